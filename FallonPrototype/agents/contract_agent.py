@@ -7,19 +7,24 @@ then generates accurate answers grounded in Fallon's actual documents.
 
 import sys
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 _AGENTS_DIR = os.path.dirname(os.path.abspath(__file__))
 _PROTO_DIR = os.path.dirname(_AGENTS_DIR)
 sys.path.insert(0, os.path.dirname(_PROTO_DIR))
 
 from FallonPrototype.shared.claude_client import call_claude
+from FallonPrototype.shared import answer_cache
+from FallonPrototype.shared.tracing import current_span, traced
 from FallonPrototype.shared.vector_store import (
     query_collection,
+    query_parent_child,
+    get_documents,
     DEAL_DATA_COLLECTION,
     MARKET_RESEARCH_COLLECTION,
     MARKET_DEFAULTS_COLLECTION,
     CONTRACTS_COLLECTION,
+    CONTRACT_CLAUSES_COLLECTION,
 )
 
 
@@ -34,6 +39,7 @@ class ContractResponse:
     sources: list[str]
     chunks_used: list[dict]
     confidence: str  # "high" | "medium" | "low"
+    cached: bool = False  # served from the semantic answer cache
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -64,7 +70,7 @@ CRITICAL RULES:
 
 2. ACCURACY: When discussing specific terms (percentages, cap rates, rents, costs), cite exact values from the context. Don't make up numbers.
 
-3. SOURCES: Reference which document your answer comes from when possible.
+3. SOURCES: Reference which document your answer comes from when possible. When a document lists a Section, cite it, e.g. "(jv_operating_agreement_002.txt, Art. 4 > 4.2 Preferred Return)".
 
 4. OPERATING REGION FOCUS: For questions about Boston, Charlotte, or Nashville, prioritize data from our market research and deal history in those markets.
 
@@ -137,6 +143,7 @@ def build_contract_query(question: str) -> str:
     return question
 
 
+@traced("retrieval.contract_context")
 def retrieve_contract_context(question: str, n_results: int = 8) -> list[dict]:
     """
     Retrieve relevant context from ALL knowledge bases:
@@ -148,8 +155,14 @@ def retrieve_contract_context(question: str, n_results: int = 8) -> list[dict]:
     query = build_contract_query(question)
     all_results = []
     
-    # 1. Query contracts collection (full contract documents)
-    contracts_results = query_collection(
+    # 1. Query contracts: match small clauses, return their parent sections
+    #    (falls back to whole chunks until contracts are re-ingested with clauses)
+    contracts_results = query_parent_child(
+        CONTRACT_CLAUSES_COLLECTION,
+        CONTRACTS_COLLECTION,
+        query,
+        n_results=4,
+    ) or query_collection(
         CONTRACTS_COLLECTION,
         query,
         n_results=4,
@@ -204,8 +217,58 @@ def retrieve_contract_context(question: str, n_results: int = 8) -> list[dict]:
     return merged[:n_results]
 
 
+def _chunk_id(metadata: dict, index: int) -> str:
+    """ID of a contract chunk, as assigned by ingest_contracts."""
+    stem = os.path.splitext(metadata.get("source", ""))[0]
+    return f"contract_{stem}_{index:03d}"
+
+
+def attach_adjacent_clauses(chunks: list[dict], before: int = 1, after: int = 1) -> list[dict]:
+    """
+    Fetch the clauses around each retrieved contract chunk.
+
+    Neighbors of every contract chunk are read with one get_documents() call
+    and stored on the chunk as "adjacent": {"before": [...], "after": [...]},
+    which format_context() renders. Neighbors that were retrieved themselves
+    are not repeated. Non-contract chunks are left unchanged.
+    """
+    def indices(meta):
+        # Merged passages (query_parent_child) span several chunks
+        if meta.get("chunk_indices"):
+            return [int(i) for i in str(meta["chunk_indices"]).split(",")]
+        return [meta["chunk_index"]]
+
+    contract_chunks = [
+        c for c in chunks
+        if c.get("metadata", {}).get("doc_type") == "contract" and "chunk_index" in c.get("metadata", {})
+    ]
+    retrieved = {_chunk_id(c["metadata"], i) for c in contract_chunks for i in indices(c["metadata"])}
+    wanted = {}
+    for chunk in contract_chunks:
+        meta = chunk["metadata"]
+        first, last = min(indices(meta)), max(indices(meta))
+        for j in list(range(first - before, first)) + list(range(last + 1, last + after + 1)):
+            if j >= 0:
+                wanted.setdefault(_chunk_id(meta, j), (chunk, j < first))
+
+    ids = [doc_id for doc_id in wanted if doc_id not in retrieved]
+    for doc in get_documents(CONTRACTS_COLLECTION, ids):
+        chunk, is_before = wanted[doc["id"]]
+        adjacent = chunk.setdefault("adjacent", {"before": [], "after": []})
+        adjacent["before" if is_before else "after"].append(doc)
+    for chunk in chunks:
+        for side in chunk.get("adjacent", {}).values():
+            side.sort(key=lambda d: d["metadata"].get("chunk_index", 0))
+    return chunks
+
+
+def _clause_block(doc: dict) -> str:
+    section = doc.get("metadata", {}).get("section_path")
+    return f"[{section}]\n{doc.get('text', '')}" if section else doc.get("text", "")
+
+
 def format_context(chunks: list[dict]) -> str:
-    """Format retrieved chunks into context for the LLM."""
+    """Format retrieved chunks into context for the LLM, citing contract sections."""
     if not chunks:
         return "No relevant documents found in the knowledge base."
     
@@ -213,12 +276,20 @@ def format_context(chunks: list[dict]) -> str:
     for i, chunk in enumerate(chunks, 1):
         source = chunk.get("metadata", {}).get("source", "Unknown")
         doc_type = chunk.get("metadata", {}).get("doc_type", "document")
+        section_path = chunk.get("metadata", {}).get("section_path")
         relevance = chunk.get("relevance", "medium")
         text = chunk.get("text", "")
         
+        adjacent = chunk.get("adjacent", {})
+        before = "".join(f"{_clause_block(d)}\n\n" for d in adjacent.get("before", []))
+        after = "".join(f"\n\n{_clause_block(d)}" for d in adjacent.get("after", []))
+        if before or after:
+            text = f"{before}[{section_path}]\n{text}{after}" if section_path else f"{before}{text}{after}"
+        
+        section_line = f"\nSection: {section_path}" if section_path else ""
         sections.append(f"""
 --- Document {i} ---
-Source: {source}
+Source: {source}{section_line}
 Type: {doc_type}
 Relevance: {relevance}
 
@@ -232,18 +303,45 @@ Relevance: {relevance}
 # Main Query Function
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def answer_contract_question(question: str) -> ContractResponse:
+@traced("contract.answer")
+def answer_contract_question(question: str, adjacent_clauses: int = 0) -> ContractResponse:
     """
     Answer a question about contracts, JV structures, or deal terms.
     
+    Equivalent questions answered from the same retrieved chunks are served
+    from the semantic answer cache (shared.answer_cache) without an LLM call.
+    
     Args:
         question: User's question about contracts or deal terms.
+        adjacent_clauses: Also include this many clauses before and after each
+                          retrieved contract chunk (e.g. for cross-references).
     
     Returns:
         ContractResponse with answer, sources, and confidence level.
     """
     # Retrieve relevant context
     chunks = retrieve_contract_context(question)
+    if adjacent_clauses:
+        attach_adjacent_clauses(chunks, adjacent_clauses, adjacent_clauses)
+    
+    # Reuse the answer to an equivalent question asked over the same chunks
+    chunk_ids = [c.get("id") or c.get("text", "")[:100] for c in chunks]
+    chunk_ids.append(f"adjacent:{adjacent_clauses}")
+    response, hit = answer_cache.cached_call(
+        question,
+        chunk_ids,
+        lambda: _generate_answer(question, chunks),
+        cacheable=lambda r: not r.answer.startswith("Unable to generate response"),
+    )
+    current_span().set(cached=hit, chunks=len(chunks))
+    if hit:
+        response = replace(response, cached=True)
+    return response
+
+
+@traced("contract.generate")
+def _generate_answer(question: str, chunks: list[dict]) -> ContractResponse:
+    """Run the LLM over retrieved chunks and grade confidence."""
     context = format_context(chunks)
     
     # Build the prompt
@@ -255,7 +353,7 @@ RELEVANT DOCUMENTS:
 Please answer the question based on the documents above. If the documents don't contain relevant information, indicate that and provide general guidance."""
     
     # Call the LLM
-    response = call_claude(CONTRACT_SYSTEM_PROMPT, user_message, max_tokens=1500)
+    response = call_claude(CONTRACT_SYSTEM_PROMPT, user_message, max_tokens=1500, site="contract_qa")
     
     if response.startswith("ERROR:"):
         return ContractResponse(
@@ -16,6 +16,7 @@ _PROTO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.dirname(_PROTO_DIR))
 
 from FallonPrototype.shared.claude_client import call_claude
+from FallonPrototype.shared.tracing import span, traced
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -108,6 +109,7 @@ Examples:
 Return ONLY the JSON object."""
 
 
+@traced("financial.extract")
 def extract_parameters(query: str) -> ProjectParameters:
     """
     Extract project parameters from a plain-English query using Claude.
@@ -119,7 +121,7 @@ def extract_parameters(query: str) -> ProjectParameters:
         ProjectParameters dataclass with extracted values. Fields not mentioned
         in the query will be None.
     """
-    response = call_claude(EXTRACTION_SYSTEM_PROMPT, query, max_tokens=512)
+    response = call_claude(EXTRACTION_SYSTEM_PROMPT, query, max_tokens=512, site="extraction")
     
     if response.startswith("ERROR:"):
         return ProjectParameters(notes=f"Extraction failed: {response}")
@@ -469,6 +471,7 @@ def build_deal_query(params: ProjectParameters) -> str:
     return " ".join(parts)
 
 
+@traced("retrieval.deal_comps")
 def retrieve_deal_comps(params: ProjectParameters) -> list[dict]:
     """
     Retrieve comparable deal memos from the vector store.
@@ -528,6 +531,7 @@ def retrieve_deal_comps(params: ProjectParameters) -> list[dict]:
 # Phase 3.2 — Market Defaults Retrieval
 # ═══════════════════════════════════════════════════════════════════════════════
 
+@traced("retrieval.market_defaults")
 def get_defaults_for_params(params: ProjectParameters) -> dict | None:
     """
     Direct lookup of market defaults for the given parameters.
@@ -570,6 +574,7 @@ def get_defaults_for_params(params: ProjectParameters) -> dict | None:
     return combined
 
 
+@traced("retrieval.defaults_context")
 def retrieve_defaults_context(params: ProjectParameters) -> list[dict]:
     """
     Retrieve market defaults context from vector store for Claude reasoning.
@@ -705,6 +710,7 @@ def _format_defaults_items(defaults: dict) -> list[str]:
     return lines
 
 
+@traced("financial.format_context")
 def format_financial_context(
     deal_comps: list[dict],
     defaults_dict: dict | None,
@@ -830,67 +836,9 @@ def assemble_context(params: ProjectParameters) -> tuple[str, str | None]:
 # Phase 4.1 — Pro Forma Output Schema
 # ═══════════════════════════════════════════════════════════════════════════════
 
-PRO_FORMA_SCHEMA = {
-    "project_summary": {
-        "deal_name": {"type": "str"},
-        "market": {"type": "str"},
-        "program_type": {"type": "str"},
-        "total_gfa_sf": {"type": "value_field"},
-        "unit_count": {"type": "value_field", "nullable": True},
-        "rentable_sf": {"type": "value_field", "nullable": True},
-        "construction_start": {"type": "value_field"},
-        "construction_duration_months": {"type": "value_field"},
-        "total_keys": {"type": "value_field", "nullable": True},
-        "notes": {"type": "str"},
-    },
-    "revenue_assumptions": {
-        "rent_psf_monthly": {"type": "value_field", "nullable": True},
-        "rent_psf_annual_nnn": {"type": "value_field", "nullable": True},
-        "adr": {"type": "value_field", "nullable": True},
-        "stabilized_occupancy_pct": {"type": "value_field"},
-        "lease_up_months": {"type": "value_field"},
-        "annual_rent_growth_pct": {"type": "value_field"},
-        "other_income_per_unit_monthly": {"type": "value_field", "nullable": True},
-    },
-    "cost_assumptions": {
-        "land_cost_total": {"type": "value_field"},
-        "hard_cost_psf": {"type": "value_field"},
-        "hard_cost_total": {"type": "value_field"},
-        "soft_cost_pct_of_hard": {"type": "value_field"},
-        "soft_cost_total": {"type": "value_field"},
-        "developer_fee_pct": {"type": "value_field"},
-        "developer_fee_total": {"type": "value_field"},
-        "contingency_pct": {"type": "value_field"},
-        "contingency_total": {"type": "value_field"},
-        "total_project_cost": {"type": "value_field"},
-    },
-    "financing_assumptions": {
-        "construction_loan_ltc_pct": {"type": "value_field"},
-        "construction_loan_amount": {"type": "value_field"},
-        "construction_loan_rate_pct": {"type": "value_field"},
-        "carry_cost_total": {"type": "value_field"},
-        "equity_required": {"type": "value_field"},
-        "lp_equity_pct": {"type": "value_field"},
-        "lp_equity_amount": {"type": "value_field"},
-        "gp_equity_pct": {"type": "value_field"},
-        "gp_equity_amount": {"type": "value_field"},
-    },
-    "return_metrics": {
-        "exit_cap_rate_pct": {"type": "value_field"},
-        "exit_year": {"type": "value_field"},
-        "stabilized_noi": {"type": "value_field"},
-        "gross_exit_value": {"type": "value_field"},
-        "net_exit_value": {"type": "value_field"},
-        "total_profit": {"type": "value_field"},
-        "profit_on_cost_pct": {"type": "value_field"},
-        "development_spread_bps": {"type": "value_field"},
-        "project_irr_levered_pct": {"type": "value_field"},
-        "equity_multiple_lp": {"type": "value_field"},
-        "lp_irr_pct": {"type": "value_field"},
-    },
-}
-
-VALID_LABELS = {"confirmed", "estimated", "calculated", "missing"}
+# Schema lives in shared/ so the calculator and exporters can use it without
+# pulling in the LLM client; re-exported here for existing callers.
+from FallonPrototype.shared.pro_forma_schema import PRO_FORMA_SCHEMA, VALID_LABELS
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -983,6 +931,7 @@ Generate the complete pro forma JSON for this project."""
 # Phase 4.3 — JSON Parsing & Validation
 # ═══════════════════════════════════════════════════════════════════════════════
 
+@traced("financial.parse_json")
 def extract_json_from_response(response: str) -> dict | None:
     """
     Extract and parse JSON from Claude's response.
@@ -1043,6 +992,7 @@ def _log_parse_failure(response: str, error: str) -> None:
         pass
 
 
+@traced("financial.validate")
 def validate_pro_forma(data: dict) -> tuple[bool, list[str]]:
     """
     Validate a parsed pro forma against the schema.
@@ -1124,6 +1074,7 @@ class AgentResponse:
     warnings: list[str] = field(default_factory=list)
 
 
+@traced("financial.generate")
 def generate_pro_forma(params: ProjectParameters, context: str) -> dict | None:
     """
     Generate a pro forma using Claude.
@@ -1138,7 +1089,7 @@ def generate_pro_forma(params: ProjectParameters, context: str) -> dict | None:
     message = build_generation_message(params, context)
     
     # First attempt
-    raw_response = call_claude(GENERATION_SYSTEM_PROMPT, message, max_tokens=4096)
+    raw_response = call_claude(GENERATION_SYSTEM_PROMPT, message, max_tokens=4096, site="generation")
     
     if raw_response.startswith("ERROR:"):
         return None
@@ -1150,7 +1101,7 @@ def generate_pro_forma(params: ProjectParameters, context: str) -> dict | None:
     
     # Retry once with simplified prompt
     retry_message = message + "\n\nIMPORTANT: Your previous response could not be parsed as JSON. Return ONLY the JSON object with no other text."
-    raw_response = call_claude(GENERATION_SYSTEM_PROMPT, retry_message, max_tokens=4096)
+    raw_response = call_claude(GENERATION_SYSTEM_PROMPT, retry_message, max_tokens=4096, site="generation_retry")
     
     if raw_response.startswith("ERROR:"):
         return None
@@ -1231,6 +1182,7 @@ def _build_answer_summary(pro_forma: dict, calc_results: dict, warnings: list[st
     return answer
 
 
+@traced("financial.run")
 def run(query: str, user_context: dict = None) -> AgentResponse:
     """
     Main entry point for the financial agent.
@@ -1301,8 +1253,9 @@ def run(query: str, user_context: dict = None) -> AgentResponse:
     is_valid, validation_errors = validate_pro_forma(pro_forma)
     
     # 7. Cross-check returns
-    calc_results = compute_returns(pro_forma)
-    warnings = check_return_discrepancy(pro_forma, calc_results)
+    with span("financial.compute_returns"):
+        calc_results = compute_returns(pro_forma)
+        warnings = check_return_discrepancy(pro_forma, calc_results)
     
     if fallback_warning:
         warnings.insert(0, fallback_warning)
@@ -10,10 +10,13 @@ import os
 import copy
 import re
 import io
+import hashlib
+import time
+from types import SimpleNamespace
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from FallonPrototype.shared.claude_client import call_claude
+from FallonPrototype.shared.claude_client import call_claude, get_usage_by_site
 from FallonPrototype.agents.financial_agent import (
     run, extract_parameters, normalize_parameters, merge_clarification,
     check_missing_parameters, format_clarification_message, retrieve_deal_comps,
@@ -21,9 +24,20 @@ from FallonPrototype.agents.financial_agent import (
     generate_pro_forma,
 )
 from FallonPrototype.agents.contract_agent import answer_contract_question
-from FallonPrototype.shared.vector_store import get_collection_counts
-from FallonPrototype.shared.return_calculator import compute_returns, check_return_discrepancy, compute_sensitivity_table, _val
-from FallonPrototype.shared.excel_export import export_pro_forma, get_suggested_filename
+from FallonPrototype.shared.vector_store import get_collection_counts, embed_texts
+from FallonPrototype.shared.return_calculator import compute_returns, check_return_discrepancy, compute_sensitivity_table, compute_driver_sensitivity, _val
+from FallonPrototype.shared.goal_seek import solve_goals, parse_goal_question
+from FallonPrototype.shared.excel_export import export_pro_forma_cached, get_suggested_filename, pro_forma_hash
+from FallonPrototype.shared.run_store import append_runs
+from FallonPrototype.shared.ocr import ocr_pdf
+from FallonPrototype.shared.text_stream import iter_pdf_pages, join_pages
+from FallonPrototype.shared.tracing import span, recent_traces
+from FallonPrototype.shared.jobs import JobQueue
+from FallonPrototype.shared.chat_history import (
+    message_text, format_history, compact_json, pending_summary_range, summarize,
+)
+from FallonPrototype.shared.web_search import search_async, collect, get_search_stats, SEARCH_TIMEOUT_S
+from FallonPrototype.shared.intent_router import classify as classify_intent, record_fallback, get_routing_stats
 from FallonPrototype.shared.memory import (
     record_interaction, record_adjustment, get_user_context,
     format_context_for_prompt
@@ -184,6 +198,10 @@ if "uploaded_documents" not in st.session_state:
     st.session_state.uploaded_documents = []  # list of {"name": str, "content": str}
 if "processed_file_keys" not in st.session_state:
     st.session_state.processed_file_keys = set()  # dedup set of "name_size" keys
+if "conversation_summary" not in st.session_state:
+    st.session_state.conversation_summary = {"text": "", "upto": 0}  # rolling summary of older messages
+if "pending_jobs" not in st.session_state:
+    st.session_state.pending_jobs = []  # list of {"id", "kind", ...} for background jobs still running
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONVERSATIONAL AI - Natural dialogue with Claude
@@ -256,43 +274,35 @@ If live web search results appear below under "LIVE MARKET DATA:", use them to p
 Be conversational and helpful. Don't be robotic. Ask good questions to understand what they're really trying to accomplish."""
 
 
-def parse_uploaded_file(uploaded_file) -> str:
-    """Parse an uploaded file and return its text content."""
+def parse_uploaded_file(uploaded_file, progress=None, max_pages=None) -> str:
+    """Parse an uploaded file and return its text content.
+
+    Scanned PDFs are OCR'd page by page (see shared.ocr); progress(done, total)
+    reports pages and max_pages overrides OCR_MAX_PAGES.
+    """
     name = uploaded_file.name.lower()
-    raw = uploaded_file.getvalue()
 
     # --- PDF ---
     if name.endswith(".pdf"):
         try:
-            from pypdf import PdfReader
-            reader = PdfReader(io.BytesIO(raw))
-            pages = [page.extract_text() or "" for page in reader.pages]
-            text = "\n".join(pages).strip()
+            # Pages are extracted one at a time straight from the upload buffer
+            uploaded_file.seek(0)
+            text = join_pages(iter_pdf_pages(uploaded_file)).strip()
             if text:
                 return text
         except Exception as pdf_err:
             # Log but don't give up — fall through to OCR attempt
             pass
 
-        # pypdf returned nothing or failed — try OCR on rendered pages
-        try:
-            from PIL import Image
-            import pytesseract
-            # Convert PDF pages to images via pdf2image if available
-            try:
-                from pdf2image import convert_from_bytes
-                images = convert_from_bytes(raw, first_page=1, last_page=5)
-                ocr_parts = [pytesseract.image_to_string(img) for img in images]
-                text = "\n".join(ocr_parts).strip()
-                if text:
-                    return text
-            except ImportError:
-                pass
-        except ImportError:
-            pass
+        # pypdf returned nothing or failed — OCR the rendered pages in parallel
+        text = ocr_pdf(uploaded_file.getvalue(), max_pages=max_pages, progress=progress)
+        if text:
+            return text
 
         return "[PDF text extraction returned empty. This may be a scanned document — try exporting pages as images and uploading those.]"
 
+    raw = uploaded_file.getvalue()
+
     # --- Images (OCR) ---
     if name.endswith((".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".webp")):
         try:
@@ -341,41 +351,25 @@ _SEARCH_KEYWORDS = re.compile(
 )
 
 
-def web_search(query: str, max_results: int = 3) -> str:
-    """Search the web via DuckDuckGo and return formatted results."""
-    try:
-        from duckduckgo_search import DDGS
-        results = DDGS().text(query, max_results=max_results)
-        if not results:
-            return ""
-        parts = []
-        for r in results:
-            parts.append(f"Title: {r.get('title', '')}")
-            parts.append(f"  {r.get('body', '')}")
-            parts.append(f"  URL: {r.get('href', '')}")
-            parts.append("---")
-        return "\n".join(parts)[:3000]
-    except Exception:
-        return ""
-
-
-def get_ai_response(user_message: str) -> dict:
-    """Get conversational response from Claude."""
-    
-    # Build conversation history
-    history = ""
-    for msg in st.session_state.messages[-10:]:  # Last 10 messages
-        role = "User" if msg["role"] == "user" else "FAiLLON"
-        content = msg.get("content", "")
-        if isinstance(content, str):
-            history += f"{role}: {content}\n"
+def get_ai_response(user_message: str, state) -> dict:
+    """Get conversational response from Claude for the conversation in `state`."""
+    
+    # Live web search for market-related queries runs while the prompt is assembled
+    search = None
+    search_deadline = time.monotonic() + SEARCH_TIMEOUT_S
+    if _SEARCH_KEYWORDS.search(user_message):
+        market = state.project_data.get("market", "")
+        search = search_async(f"{user_message} real estate 2025 2026", market=market)
+    
+    # Build conversation history (summary of older turns + recent turns verbatim)
+    history = format_history(state.messages, state.summary)
     
     # Get user context
     user_ctx = get_user_context()
     ctx_str = format_context_for_prompt() if user_ctx.get("has_history") else "No prior history"
     
     # Format project data
-    proj_data = json.dumps(st.session_state.project_data, indent=2) if st.session_state.project_data else "No project data yet"
+    proj_data = compact_json(state.project_data) if state.project_data else "No project data yet"
     
     system_prompt = CONVERSATION_PROMPT.format(
         project_data=proj_data,
@@ -383,12 +377,19 @@ def get_ai_response(user_message: str) -> dict:
         history=history,
         message=user_message
     )
+    prompt_parts = {
+        "history": len(history),
+        "user_context": len(ctx_str),
+        "project_data": len(proj_data),
+        "documents": 0,
+        "web_results": 0,
+    }
 
     # Inject uploaded document context
-    if st.session_state.uploaded_documents:
+    if state.uploaded_documents:
         doc_context = "\n\nUPLOADED DOCUMENTS:\n"
         budget = 10000
-        for doc in st.session_state.uploaded_documents:
+        for doc in state.uploaded_documents:
             header = f"\n--- {doc['name']} ---\n"
             content = doc["content"][:budget]
             doc_context += header + content + "\n"
@@ -396,17 +397,18 @@ def get_ai_response(user_message: str) -> dict:
             if budget <= 0:
                 break
         system_prompt += doc_context
+        prompt_parts["documents"] = len(doc_context)
 
-    # Live web search for market-related queries
-    if _SEARCH_KEYWORDS.search(user_message):
-        market = st.session_state.project_data.get("market", "")
-        search_query = f"{user_message} real estate {market} 2025 2026".strip()
-        search_results = web_search(search_query)
+    # Use the web results if they arrive within the search budget
+    if search is not None:
+        with span("chat.web_search_wait"):
+            search_results = collect(search, timeout=search_deadline - time.monotonic())
         if search_results:
             system_prompt += f"\n\nLIVE MARKET DATA (from web search):\n{search_results}"
+            prompt_parts["web_results"] = len(search_results)
 
     try:
-        response = call_claude(system_prompt, user_message, max_tokens=2048)
+        response = call_claude(system_prompt, user_message, max_tokens=2048, site="chat", prompt_parts=prompt_parts)
         
         # Parse JSON response
         try:
@@ -435,29 +437,50 @@ def get_ai_response(user_message: str) -> dict:
         }
 
 
-def process_message(user_message: str) -> dict:
-    """Process user message and return appropriate response."""
+def process_message(user_message: str, state, report=None) -> dict:
+    """Process user message and return appropriate response.
+
+    Runs as a background job: `state` is a snapshot of the session (see
+    snapshot_state) and is updated in place; report(message=, partial=)
+    publishes progress.
+    """
+    report = report or (lambda **kwargs: None)
     
-    # Check for explicit adjustment commands on existing model
-    if st.session_state.model:
+    # Check for goal-seek questions and explicit adjustment commands on existing model
+    if state.model:
         m = user_message.lower()
+        if parse_goal_question(m):
+            return handle_goal_seek(user_message, state)
         if any(k in m for k in ["change", "adjust", "set", "update", "modify", "make it", "what if"]):
-            return handle_adjustment(user_message)
+            return handle_adjustment(user_message, state)
+    
+    # Clear-cut turns go straight to their handler without the conversation model
+    decision = classify_intent(user_message, has_model=bool(state.model), project_data=state.project_data)
+    if decision is not None:
+        routed = route_intent(decision, user_message, state, report)
+        if routed is not None:
+            return routed
+        record_fallback()
     
     # Get AI response
-    ai_result = get_ai_response(user_message)
+    ai_result = get_ai_response(user_message, state)
+    
+    # The model's label trains the intent router, whichever branch handles the turn
+    record_interaction(user_message, ai_result.get("intent", "chat"), "text", success=True)
     
     # Update project data with any extracted info
     if ai_result.get("extracted_data"):
-        st.session_state.project_data.update(ai_result["extracted_data"])
+        state.project_data.update(ai_result["extracted_data"])
     
     # If ready to generate and user seems to want it
     if ai_result.get("ready_to_generate") and ai_result.get("intent") == "generate_model":
-        return generate_model_from_data()
+        report(partial=ai_result.get("response"))
+        return generate_model_from_data(state, report)
     
     # If answering a question about contracts/market
     if ai_result.get("intent") == "answer_question":
         # Try to get relevant context
+        report(message="Searching contracts...", partial=ai_result.get("response"))
         try:
             r = answer_contract_question(user_message)
             if r.answer and r.confidence != "low":
@@ -472,18 +495,47 @@ def process_message(user_message: str) -> dict:
     
     # Regular conversational response
     response_text = ai_result.get("response", "I'm not sure how to help with that.")
-
-    record_interaction(user_message, ai_result.get("intent", "chat"), "text", success=True)
     
     return {"t": "txt", "txt": response_text}
 
 
-def handle_adjustment(user_message: str) -> dict:
+def route_intent(decision, user_message: str, state, report) -> dict | None:
+    """Act on a locally classified turn; None hands it back to the conversation model."""
+    with span("chat.routed", intent=decision.intent, source=decision.source, confidence=round(decision.confidence, 3)):
+        if decision.intent == "adjust_model":
+            result = handle_adjustment(user_message, state)
+            if result["t"] != "model":
+                return None
+        elif decision.intent == "generate_model":
+            result = generate_model_from_data(state, report)
+        else:
+            report(message="Searching contracts...")
+            try:
+                r = answer_contract_question(user_message)
+            except Exception:
+                return None
+            if not r.answer or r.confidence == "low":
+                return None
+            result = {"t": "answer", "txt": r.answer, "src": r.sources, "conf": r.confidence}
+    
+    record_interaction(user_message, decision.intent, "text", parameters={"routed_by": decision.source}, success=True)
+    return result
+
+
+def _record_run(model: dict):
+    """Append a generated/adjusted model to the Parquet run history (best effort)."""
+    try:
+        append_runs([model])
+    except Exception as e:
+        print(f"  [warning] Could not record run: {e}")
+
+
+def handle_adjustment(user_message: str, state) -> dict:
     """Handle adjustments to existing model."""
-    if not st.session_state.model:
+    if not state.model:
         return {"t": "txt", "txt": "Let's create a model first. Tell me about your project."}
     
-    pf = copy.deepcopy(st.session_state.model["pro_forma"])
+    pf = copy.deepcopy(state.model["pro_forma"])
     changes = []
     m = user_message.lower()
     
@@ -519,23 +571,44 @@ def handle_adjustment(user_message: str) -> dict:
     
     if changes:
         calc = compute_returns(pf)
-        st.session_state.model = {
+        state.model = {
             "pro_forma": pf,
             "calc_results": calc,
             "warnings": check_return_discrepancy(pf, calc)
         }
+        _record_run(state.model)
         return {
             "t": "model",
-            "data": st.session_state.model,
+            "data": state.model,
             "txt": f"Got it! I've updated: {', '.join(changes)}. Here's the revised model:"
         }
     
     return {"t": "txt", "txt": "I couldn't identify what you'd like to change. Try something like 'change cap rate to 5.5' or 'set rent to $2.75'."}
 
 
-def generate_model_from_data() -> dict:
+def handle_goal_seek(user_message: str, state) -> dict:
+    """Answer 'what rent do I need to hit a 15% IRR?' by inverting the returns model."""
+    pf = state.model["pro_forma"]
+    goal = parse_goal_question(user_message)
+    target_name, target_value, target_desc, inputs = goal["target"], goal["value"], goal["description"], goal["inputs"]
+    
+    results = solve_goals(pf, [{"input": i, "target": target_name, "value": target_value} for i in inputs])
+    
+    lines = []
+    for r in results:
+        label = (r["field"] or r["input"]).split(".")[-1].replace("_", " ")
+        if r["solved"]:
+            current = f" (currently {r['base_value']:,.2f})" if r["base_value"] is not None else ""
+            lines.append(f"- **{label}**: {r['value']:,.2f}{current}")
+        else:
+            lines.append(f"- **{label}**: {r['message']}")
+    
+    return {"t": "txt", "txt": f"To hit a {target_desc}, holding everything else constant:\n\n" + "\n".join(lines)}
+
+
+def generate_model_from_data(state, report=None) -> dict:
     """Generate model from accumulated project data."""
-    data = st.session_state.project_data
+    data = state.project_data
     
     # Build query from accumulated data
     parts = []
@@ -558,12 +631,15 @@ def generate_model_from_data() -> dict:
 
     query = " ".join(parts) if parts else "multifamily development"
     
+    if report:
+        report(message="Generating pro forma...")
     try:
         r = run(query, user_context=get_user_context())
         
         if r.export_data and "pro_forma" in r.export_data:
-            st.session_state.model = r.export_data
+            state.model = r.export_data
             record_interaction(query, "generate", "model", pro_forma=r.export_data.get("pro_forma"), success=True)
+            _record_run(r.export_data)
             return {
                 "t": "model",
                 "data": r.export_data,
@@ -579,11 +655,208 @@ def generate_model_from_data() -> dict:
         return {"t": "txt", "txt": f"I had trouble generating the model. Let me know more details about your project."}
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# BACKGROUND JOBS - Slow work runs off the script thread and survives reruns
+# ═══════════════════════════════════════════════════════════════════════════════
+
+JOB_POLL_S = 1.0
+
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """One job queue per server process, shared by every session and rerun."""
+    return JobQueue()
+
+
+def snapshot_state() -> SimpleNamespace:
+    """Copy of the session fields a chat job reads and updates (jobs can't touch st.session_state)."""
+    summary = st.session_state.conversation_summary
+    # Only the messages the summary doesn't cover yet; "upto" is rebased onto them
+    unsummarized = st.session_state.messages[summary["upto"]:]
+    return SimpleNamespace(
+        messages=[{"role": m["role"], "content": message_text(m)} for m in unsummarized],
+        summary={"text": summary["text"], "upto": 0},
+        project_data=copy.deepcopy(st.session_state.project_data),
+        model=copy.deepcopy(st.session_state.model),
+        uploaded_documents=list(st.session_state.uploaded_documents),
+    )
+
+
+def _chat_job(job, prompt: str, state) -> dict:
+    job.report(message="Thinking...")
+    with span("app.request", chars=len(prompt)):
+        resp = process_message(prompt, state, job.report)
+    return {"resp": resp, "project_data": state.project_data, "model": state.model}
+
+
+def _parse_job(job, name: str, data: bytes) -> str:
+    upload = io.BytesIO(data)
+    upload.name = name
+    job.report(message=f"Reading {name}...")
+    return parse_document(
+        hashlib.sha256(data).hexdigest(),
+        os.path.splitext(name)[1].lower(),
+        upload,
+        lambda done, total: job.report(done, total, f"OCR: page {done} of {total}"),
+    )
+
+
+def _summary_job(job, previous: str, messages: list) -> str | None:
+    job.report(message="Summarizing earlier conversation...")
+    return summarize(previous, messages)
+
+
+def maybe_summarize_history():
+    """Fold messages that left the verbatim window into the rolling summary, in the background."""
+    if any(p["kind"] == "summary" for p in st.session_state.pending_jobs):
+        return
+    summary = st.session_state.conversation_summary
+    due = pending_summary_range(st.session_state.messages, summary)
+    if due:
+        start, end = due
+        older = [{"role": m["role"], "content": message_text(m)} for m in st.session_state.messages[start:end]]
+        start_job("summary", _summary_job, summary["text"], older, upto=end)
+
+
+def start_job(kind: str, fn, *args, key=None, reuse_finished=True, **meta):
+    """Submit a job (or join an identical one) and track it for this session."""
+    job = get_job_queue().submit(kind, fn, *args, key=key, reuse_finished=reuse_finished)
+    st.session_state.pending_jobs.append({"id": job.id, "kind": kind, **meta})
+    return job
+
+
+def collect_finished_jobs():
+    """Apply the results of this session's finished jobs. Runs on every rerun."""
+    queue = get_job_queue()
+    still_running = []
+    for pending in st.session_state.pending_jobs:
+        job = queue.get(pending["id"])
+        if job is None:
+            continue  # dropped from the registry (e.g. server restarted)
+        if not job.done:
+            still_running.append(pending)
+            continue
+        if pending["kind"] == "chat":
+            if job.status == "error":
+                resp = {"t": "txt", "txt": f"Something went wrong while working on that ({job.error[:80]}). Please try again."}
+            else:
+                result = copy.deepcopy(job.result)  # identical requests from other sessions share the job
+                resp = result["resp"]
+                st.session_state.project_data = result["project_data"]
+                st.session_state.model = result["model"]
+            st.session_state.messages.append({"role": "assistant", "resp": resp})
+        elif pending["kind"] == "parse":
+            content = job.result if job.status == "done" else f"[Error reading {pending['name']}: {job.error[:150]}]"
+            st.session_state.uploaded_documents.append({"name": pending["name"], "content": content})
+        elif pending["kind"] == "summary" and job.result:
+            st.session_state.conversation_summary = {"text": job.result, "upto": pending["upto"]}
+    st.session_state.pending_jobs = still_running
+    maybe_summarize_history()
+
+
+@st.fragment(run_every=JOB_POLL_S)
+def show_pending_jobs():
+    """Progress and partial results of running jobs; reruns the app when one finishes."""
+    queue = get_job_queue()
+    for pending in st.session_state.pending_jobs:
+        job = queue.get(pending["id"])
+        if job is None or job.done:
+            st.rerun()
+        if pending["kind"] == "summary":
+            continue
+        with st.chat_message("assistant"):
+            if job.partial:
+                st.markdown(job.partial)
+            if job.progress:
+                done, total = job.progress
+                st.progress(done / total, text=job.message)
+            else:
+                st.caption(f"{job.message or 'Queued...'} {job.elapsed:.0f}s")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CACHING - Keep reruns cheap: nothing below repeats for the same inputs
+# ═══════════════════════════════════════════════════════════════════════════════
+
+SIDEBAR_STATS_TTL_S = 30
+PARSED_DOCUMENTS_MAX = 64
+MODEL_ANALYSES_MAX = 32
+
+
+@st.cache_resource(show_spinner=False)
+def warm_up_resources():
+    """Load the embedding model and open the Chroma collections once per process.
+
+    The Chroma and LLM clients are module-level singletons in shared/, so
+    reruns never rebuild them; this only moves the first (slow) embedding
+    model load off the first user request, onto the job queue.
+    """
+    def warm(job):
+        embed_texts(["warm up"])
+        return get_collection_counts()
+
+    return get_job_queue().submit("warmup", warm, key="warmup")
+
+
+@st.cache_data(ttl=SIDEBAR_STATS_TTL_S, show_spinner=False)
+def sidebar_counts() -> dict:
+    """Collection sizes for the sidebar, refreshed at most every SIDEBAR_STATS_TTL_S."""
+    return get_collection_counts()
+
+
+@st.cache_data(max_entries=PARSED_DOCUMENTS_MAX, show_spinner=False)
+def parse_document(digest: str, extension: str, _upload, _progress=None) -> str:
+    """parse_uploaded_file() keyed by content hash, so the same bytes are never parsed or OCR'd twice."""
+    return parse_uploaded_file(_upload, progress=_progress)
+
+
+@st.cache_data(max_entries=MODEL_ANALYSES_MAX, show_spinner=False)
+def model_analysis(pf_hash: str, _pf: dict) -> tuple[dict, dict]:
+    """Sensitivity grid and driver sensitivity for a pro forma, computed once per pro forma hash."""
+    return compute_sensitivity_table(_pf, target_irr=14.0), compute_driver_sensitivity(_pf)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # RENDER FUNCTIONS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def show_model(data, note=None):
+def driver_chart_specs(drv, top, base):
+    """Vega-Lite specs for the driver tornado and spider charts.
+
+    Built directly instead of via st.bar_chart / st.line_chart, which
+    generate and schema-validate an Altair chart on every rerun.
+    """
+    flex = drv["flex_pct"]
+    labels = [d["label"] for d in top]
+    tornado = {
+        "data": {"values": [
+            {"driver": d["label"], "flex": move, "change": (d[key] or 0) - base}
+            for d in top for move, key in ((f"-{flex:g}%", "irr_down"), (f"+{flex:g}%", "irr_up"))
+        ]},
+        "mark": "bar",
+        "encoding": {
+            "y": {"field": "driver", "type": "nominal", "sort": labels, "title": None},
+            "yOffset": {"field": "flex"},
+            "x": {"field": "change", "type": "quantitative", "title": "LP IRR change (pts)"},
+            "color": {"field": "flex", "type": "nominal", "title": None},
+        },
+    }
+    spider = {
+        "data": {"values": [
+            {"Flex %": step, "driver": d["label"], "LP IRR": irr}
+            for d in top[:5] for step, irr in zip(drv["steps"], d["irr_curve"]) if irr is not None
+        ]},
+        "mark": "line",
+        "encoding": {
+            "x": {"field": "Flex %", "type": "quantitative"},
+            "y": {"field": "LP IRR", "type": "quantitative", "scale": {"zero": False}},
+            "color": {"field": "driver", "type": "nominal", "sort": labels[:5], "title": None},
+        },
+    }
+    return tornado, spider
+
+
+def show_model(data, note=None, key="model"):
     pf = data.get("pro_forma", {})
     ret = pf.get("return_metrics", {})
     cost = pf.get("cost_assumptions", {})
@@ -615,7 +888,8 @@ def show_model(data, note=None):
     with st.expander("Details"):
         tabs = st.tabs(["Summary", "Revenue", "Cost", "Capital", "Returns"])
         def df(s):
-            rows = [{"Field": k.replace("_"," ").title(), "Value": (v.get("value") if isinstance(v,dict) else v)} for k,v in s.items() if (v.get("value") if isinstance(v,dict) else v) is not None]
+            # Values are mixed numbers and text; as strings the table serializes to Arrow directly
+            rows = [{"Field": k.replace("_"," ").title(), "Value": str(v.get("value") if isinstance(v,dict) else v)} for k,v in s.items() if (v.get("value") if isinstance(v,dict) else v) is not None]
             return pd.DataFrame(rows) if rows else pd.DataFrame(columns=["Field","Value"])
         with tabs[0]: st.dataframe(df(pf.get("project_summary",{})), use_container_width=True, hide_index=True)
         with tabs[1]: st.dataframe(df(pf.get("revenue_assumptions",{})), use_container_width=True, hide_index=True)
@@ -623,20 +897,31 @@ def show_model(data, note=None):
         with tabs[3]: st.dataframe(df(pf.get("financing_assumptions",{})), use_container_width=True, hide_index=True)
         with tabs[4]: st.dataframe(df(pf.get("return_metrics",{})), use_container_width=True, hide_index=True)
     
+    s, drv = model_analysis(pro_forma_hash(pf), pf)
     with st.expander("Sensitivity"):
-        s = compute_sensitivity_table(pf, target_irr=14.0)
         sdf = pd.DataFrame({"Cap": s["rows"]})
         for i, c in enumerate(s["cols"]):
             sdf[c] = [f"{s['values'][j][i]:.1f}%" if s['values'][j][i] else "—" for j in range(3)]
         st.dataframe(sdf, use_container_width=True, hide_index=True)
     
+    with st.expander("Drivers"):
+        top = [d for d in drv["drivers"] if d["irr_swing"] > 0][:10]
+        if top:
+            base = drv["base_irr"] or 0
+            st.caption(f"LP IRR change when each input moves ±{drv['flex_pct']:g}% (base {base:.1f}%)")
+            tornado, spider = driver_chart_specs(drv, top, base)
+            st.vega_lite_chart(tornado, use_container_width=True)
+            st.vega_lite_chart(spider, use_container_width=True)
+        else:
+            st.caption("No numeric drivers to flex.")
+    
     c1, c2 = st.columns(2)
-    sens = compute_sensitivity_table(pf, target_irr=14.0)
-    exp = {**data, "sensitivity": sens}
+    exp = {**data, "sensitivity": s, "drivers": drv}
     with c1:
-        st.download_button("Download Excel", export_pro_forma(exp, name), get_suggested_filename(exp), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", use_container_width=True)
+        # Workbook is only built when the button is clicked, then cached by pro forma hash
+        st.download_button("Download Excel", lambda: export_pro_forma_cached(exp, name), get_suggested_filename(exp), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", use_container_width=True, key=f"{key}_xlsx")
     with c2:
-        st.download_button("Download JSON", json.dumps(pf, indent=2, default=str), f"{name}.json", "application/json", use_container_width=True)
+        st.download_button("Download JSON", lambda: json.dumps(pf, indent=2, default=str), f"{name}.json", "application/json", use_container_width=True, key=f"{key}_json")
     
     st.markdown("---")
     st.caption("💡 You can say things like 'change the cap rate to 5.5' or 'what if we had 200 units instead?' to adjust the model.")
@@ -649,10 +934,64 @@ def show_answer(txt, src, conf):
         st.markdown(f'<div style="margin-top:0.5rem;">{tags}</div>', unsafe_allow_html=True)
 
 
+TRACE_PANEL_TRACES = 5
+TRACE_PANEL_SPANS = 25
+
+
+def show_waterfall(trace):
+    """One request's spans as indented rows with bars on a shared time axis."""
+    total = max(trace["duration_ms"], 0.001)
+    rows = []
+    for sp in trace["spans"][:TRACE_PANEL_SPANS]:
+        left = sp["offset_ms"] / total * 100
+        width = max(sp["duration_ms"] / total * 100, 0.5)
+        color = "#ef4444" if sp["status"] == "ERROR" else "#10a37f"
+        rows.append(
+            f'<div style="font-size:0.6875rem;margin-left:{sp["depth"] * 8}px;">'
+            f'{sp["name"]} <span style="color:#6b7280;">{sp["duration_ms"]:.0f}ms</span></div>'
+            f'<div style="position:relative;height:4px;background:#2a2a2a;margin-bottom:3px;">'
+            f'<div style="position:absolute;left:{left:.1f}%;width:{width:.1f}%;height:4px;background:{color};"></div></div>'
+        )
+    hidden = len(trace["spans"]) - TRACE_PANEL_SPANS
+    if hidden > 0:
+        rows.append(f'<div style="font-size:0.6875rem;color:#6b7280;">+{hidden} more spans</div>')
+    st.markdown(f"**{trace['name']}** · {trace['duration_ms'] / 1000:.2f}s")
+    st.markdown("".join(rows), unsafe_allow_html=True)
+
+
+def show_token_usage(usage):
+    """Per-call-site token totals and the prompt-size histogram."""
+    st.dataframe(
+        [
+            {
+                "site": site,
+                "calls": u["calls"],
+                "in": u["input_tokens"],
+                "out": u["output_tokens"],
+                "avg in": u["avg_input_tokens"],
+                "tok/s": u["tokens_per_s"],
+            }
+            for site, u in usage.items()
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.caption("Prompt tokens per call")
+    st.bar_chart({site: u["prompt_hist"] for site, u in usage.items()}, height=160)
+    st.caption("Output tokens / s")
+    st.bar_chart({site: u["tokens_per_s_hist"] for site, u in usage.items()}, height=160)
+    parts = usage.get("chat", {}).get("avg_prompt_part_chars")
+    if parts:
+        st.caption("Chat prompt (avg chars): " + " · ".join(f"{k} {v:,}" for k, v in parts.items()))
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # SIDEBAR
 # ═══════════════════════════════════════════════════════════════════════════════
 
+warm_up_resources()
+collect_finished_jobs()
+
 with st.sidebar:
     # Collapse sidebar button at top
     col1, col2 = st.columns([3, 1])
@@ -679,6 +1018,8 @@ with st.sidebar:
         st.session_state.model = None
         st.session_state.uploaded_documents = []
         st.session_state.processed_file_keys = set()
+        st.session_state.conversation_summary = {"text": "", "upto": 0}
+        st.session_state.pending_jobs = []
         st.rerun()
     
     st.markdown("---")
@@ -688,6 +1029,8 @@ with st.sidebar:
             st.session_state.messages = chat.get("messages", []).copy()
             st.session_state.project_data = chat.get("project_data", {}).copy()
             st.session_state.model = None
+            st.session_state.conversation_summary = {"text": "", "upto": 0}
+            st.session_state.pending_jobs = []
             st.rerun()
     
     st.markdown("---")
@@ -706,7 +1049,7 @@ with st.sidebar:
 
     st.markdown("---")
     try:
-        cnt = get_collection_counts()
+        cnt = sidebar_counts()
         c1, c2 = st.columns(2)
         with c1:
             st.metric("Deals", cnt.get("fallon_deal_data", 0))
@@ -715,6 +1058,27 @@ with st.sidebar:
     except:
         pass
 
+    traces = recent_traces(TRACE_PANEL_TRACES)
+    if traces:
+        st.markdown("---")
+        with st.expander("TIMING", expanded=False):
+            for trace in traces:
+                show_waterfall(trace)
+
+    usage = get_usage_by_site()
+    if usage:
+        with st.expander("TOKENS", expanded=False):
+            show_token_usage(usage)
+
+    searches = get_search_stats()
+    if searches["hits"] + searches["misses"]:
+        st.caption(f"Web search: {searches['hits']} cached · {searches['misses']} live · {searches['timeouts']} over budget")
+
+    routing = get_routing_stats()
+    local = routing["rules"] + routing["centroid"] - routing["fallback"]
+    if local:
+        st.caption(f"Intent: {local} routed locally · {routing['llm'] + routing['fallback']} via chat model")
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # MAIN
@@ -733,7 +1097,7 @@ if not st.session_state.messages:
     st.markdown("Just tell me about what you're working on, or ask me anything about real estate development.")
 
 # Display chat
-for m in st.session_state.messages:
+for i, m in enumerate(st.session_state.messages):
     with st.chat_message(m["role"]):
         if m.get("is_upload"):
             st.markdown(f'<div class="upload-msg">{m.get("content", "")}</div>', unsafe_allow_html=True)
@@ -742,12 +1106,15 @@ for m in st.session_state.messages:
         else:
             r = m.get("resp", {})
             if r.get("t") == "model":
-                show_model(r["data"], r.get("txt"))
+                show_model(r["data"], r.get("txt"), key=f"msg{i}")
             elif r.get("t") == "answer":
                 show_answer(r["txt"], r.get("src", []), r.get("conf", "medium"))
             else:
                 st.markdown(r.get("txt", m.get("content", "")))
 
+if st.session_state.pending_jobs:
+    show_pending_jobs()
+
 # File uploader
 uploaded_files = st.file_uploader(
     "Upload documents",
@@ -761,8 +1128,7 @@ if uploaded_files:
         file_key = f"{uf.name}_{uf.size}"
         if file_key not in st.session_state.processed_file_keys:
             st.session_state.processed_file_keys.add(file_key)
-            content = parse_uploaded_file(uf)
-            st.session_state.uploaded_documents.append({"name": uf.name, "content": content})
+            start_job("parse", _parse_job, uf.name, uf.getvalue(), name=uf.name)
             is_image = uf.name.lower().endswith((".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".webp"))
             icon = "📷" if is_image else "📄"
             st.session_state.messages.append({
@@ -772,22 +1138,11 @@ if uploaded_files:
             })
             st.rerun()
 
-# Chat input
-if prompt := st.chat_input("Tell me about your project, or ask me anything..."):
+# Chat input (one chat job at a time — it works on a snapshot of the conversation)
+chat_busy = any(p["kind"] == "chat" for p in st.session_state.pending_jobs)
+if prompt := st.chat_input("Tell me about your project, or ask me anything...", disabled=chat_busy):
     st.session_state.messages.append({"role": "user", "content": prompt})
-    
-    with st.chat_message("user"):
-        st.markdown(prompt)
-    
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            resp = process_message(prompt)
-        
-        if resp.get("t") == "model":
-            show_model(resp["data"], resp.get("txt"))
-        elif resp.get("t") == "answer":
-            show_answer(resp["txt"], resp.get("src", []), resp.get("conf", "medium"))
-        else:
-            st.markdown(resp.get("txt", ""))
-        
-        st.session_state.messages.append({"role": "assistant", "resp": resp})
+    state = snapshot_state()
+    # Identical requests only share a reply while it's being worked on
+    start_job("chat", _chat_job, prompt, state, key=[prompt, vars(state)], reuse_finished=False)
+    st.rerun()
@@ -0,0 +1,185 @@
+"""
+Answer Cache — Semantic Reuse of Contract Q&A Answers
+
+Questions are embedded with the shared MiniLM function and compared against
+previously answered questions with one matrix-vector product. A cached
+answer is reused only if
+
+  - its question is at least SIMILARITY_THRESHOLD similar (cosine),
+  - it is younger than TTL_SECONDS,
+  - it was produced against the current corpus version (collection counts
+    plus an explicit generation bumped by invalidate()), and
+  - retrieval for the new question returns the same chunk IDs, so the LLM
+    would have seen exactly the same context.
+
+A hit skips the LLM call entirely. Without an embedding model (offline),
+lookups fall back to an exact match on the normalized question text.
+"""
+
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+SIMILARITY_THRESHOLD = 0.90
+TTL_SECONDS = 24 * 3600
+CACHE_SIZE = 256
+
+# Embedding function override (texts -> vectors). None uses vector_store's
+# shared MiniLM function.
+_embed_fn = None
+_embed_unavailable = False
+
+_lock = threading.Lock()
+_entries = []            # dicts: question, key, vec, chunk_ids, corpus, created, value
+_generation = 0
+_stats = {"hits": 0, "misses": 0}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HELPERS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _normalize(question: str) -> str:
+    return re.sub(r"[^a-z0-9%$.]+", " ", question.lower()).strip()
+
+
+def _embed(text: str) -> Optional[np.ndarray]:
+    """Unit-normalized float32 embedding, or None if no model is available."""
+    global _embed_unavailable
+    fn = _embed_fn
+    if fn is None:
+        if _embed_unavailable:
+            return None
+        try:
+            from FallonPrototype.shared.vector_store import embed_texts
+            fn = embed_texts
+        except Exception:
+            _embed_unavailable = True
+            return None
+    try:
+        vec = np.asarray(fn([text])[0], dtype=np.float32)
+    except Exception:
+        # Model not downloadable (offline) — exact-match lookups only
+        if _embed_fn is None:
+            _embed_unavailable = True
+        return None
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def corpus_version() -> tuple:
+    """Current corpus version: collection sizes plus the invalidation generation."""
+    try:
+        from FallonPrototype.shared.vector_store import get_collection_counts
+        counts = tuple(sorted(get_collection_counts().items()))
+    except Exception:
+        counts = ()
+    return (_generation,) + counts
+
+
+def _evict(now: float, corpus: tuple):
+    """Drop expired entries and entries from another corpus version (lock held)."""
+    _entries[:] = [
+        e for e in _entries
+        if now - e["created"] <= TTL_SECONDS and e["corpus"] == corpus
+    ][-CACHE_SIZE:]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PUBLIC API
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def lookup(question: str, chunk_ids: list[str], corpus: Optional[tuple] = None) -> Optional[Any]:
+    """
+    Return a cached value for a semantically equivalent question, or None.
+
+    Args:
+        question: The new question.
+        chunk_ids: IDs of the chunks retrieved for the new question; the
+                   cached entry must have been answered from the same set.
+        corpus: Corpus version (default: corpus_version()).
+    """
+    corpus = corpus if corpus is not None else corpus_version()
+    key = _normalize(question)
+    ids = tuple(sorted(chunk_ids))
+    vec = _embed(question)
+    now = time.time()
+
+    with _lock:
+        _evict(now, corpus)
+        best, best_score = None, -1.0
+        if vec is not None:
+            candidates = [e for e in _entries if e["vec"] is not None and len(e["vec"]) == len(vec)]
+            if candidates:
+                scores = np.stack([e["vec"] for e in candidates]) @ vec
+                for i in np.argsort(-scores):
+                    if scores[i] < SIMILARITY_THRESHOLD:
+                        break
+                    if candidates[i]["chunk_ids"] == ids:
+                        best, best_score = candidates[i], float(scores[i])
+                        break
+        if best is None:
+            best = next((e for e in reversed(_entries) if e["key"] == key and e["chunk_ids"] == ids), None)
+            best_score = 1.0 if best else best_score
+
+        if best is None:
+            _stats["misses"] += 1
+            return None
+        _stats["hits"] += 1
+        best["hits"] += 1
+        best["similarity"] = best_score
+        return best["value"]
+
+
+def store(question: str, chunk_ids: list[str], value: Any, corpus: Optional[tuple] = None):
+    """Cache a value for a question answered from the given chunk IDs."""
+    corpus = corpus if corpus is not None else corpus_version()
+    entry = {
+        "question": question,
+        "key": _normalize(question),
+        "vec": _embed(question),
+        "chunk_ids": tuple(sorted(chunk_ids)),
+        "corpus": corpus,
+        "created": time.time(),
+        "hits": 0,
+        "value": value,
+    }
+    with _lock:
+        _entries[:] = [e for e in _entries if not (e["key"] == entry["key"] and e["chunk_ids"] == entry["chunk_ids"])]
+        _entries.append(entry)
+        _evict(entry["created"], corpus)
+
+
+def invalidate():
+    """Drop every cached answer (e.g. after re-ingesting documents)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters and current size."""
+    with _lock:
+        return {**_stats, "size": len(_entries)}
+
+
+def cached_call(question: str, chunk_ids: list[str], compute: Callable[[], Any],
+                cacheable: Callable[[Any], bool] = lambda v: True):
+    """
+    lookup() or compute-and-store().
+
+    Returns:
+        (value, hit) — hit is True when the value came from the cache.
+    """
+    corpus = corpus_version()
+    value = lookup(question, chunk_ids, corpus)
+    if value is not None:
+        return value, True
+    value = compute()
+    if cacheable(value):
+        store(question, chunk_ids, value, corpus)
+    return value, False
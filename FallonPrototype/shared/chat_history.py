@@ -0,0 +1,109 @@
+"""
+Chat History — Rolling Conversation Memory for the Chat Prompt
+
+The chat prompt used to carry the last 10 messages verbatim plus all
+project data as indented JSON, so long sessions (and pasted documents)
+made every turn bigger. The history block is now bounded:
+
+    [summary of older messages]     one paragraph, updated incrementally
+    [messages it doesn't cover yet] each capped at PENDING_MESSAGE_CHARS
+    [last RECENT_MESSAGES messages] verbatim, each capped at MESSAGE_CHARS
+
+Older messages are folded into the summary in batches of SUMMARY_BATCH:
+the model gets the previous summary plus only the new messages, so each
+message is summarized once. The summary lives in the session as
+{"text": str, "upto": n}, n being how many messages it covers. Until a
+message is folded in it stays in the prompt, so every message is always
+in either the summary or the verbatim part.
+
+These functions take plain message lists and summary dicts; the app keeps
+them in st.session_state and runs summarize() as a background job.
+"""
+
+import json
+
+from FallonPrototype.shared.claude_client import call_claude
+
+RECENT_MESSAGES = 6            # kept verbatim
+MESSAGE_CHARS = 1500           # per verbatim message
+PENDING_MESSAGE_CHARS = 300    # per message past the window, awaiting the summary
+SUMMARY_BATCH = 6              # older messages folded in at a time
+SUMMARY_CHARS = 2000           # cap on the stored summary
+SUMMARY_INPUT_CHARS = 8000     # cap on new messages sent to the summarizer
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a real estate developer and FAiLLON, an underwriting assistant.
+
+Update the summary with the new messages. Keep: project facts and numbers the user gave (market, program, units, SF, costs, rents, cap rates, targets), decisions and requested changes, questions still open, and the user's goals and preferences. Drop pleasantries and anything already superseded.
+
+Return only the updated summary as plain prose or terse bullets, under 250 words."""
+
+
+def message_text(msg: dict) -> str:
+    """Plain text of a stored chat message (assistant replies keep their text under "resp")."""
+    content = msg.get("content")
+    if isinstance(content, str) and content:
+        return content
+    resp = msg.get("resp") or {}
+    text = resp.get("txt", "")
+    if resp.get("t") == "model":
+        text = f"{text} [pro forma generated]".strip()
+    return text
+
+
+def _line(msg: dict, limit: int) -> str:
+    role = "User" if msg["role"] == "user" else "FAiLLON"
+    text = message_text(msg)
+    if len(text) > limit:
+        text = text[:limit] + f"… [{len(text) - limit:,} more characters]"
+    return f"{role}: {text}"
+
+
+def pending_summary_range(messages: list[dict], summary: dict) -> tuple[int, int] | None:
+    """
+    (start, end) of the messages due to be folded into the summary, or None.
+
+    Messages are due once they leave the verbatim window, and are folded in
+    batches of SUMMARY_BATCH so the summarizer runs every few turns, not every turn.
+    """
+    start = summary.get("upto", 0)
+    end = len(messages) - RECENT_MESSAGES
+    if end - start < SUMMARY_BATCH:
+        return None
+    return start, end
+
+
+def summarize(previous: str, messages: list[dict]) -> str | None:
+    """
+    Fold messages into the previous summary with one LLM call.
+
+    Returns:
+        The updated summary, or None if the call failed (retry next turn).
+    """
+    lines = "\n".join(_line(m, MESSAGE_CHARS) for m in messages)[-SUMMARY_INPUT_CHARS:]
+    user_message = f"CURRENT SUMMARY:\n{previous or '(none yet)'}\n\nNEW MESSAGES:\n{lines}"
+    response = call_claude(SUMMARY_SYSTEM_PROMPT, user_message, max_tokens=500, site="history_summary")
+    if response.startswith("ERROR:"):
+        return None
+    return response.strip()[:SUMMARY_CHARS]
+
+
+def format_history(messages: list[dict], summary: dict) -> str:
+    """
+    The CONVERSATION HISTORY block: the summary, then every message it doesn't cover.
+
+    Messages past the verbatim window that the summarizer hasn't reached yet
+    are shortened to PENDING_MESSAGE_CHARS rather than dropped.
+    """
+    parts = []
+    if summary.get("text"):
+        parts.append(f"Summary of earlier conversation: {summary['text']}\n")
+    unsummarized = messages[summary.get("upto", 0):]
+    window = len(unsummarized) - RECENT_MESSAGES
+    parts.extend(_line(m, MESSAGE_CHARS if i >= window else PENDING_MESSAGE_CHARS)
+                 for i, m in enumerate(unsummarized))
+    return "\n".join(parts) + "\n" if parts else ""
+
+
+def compact_json(data: dict) -> str:
+    """Project data for the prompt without indentation or spaces."""
+    return json.dumps(data, separators=(",", ":"), default=str)
@@ -5,15 +5,21 @@ Every agent imports call_claude() from here — never calls the API directly.
 """
 
 import os
+import threading
+import time
+from bisect import bisect_left
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from FallonPrototype.shared.tracing import span
+
 # Load .env from project root (G1000/.env has the NVIDIA_API_KEY)
 _root_env = os.path.join(os.path.dirname(__file__), "..", "..", ".env")
 load_dotenv(dotenv_path=_root_env)
 
-# Nvidia NIM API configuration
-NVIDIA_BASE_URL = "https://integrate.api.nvidia.com/v1"
+# Nvidia NIM API configuration — NVIDIA_BASE_URL can point at any
+# OpenAI-compatible server (e.g. the local stub used by tests/bench_agents.py)
+NVIDIA_BASE_URL = os.environ.get("NVIDIA_BASE_URL", "https://integrate.api.nvidia.com/v1")
 MODEL = "moonshotai/kimi-k2-instruct"  # Kimi K2 model on Nvidia NIM
 
 # Single shared client — initialized once at import time
@@ -32,8 +38,21 @@ _session_usage = {
 _PRICE_PER_M_INPUT = 0.0
 _PRICE_PER_M_OUTPUT = 0.0
 
-
-def call_claude(system_prompt: str, user_message: str, max_tokens: int = 2048) -> str:
+# Per-call-site accounting — which prompts are large and slow.
+# Histogram buckets are upper bounds; the last bucket is open-ended.
+PROMPT_TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+TOKENS_PER_S_BUCKETS = (5, 10, 20, 40, 80, 160)
+_site_usage = {}
+_usage_lock = threading.Lock()
+
+
+def call_claude(
+    system_prompt: str,
+    user_message: str,
+    max_tokens: int = 2048,
+    site: str = "other",
+    prompt_parts: dict | None = None,
+) -> str:
     """
     Send a message to the LLM and return the response text as a plain string.
     
@@ -42,7 +61,7 @@ def call_claude(system_prompt: str, user_message: str, max_tokens: int = 2048) -
 
     All sub-agents call this function. It handles:
     - API errors with a clean message (no stack traces in the UI)
-    - Token usage tracking for the session cost display
+    - Token usage tracking for the session cost display, per call site
 
     Args:
         system_prompt: The system-level instruction for the model's role/behavior.
@@ -50,6 +69,10 @@ def call_claude(system_prompt: str, user_message: str, max_tokens: int = 2048) -
         max_tokens:    Maximum tokens in the response. Default 2048 is sufficient
                        for most contract answers and financial summaries. Increase
                        to 4096 for full pro forma JSON generation.
+        site:          Call-site name for usage accounting ("extraction",
+                       "generation", "contract_qa", "chat", ...).
+        prompt_parts:  Optional {part name: characters} breakdown of the prompt
+                       (history, documents, web results...), averaged per site.
 
     Returns:
         The response text as a plain string, or an error message string if the
@@ -57,21 +80,32 @@ def call_claude(system_prompt: str, user_message: str, max_tokens: int = 2048) -
         if they need to distinguish failures from valid responses.
     """
     try:
-        response = _client.chat.completions.create(
-            model=MODEL,
-            max_tokens=max_tokens,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message},
-            ],
-        )
-
-        # Accumulate token usage for the session cost tracker
-        if response.usage:
-            _session_usage["input_tokens"] += response.usage.prompt_tokens or 0
-            _session_usage["output_tokens"] += response.usage.completion_tokens or 0
-
-        return response.choices[0].message.content
+        with span("llm.call", model=MODEL, max_tokens=max_tokens, site=site) as llm_span:
+            start = time.perf_counter()
+            response = _client.chat.completions.create(
+                model=MODEL,
+                max_tokens=max_tokens,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message},
+                ],
+            )
+
+            seconds = time.perf_counter() - start
+            text = response.choices[0].message.content
+
+            # Accumulate token usage for the session cost tracker
+            if response.usage:
+                input_tokens = response.usage.prompt_tokens or 0
+                output_tokens = response.usage.completion_tokens or 0
+            else:
+                # No usage reported — estimate at ~4 characters per token
+                input_tokens = (len(system_prompt) + len(user_message)) // 4
+                output_tokens = len(text or "") // 4
+            _record_site_usage(site, input_tokens, output_tokens, seconds, prompt_parts)
+            llm_span.set(input_tokens=input_tokens, output_tokens=output_tokens)
+
+        return text
 
     except Exception as e:
         error_str = str(e)
@@ -83,6 +117,76 @@ def call_claude(system_prompt: str, user_message: str, max_tokens: int = 2048) -
             return f"ERROR: Unexpected error calling Nvidia NIM API — {error_str}"
 
 
+def _bucket_labels(edges: tuple) -> list[str]:
+    return [f"≤{e:,}" for e in edges] + [f">{edges[-1]:,}"]
+
+
+def _record_site_usage(site: str, input_tokens: int, output_tokens: int, seconds: float, prompt_parts: dict | None):
+    """Add one call to the session totals and the per-site counters and histograms."""
+    tokens_per_s = output_tokens / seconds if seconds > 0 else 0.0
+    with _usage_lock:
+        _session_usage["input_tokens"] += input_tokens
+        _session_usage["output_tokens"] += output_tokens
+        stats = _site_usage.get(site)
+        if stats is None:
+            stats = _site_usage[site] = {
+                "calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "seconds": 0.0,
+                "max_input_tokens": 0,
+                "prompt_hist": [0] * (len(PROMPT_TOKEN_BUCKETS) + 1),
+                "tokens_per_s_hist": [0] * (len(TOKENS_PER_S_BUCKETS) + 1),
+                "prompt_part_chars": {},
+            }
+        stats["calls"] += 1
+        stats["input_tokens"] += input_tokens
+        stats["output_tokens"] += output_tokens
+        stats["seconds"] += seconds
+        stats["max_input_tokens"] = max(stats["max_input_tokens"], input_tokens)
+        stats["prompt_hist"][bisect_left(PROMPT_TOKEN_BUCKETS, input_tokens)] += 1
+        stats["tokens_per_s_hist"][bisect_left(TOKENS_PER_S_BUCKETS, tokens_per_s)] += 1
+        for part, chars in (prompt_parts or {}).items():
+            stats["prompt_part_chars"][part] = stats["prompt_part_chars"].get(part, 0) + chars
+
+
+def get_usage_by_site() -> dict:
+    """
+    Token usage broken down by call site, for finding where prompt trimming pays off.
+
+    Returns a dict keyed by site name:
+        {
+            "calls", "input_tokens", "output_tokens": int,
+            "avg_input_tokens", "max_input_tokens": int,
+            "seconds": float               total time waiting on the API,
+            "tokens_per_s": float          output tokens / second (end to end,
+                                           prompt processing included),
+            "prompt_hist": {bucket label: calls}     input tokens per call,
+            "tokens_per_s_hist": {bucket label: calls},
+            "avg_prompt_part_chars": {part: chars}   from prompt_parts, per call,
+        }
+    """
+    prompt_labels = _bucket_labels(PROMPT_TOKEN_BUCKETS)
+    rate_labels = _bucket_labels(TOKENS_PER_S_BUCKETS)
+    with _usage_lock:
+        out = {}
+        for site, stats in sorted(_site_usage.items(), key=lambda kv: -kv[1]["input_tokens"]):
+            calls = stats["calls"]
+            out[site] = {
+                "calls": calls,
+                "input_tokens": stats["input_tokens"],
+                "output_tokens": stats["output_tokens"],
+                "avg_input_tokens": stats["input_tokens"] // calls,
+                "max_input_tokens": stats["max_input_tokens"],
+                "seconds": round(stats["seconds"], 3),
+                "tokens_per_s": round(stats["output_tokens"] / stats["seconds"], 1) if stats["seconds"] else 0.0,
+                "prompt_hist": dict(zip(prompt_labels, stats["prompt_hist"])),
+                "tokens_per_s_hist": dict(zip(rate_labels, stats["tokens_per_s_hist"])),
+                "avg_prompt_part_chars": {k: v // calls for k, v in stats["prompt_part_chars"].items()},
+            }
+        return out
+
+
 def get_session_usage() -> dict:
     """
     Return total token usage and estimated cost for the current session.
@@ -96,8 +200,9 @@ def get_session_usage() -> dict:
             "estimated_cost_usd": float  (rounded to 4 decimal places)
         }
     """
-    input_t = _session_usage["input_tokens"]
-    output_t = _session_usage["output_tokens"]
+    with _usage_lock:
+        input_t = _session_usage["input_tokens"]
+        output_t = _session_usage["output_tokens"]
     cost = (input_t / 1_000_000 * _PRICE_PER_M_INPUT) + (
         output_t / 1_000_000 * _PRICE_PER_M_OUTPUT
     )
@@ -110,6 +215,8 @@ def get_session_usage() -> dict:
 
 
 def reset_session_usage() -> None:
-    """Reset the session token counter. Called by the 'Clear Session' button in the UI."""
-    _session_usage["input_tokens"] = 0
-    _session_usage["output_tokens"] = 0
+    """Reset the session token counters (totals and per site). Called by the 'Clear Session' button in the UI."""
+    with _usage_lock:
+        _session_usage["input_tokens"] = 0
+        _session_usage["output_tokens"] = 0
+        _site_usage.clear()
@@ -0,0 +1,312 @@
+"""
+Contract Chunker — Structure-Aware Splitting of Contract Text
+
+Contracts are split along their own outline instead of at fixed character
+counts: articles, numbered sections (4.2, 4.2.1), defined-term entries,
+exhibits/schedules and the signature block each start a new clause. Whole
+clauses are then packed into chunks of up to CHUNK_MAX_CHARS without ever
+crossing an article boundary, so a clause is never cut in half or repeated
+in two chunks and no overlap is needed. Only a single clause longer than the
+limit is split further, at paragraph boundaries.
+
+Every chunk carries its section path, e.g. "Art. 4 > 4.2 Preferred Return",
+for citations in answers.
+
+The chunker makes one pass over the lines of a page stream
+(shared.text_stream), holding at most one clause and one pending chunk, so
+it runs in linear time and works on documents of any length.
+"""
+
+import re
+from typing import Iterable, Iterator, NamedTuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from FallonPrototype.shared.text_stream import Page, PAGE_SEPARATOR
+
+CHUNK_MAX_CHARS = 1500
+CLAUSE_MAX_CHARS = 12000   # open clauses longer than this are flushed early
+CHILD_MAX_CHARS = 400      # child chunks indexed for precise matching
+
+
+class ContractChunk(NamedTuple):
+    index: int
+    offset: int            # character offset in the joined document
+    page: int              # page the chunk starts on
+    text: str
+    section_path: str      # "Art. 4 > 4.2 Preferred Return"
+    article: str           # "4", "IV", "Exhibit A", "" for the preamble
+    sections: tuple        # clause numbers covered, e.g. ("4.1", "4.2")
+    kind: str              # preamble | clause | definition | exhibit | signatures
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HEADING DETECTION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_ARTICLE = re.compile(r"^\s*(?:ARTICLE|Article)\s+([IVXLC]+|\d+)\b[\s.:\-–—]*(.*)$")
+_EXHIBIT = re.compile(r"^\s*(EXHIBIT|Exhibit|SCHEDULE|Schedule|ANNEX|Annex|APPENDIX|Appendix)\s+([A-Z0-9][\w.\-]*)\b[\s.:\-–—]*(.*)$")
+# Number, then a heading-shaped title: "4.2 Preferred Return", not "8.0 percent per annum"
+_SECTION = re.compile(r"^\s*(SECTION\s*|Section\s*|§\s*)?(\d+(?:\.\d+)+\.?|\d+\.)\s+([\"“(]?[A-Z].*)$")
+_DEFINITION = re.compile(r"^\s*[\"“]([^\"”]{2,80})[\"”]\s+(?:means|shall mean|has the meaning|shall have the meaning|refers to)\b")
+_SIGNATURES = re.compile(r"^\s*IN WITNESS WHEREOF\b")
+_DEFINITIONS_TITLE = re.compile(r"\bDEFINITIONS?\b", re.IGNORECASE)
+_ROMAN = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+_clause_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_MAX_CHARS,
+    chunk_overlap=0,
+    separators=["\n\n", "\n", ". ", " ", ""],
+    keep_separator="end",
+)
+
+
+_child_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=CHILD_MAX_CHARS,
+    chunk_overlap=0,
+    separators=["\n\n", "\n", ". ", "; ", " ", ""],
+    keep_separator="end",
+)
+
+
+def _title(text: str, limit: int = 60) -> str:
+    """Caption of a heading line: text up to the first sentence break, trimmed."""
+    text = text.strip()
+    for sep in (". ", ": "):
+        cut = text.find(sep)
+        if 0 < cut <= limit:
+            return text[:cut].strip()
+    if text.endswith((".", ":")) and len(text) <= limit + 1:
+        return text[:-1].strip()
+    return text[:limit].rstrip() + ("…" if len(text) > limit else "")
+
+
+def _article_number(article: str):
+    """Integer value of an arabic or roman article number; None for exhibits and the preamble."""
+    if article.isdigit():
+        return int(article)
+    if not article or any(c not in _ROMAN for c in article):
+        return None
+    values = [_ROMAN[c] for c in article]
+    return sum(-v if v < nxt else v for v, nxt in zip(values, values[1:] + [0]))
+
+
+def _fits_outline(number: str, keyword: bool, article: str, section: str) -> bool:
+    """
+    Whether a numbered line can open a section at this point in the outline.
+
+    Dotted numbers must sit under their article (4.x inside Article 4). A bare
+    "2." inside an open section is a list item unless it's the next top-level
+    section or carries a "Section" keyword.
+    """
+    if "." in number:
+        top = _article_number(article)
+        return top is None or int(number.split(".")[0]) == top
+    if keyword or not section:
+        return True
+    return section.isdigit() and int(number) == int(section) + 1
+
+
+def _classify(line: str, in_definitions: bool, article: str = "", section: str = ""):
+    """
+    Classify a line that opens a new clause.
+
+    Args:
+        line: The line to classify.
+        in_definitions: Whether defined-term entries open clauses here.
+        article: Number of the open article ("" outside articles).
+        section: Number of the open section ("" if none).
+
+    Returns:
+        (level, number, title) — level "article" | "exhibit" | "section" |
+        "definition" | "signatures" — or None for a continuation line.
+    """
+    m = _ARTICLE.match(line)
+    if m:
+        return "article", m.group(1), _title(m.group(2))
+    m = _EXHIBIT.match(line)
+    if m:
+        return "exhibit", f"{m.group(1).title()} {m.group(2)}", _title(m.group(3))
+    if _SIGNATURES.match(line):
+        return "signatures", "", "Signatures"
+    m = _SECTION.match(line)
+    if m and not line.startswith(("    ", "\t")):
+        number = m.group(2).rstrip(".")
+        if _fits_outline(number, bool(m.group(1)), article, section):
+            return "section", number, _title(m.group(3))
+    if in_definitions:
+        m = _DEFINITION.match(line)
+        if m:
+            return "definition", "", f"\"{m.group(1)}\""
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CHUNKING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _lines(pages: Iterable[Page]) -> Iterator[tuple[int, int, str]]:
+    """(offset, page, line) for every line of the page stream, separator included."""
+    for page in pages:
+        offset = page.offset
+        for line in page.text.splitlines(keepends=True):
+            yield offset, page.number, line
+            offset += len(line)
+        yield offset, page.number, PAGE_SEPARATOR
+
+
+def iter_contract_chunks(
+    pages: Iterable[Page],
+    max_chars: int = CHUNK_MAX_CHARS,
+) -> Iterator[ContractChunk]:
+    """
+    Chunk a contract page stream along its article / section structure.
+
+    Args:
+        pages: Page stream from shared.text_stream (iter_file_pages etc.).
+        max_chars: Chunk size limit; clauses are packed up to this size.
+
+    Yields:
+        ContractChunk records in document order.
+    """
+    index = 0
+
+    # Outline position
+    article, article_title, group = "", "", "preamble"
+    section, section_title, term = "", "", ""
+    in_definitions = False        # inside a definitions article or section
+    definitions_article = False
+
+    clause, clause_size = [], 0   # [(offset, page, line)] of the open clause
+    pending = None                # chunk being packed
+
+    def current_path() -> str:
+        if group in ("preamble", "signatures"):
+            parts = [group.title()]
+        elif group == "exhibit":
+            parts = [f"{article} {article_title}".strip()]
+        elif article:
+            parts = [f"Art. {article} {article_title}".strip() if not section else f"Art. {article}"]
+        else:
+            parts = []
+        if section:
+            parts.append(f"{section} {section_title}".strip())
+        if term:
+            parts.append(term)
+        return " > ".join(parts)
+
+    def new_chunk(offset, page, text):
+        return {
+            "offset": offset, "page": page, "parts": [text], "sections": [section],
+            "path": current_path(), "article": article, "term": term,
+            "kind": "definition" if term else ("clause" if group == "article" else group),
+        }
+
+    def make(chunk) -> ContractChunk:
+        nonlocal index
+        raw = "".join(chunk["parts"])
+        text = raw.strip()
+        lead = len(raw) - len(raw.lstrip())
+        numbers = tuple(dict.fromkeys(n for n in chunk["sections"] if n))
+        out = ContractChunk(index, chunk["offset"] + lead, chunk["page"], text,
+                            chunk["path"], chunk["article"], numbers, chunk["kind"])
+        index += 1
+        return out
+
+    def close_clause():
+        """Move the open clause into the pending chunk, yielding chunks that fill up."""
+        nonlocal pending, clause, clause_size
+        if not clause:
+            return
+        text = "".join(line for _, _, line in clause)
+        offset, page = clause[0][0], clause[0][1]
+        clause, clause_size = [], 0
+        if not text.strip():
+            if pending:
+                pending["parts"].append(text)
+            return
+
+        if len(text) > max_chars:
+            # One clause over the limit: split it alone, at paragraph boundaries
+            if pending:
+                yield make(pending)
+                pending = None
+            search = 0
+            for piece in _clause_splitter.split_text(text):
+                pos = text.find(piece, search)
+                pos = search if pos == -1 else pos
+                search = pos + len(piece)
+                yield make(new_chunk(offset + pos, page, piece))
+            return
+
+        kind = new_chunk(offset, page, "")["kind"]
+        if (pending and pending["article"] == article and pending["kind"] == kind
+                and sum(map(len, pending["parts"])) + len(text) <= max_chars):
+            pending["parts"].append(text)
+            pending["sections"].append(section)
+            if kind == "definition" and pending.pop("term", None):
+                # Several defined terms in one chunk: cite the enclosing section
+                pending["path"] = pending["path"].rsplit(" > ", 1)[0]
+            return
+        if pending:
+            yield make(pending)
+        pending = new_chunk(offset, page, text)
+
+    for offset, page, line in _lines(pages):
+        outline = (article if group == "article" else "", section)
+        heading = _classify(line, in_definitions, *outline) if line.strip() else None
+        if heading:
+            yield from close_clause()
+            level, number, title = heading
+            if level in ("article", "exhibit", "signatures"):
+                # Chunks never span two articles
+                if pending:
+                    yield make(pending)
+                    pending = None
+                group = level
+                article, article_title = (number, title) if level != "signatures" else ("", "")
+                section, section_title, term = "", "", ""
+                definitions_article = level == "article" and bool(_DEFINITIONS_TITLE.search(title))
+                in_definitions = definitions_article
+            elif level == "section":
+                if group == "preamble":
+                    group = "article"
+                section, section_title, term = number, title, ""
+                in_definitions = definitions_article or bool(_DEFINITIONS_TITLE.search(title))
+            else:
+                term = title
+        clause.append((offset, page, line))
+        clause_size += len(line)
+        if clause_size > CLAUSE_MAX_CHARS:
+            yield from close_clause()
+
+    yield from close_clause()
+    if pending:
+        yield make(pending)
+
+
+def chunk_contract(text: str, max_chars: int = CHUNK_MAX_CHARS) -> list[ContractChunk]:
+    """Chunk an in-memory contract string (single page)."""
+    return list(iter_contract_chunks([Page(1, 0, text)], max_chars))
+
+
+def child_chunks(chunk: ContractChunk) -> list[tuple[int, str]]:
+    """
+    Split a chunk into children of up to CHILD_MAX_CHARS for precise matching.
+
+    Children follow line and sentence boundaries inside the chunk; each one
+    is matched on its own and resolves back to the whole chunk (its parent)
+    at retrieval time.
+
+    Returns:
+        [(offset, text)] with offsets in the joined document.
+    """
+    if len(chunk.text) <= CHILD_MAX_CHARS:
+        return [(chunk.offset, chunk.text)]
+    children, search = [], 0
+    for piece in _child_splitter.split_text(chunk.text):
+        pos = chunk.text.find(piece, search)
+        pos = search if pos == -1 else pos
+        search = pos + len(piece)
+        children.append((chunk.offset + pos, piece))
+    return children
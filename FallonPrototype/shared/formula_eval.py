@@ -0,0 +1,606 @@
+"""
+Formula Evaluator — Cached Values for Exported Workbooks
+
+openpyxl writes formulas without results, so anything that reads an exported
+workbook without Excel (previewers, pandas, load_workbook(data_only=True),
+our own tests) sees empty cells. This module evaluates the formula subset
+excel_export emits and writes each result into the cell's cached <v> value.
+
+Supported: numbers, strings, TRUE/FALSE, + - * / ^ & and comparisons,
+A1 / $A$1 refs and ranges (optionally 'Sheet Name'! qualified), and
+IF, ROUND, SUM, SUMPRODUCT, MIN, MAX, AVERAGE, ABS, RANK.
+
+Every formula is parsed once, the cell dependency graph is sorted
+topologically, and each cell is evaluated exactly once in that order.
+Cells on a cycle are left without a cached value.
+"""
+
+import io
+import math
+import re
+import shutil
+import zipfile
+from collections import deque
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.utils import column_index_from_string
+
+
+class FormulaError(str):
+    """Excel error value (#DIV/0!, #VALUE!, ...) — propagates through formulas."""
+
+
+DIV0 = FormulaError("#DIV/0!")
+VALUE = FormulaError("#VALUE!")
+NUM = FormulaError("#NUM!")
+NAME = FormulaError("#NAME?")
+NA = FormulaError("#N/A")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PARSER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<num>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+    | "(?P<str>(?:[^"]|"")*)"
+    | (?P<ref>(?:(?:'(?P<qsheet>(?:[^']|'')+)'|(?P<sheet>[A-Za-z_][\w.]*))!)?
+              \$?(?P<c1>[A-Z]{1,3})\$?(?P<r1>\d+)(?::\$?(?P<c2>[A-Z]{1,3})\$?(?P<r2>\d+))?)
+    | (?P<name>[A-Za-z_][\w.]*)
+    | (?P<op><>|<=|>=|[-+*/^&=<>(),])
+    )""", re.VERBOSE)
+
+_BINARY = {
+    "=": 1, "<>": 1, "<": 1, ">": 1, "<=": 1, ">=": 1,
+    "&": 2,
+    "+": 3, "-": 3,
+    "*": 4, "/": 4,
+    "^": 5,
+}
+_UNARY_PRECEDENCE = 6   # Excel: -2^2 = 4
+
+
+def _tokenize(formula: str) -> list[tuple]:
+    tokens, pos, end = [], 0, len(formula)
+    while pos < end:
+        m = _TOKEN.match(formula, pos)
+        if not m or m.end() == pos:
+            if formula[pos:].strip() == "":
+                break
+            raise SyntaxError(f"Unexpected character at {pos} in {formula!r}")
+        pos = m.end()
+        if m["num"] is not None:
+            tokens.append(("num", float(m["num"])))
+        elif m["str"] is not None:
+            tokens.append(("str", m["str"].replace('""', '"')))
+        elif m["ref"] is not None:
+            sheet = m["qsheet"].replace("''", "'") if m["qsheet"] else m["sheet"]
+            start = (column_index_from_string(m["c1"]), int(m["r1"]))
+            stop = (column_index_from_string(m["c2"]), int(m["r2"])) if m["c2"] else None
+            tokens.append(("ref", (sheet, start, stop)))
+        elif m["name"] is not None:
+            tokens.append(("name", m["name"].upper()))
+        else:
+            tokens.append(("op", m["op"]))
+    return tokens
+
+
+class _Parser:
+    """Precedence-climbing parser producing nested tuples."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        tok = self.peek()
+        if (kind and tok[0] != kind) or (value and tok[1] != value):
+            raise SyntaxError(f"Expected {value or kind}, got {tok[1]!r}")
+        self.i += 1
+        return tok
+
+    def expr(self, min_prec=1):
+        left = self.unary()
+        while True:
+            kind, op = self.peek()
+            prec = _BINARY.get(op) if kind == "op" else None
+            if prec is None or prec < min_prec:
+                return left
+            self.i += 1
+            right = self.expr(prec + 1)
+            left = ("bin", op, left, right)
+
+    def unary(self):
+        kind, op = self.peek()
+        if kind == "op" and op in "+-":
+            self.i += 1
+            operand = self.expr(_UNARY_PRECEDENCE)
+            return ("neg", operand) if op == "-" else operand
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind in ("num", "str"):
+            return ("const", value)
+        if kind == "ref":
+            return ("ref",) + value
+        if kind == "name":
+            if self.peek() == ("op", "("):
+                self.i += 1
+                args = []
+                if self.peek() != ("op", ")"):
+                    args.append(self.expr())
+                    while self.peek() == ("op", ","):
+                        self.i += 1
+                        args.append(self.expr())
+                self.take("op", ")")
+                return ("call", value, args)
+            if value in ("TRUE", "FALSE"):
+                return ("const", value == "TRUE")
+            return ("const", NAME)
+        if (kind, value) == ("op", "("):
+            node = self.expr()
+            self.take("op", ")")
+            return node
+        raise SyntaxError(f"Unexpected token {value!r}")
+
+
+def parse_formula(formula: str):
+    """Parse a formula (with or without the leading '=') into an AST."""
+    parser = _Parser(_tokenize(formula[1:] if formula.startswith("=") else formula))
+    node = parser.expr()
+    if parser.i != len(parser.tokens):
+        raise SyntaxError(f"Trailing tokens in {formula!r}")
+    return node
+
+
+def _refs(node, sheet):
+    """Yield every (sheet, col, row) a formula reads."""
+    kind = node[0]
+    if kind == "ref":
+        _, ref_sheet, start, stop = node
+        ref_sheet = ref_sheet or sheet
+        stop = stop or start
+        for col in range(min(start[0], stop[0]), max(start[0], stop[0]) + 1):
+            for row in range(min(start[1], stop[1]), max(start[1], stop[1]) + 1):
+                yield ref_sheet, col, row
+    elif kind == "bin":
+        yield from _refs(node[2], sheet)
+        yield from _refs(node[3], sheet)
+    elif kind == "neg":
+        yield from _refs(node[1], sheet)
+    elif kind == "call":
+        for arg in node[2]:
+            yield from _refs(arg, sheet)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# EVALUATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _number(v):
+    """Coerce a scalar to float the way Excel arithmetic does."""
+    if isinstance(v, FormulaError):
+        return v
+    if v is None or v == "":
+        return 0.0
+    if isinstance(v, bool):
+        return float(v)
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return VALUE
+
+
+def _text(v):
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    if isinstance(v, float):
+        return str(int(v)) if v.is_integer() else repr(v)
+    return str(v)
+
+
+def _compare(op, a, b):
+    # Excel ordering across types: numbers < text < logicals; blanks act as 0 / ""
+    def key(v):
+        if isinstance(v, bool):
+            return (2, v)
+        if isinstance(v, str):
+            return (1, v.lower())
+        return (0, 0.0 if v is None else float(v))
+    ka, kb = key(a), key(b)
+    return {
+        "=": ka == kb, "<>": ka != kb,
+        "<": ka < kb, ">": ka > kb,
+        "<=": ka <= kb, ">=": ka >= kb,
+    }[op]
+
+
+def _arith(op, a, b):
+    if op == "&":
+        return _text(a) + _text(b)
+    if op in ("=", "<>", "<", ">", "<=", ">="):
+        return _compare(op, a, b)
+    a, b = _number(a), _number(b)
+    if isinstance(a, FormulaError):
+        return a
+    if isinstance(b, FormulaError):
+        return b
+    try:
+        if op == "+":
+            return a + b
+        if op == "-":
+            return a - b
+        if op == "*":
+            return a * b
+        if op == "/":
+            return DIV0 if b == 0 else a / b
+        if op == "^":
+            result = a ** b
+            return NUM if isinstance(result, complex) else result
+    except (OverflowError, ZeroDivisionError):
+        return NUM
+    raise ValueError(f"Unknown operator {op}")
+
+
+def _flatten(values):
+    for v in values:
+        if isinstance(v, list):
+            yield from _flatten(v)
+        else:
+            yield v
+
+
+def _numbers(args):
+    """Numeric cells out of range/scalar args — text and blanks are skipped, errors propagate."""
+    out = []
+    for v in _flatten(args):
+        if isinstance(v, FormulaError):
+            return v
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            out.append(float(v))
+    return out
+
+
+def _fn_round(x, digits=0.0):
+    x, digits = _number(x), _number(digits)
+    if isinstance(x, FormulaError):
+        return x
+    if isinstance(digits, FormulaError):
+        return digits
+    # Excel rounds half away from zero
+    scale = 10 ** int(digits)
+    return math.copysign(math.floor(abs(x) * scale + 0.5) / scale, x)
+
+
+def _fn_rank(x, values, order=0.0):
+    x = _number(x)
+    nums = _numbers([values])
+    if isinstance(x, FormulaError):
+        return x
+    if isinstance(nums, FormulaError):
+        return nums
+    if x not in nums:
+        return NA
+    if _number(order):
+        return float(1 + sum(1 for v in nums if v < x))
+    return float(1 + sum(1 for v in nums if v > x))
+
+
+def _fn_sumproduct(*ranges):
+    flat = [list(_flatten([r])) for r in ranges]
+    if len({len(f) for f in flat}) > 1:
+        return VALUE
+    total = 0.0
+    for items in zip(*flat):
+        for v in items:
+            if isinstance(v, FormulaError):
+                return v
+        product = 1.0
+        for v in items:
+            product *= v if isinstance(v, (int, float)) and not isinstance(v, bool) else 0.0
+        total += product
+    return total
+
+
+def _aggregate(fn):
+    def call(*args):
+        nums = _numbers(args)
+        return nums if isinstance(nums, FormulaError) else fn(nums)
+    return call
+
+
+_FUNCTIONS = {
+    "ROUND": _fn_round,
+    "RANK": _fn_rank,
+    "SUMPRODUCT": _fn_sumproduct,
+    "SUM": _aggregate(sum),
+    "MIN": _aggregate(lambda v: min(v) if v else 0.0),
+    "MAX": _aggregate(lambda v: max(v) if v else 0.0),
+    "AVERAGE": _aggregate(lambda v: sum(v) / len(v) if v else DIV0),
+    "ABS": lambda x: x if isinstance(_number(x), FormulaError) else abs(_number(x)),
+}
+
+
+def _eval(node, sheet, cells):
+    kind = node[0]
+    if kind == "const":
+        return node[1]
+    if kind == "ref":
+        _, ref_sheet, start, stop = node
+        ref_sheet = ref_sheet or sheet
+        if stop is None:
+            return cells.get((ref_sheet, start[0], start[1]))
+        return [
+            [cells.get((ref_sheet, col, row)) for col in range(start[0], stop[0] + 1)]
+            for row in range(start[1], stop[1] + 1)
+        ]
+    if kind == "bin":
+        a = _eval(node[2], sheet, cells)
+        b = _eval(node[3], sheet, cells)
+        for v in (a, b):
+            if isinstance(v, FormulaError):
+                return v
+        return _arith(node[1], a, b)
+    if kind == "neg":
+        v = _number(_eval(node[1], sheet, cells))
+        return v if isinstance(v, FormulaError) else -v
+    if kind == "call":
+        name, args = node[1], node[2]
+        if name == "IF":
+            # Lazy: only the chosen branch is evaluated
+            cond = _eval(args[0], sheet, cells)
+            if isinstance(cond, FormulaError):
+                return cond
+            cond = bool(_number(cond)) if not isinstance(cond, str) else VALUE
+            if isinstance(cond, FormulaError):
+                return cond
+            if cond:
+                return _eval(args[1], sheet, cells) if len(args) > 1 else True
+            return _eval(args[2], sheet, cells) if len(args) > 2 else False
+        fn = _FUNCTIONS.get(name)
+        if fn is None:
+            return NAME
+        try:
+            return fn(*[_eval(a, sheet, cells) for a in args])
+        except (TypeError, ValueError, OverflowError):
+            return VALUE
+    raise ValueError(f"Unknown node {kind}")
+
+
+def evaluate_cells(cells: dict) -> dict:
+    """
+    Evaluate every formula in a workbook's cells.
+
+    Args:
+        cells: {(sheet, col, row): value}, where formulas are strings
+               starting with "=" and everything else is a constant.
+
+    Returns:
+        {(sheet, col, row): result} for each formula cell that could be
+        evaluated. Unparseable formulas and cycles are omitted.
+    """
+    values = {k: v for k, v in cells.items() if not (isinstance(v, str) and v.startswith("="))}
+    formulas = {}
+    for key, text in cells.items():
+        if key not in values:
+            try:
+                formulas[key] = parse_formula(text)
+            except SyntaxError:
+                continue
+    return _evaluate(formulas, values)
+
+
+def _evaluate(formulas: dict, values: dict) -> dict:
+    """Evaluate parsed formulas in dependency order; `values` gains the results."""
+    # Kahn's algorithm over formula -> formula dependencies
+    waiting = {}
+    dependents = {}
+    for key, node in formulas.items():
+        # A self-reference waits on itself and so never becomes ready
+        deps = {d for d in _refs(node, key[0]) if d in formulas}
+        waiting[key] = len(deps)
+        for d in deps:
+            dependents.setdefault(d, []).append(key)
+
+    ready = deque(k for k, n in waiting.items() if n == 0)
+    results = {}
+    while ready:
+        key = ready.popleft()
+        result = _eval(formulas[key], key[0], values)
+        if isinstance(result, float) and not math.isfinite(result):
+            result = NUM
+        values[key] = results[key] = result
+        for dep in dependents.get(key, ()):
+            waiting[dep] -= 1
+            if waiting[dep] == 0:
+                ready.append(dep)
+
+    return results
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# XLSX PACKAGE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_SHEET_ENTRY = re.compile(r'<sheet\b[^>]*?\bname="([^"]*)"[^>]*?\br:id="([^"]*)"')
+_REL_ENTRY = re.compile(r'<Relationship\b[^>]*?\bTarget="([^"]*)"[^>]*?\bId="([^"]*)"')
+_CELL = re.compile(r'<c r="([A-Z]+)(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_INLINE = re.compile(r"<t[^>]*>(.*?)</t>", re.S)
+_V = re.compile(r"<v>(.*?)</v>", re.S)
+_F = re.compile(r"<f[^>]*>(.*?)</f>", re.S)
+_TYPE = re.compile(r'\bt="(\w+)"')
+_SHARED = re.compile(r"<si>(.*?)</si>", re.S)
+
+STREAM_CHUNK = 1 << 16     # bytes read per step when scanning / rewriting a sheet
+
+
+def _sheet_paths(z: zipfile.ZipFile) -> dict:
+    """Sheet name -> zip member path, via workbook.xml and its rels."""
+    rels = {rid: target for target, rid in _REL_ENTRY.findall(z.read("xl/_rels/workbook.xml.rels").decode())}
+    paths = {}
+    for name, rid in _SHEET_ENTRY.findall(z.read("xl/workbook.xml").decode()):
+        target = rels[rid]
+        paths[unescape(name, {"&quot;": '"', "&apos;": "'"})] = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    return paths
+
+
+def _scan_cells(sheet: str, xml: str, shared: list | None):
+    """
+    Yield (key, value) for each non-empty cell; formulas come back as "=...".
+
+    With shared=None only formula cells are yielded.
+    """
+    for col, row, attrs, body in _CELL.findall(xml):
+        if not body:
+            continue
+        key = (sheet, column_index_from_string(col), int(row))
+        f = _F.search(body)
+        if f:
+            yield key, "=" + unescape(f.group(1))
+            continue
+        if shared is None:
+            continue
+        t = _TYPE.search(attrs)
+        t = t.group(1) if t else "n"
+        if t == "inlineStr":
+            yield key, unescape("".join(_INLINE.findall(body)))
+            continue
+        v = _V.search(body)
+        if v is None or v.group(1) == "":
+            continue
+        raw = v.group(1)
+        if t == "s":
+            yield key, shared[int(raw)]
+        elif t == "b":
+            yield key, raw == "1"
+        elif t in ("str", "e"):
+            yield key, FormulaError(unescape(raw)) if t == "e" else unescape(raw)
+        else:
+            yield key, float(raw)
+
+
+def _cached(value) -> tuple[str, str]:
+    """(t attribute, <v> text) for a computed value."""
+    if isinstance(value, FormulaError):
+        return "e", escape(value)
+    if isinstance(value, bool):
+        return "b", "1" if value else "0"
+    if isinstance(value, str):
+        return "str", escape(value)
+    if value is None:
+        return "n", "0"
+    value = float(value)
+    return "n", str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+def _write_values(sheet: str, xml: str, results: dict) -> str:
+    def fill(m):
+        col, row, attrs, body = m.groups()
+        if not body or "<f" not in body:
+            return m.group(0)
+        key = (sheet, column_index_from_string(col), int(row))
+        if key not in results:
+            return m.group(0)
+        t, v = _cached(results[key])
+        attrs = _TYPE.sub("", attrs).rstrip()
+        body = re.sub(r"<v\s*/>|<v>.*?</v>", "", body, flags=re.S) + f"<v>{v}</v>"
+        type_attr = "" if t == "n" else f' t="{t}"'
+        return f'<c r="{col}{row}"{attrs}{type_attr}>{body}</c>'
+    return _CELL.sub(fill, xml)
+
+
+def _pieces(stream, end: bytes):
+    """
+    Decoded text of a zip member in chunks that each finish on `end`.
+
+    Cutting only after a closing tag keeps every <c> (or <si>) element whole,
+    so the regexes above can run on one piece at a time.
+    """
+    tail = b""
+    while True:
+        chunk = stream.read(STREAM_CHUNK)
+        if not chunk:
+            break
+        buf = tail + chunk
+        cut = buf.rfind(end)
+        if cut < 0:
+            tail = buf
+            continue
+        cut += len(end)
+        yield buf[:cut].decode()
+        tail = buf[cut:]
+    if tail:
+        yield tail.decode()
+
+
+def add_cached_values(xlsx: bytes) -> bytes:
+    """
+    Evaluate a workbook's formulas and store the results as cached values.
+
+    Sheets are streamed one zip entry at a time, STREAM_CHUNK bytes (cut on
+    row boundaries) at a time, so no sheet's XML is ever held whole:
+
+        1. parse every formula and note the cells it reads
+        2. load only those cells' constants (labels and unused inputs are skipped)
+        3. evaluate, then rewrite each sheet into the output archive
+
+    Args:
+        xlsx: Workbook bytes as written by openpyxl.
+
+    Returns:
+        Workbook bytes with <v> filled in for every formula that evaluated.
+        Formulas are kept, so Excel still recalculates on open.
+    """
+    with zipfile.ZipFile(io.BytesIO(xlsx)) as z:
+        paths = _sheet_paths(z)
+
+        def scan(shared):
+            for name, path in paths.items():
+                with z.open(path) as f:
+                    for piece in _pieces(f, b"</row>"):
+                        yield from _scan_cells(name, piece, shared)
+
+        formulas = {}
+        needed = set()
+        for key, text in scan(None):
+            try:
+                formulas[key] = node = parse_formula(text)
+            except SyntaxError:
+                continue
+            needed.update(_refs(node, key[0]))
+
+        shared = []
+        if "xl/sharedStrings.xml" in z.namelist():
+            with z.open("xl/sharedStrings.xml") as f:
+                for piece in _pieces(f, b"</si>"):
+                    shared.extend(unescape("".join(_INLINE.findall(si))) for si in _SHARED.findall(piece))
+        values = {}
+        for key, value in scan(shared):
+            if key in needed and key not in formulas:
+                values[key] = value
+        del needed, shared
+
+        results = _evaluate(formulas, values)
+        del formulas, values
+
+        out = io.BytesIO()
+        by_path = {path: name for name, path in paths.items()}
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+            for info in z.infolist():
+                name = by_path.get(info.filename)
+                with z.open(info) as src, dst.open(info, "w") as w:
+                    if name is None:
+                        shutil.copyfileobj(src, w, STREAM_CHUNK)
+                        continue
+                    for piece in _pieces(src, b"</row>"):
+                        w.write(_write_values(name, piece, results).encode())
+    return out.getvalue()
@@ -0,0 +1,277 @@
+"""
+Goal-Seek Solver
+
+Inverts the return calculator: finds the value of one input (rent, hard cost,
+exit cap, land cost, unit count) that hits a return target (LP IRR, LP equity
+multiple, or profit on cost).
+
+Uses bracketed root-finding on compute_returns_batch(). Each iteration scores
+a grid of candidates for every goal in a single vectorized call, then narrows
+each goal's bracket to the grid cell where its metric crosses the target.
+"""
+
+import re
+
+import numpy as np
+
+from FallonPrototype.shared.pro_forma_frame import ProFormaFrame, as_frame
+from FallonPrototype.shared.return_calculator import compute_returns_batch
+
+# Solver input name -> (section, field). "rent" depends on program type.
+SOLVER_INPUTS = {
+    "rent": None,
+    "hard_cost_psf": ("cost_assumptions", "hard_cost_psf"),
+    "exit_cap": ("return_metrics", "exit_cap_rate_pct"),
+    "land_cost": ("cost_assumptions", "land_cost_total"),
+    "unit_count": ("project_summary", "unit_count"),
+}
+
+_RENT_FIELDS = {
+    "multifamily": "rent_psf_monthly",
+    "condo": "rent_psf_monthly",
+    "office": "rent_psf_annual_nnn",
+    "hotel": "adr",
+}
+
+# Target name -> compute_returns() result key
+TARGET_METRICS = {
+    "target_lp_irr_pct": "calc_irr_approx_pct",
+    "target_equity_multiple": "calc_equity_multiple_approx",
+    "target_profit_on_cost_pct": "calc_profit_on_cost_pct",
+}
+
+
+_GOAL_INPUT = re.compile(r'\b(rent|adr|hard\s*cost|exit\s*cap|cap\s*rate|land(?:\s*(?:cost|price))?|units?|unit\s*count)\b')
+_GOAL_TARGET = re.compile(
+    r'(\d+\.?\d*)\s*%\s*(?:lp\s*)?irr|(\d+\.?\d*)\s*x\b|(\d+\.?\d*)\s*%\s*(?:profit\s*on\s*cost|poc|margin)'
+)
+# Leading word of an input phrase (plural stripped) -> solver input name
+_GOAL_INPUT_NAMES = {
+    "rent": "rent", "adr": "rent", "hard": "hard_cost_psf", "exit": "exit_cap",
+    "cap": "exit_cap", "land": "land_cost", "unit": "unit_count",
+}
+
+
+def parse_goal_question(text: str) -> dict | None:
+    """
+    Read a goal-seek question like "what rent do I need for a 15% IRR?".
+
+    Returns:
+        {"target", "value", "description", "inputs"} with inputs as solver
+        input names in the order mentioned, or None if the text names no
+        target metric or no solvable input.
+    """
+    m = text.lower()
+    target = _GOAL_TARGET.search(m)
+    if not target or not _GOAL_INPUT.search(m):
+        return None
+    if target.group(1):
+        name, value, desc = "target_lp_irr_pct", float(target.group(1)), f"{target.group(1)}% LP IRR"
+    elif target.group(2):
+        name, value, desc = "target_equity_multiple", float(target.group(2)), f"{target.group(2)}x equity multiple"
+    else:
+        name, value, desc = "target_profit_on_cost_pct", float(target.group(3)), f"{target.group(3)}% profit on cost"
+
+    inputs = []
+    for match in _GOAL_INPUT.finditer(m):
+        word = re.match(r'[a-z]+', match.group(1)).group()
+        input_name = _GOAL_INPUT_NAMES[word[:-1] if word == "units" else word]
+        if input_name not in inputs:
+            inputs.append(input_name)
+    return {"target": name, "value": value, "description": desc, "inputs": inputs}
+
+
+def resolve_input_field(pro_forma: dict | ProFormaFrame, input_name: str) -> tuple[str, str] | None:
+    """
+    Map a solver input name to its (section, field) in the pro forma.
+
+    Returns:
+        Tuple of (section, field), or None if the input doesn't apply
+        (e.g. "rent" on a program type without a rent driver).
+    """
+    if input_name == "rent":
+        program_type = as_frame(pro_forma).raw("project_summary", "program_type", "multifamily")
+        field = _RENT_FIELDS.get(program_type)
+        return ("revenue_assumptions", field) if field else None
+    return SOLVER_INPUTS.get(input_name)
+
+
+def _default_bounds(frame: ProFormaFrame, input_name: str, base: float) -> tuple[float, float]:
+    """Search bracket for an input when the caller doesn't supply one."""
+    if input_name == "exit_cap":
+        return 2.0, 12.0
+    if input_name == "land_cost":
+        total_cost = frame.get("cost_assumptions", "total_project_cost", 0) or 0
+        return 0.0, max(base * 5, total_cost)
+    return base * 0.25, base * 4
+
+
+def solve_goals(
+    pro_forma: dict | ProFormaFrame,
+    goals: list[dict],
+    grid_points: int = 33,
+    max_iter: int = 8,
+    rel_tol: float = 1e-6,
+) -> list[dict]:
+    """
+    Solve several goal-seek problems at once.
+
+    Args:
+        pro_forma: The base pro forma (dict or ProFormaFrame).
+        goals: List of dicts with keys:
+               "input"  — one of SOLVER_INPUTS
+               "target" — one of TARGET_METRICS
+               "value"  — target metric value (e.g. 15.0 for 15% IRR, 1.8 for 1.8x)
+               "bounds" — optional (low, high) search bracket for the input
+        grid_points: Candidates scored per goal per iteration.
+        max_iter: Maximum bracket-narrowing iterations.
+        rel_tol: Stop once the bracket is this narrow relative to the input.
+
+    Returns:
+        One result dict per goal, in order:
+          {
+            "input", "field", "target", "target_value",
+            "solved":        bool,
+            "value":         solved input value (or closest achievable),
+            "base_value":    current input value,
+            "achieved":      metric at "value",
+            "message":       plain-English summary,
+          }
+    """
+    frame = as_frame(pro_forma)
+    results = [None] * len(goals)
+    active = []  # (goal_index, key, metric, target_value, lo, hi)
+
+    for i, goal in enumerate(goals):
+        input_name = goal.get("input")
+        target = goal.get("target")
+        field = resolve_input_field(frame, input_name)
+        result = {
+            "input": input_name,
+            "field": ".".join(field) if field else None,
+            "target": target,
+            "target_value": goal.get("value"),
+            "solved": False,
+            "value": None,
+            "base_value": None,
+            "achieved": None,
+            "message": "",
+        }
+        results[i] = result
+
+        if field is None:
+            result["message"] = f"'{input_name}' is not a solvable input for this program type."
+            continue
+        if target not in TARGET_METRICS:
+            result["message"] = f"Unknown target '{target}'. Use one of: {', '.join(TARGET_METRICS)}."
+            continue
+
+        base = frame.get(*field)
+        result["base_value"] = base
+        if base is None and "bounds" not in goal:
+            result["message"] = f"No current value for {field[1]} to search around."
+            continue
+
+        lo, hi = goal.get("bounds") or _default_bounds(frame, input_name, base)
+        active.append((i, result["field"], TARGET_METRICS[target], float(goal["value"]), float(lo), float(hi)))
+
+    if not active:
+        return results
+
+    idx = np.array([a[0] for a in active])
+    keys = [a[1] for a in active]
+    metrics = [a[2] for a in active]
+    targets = np.array([a[3] for a in active])
+    lo = np.array([a[4] for a in active])
+    hi = np.array([a[5] for a in active])
+    lo0, hi0 = lo.copy(), hi.copy()
+    n = len(active)
+
+    def evaluate(x: np.ndarray) -> np.ndarray:
+        """Score candidate inputs x (shape n × k) — one kernel call for all goals."""
+        overrides = {}
+        for key in set(keys):
+            arr = np.full(x.shape, np.nan)
+            rows = [g for g in range(n) if keys[g] == key]
+            arr[rows] = x[rows]
+            overrides[key] = arr
+        calc = compute_returns_batch(frame, overrides)
+        return np.stack([calc[metrics[g]][g] for g in range(n)])
+
+    t = np.linspace(0.0, 1.0, grid_points)
+    solved = np.zeros(n, dtype=bool)
+    reachable = np.ones(n, dtype=bool)
+    closest = np.full(n, np.nan)
+
+    for iteration in range(max_iter):
+        x = lo[:, None] + (hi - lo)[:, None] * t[None, :]
+        diff = evaluate(x) - targets[:, None]
+
+        for g in range(n):
+            if solved[g] or not reachable[g]:
+                continue
+            d = diff[g]
+            finite = np.isfinite(d)
+            crossing = np.nonzero(finite[:-1] & finite[1:] & (np.sign(d[:-1]) * np.sign(d[1:]) <= 0))[0]
+            if crossing.size == 0:
+                if iteration == 0:
+                    reachable[g] = False
+                    if finite.any():
+                        closest[g] = x[g][np.nanargmin(np.abs(np.where(finite, d, np.nan)))]
+                continue
+            c = crossing[0]
+            lo[g], hi[g] = x[g, c], x[g, c + 1]
+            if d[c] == 0:
+                hi[g] = lo[g]
+            elif d[c + 1] == 0:
+                lo[g] = hi[g]
+            scale = max(abs(lo[g]), abs(hi[g]), 1.0)
+            if hi[g] - lo[g] <= rel_tol * scale:
+                solved[g] = True
+
+        if (solved | ~reachable).all():
+            break
+
+    # Final answer: midpoint of the bracket, or the closest grid point if unreachable
+    values = np.where(reachable, (lo + hi) / 2, closest)
+    achieved = evaluate(values[:, None])[:, 0]
+
+    for g, i in enumerate(idx):
+        result = results[i]
+        value = float(values[g]) if np.isfinite(values[g]) else None
+        result["value"] = value
+        result["achieved"] = float(achieved[g]) if np.isfinite(achieved[g]) else None
+        result["solved"] = bool(reachable[g])
+        label = result["field"].split(".")[1]
+        if reachable[g]:
+            result["message"] = f"{label} = {value:,.4g} hits {result['target']} {targets[g]:g}."
+        else:
+            result["message"] = (
+                f"{result['target']} {targets[g]:g} is not reachable by moving {label} "
+                f"between {lo0[g]:,.4g} and {hi0[g]:,.4g}."
+            )
+
+    return results
+
+
+def solve_for_target(
+    pro_forma: dict,
+    input_name: str,
+    target: str,
+    value: float,
+    bounds: tuple[float, float] | None = None,
+) -> dict:
+    """
+    Solve a single goal-seek problem.
+
+    Example:
+        solve_for_target(pf, "rent", "target_lp_irr_pct", 15.0)
+        → rent_psf_monthly needed for a 15% LP IRR
+
+    Returns:
+        Result dict as described in solve_goals().
+    """
+    goal = {"input": input_name, "target": target, "value": value}
+    if bounds is not None:
+        goal["bounds"] = bounds
+    return solve_goals(pro_forma, [goal])[0]
@@ -0,0 +1,276 @@
+"""
+Hybrid Search — Lexical + Semantic Retrieval with Reranking
+
+Two alternatives to plain vector search (vector_store.query_collection),
+returning results in the same shape so agents can switch modes freely:
+
+  hybrid_query()    BM25 keyword ranking fused with the vector ranking by
+                    reciprocal rank fusion (RRF). Catches exact terms the
+                    embedding blurs — deal names, submarkets, "Section 4.2".
+  reranked_query()  hybrid candidates re-scored against the question. Uses a
+                    cross-encoder when sentence-transformers is installed,
+                    otherwise the best MiniLM similarity between the question
+                    and any single sentence of the chunk.
+
+The BM25 index for a collection is built from its stored documents on first
+use and rebuilt whenever the collection size changes.
+"""
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from FallonPrototype.shared.vector_store import (
+    get_collection,
+    query_collection,
+    embed_texts,
+    _classify_relevance,
+)
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60                 # reciprocal rank fusion constant
+CANDIDATE_POOL = 20        # results taken from each ranking before fusion / reranking
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+_SENTENCE_CACHE_SIZE = 4096
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+_SENTENCE = re.compile(r"(?<=[.!?;])\s+|\n+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were what which with how does do".split()
+)
+
+_indexes = {}              # collection name -> _BM25Index
+_index_lock = threading.Lock()
+
+_cross_encoder = None
+_cross_encoder_unavailable = False
+_sentence_vectors = OrderedDict()   # sentence text -> unit vector
+_sentence_lock = threading.Lock()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BM25
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word / number tokens without stopwords ("4.2" stays one token)."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _unit(vec: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class _BM25Index:
+    """In-memory Okapi BM25 over every document of one collection."""
+
+    def __init__(self, ids: list[str], texts: list[str]):
+        self.ids = ids
+        self.term_counts = [Counter(tokenize(t)) for t in texts]
+        self.lengths = [sum(c.values()) for c in self.term_counts]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        df = Counter(term for counts in self.term_counts for term in counts)
+        n = len(ids)
+        self.idf = {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+
+    def search(self, query: str, n_results: int, allowed: set | None = None) -> list[tuple[str, float]]:
+        """[(id, score)] for the top documents containing any query term."""
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        if not terms:
+            return []
+        scores = []
+        for i, counts in enumerate(self.term_counts):
+            if allowed is not None and self.ids[i] not in allowed:
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((self.ids[i], score))
+        scores.sort(key=lambda s: -s[1])
+        return scores[:n_results]
+
+
+def _get_index(collection_name: str) -> _BM25Index:
+    """BM25 index for a collection, rebuilt when its document count changes."""
+    collection = get_collection(collection_name)
+    count = collection.count()
+    with _index_lock:
+        index = _indexes.get(collection_name)
+        if index is not None and len(index.ids) == count:
+            return index
+    data = collection.get(include=["documents"])
+    index = _BM25Index(data["ids"], [d or "" for d in data["documents"]])
+    with _index_lock:
+        _indexes[collection_name] = index
+    return index
+
+
+def lexical_query(
+    collection_name: str,
+    query_text: str,
+    n_results: int = 5,
+    where: dict | None = None,
+) -> list[dict]:
+    """
+    BM25 keyword search over a collection.
+
+    Returns:
+        Results shaped like query_collection()'s, most relevant first, with a
+        "bm25" score instead of a distance.
+    """
+    index = _get_index(collection_name)
+    allowed = None
+    if where:
+        allowed = set(get_collection(collection_name).get(where=where, include=[])["ids"])
+    hits = index.search(query_text, n_results, allowed)
+    if not hits:
+        return []
+    stored = get_collection(collection_name).get(ids=[h[0] for h in hits], include=["documents", "metadatas"])
+    by_id = {i: (doc, meta) for i, doc, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])}
+    return [
+        {"id": hit_id, "text": by_id[hit_id][0], "metadata": by_id[hit_id][1], "bm25": round(score, 4)}
+        for hit_id, score in hits if hit_id in by_id
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HYBRID (RRF)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def hybrid_query(
+    collection_name: str,
+    query_text: str,
+    n_results: int = 5,
+    where: dict | None = None,
+    pool: int = CANDIDATE_POOL,
+) -> list[dict]:
+    """
+    Vector and BM25 rankings fused by reciprocal rank fusion.
+
+    Each document scores sum(1 / (RRF_K + rank)) over the rankings it
+    appears in. Documents found only by BM25 get their cosine distance
+    computed from the stored embedding, so "distance" and "relevance" mean
+    the same as in query_collection().
+
+    Args:
+        collection_name: Which collection to search.
+        query_text: Plain-English query.
+        n_results: Number of fused results to return.
+        where: Optional ChromaDB metadata filter, applied to both rankings.
+        pool: Candidates taken from each ranking before fusion.
+    """
+    vector = query_collection(collection_name, query_text, n_results=max(pool, n_results), where=where)
+    lexical = lexical_query(collection_name, query_text, n_results=max(pool, n_results), where=where)
+
+    fused, results = {}, {}
+    for ranking in (vector, lexical):
+        for rank, result in enumerate(ranking, 1):
+            fused[result["id"]] = fused.get(result["id"], 0.0) + 1.0 / (RRF_K + rank)
+            entry = results.setdefault(result["id"], dict(result))
+            if "bm25" in result:
+                entry["bm25"] = result["bm25"]
+
+    top = sorted(fused, key=lambda i: -fused[i])[:n_results]
+    missing = [i for i in top if "distance" not in results[i]]
+    if missing:
+        stored = get_collection(collection_name).get(ids=missing, include=["embeddings"])
+        query_vec = _unit(np.asarray(embed_texts([query_text])[0], dtype=np.float32))
+        for doc_id, emb in zip(stored["ids"], stored["embeddings"]):
+            distance = round(1.0 - float(_unit(np.asarray(emb, dtype=np.float32)) @ query_vec), 4)
+            results[doc_id].update({"distance": distance, "relevance": _classify_relevance(distance)})
+
+    output = []
+    for doc_id in top:
+        result = results[doc_id]
+        result.setdefault("distance", 1.0)
+        result.setdefault("relevance", "low")
+        result["rrf"] = round(fused[doc_id], 5)
+        output.append(result)
+    return output
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RERANKING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _load_cross_encoder():
+    """sentence-transformers CrossEncoder, or None if not installed / not downloadable."""
+    global _cross_encoder, _cross_encoder_unavailable
+    if _cross_encoder is None and not _cross_encoder_unavailable:
+        try:
+            from sentence_transformers import CrossEncoder
+            _cross_encoder = CrossEncoder(RERANK_MODEL)
+        except Exception:
+            _cross_encoder_unavailable = True
+    return _cross_encoder
+
+
+def _sentence_scores(query_text: str, texts: list[str]) -> list[float]:
+    """Best cosine similarity between the query and any sentence of each text."""
+    per_text = [[s.strip() for s in _SENTENCE.split(t) if len(s.strip()) > 20] or [t] for t in texts]
+    with _sentence_lock:
+        todo = list({s for sentences in per_text for s in sentences if s not in _sentence_vectors})
+    if todo:
+        vectors = embed_texts(todo)
+        with _sentence_lock:
+            for sentence, vec in zip(todo, vectors):
+                _sentence_vectors[sentence] = _unit(np.asarray(vec, dtype=np.float32))
+            while len(_sentence_vectors) > _SENTENCE_CACHE_SIZE:
+                _sentence_vectors.popitem(last=False)
+
+    query_vec = _unit(np.asarray(embed_texts([query_text])[0], dtype=np.float32))
+    scores = []
+    with _sentence_lock:
+        for sentences in per_text:
+            vecs = [_sentence_vectors[s] for s in sentences if s in _sentence_vectors]
+            scores.append(float(np.max(np.stack(vecs) @ query_vec)) if vecs else 0.0)
+    return scores
+
+
+def rerank(query_text: str, results: list[dict], n_results: int | None = None) -> list[dict]:
+    """
+    Re-order retrieved results by how well each one answers the query.
+
+    Args:
+        query_text: The question.
+        results: Output of query_collection() / hybrid_query().
+        n_results: Keep only this many (default: all).
+
+    Returns:
+        The results, best first, each with a "rerank" score.
+    """
+    if not results:
+        return []
+    texts = [r["text"] for r in results]
+    model = _load_cross_encoder()
+    if model is not None:
+        scores = [float(s) for s in model.predict([(query_text, t) for t in texts])]
+    else:
+        scores = _sentence_scores(query_text, texts)
+    ranked = sorted(zip(scores, range(len(results))), key=lambda s: (-s[0], s[1]))
+    output = []
+    for score, i in ranked[:n_results or len(results)]:
+        output.append({**results[i], "rerank": round(score, 4)})
+    return output
+
+
+def reranked_query(
+    collection_name: str,
+    query_text: str,
+    n_results: int = 5,
+    where: dict | None = None,
+    pool: int = CANDIDATE_POOL,
+) -> list[dict]:
+    """hybrid_query() for `pool` candidates, reranked down to n_results."""
+    candidates = hybrid_query(collection_name, query_text, n_results=max(pool, n_results), where=where, pool=pool)
+    return rerank(query_text, candidates, n_results)
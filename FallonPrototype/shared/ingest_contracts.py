@@ -10,20 +10,26 @@ Usage: python -m FallonPrototype.shared.ingest_contracts
 import os
 import sys
 import json
+import itertools
 from datetime import datetime
 
 _SHARED_DIR = os.path.dirname(os.path.abspath(__file__))
 _PROTO_DIR = os.path.dirname(_SHARED_DIR)
 sys.path.insert(0, os.path.dirname(_PROTO_DIR))
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
 from FallonPrototype.shared.vector_store import (
     add_documents,
+    get_collection,
+    delete_documents,
     CONTRACTS_COLLECTION,
+    CONTRACT_CLAUSES_COLLECTION,
     DEAL_DATA_COLLECTION,
 )
 from FallonPrototype.shared.claude_client import call_claude
+from FallonPrototype.shared import answer_cache
+from FallonPrototype.shared.tracing import traced
+from FallonPrototype.shared.text_stream import iter_file_pages, join_pages
+from FallonPrototype.shared.contract_chunker import iter_contract_chunks, child_chunks
 from FallonPrototype.shared.contract_models import (
     ExtractedContract,
     CONTRACT_TYPES,
@@ -33,11 +39,10 @@ from FallonPrototype.shared.contract_models import (
 
 _CONTRACTS_DIR = os.path.join(_PROTO_DIR, "data", "contracts")
 
-_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1500,
-    chunk_overlap=200,
-    separators=["\n\n", "\n", ". ", " ", ""],
-)
+EXTRACTION_CHARS = 15000   # contract prefix sent for metadata extraction
+EMBED_BATCH_SIZE = 64      # chunks per add_documents() call while streaming
+
+CHUNKER_VERSION = "structure-v1"   # stored on each chunk; older chunks are replaced on re-ingest
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # Extraction System Prompt
@@ -72,6 +77,7 @@ Rules:
 Return ONLY valid JSON, no other text."""
 
 
+@traced("ingest.extract_metadata")
 def extract_contract_metadata(contract_text: str) -> dict | None:
     """
     Use Claude to extract structured metadata from contract text.
@@ -79,8 +85,9 @@ def extract_contract_metadata(contract_text: str) -> dict | None:
     """
     response = call_claude(
         EXTRACTION_PROMPT,
-        f"CONTRACT DOCUMENT:\n\n{contract_text[:15000]}",  # Limit to avoid token overflow
+        f"CONTRACT DOCUMENT:\n\n{contract_text[:EXTRACTION_CHARS]}",  # Limit to avoid token overflow
         max_tokens=2000,
+        site="ingestion_extraction",
     )
     
     if response.startswith("ERROR:"):
@@ -102,32 +109,50 @@ def extract_contract_metadata(contract_text: str) -> dict | None:
         return None
 
 
+def _read_error(filepath: str, e: Exception):
+    if isinstance(e, ImportError):
+        print(f"  [warning] pypdf not installed, skipping PDF: {filepath}")
+    else:
+        print(f"  [error] Failed to read {filepath}: {e}")
+
+
 def read_contract_file(filepath: str) -> str | None:
     """Read contract content from file (supports .txt and basic .pdf)."""
-    _, ext = os.path.splitext(filepath)
-    
-    if ext.lower() == ".txt":
-        with open(filepath, "r", encoding="utf-8") as f:
-            return f.read().strip()
-    
-    elif ext.lower() == ".pdf":
-        try:
-            import pypdf
-            reader = pypdf.PdfReader(filepath)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
-        except ImportError:
-            print(f"  [warning] pypdf not installed, skipping PDF: {filepath}")
-            return None
-        except Exception as e:
-            print(f"  [error] Failed to read PDF {filepath}: {e}")
-            return None
-    
-    return None
+    try:
+        text = join_pages(iter_file_pages(filepath)).strip()
+    except Exception as e:
+        _read_error(filepath, e)
+        return None
+    return text or None
 
 
+def _drop_stale_chunks(filename: str, collection_name: str = CONTRACTS_COLLECTION, doc_type: str = "contract"):
+    """Remove a file's chunks written by an older chunker so IDs can be reused."""
+    try:
+        existing = get_collection(collection_name).get(where={"source": filename}, include=["metadatas"])
+    except Exception:
+        return
+    stale = [
+        doc_id for doc_id, meta in zip(existing["ids"], existing["metadatas"])
+        if (meta or {}).get("doc_type") == doc_type and (meta or {}).get("chunker") != CHUNKER_VERSION
+    ]
+    if stale:
+        delete_documents(collection_name, stale)
+        print(f"    Replaced {len(stale)} {doc_type} chunks from an older chunker")
+
+
+def _take_prefix(pages, chars: int) -> list:
+    """Pull pages off the stream until at least `chars` characters are buffered."""
+    head, size = [], 0
+    for page in pages:
+        head.append(page)
+        size += len(page.text)
+        if size >= chars:
+            break
+    return head
+
+
+@traced("ingest.contracts")
 def ingest_contracts(extract_metadata: bool = True) -> dict:
     """
     Ingest all contract files from data/contracts/ into the vector store.
@@ -156,9 +181,7 @@ def ingest_contracts(extract_metadata: bool = True) -> dict:
     
     print(f"[ingest_contracts] Found {len(files)} contract files")
     
-    all_texts = []
-    all_metadatas = []
-    all_ids = []
+    chunk_count = 0
     
     # Also store full contract summaries in deal_data for Q&A
     summary_texts = []
@@ -170,7 +193,16 @@ def ingest_contracts(extract_metadata: bool = True) -> dict:
     
     for filename in files:
         filepath = os.path.join(_CONTRACTS_DIR, filename)
-        content = read_contract_file(filepath)
+        pages = iter_file_pages(filepath)
+        
+        # Only the first pages are read up front (for metadata extraction);
+        # the rest are parsed while earlier chunks are being embedded
+        try:
+            head = _take_prefix(pages, EXTRACTION_CHARS)
+        except Exception as e:
+            _read_error(filepath, e)
+            head = []
+        content = join_pages(head).strip()
         
         if not content:
             print(f"  Skipping: {filename}")
@@ -253,28 +285,66 @@ PROPERTY: {extracted.get('property_address', '')} ({extracted.get('property_type
                 "contract_type": _infer_type_from_filename(stem),
             }
         
-        # Chunk the full contract text for detailed retrieval
-        chunks = _splitter.split_text(content)
+        _drop_stale_chunks(filename)
+        _drop_stale_chunks(filename, CONTRACT_CLAUSES_COLLECTION, "contract_clause")
         
-        for i, chunk in enumerate(chunks):
-            chunk_id = f"contract_{stem}_{i:03d}"
-            meta = {
-                **base_meta,
-                "chunk_index": i,
-                "total_chunks": len(chunks),
-            }
-            all_texts.append(chunk)
-            all_metadatas.append(meta)
-            all_ids.append(chunk_id)
+        # Chunk the full contract along its articles / sections and embed in
+        # batches as pages are parsed. Each chunk is also indexed as small
+        # child clauses that point back to it (see query_parent_child).
+        chunks = 0
+        batch_texts, batch_metas, batch_ids = [], [], []
+        child_texts, child_metas, child_ids = [], [], []
+        try:
+            for chunk in iter_contract_chunks(itertools.chain(head, pages)):
+                batch_texts.append(chunk.text)
+                batch_metas.append({
+                    **base_meta,
+                    "chunk_index": chunk.index,
+                    "char_offset": chunk.offset,
+                    "page": chunk.page,
+                    "section_path": chunk.section_path,
+                    "article": chunk.article,
+                    "sections": ", ".join(chunk.sections),
+                    "clause_kind": chunk.kind,
+                    "chunker": CHUNKER_VERSION,
+                })
+                batch_ids.append(f"contract_{stem}_{chunk.index:03d}")
+                
+                children = child_chunks(chunk)
+                for j, (offset, text) in enumerate(children):
+                    child_texts.append(text)
+                    child_metas.append({
+                        "source": filename,
+                        "doc_type": "contract_clause",
+                        "contract_type": base_meta["contract_type"],
+                        "parent_series": f"contract_{stem}_",
+                        "parent_index": chunk.index,
+                        "child_index": j,
+                        "child_count": len(children),
+                        "char_offset": offset,
+                        "section_path": chunk.section_path,
+                        "chunker": CHUNKER_VERSION,
+                    })
+                    child_ids.append(f"clause_{stem}_{chunk.index:03d}_{j:02d}")
+                
+                if len(batch_texts) >= EMBED_BATCH_SIZE:
+                    add_documents(CONTRACTS_COLLECTION, batch_texts, batch_metas, batch_ids)
+                    add_documents(CONTRACT_CLAUSES_COLLECTION, child_texts, child_metas, child_ids)
+                    batch_texts, batch_metas, batch_ids = [], [], []
+                    child_texts, child_metas, child_ids = [], [], []
+                chunks += 1
+        except Exception as e:
+            _read_error(filepath, e)
+        if batch_texts:
+            add_documents(CONTRACTS_COLLECTION, batch_texts, batch_metas, batch_ids)
+            add_documents(CONTRACT_CLAUSES_COLLECTION, child_texts, child_metas, child_ids)
         
+        chunk_count += chunks
         total_files += 1
-        print(f"    Created {len(chunks)} chunks")
+        print(f"    Created {chunks} chunks")
     
-    # Ingest chunks into contracts collection
-    if all_texts:
-        result = add_documents(CONTRACTS_COLLECTION, all_texts, all_metadatas, all_ids)
-        print(f"\n[ingest_contracts] Contracts collection: {result['added']} new, "
-              f"{result['skipped']} skipped, {result['total']} total")
+    if chunk_count:
+        print(f"\n[ingest_contracts] Contracts collection: {chunk_count} chunks from {total_files} files")
     
     # Ingest summaries into deal_data collection for Q&A agent
     if summary_texts:
@@ -283,9 +353,12 @@ PROPERTY: {extracted.get('property_address', '')} ({extracted.get('property_type
         )
         print(f"[ingest_contracts] Deal data collection: {summary_result['added']} new summaries")
     
+    # Answers cached against the old chunks are stale now
+    answer_cache.invalidate()
+    
     return {
         "files": total_files,
-        "chunks": len(all_texts),
+        "chunks": chunk_count,
         "extracted": extracted_count,
         "summaries": len(summary_texts),
     }
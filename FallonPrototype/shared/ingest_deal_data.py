@@ -17,6 +17,7 @@ sys.path.insert(0, os.path.dirname(_PROTO_DIR))
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from FallonPrototype.shared.vector_store import add_documents, DEAL_DATA_COLLECTION
+from FallonPrototype.shared.tracing import traced
 
 # Check both possible data locations
 _DEAL_DATA_DIRS = [
@@ -91,6 +92,7 @@ def _find_deal_data_dir() -> str | None:
     return None
 
 
+@traced("ingest.deal_data")
 def ingest_deal_data() -> dict:
     """Ingest all .txt files from data/deal_data/ into the vector store."""
     deal_data_dir = _find_deal_data_dir()
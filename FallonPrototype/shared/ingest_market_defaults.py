@@ -16,6 +16,7 @@ _PROTO_DIR = os.path.dirname(_SHARED_DIR)
 sys.path.insert(0, os.path.dirname(_PROTO_DIR))
 
 from FallonPrototype.shared.vector_store import add_documents, MARKET_DEFAULTS_COLLECTION
+from FallonPrototype.shared.tracing import traced
 
 # Check both possible locations
 _DEFAULTS_PATHS = [
@@ -126,6 +127,7 @@ def _find_defaults_path() -> str | None:
     return None
 
 
+@traced("ingest.market_defaults")
 def ingest_market_defaults() -> dict:
     """Ingest market defaults JSON into the vector store as text records."""
     defaults_path = _find_defaults_path()
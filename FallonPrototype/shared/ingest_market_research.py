@@ -17,6 +17,7 @@ sys.path.insert(0, os.path.dirname(_PROTO_DIR))
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from FallonPrototype.shared.vector_store import add_documents, MARKET_RESEARCH_COLLECTION
+from FallonPrototype.shared.tracing import traced
 
 _MARKET_RESEARCH_DIR = os.path.join(_PROTO_DIR, "Financial Model", "data", "market_research")
 
@@ -55,6 +56,7 @@ def _parse_metadata_from_filename(filename: str) -> dict:
     }
 
 
+@traced("ingest.market_research")
 def ingest_market_research() -> dict:
     """Ingest all .txt files from market_research/ into the vector store."""
     if not os.path.isdir(_MARKET_RESEARCH_DIR):
@@ -0,0 +1,226 @@
+"""
+Intent Router — Local Intent Classification for Chat Turns
+
+Every chat turn used to go through the full conversation prompt just to
+learn what the user wanted (chat, gather_info, generate_model,
+adjust_model, answer_question). Many turns are unambiguous: "what does
+the JV agreement say about removal of the GP?" is a contract question,
+"set rent to $3.10" is an adjustment. This module recognizes those turns
+locally so the app can route them straight to the contract agent, the
+adjustment handler or model generation, saving one LLM call per turn.
+
+Two stages, cheapest first:
+
+    1. Keyword rules     high-precision patterns; no model needed
+    2. Nearest centroid  cosine similarity of the message embedding to the
+                         mean embedding of past messages per intent, trained
+                         from the interactions in the memory store
+
+A decision is only returned when it is actionable right now (a model exists
+to adjust, the project data is complete enough to generate) and confident;
+everything else returns None and goes to the conversation model as before.
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from FallonPrototype.shared import memory
+
+INTENTS = ("chat", "gather_info", "generate_model", "adjust_model", "answer_question")
+ROUTABLE_INTENTS = ("generate_model", "adjust_model", "answer_question")
+
+# Labels written by older code paths, mapped onto the chat intents
+_LABEL_ALIASES = {"generate": "generate_model", "MODEL": "generate_model", "CLARIFY": "gather_info"}
+
+MIN_EXAMPLES_PER_INTENT = 5    # intents with fewer past messages get no centroid
+CENTROID_THRESHOLD = 0.55      # cosine similarity to the winning centroid
+CENTROID_MARGIN = 0.08         # lead over the runner-up centroid
+RETRAIN_S = 60.0               # centroids are rebuilt at most this often
+
+_CONTRACT_TERMS = re.compile(
+    r'\b(contracts?|leases?|clauses?|provisions?|indemnif\w*|terminat\w*|warrant\w*|liabilit\w*|'
+    r'agreements?|amendments?|easements?|covenants?|force\s*majeure|assignment|estoppel|'
+    r'loi|psa|gmp|change\s*orders?|retainage|liquidated\s*damages|'
+    r'jv|joint\s*venture|waterfall|promote|preferred\s*return|capital\s*calls?|'
+    r'key\s*person|buy[\s-]*sell|right\s*of\s*first)\b',
+    re.IGNORECASE,
+)
+_QUESTION = re.compile(
+    r'\?\s*$|^\s*(what|how|does|do|is|are|can|who|when|which|where|why|explain|summarize|tell\s+me|walk\s+me)\b',
+    re.IGNORECASE,
+)
+_GENERATE = re.compile(
+    r'\b(generate|build|run|create|produce|underwrite)\b.*\b(model|pro\s*forma|proforma|numbers|underwriting)\b'
+    r'|^\s*(go\s+ahead|let\'?s\s+(?:see|run)\s+(?:it|the\s+numbers))\b',
+    re.IGNORECASE,
+)
+# Fields handle_adjustment knows how to change, each with a value
+_ADJUST_FIELD = re.compile(
+    r'cap\s*(?:rate)?\s*(?:to|=|:|of)?\s*\d|rent\s*(?:to|=|:|of)?\s*\$?\d|\d+\s*units?\b|hard\s*(?:cost)?\s*(?:to|=|:|of)?\s*\$?\d',
+    re.IGNORECASE,
+)
+_ADJUST_VERB = re.compile(
+    r'\b(change|adjust|set|update|modify|make|bump|raise|lower|increase|decrease|drop|use|try)\b', re.IGNORECASE
+)
+_NUMBER = re.compile(r'\d')
+
+
+@dataclass
+class IntentDecision:
+    """A locally classified chat turn."""
+    intent: str
+    confidence: float
+    source: str        # "rules" | "centroid"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# GUARDS — when an intent can be acted on without the conversation model
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def ready_to_generate(project_data: dict) -> bool:
+    """Market, program, parcel and a size are known — the same bar the chat prompt sets."""
+    size = any(project_data.get(k) for k in ("unit_count", "rentable_sf", "total_keys"))
+    return bool(project_data.get("market") and project_data.get("program_type")
+                and project_data.get("parcel_acres") and size)
+
+
+def _actionable(intent: str, message: str, has_model: bool, project_data: dict) -> bool:
+    if intent == "adjust_model":
+        return has_model and bool(_ADJUST_FIELD.search(message))
+    if intent == "generate_model":
+        # New numbers in the message need the conversation model to extract them
+        return ready_to_generate(project_data) and not _NUMBER.search(message)
+    return intent == "answer_question"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# KEYWORD RULES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def classify_rules(message: str, has_model: bool) -> Optional[str]:
+    """Intent from high-precision keyword rules, or None."""
+    if has_model and _ADJUST_FIELD.search(message) and (_ADJUST_VERB.search(message) or len(message.split()) <= 6):
+        if not _QUESTION.search(message):
+            return "adjust_model"
+    if _GENERATE.search(message) and not _QUESTION.search(message):
+        return "generate_model"
+    if _CONTRACT_TERMS.search(message) and _QUESTION.search(message):
+        return "answer_question"
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# NEAREST-CENTROID MODEL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class CentroidModel:
+    """
+    One unit-normalized mean embedding per intent.
+
+    Args:
+        intents: Label of each example row.
+        matrix: Unit-normalized example embeddings, one row per label.
+    """
+
+    def __init__(self, intents: list[str], matrix: np.ndarray):
+        labels = np.array([_LABEL_ALIASES.get(i, i) for i in intents])
+        self.intents = []
+        centroids = []
+        for intent in INTENTS:
+            rows = matrix[labels == intent]
+            if len(rows) >= MIN_EXAMPLES_PER_INTENT:
+                mean = rows.mean(axis=0)
+                centroids.append(mean / (np.linalg.norm(mean) or 1.0))
+                self.intents.append(intent)
+        self.centroids = np.stack(centroids) if centroids else np.zeros((0, matrix.shape[1]), dtype=np.float32)
+        self.examples = len(intents)
+
+    def predict(self, vec: np.ndarray) -> Optional[tuple[str, float]]:
+        """(intent, similarity) if the nearest centroid clears the threshold and margin, else None."""
+        if len(self.intents) < 2:
+            return None
+        scores = self.centroids @ vec
+        order = np.argsort(-scores)
+        best, runner_up = float(scores[order[0]]), float(scores[order[1]])
+        if best < CENTROID_THRESHOLD or best - runner_up < CENTROID_MARGIN:
+            return None
+        return self.intents[order[0]], best
+
+
+_model: Optional[CentroidModel] = None
+_model_key = None          # (db path, trained at)
+_model_lock = threading.Lock()
+_stats = {"rules": 0, "centroid": 0, "llm": 0, "fallback": 0}
+
+
+def get_model() -> Optional[CentroidModel]:
+    """Centroids trained from the memory store, rebuilt every RETRAIN_S; None without embeddings."""
+    global _model, _model_key
+    with _model_lock:
+        now = time.time()
+        if _model_key is not None and _model_key[0] == str(memory.MEMORY_DB) and now - _model_key[1] < RETRAIN_S:
+            return _model
+        intents, matrix = memory.get_intent_examples()
+        _model = CentroidModel(intents, matrix) if matrix is not None else None
+        _model_key = (str(memory.MEMORY_DB), now)
+        return _model
+
+
+def reset():
+    """Drop the trained centroids and routing counts."""
+    global _model, _model_key
+    with _model_lock:
+        _model, _model_key = None, None
+        for key in _stats:
+            _stats[key] = 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ROUTING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def classify(message: str, has_model: bool = False, project_data: dict = None) -> Optional[IntentDecision]:
+    """
+    Route a chat message locally if its intent is clear-cut and actionable.
+
+    Args:
+        message: The user's chat message.
+        has_model: Whether a pro forma exists to adjust.
+        project_data: Project parameters gathered so far.
+
+    Returns:
+        IntentDecision for a routable intent, or None to use the conversation model.
+    """
+    project_data = project_data or {}
+    decision = None
+
+    intent = classify_rules(message, has_model)
+    if intent and _actionable(intent, message, has_model, project_data):
+        decision = IntentDecision(intent, 1.0, "rules")
+    elif intent is None:
+        model = get_model()
+        vec = memory.embed_query(message) if model is not None else None
+        predicted = model.predict(vec) if vec is not None else None
+        if predicted and predicted[0] in ROUTABLE_INTENTS and _actionable(predicted[0], message, has_model, project_data):
+            decision = IntentDecision(predicted[0], predicted[1], "centroid")
+
+    with _model_lock:
+        _stats[decision.source if decision else "llm"] += 1
+    return decision
+
+
+def record_fallback():
+    """Count a routed turn that still needed the conversation model (e.g. no confident contract answer)."""
+    with _model_lock:
+        _stats["fallback"] += 1
+
+
+def get_routing_stats() -> dict:
+    """Turns routed by rules or centroid, sent to the conversation model, and routed but handed back."""
+    with _model_lock:
+        return dict(_stats)
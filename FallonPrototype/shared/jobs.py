@@ -0,0 +1,183 @@
+"""
+Jobs — Background Execution for Long-Running App Work
+
+Model generation, contract Q&A and file parsing / OCR can take tens of
+seconds. Run inline in the Streamlit script they block the session, and
+any widget interaction reruns the script and throws the work away. A
+JobQueue runs them on a thread pool instead:
+
+    queue = JobQueue()
+    job = queue.submit("parse", parse_fn, name, data)
+    ...
+    job = queue.get(job.id)       # on a later rerun
+    if job.done:
+        use(job.result)
+
+The queue is meant to live in st.cache_resource, so jobs outlive reruns and
+sessions only keep job ids. Jobs are keyed by a hash of their kind and
+inputs: submitting the same work again while it runs (or after it finished)
+returns the existing job instead of starting a duplicate. Failed jobs are
+replaced on resubmission.
+
+Job functions receive the Job as their first argument and may call
+job.report() to publish progress and partial results for the UI to poll.
+Code running in a job has no Streamlit script context — it must not read
+or write st.session_state; pass a snapshot in and return the changes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from FallonPrototype.shared.tracing import span
+
+JOB_WORKERS = int(os.environ.get("FALLON_JOB_WORKERS", "4"))
+MAX_FINISHED_JOBS = 200        # finished jobs kept for dedupe / late pickup
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# JOB
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class Job:
+    """
+    One unit of background work and its observable state.
+
+    status moves queued → running → done | error. progress, message and
+    partial are updated by the job function through report() and can be
+    read at any time.
+    """
+
+    def __init__(self, job_id: str, kind: str):
+        self.id = job_id
+        self.kind = kind
+        self.status = "queued"
+        self.result = None
+        self.error: Optional[str] = None
+        self.progress: Optional[tuple[int, int]] = None   # (done, total)
+        self.message = ""
+        self.partial = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error")
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the job started running (0 while queued)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def report(self, done: int = None, total: int = None, message: str = None, partial=None):
+        """Publish progress from inside the job function (any argument may be omitted)."""
+        if done is not None and total:
+            self.progress = (done, total)
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+
+
+def job_key(kind: str, payload) -> str:
+    """Stable hash of a job's kind and inputs; bytes are hashed, not embedded."""
+    def default(obj):
+        if isinstance(obj, (bytes, bytearray)):
+            return hashlib.sha256(obj).hexdigest()
+        if isinstance(obj, set):
+            return sorted(obj, key=str)
+        return str(obj)
+
+    encoded = json.dumps([kind, payload], sort_keys=True, default=default)
+    return hashlib.sha256(encoded.encode("utf-8", errors="replace")).hexdigest()[:24]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# QUEUE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class JobQueue:
+    """
+    Thread-pool executor with a job registry deduplicated by input hash.
+
+    Args:
+        workers: Jobs run at once; the rest wait in the queue.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fallon-job")
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable, *args, key=None, reuse_finished: bool = True, **kwargs) -> Job:
+        """
+        Run fn(job, *args, **kwargs) in the background.
+
+        Args:
+            kind: Job type ("chat", "parse", ...), part of the dedupe key.
+            fn: Job function; gets the Job first, returns the result.
+            key: What identifies the inputs for deduplication. Defaults to
+                 (args, kwargs); pass something smaller when arguments hold
+                 objects that do not serialize meaningfully.
+            reuse_finished: Hand back a finished job for identical inputs.
+                 False only joins a job that is still queued or running,
+                 for work whose answer goes stale (chat replies).
+
+        Returns:
+            The new Job, or the existing one for identical inputs unless it failed.
+        """
+        job_id = job_key(kind, key if key is not None else [args, kwargs])
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing.status != "error" and (reuse_finished or not existing.done):
+                return existing
+            job = Job(job_id, kind)
+            self._jobs[job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args: tuple, kwargs: dict):
+        job.status = "running"
+        job.started = time.time()
+        try:
+            with span(f"job.{job.kind}", job_id=job.id):
+                job.result = fn(job, *args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS (caller holds the lock)."""
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in sorted(finished, key=lambda j: j.finished or 0)[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, kind: str = None) -> list[Job]:
+        """Registered jobs, oldest first, optionally of one kind."""
+        with self._lock:
+            return [j for j in self._jobs.values() if kind is None or j.kind == kind]
+
+    def forget(self, job_id: str):
+        """Remove a finished job so identical inputs run again."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.done:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
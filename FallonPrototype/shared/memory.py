@@ -6,50 +6,199 @@ Persistent learning from user interactions:
 - Tracks user preferences and patterns
 - Learns from adjustments and corrections
 - Provides context for improved responses
+
+Backed by SQLite in WAL mode: each record_* call is one small append
+transaction, and preferences/learned adjustments are kept as running
+aggregates, so writes are O(1) and concurrent Streamlit sessions don't
+clobber each other. An existing user_memory.json is migrated on first use.
+
+Successful queries are embedded at record time with the same MiniLM
+function as vector_store; similar-query recall is one matrix-vector product
+over an in-process NumPy matrix of those embeddings.
 """
 
 import json
-import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
-from collections import Counter
+
+import numpy as np
 
 MEMORY_DIR = Path(__file__).parent.parent / "data" / "memory"
-MEMORY_FILE = MEMORY_DIR / "user_memory.json"
+MEMORY_DB = MEMORY_DIR / "user_memory.db"
+MEMORY_FILE = MEMORY_DIR / "user_memory.json"  # legacy store, migrated into MEMORY_DB
 INSIGHTS_FILE = MEMORY_DIR / "learned_insights.json"
 
+# Retention — older rows are pruned one-for-one as new ones arrive
+INTERACTION_LIMIT = 500
+CORRECTION_LIMIT = 200
+FEEDBACK_LIMIT = 100
+SUCCESSFUL_QUERY_LIMIT = 100
+LEARNED_DELTA_WINDOW = 20
+QUERY_EMBEDDING_LIMIT = 50000
+
+# Cosine similarity below this isn't "similar" for recall purposes
+SIMILARITY_THRESHOLD = 0.35
+
+DEFAULT_IRR_RANGE = [15, 20]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    query TEXT,
+    intent TEXT,
+    response_type TEXT,
+    parameters TEXT,
+    sources_used TEXT,
+    success INTEGER,
+    deal_name TEXT,
+    market TEXT,
+    program_type TEXT,
+    irr REAL,
+    multiple REAL,
+    exit_cap REAL,
+    total_cost REAL,
+    has_metrics INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_success ON interactions(success, id);
+CREATE INDEX IF NOT EXISTS idx_interactions_type ON interactions(response_type, id);
+
+CREATE TABLE IF NOT EXISTS corrections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    parameter TEXT,
+    original REAL,
+    adjusted REAL,
+    delta REAL,
+    context TEXT,
+    learn_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_corrections_key ON corrections(learn_key, id);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    query TEXT,
+    helpful INTEGER,
+    notes TEXT
+);
+
+-- Running counts: kind in (market, program_type, intent, corrected_param, outcome)
+CREATE TABLE IF NOT EXISTS counters (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+
+-- Running numeric aggregates: irr, exit_cap, total_cost
+CREATE TABLE IF NOT EXISTS aggregates (
+    name TEXT PRIMARY KEY,
+    n INTEGER NOT NULL,
+    total REAL NOT NULL,
+    min REAL,
+    max REAL
+);
+
+CREATE TABLE IF NOT EXISTS learned_adjustments (
+    key TEXT PRIMARY KEY,
+    avg_adjustment REAL,
+    n INTEGER
+);
+
+-- Unit-normalized float32 embeddings of successful queries
+CREATE TABLE IF NOT EXISTS query_embeddings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    interaction_id INTEGER UNIQUE,
+    query TEXT,
+    timestamp TEXT,
+    vec BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_local = threading.local()
+
 def _ensure_dir():
     MEMORY_DIR.mkdir(parents=True, exist_ok=True)
 
-def _load_memory() -> dict:
-    _ensure_dir()
-    if MEMORY_FILE.exists():
-        try:
-            return json.loads(MEMORY_FILE.read_text())
-        except:
-            return _default_memory()
-    return _default_memory()
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection to MEMORY_DB, creating and migrating it on first use."""
+    path = str(MEMORY_DB)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is not None:
+        return conn
+    
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=10000")
+    conn.executescript(_SCHEMA)
+    conns[path] = conn
+    _migrate_json(conn)
+    return conn
 
-def _save_memory(data: dict):
-    _ensure_dir()
-    MEMORY_FILE.write_text(json.dumps(data, indent=2, default=str))
-
-def _default_memory() -> dict:
-    return {
-        "interactions": [],
-        "preferences": {
-            "markets": {},
-            "program_types": {},
-            "typical_deal_size": None,
-            "target_irr_range": [15, 20],
-            "preferred_exit_cap": None,
-        },
-        "corrections": [],
-        "successful_queries": [],
-        "learned_defaults": {},
-        "feedback_scores": [],
-    }
+@contextmanager
+def _transaction():
+    """Write transaction — takes the write lock up front so concurrent writers queue."""
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def _meta_get(conn, key: str, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row["value"]) if row else default
+
+def _meta_set(conn, key: str, value):
+    conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, json.dumps(value, default=str)))
+
+def _bump(conn, kind: str, key, by: int = 1):
+    if key is None or key == "":
+        return
+    conn.execute(
+        "INSERT INTO counters(kind, key, count) VALUES (?, ?, ?) "
+        "ON CONFLICT(kind, key) DO UPDATE SET count = count + excluded.count",
+        (kind, str(key), by),
+    )
+
+def _accumulate(conn, name: str, value):
+    if not value:
+        return
+    value = float(value)
+    conn.execute(
+        "INSERT INTO aggregates(name, n, total, min, max) VALUES (?, 1, ?, ?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET n = n + 1, total = total + excluded.total, "
+        "min = MIN(min, excluded.min), max = MAX(max, excluded.max)",
+        (name, value, value, value),
+    )
+
+def _prune(conn, table: str, limit: int):
+    """Drop rows older than the newest `limit` — one indexed delete per insert."""
+    conn.execute(f"DELETE FROM {table} WHERE id <= (SELECT MAX(id) FROM {table}) - ?", (limit,))
+
+def _num(v):
+    try:
+        return float(v) if v is not None else None
+    except (TypeError, ValueError):
+        return None
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # RECORD INTERACTIONS
@@ -65,8 +214,6 @@ def record_interaction(
     success: bool = True,
 ):
     """Record a user interaction for learning."""
-    memory = _load_memory()
-    
     interaction = {
         "timestamp": datetime.now().isoformat(),
         "query": query,
@@ -89,26 +236,58 @@ def record_interaction(
         interaction["market"] = _extract_val(pro_forma, "project_summary", "market")
         interaction["program_type"] = _extract_val(pro_forma, "project_summary", "program_type")
     
-    memory["interactions"].append(interaction)
+    # Embed before taking the write lock — the model call is the slow part
+    vec = _embed([query]) if success and query else None
     
-    # Keep last 500 interactions
-    memory["interactions"] = memory["interactions"][-500:]
+    with _transaction() as conn:
+        total = _insert_interaction(conn, interaction)
+        if vec is not None:
+            _insert_query_embedding(conn, conn.execute("SELECT MAX(id) FROM interactions").fetchone()[0],
+                                    query, interaction["timestamp"], vec[0])
     
-    # Update preferences based on this interaction
-    _update_preferences(memory, interaction)
+    # Periodically refresh the insights file (cheap — reads aggregates only)
+    if total % 10 == 0:
+        analyze_and_learn()
+
+def _insert_interaction(conn, interaction: dict) -> int:
+    """Append one interaction and update aggregates. Returns the all-time count."""
+    metrics = interaction.get("metrics") or {}
+    conn.execute(
+        "INSERT INTO interactions(timestamp, query, intent, response_type, parameters, sources_used, "
+        "success, deal_name, market, program_type, irr, multiple, exit_cap, total_cost, has_metrics) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            interaction.get("timestamp") or datetime.now().isoformat(),
+            interaction.get("query"),
+            interaction.get("intent"),
+            interaction.get("response_type"),
+            json.dumps(interaction.get("parameters") or {}, default=str),
+            json.dumps(interaction.get("sources_used") or [], default=str),
+            1 if interaction.get("success") else 0,
+            interaction.get("deal_name"),
+            interaction.get("market"),
+            interaction.get("program_type"),
+            _num(metrics.get("irr")),
+            _num(metrics.get("multiple")),
+            _num(metrics.get("exit_cap")),
+            _num(metrics.get("total_cost")),
+            1 if metrics else 0,
+        ),
+    )
+    _prune(conn, "interactions", INTERACTION_LIMIT)
     
-    if success:
-        memory["successful_queries"].append({
-            "query": query,
-            "timestamp": interaction["timestamp"],
-        })
-        memory["successful_queries"] = memory["successful_queries"][-100:]
+    # Update preferences based on this interaction
+    _update_preferences(conn, interaction)
     
-    _save_memory(memory)
+    conn.execute(
+        "INSERT INTO counters(kind, key, count) VALUES ('outcome', 'total', 1) "
+        "ON CONFLICT(kind, key) DO UPDATE SET count = count + 1"
+    )
+    if interaction.get("success"):
+        _bump(conn, "outcome", "success")
+    _bump(conn, "intent", interaction.get("intent"))
     
-    # Periodically analyze and extract insights
-    if len(memory["interactions"]) % 10 == 0:
-        analyze_and_learn()
+    return conn.execute("SELECT count FROM counters WHERE kind = 'outcome' AND key = 'total'").fetchone()["count"]
 
 def record_adjustment(
     original_param: str,
@@ -117,8 +296,6 @@ def record_adjustment(
     context: dict = None,
 ):
     """Record when user adjusts a parameter - key learning signal."""
-    memory = _load_memory()
-    
     correction = {
         "timestamp": datetime.now().isoformat(),
         "parameter": original_param,
@@ -128,134 +305,124 @@ def record_adjustment(
         "context": context or {},
     }
     
-    memory["corrections"].append(correction)
-    memory["corrections"] = memory["corrections"][-200:]
+    with _transaction() as conn:
+        _insert_correction(conn, correction)
+
+def _insert_correction(conn, correction: dict):
+    context = correction.get("context") or {}
+    key = _learn_key(context.get("market", "general"), context.get("program_type", "general"), correction["parameter"])
+    conn.execute(
+        "INSERT INTO corrections(timestamp, parameter, original, adjusted, delta, context, learn_key) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            correction.get("timestamp") or datetime.now().isoformat(),
+            correction["parameter"],
+            _num(correction.get("original")),
+            _num(correction.get("adjusted")),
+            _num(correction.get("delta")),
+            json.dumps(context, default=str),
+            key,
+        ),
+    )
+    _prune(conn, "corrections", CORRECTION_LIMIT)
+    _bump(conn, "corrected_param", correction["parameter"])
     
     # Learn from this correction
-    _learn_from_correction(memory, correction)
-    
-    _save_memory(memory)
+    _learn_from_correction(conn, key, correction.get("delta"))
 
 def record_feedback(query: str, helpful: bool, notes: str = ""):
     """Record explicit user feedback."""
-    memory = _load_memory()
-    
-    memory["feedback_scores"].append({
-        "timestamp": datetime.now().isoformat(),
-        "query": query,
-        "helpful": helpful,
-        "notes": notes,
-    })
-    memory["feedback_scores"] = memory["feedback_scores"][-100:]
-    
-    _save_memory(memory)
+    with _transaction() as conn:
+        conn.execute(
+            "INSERT INTO feedback(timestamp, query, helpful, notes) VALUES (?, ?, ?, ?)",
+            (datetime.now().isoformat(), query, 1 if helpful else 0, notes),
+        )
+        _prune(conn, "feedback", FEEDBACK_LIMIT)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # LEARNING FUNCTIONS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def _update_preferences(memory: dict, interaction: dict):
-    """Update user preferences based on interaction patterns."""
-    prefs = memory["preferences"]
-    
-    # Track market preferences
-    market = interaction.get("market")
-    if market:
-        prefs["markets"][market] = prefs["markets"].get(market, 0) + 1
-    
-    # Track program type preferences
-    prog = interaction.get("program_type")
-    if prog:
-        prefs["program_types"][prog] = prefs["program_types"].get(prog, 0) + 1
-    
-    # Track typical deal sizes
-    metrics = interaction.get("metrics", {})
-    if metrics.get("total_cost"):
-        costs = [i.get("metrics", {}).get("total_cost") for i in memory["interactions"] if i.get("metrics", {}).get("total_cost")]
-        if costs:
-            prefs["typical_deal_size"] = sum(costs) / len(costs)
-    
-    # Track IRR expectations
-    if metrics.get("irr"):
-        irrs = [i.get("metrics", {}).get("irr") for i in memory["interactions"] if i.get("metrics", {}).get("irr")]
-        if len(irrs) >= 3:
-            prefs["target_irr_range"] = [min(irrs), max(irrs)]
-
-def _learn_from_correction(memory: dict, correction: dict):
-    """Learn default adjustments from user corrections."""
-    param = correction["parameter"]
-    delta = correction.get("delta")
-    context = correction.get("context", {})
-    
+def _update_preferences(conn, interaction: dict):
+    """Update running preference counts and deal-metric aggregates."""
+    # Track market and program type preferences
+    _bump(conn, "market", interaction.get("market"))
+    _bump(conn, "program_type", interaction.get("program_type"))
+    
+    # Track typical deal sizes, IRR expectations and exit caps
+    metrics = interaction.get("metrics") or {}
+    _accumulate(conn, "total_cost", _num(metrics.get("total_cost")))
+    _accumulate(conn, "irr", _num(metrics.get("irr")))
+    _accumulate(conn, "exit_cap", _num(metrics.get("exit_cap")))
+
+def _learn_key(market, program, param) -> str:
+    return f"{market or 'general'}_{program or 'general'}_{param}"
+
+def _learn_from_correction(conn, key: str, delta):
+    """Refresh the learned adjustment for `key` from its last few deltas."""
     if delta is None:
         return
     
-    # Build context key (market + program type)
-    market = context.get("market", "general")
-    prog = context.get("program_type", "general")
-    key = f"{market}_{prog}_{param}"
-    
-    # Track correction patterns
-    learned = memory.get("learned_defaults", {})
-    if key not in learned:
-        learned[key] = {"deltas": [], "avg_adjustment": 0}
-    
-    learned[key]["deltas"].append(delta)
-    learned[key]["deltas"] = learned[key]["deltas"][-20:]  # Keep last 20
-    learned[key]["avg_adjustment"] = sum(learned[key]["deltas"]) / len(learned[key]["deltas"])
-    
-    memory["learned_defaults"] = learned
+    row = conn.execute(
+        "SELECT AVG(delta) AS avg, COUNT(*) AS n FROM ("
+        "  SELECT delta FROM corrections WHERE learn_key = ? AND delta IS NOT NULL ORDER BY id DESC LIMIT ?"
+        ")",
+        (key, LEARNED_DELTA_WINDOW),
+    ).fetchone()
+    conn.execute(
+        "INSERT OR REPLACE INTO learned_adjustments(key, avg_adjustment, n) VALUES (?, ?, ?)",
+        (key, row["avg"], row["n"]),
+    )
+
+def _counts(conn, kind: str, limit: int | None = None) -> list[tuple[str, int]]:
+    sql = "SELECT key, count FROM counters WHERE kind = ? ORDER BY count DESC, key"
+    rows = conn.execute(sql + (f" LIMIT {int(limit)}" if limit else ""), (kind,)).fetchall()
+    return [(r["key"], r["count"]) for r in rows]
+
+def _aggregate(conn, name: str) -> Optional[sqlite3.Row]:
+    return conn.execute("SELECT n, total, min, max FROM aggregates WHERE name = ?", (name,)).fetchone()
 
 def analyze_and_learn():
-    """Analyze interaction history and extract insights."""
-    memory = _load_memory()
-    interactions = memory["interactions"]
+    """Summarize interaction history from the running aggregates."""
+    conn = _connect()
+    outcome = dict(_counts(conn, "outcome"))
+    total = outcome.get("total", 0)
     
-    if len(interactions) < 5:
+    if total < 5:
         return
     
     insights = {
         "generated_at": datetime.now().isoformat(),
-        "total_interactions": len(interactions),
+        "total_interactions": total,
         "patterns": {},
     }
     
-    # Most common markets
-    markets = [i.get("market") for i in interactions if i.get("market")]
+    # Most common markets and program types
+    markets = _counts(conn, "market", 5)
     if markets:
-        insights["patterns"]["top_markets"] = Counter(markets).most_common(5)
-    
-    # Most common program types
-    programs = [i.get("program_type") for i in interactions if i.get("program_type")]
+        insights["patterns"]["top_markets"] = markets
+    programs = _counts(conn, "program_type", 5)
     if programs:
-        insights["patterns"]["top_programs"] = Counter(programs).most_common(5)
+        insights["patterns"]["top_programs"] = programs
     
     # Average deal metrics
-    irrs = [i.get("metrics", {}).get("irr") for i in interactions if i.get("metrics", {}).get("irr")]
-    caps = [i.get("metrics", {}).get("exit_cap") for i in interactions if i.get("metrics", {}).get("exit_cap")]
-    costs = [i.get("metrics", {}).get("total_cost") for i in interactions if i.get("metrics", {}).get("total_cost")]
-    
-    if irrs:
-        insights["patterns"]["avg_irr"] = sum(irrs) / len(irrs)
-    if caps:
-        insights["patterns"]["avg_exit_cap"] = sum(caps) / len(caps)
-    if costs:
-        insights["patterns"]["avg_deal_size"] = sum(costs) / len(costs)
+    for name, label in [("irr", "avg_irr"), ("exit_cap", "avg_exit_cap"), ("total_cost", "avg_deal_size")]:
+        agg = _aggregate(conn, name)
+        if agg and agg["n"]:
+            insights["patterns"][label] = agg["total"] / agg["n"]
     
     # Common query patterns
-    intents = [i.get("intent") for i in interactions if i.get("intent")]
+    intents = _counts(conn, "intent")
     if intents:
-        insights["patterns"]["intent_distribution"] = dict(Counter(intents))
+        insights["patterns"]["intent_distribution"] = dict(intents)
     
     # Success rate
-    successes = [i for i in interactions if i.get("success")]
-    insights["patterns"]["success_rate"] = len(successes) / len(interactions) if interactions else 0
+    insights["patterns"]["success_rate"] = outcome.get("success", 0) / total
     
     # Correction patterns
-    corrections = memory.get("corrections", [])
-    if corrections:
-        param_corrections = Counter([c["parameter"] for c in corrections])
-        insights["patterns"]["most_corrected_params"] = param_corrections.most_common(5)
+    corrected = _counts(conn, "corrected_param", 5)
+    if corrected:
+        insights["patterns"]["most_corrected_params"] = corrected
     
     # Save insights
     _ensure_dir()
@@ -263,77 +430,276 @@ def analyze_and_learn():
     
     return insights
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# MIGRATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _migrate_json(conn):
+    """One-time import of the legacy user_memory.json into the database."""
+    if not MEMORY_FILE.exists() or _meta_get(conn, "migrated_json"):
+        return
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if _meta_get(conn, "migrated_json"):  # another session got here first
+            conn.execute("COMMIT")
+            return
+        try:
+            legacy = json.loads(MEMORY_FILE.read_text())
+        except (OSError, ValueError):
+            legacy = {}
+    
+        for interaction in legacy.get("interactions", []):
+            _insert_interaction(conn, interaction)
+    
+        # The interaction log was capped, so keep the legacy preference counts
+        prefs = legacy.get("preferences", {})
+        if prefs.get("markets") or prefs.get("program_types"):
+            conn.execute("DELETE FROM counters WHERE kind IN ('market', 'program_type')")
+            for market, count in (prefs.get("markets") or {}).items():
+                _bump(conn, "market", market, count)
+            for prog, count in (prefs.get("program_types") or {}).items():
+                _bump(conn, "program_type", prog, count)
+        _meta_set(conn, "legacy_preferences", {
+            k: prefs.get(k) for k in ("typical_deal_size", "target_irr_range", "preferred_exit_cap")
+        })
+    
+        for correction in legacy.get("corrections", []):
+            if correction.get("parameter"):
+                _insert_correction(conn, correction)
+        for key, learned in (legacy.get("learned_defaults") or {}).items():
+            deltas = learned.get("deltas") or []
+            conn.execute(
+                "INSERT OR REPLACE INTO learned_adjustments(key, avg_adjustment, n) VALUES (?, ?, ?)",
+                (key, learned.get("avg_adjustment"), len(deltas)),
+            )
+    
+        for fb in legacy.get("feedback_scores", []):
+            conn.execute(
+                "INSERT INTO feedback(timestamp, query, helpful, notes) VALUES (?, ?, ?, ?)",
+                (fb.get("timestamp") or datetime.now().isoformat(), fb.get("query"),
+                 1 if fb.get("helpful") else 0, fb.get("notes", "")),
+            )
+    
+        _meta_set(conn, "migrated_json", datetime.now().isoformat())
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# QUERY EMBEDDINGS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Embedding function override (texts -> vectors). None uses vector_store's
+# shared MiniLM function; set to a callable to swap models.
+_embed_fn = None
+_embed_unavailable = False
+
+_query_indexes = {}  # db path -> _QueryIndex
+_index_lock = threading.Lock()
+
+def _embed(texts: list[str]) -> Optional[np.ndarray]:
+    """Unit-normalized float32 embeddings, or None if no model is available."""
+    global _embed_unavailable
+    fn = _embed_fn
+    if fn is None:
+        if _embed_unavailable:
+            return None
+        try:
+            from FallonPrototype.shared.vector_store import embed_texts
+            vecs = embed_texts(texts)
+        except Exception:
+            # Model not downloadable (offline) — recall falls back to word overlap
+            _embed_unavailable = True
+            return None
+    else:
+        vecs = fn(texts)
+    
+    matrix = np.asarray(vecs, dtype=np.float32).reshape(len(texts), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def _insert_query_embedding(conn, interaction_id: int, query: str, timestamp: str, vec: np.ndarray):
+    conn.execute(
+        "INSERT OR REPLACE INTO query_embeddings(interaction_id, query, timestamp, vec) VALUES (?, ?, ?, ?)",
+        (interaction_id, query, timestamp, vec.astype(np.float32).tobytes()),
+    )
+    _prune(conn, "query_embeddings", QUERY_EMBEDDING_LIMIT)
+
+class _QueryIndex:
+    """
+    Append-only embedding matrix mirroring the query_embeddings table.
+    
+    Rows [start, size) are live. New rows are appended into spare capacity;
+    pruned rows (always the oldest) just advance `start`.
+    """
+    
+    def __init__(self):
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.queries = []
+        self.timestamps = []
+        self.start = 0
+        self.size = 0
+        self.backfilled = False
+    
+    def append(self, ids, queries, timestamps, vecs: np.ndarray):
+        n = len(ids)
+        if self.size + n > len(self.matrix) or self.matrix.shape[1] != vecs.shape[1]:
+            # Grow (and compact away pruned rows) — amortized O(1) per row
+            live = self.size - self.start
+            cap = max(64, 2 * (live + n))
+            matrix = np.zeros((cap, vecs.shape[1]), dtype=np.float32)
+            matrix[:live] = self.matrix[self.start:self.size] if live else 0
+            ids_buf = np.zeros(cap, dtype=np.int64)
+            ids_buf[:live] = self.ids[self.start:self.size]
+            self.matrix, self.ids = matrix, ids_buf
+            self.queries = self.queries[self.start:self.size]
+            self.timestamps = self.timestamps[self.start:self.size]
+            self.start, self.size = 0, live
+        self.matrix[self.size:self.size + n] = vecs
+        self.ids[self.size:self.size + n] = ids
+        self.queries.extend(queries)
+        self.timestamps.extend(timestamps)
+        self.size += n
+    
+    def drop_before(self, min_id: int):
+        while self.start < self.size and self.ids[self.start] < min_id:
+            self.start += 1
+
+def _backfill_query_embeddings(conn):
+    """Embed successful queries recorded without a vector (legacy JSON, model offline)."""
+    rows = conn.execute(
+        "SELECT i.id, i.query, i.timestamp FROM interactions i "
+        "LEFT JOIN query_embeddings q ON q.interaction_id = i.id "
+        "WHERE i.success = 1 AND q.id IS NULL AND i.query IS NOT NULL AND i.query != '' ORDER BY i.id"
+    ).fetchall()
+    if not rows:
+        return True
+    vecs = _embed([r["query"] for r in rows])
+    if vecs is None:
+        return False
+    with _transaction():
+        for r, vec in zip(rows, vecs):
+            _insert_query_embedding(conn, r["id"], r["query"], r["timestamp"], vec)
+    return True
+
+def _refresh_query_index(conn) -> Optional[_QueryIndex]:
+    """Bring this process's embedding matrix up to date with the database."""
+    with _index_lock:
+        index = _query_indexes.setdefault(str(MEMORY_DB), _QueryIndex())
+        if not index.backfilled:
+            if not _backfill_query_embeddings(conn):
+                return None
+            index.backfilled = True
+        
+        last_id = int(index.ids[index.size - 1]) if index.size else 0
+        rows = conn.execute(
+            "SELECT id, query, timestamp, vec FROM query_embeddings WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall()
+        if rows:
+            vecs = np.stack([np.frombuffer(r["vec"], dtype=np.float32) for r in rows])
+            index.append([r["id"] for r in rows], [r["query"] for r in rows], [r["timestamp"] for r in rows], vecs)
+        
+        min_id = conn.execute("SELECT MIN(id) FROM query_embeddings").fetchone()[0]
+        if min_id is not None:
+            index.drop_before(min_id)
+        return index
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # RETRIEVAL FUNCTIONS
 # ═══════════════════════════════════════════════════════════════════════════════
 
 def get_user_context() -> dict:
     """Get accumulated user context for improving responses."""
-    memory = _load_memory()
-    prefs = memory["preferences"]
+    conn = _connect()
+    count = conn.execute("SELECT COUNT(*) AS n FROM interactions").fetchone()["n"]
+    legacy = _meta_get(conn, "legacy_preferences", {})
     
     context = {
-        "has_history": len(memory["interactions"]) > 0,
-        "interaction_count": len(memory["interactions"]),
+        "has_history": count > 0,
+        "interaction_count": count,
     }
     
-    # Preferred markets (sorted by frequency)
-    if prefs["markets"]:
-        context["preferred_markets"] = sorted(
-            prefs["markets"].items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:3]
-    
-    # Preferred program types
-    if prefs["program_types"]:
-        context["preferred_programs"] = sorted(
-            prefs["program_types"].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:3]
+    # Preferred markets and program types (sorted by frequency)
+    markets = _counts(conn, "market", 3)
+    if markets:
+        context["preferred_markets"] = markets
+    programs = _counts(conn, "program_type", 3)
+    if programs:
+        context["preferred_programs"] = programs
     
     # Typical deal parameters
-    if prefs["typical_deal_size"]:
-        context["typical_deal_size"] = prefs["typical_deal_size"]
+    cost = _aggregate(conn, "total_cost")
+    if cost and cost["n"]:
+        context["typical_deal_size"] = cost["total"] / cost["n"]
+    elif legacy.get("typical_deal_size"):
+        context["typical_deal_size"] = legacy["typical_deal_size"]
     
-    context["target_irr_range"] = prefs["target_irr_range"]
+    irr = _aggregate(conn, "irr")
+    if irr and irr["n"] >= 3:
+        context["target_irr_range"] = [irr["min"], irr["max"]]
+    else:
+        context["target_irr_range"] = legacy.get("target_irr_range") or list(DEFAULT_IRR_RANGE)
     
-    if prefs["preferred_exit_cap"]:
-        context["preferred_exit_cap"] = prefs["preferred_exit_cap"]
+    if legacy.get("preferred_exit_cap"):
+        context["preferred_exit_cap"] = legacy["preferred_exit_cap"]
     
     return context
 
 def get_learned_adjustment(param: str, market: str = None, program: str = None) -> Optional[float]:
     """Get learned adjustment for a parameter based on past corrections."""
-    memory = _load_memory()
-    learned = memory.get("learned_defaults", {})
+    conn = _connect()
     
-    # Try specific key first
+    # Most specific key first: market + program, then market, then general
+    keys = []
     if market and program:
-        key = f"{market}_{program}_{param}"
-        if key in learned:
-            return learned[key].get("avg_adjustment")
-    
-    # Try market-specific
+        keys.append(_learn_key(market, program, param))
     if market:
-        key = f"{market}_general_{param}"
-        if key in learned:
-            return learned[key].get("avg_adjustment")
+        keys.append(_learn_key(market, "general", param))
+    keys.append(_learn_key("general", "general", param))
     
-    # Try general
-    key = f"general_general_{param}"
-    if key in learned:
-        return learned[key].get("avg_adjustment")
+    for key in keys:
+        row = conn.execute("SELECT avg_adjustment FROM learned_adjustments WHERE key = ?", (key,)).fetchone()
+        if row:
+            return row["avg_adjustment"]
     
     return None
 
 def get_similar_past_queries(query: str, limit: int = 3) -> list:
-    """Find similar past successful queries for context."""
-    memory = _load_memory()
-    successful = memory.get("successful_queries", [])
-    
-    # Simple keyword matching (could be enhanced with embeddings)
+    """
+    Find similar past successful queries for context.
+    
+    Ranks by cosine similarity of MiniLM embeddings (one matrix-vector
+    product over the query index). Falls back to word overlap if the
+    embedding model isn't available.
+    """
+    conn = _connect()
+    
+    qvec = _embed([query])
+    index = _refresh_query_index(conn) if qvec is not None else None
+    if index is not None:
+        matrix = index.matrix[index.start:index.size]
+        if not len(matrix):
+            return []
+        scores = matrix @ qvec[0]
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"query": index.queries[index.start + i], "timestamp": index.timestamps[index.start + i],
+             "similarity": float(scores[i])}
+            for i in top if scores[i] >= SIMILARITY_THRESHOLD
+        ]
+    
+    rows = conn.execute(
+        "SELECT query, timestamp FROM interactions WHERE success = 1 ORDER BY id DESC LIMIT ?",
+        (SUCCESSFUL_QUERY_LIMIT,),
+    ).fetchall()
+    successful = [{"query": r["query"] or "", "timestamp": r["timestamp"]} for r in reversed(rows)]
+    
+    # Word overlap fallback
     query_words = set(query.lower().split())
     
     scored = []
@@ -346,16 +712,65 @@ def get_similar_past_queries(query: str, limit: int = 3) -> list:
     scored.sort(key=lambda x: x[1], reverse=True)
     return [s[0] for s in scored[:limit]]
 
+def embed_query(query: str) -> Optional[np.ndarray]:
+    """Unit-normalized embedding of one query, or None if the model isn't available."""
+    vecs = _embed([query])
+    return vecs[0] if vecs is not None else None
+
+def get_intent_examples(limit: int = INTERACTION_LIMIT) -> tuple[list[str], Optional[np.ndarray]]:
+    """
+    Chat messages labelled by the conversation model, for intent classification.
+
+    Only successful "text" turns count — those are the user's own words with
+    the intent the chat model assigned. Turns routed locally (parameters carry
+    "routed_by") are left out so the classifier never trains on itself.
+
+    Returns:
+        (intents, matrix) with one unit-normalized row per example, newest
+        last, or ([], None) if the embedding model isn't available.
+    """
+    conn = _connect()
+    if _embed_fn is None and _embed_unavailable:
+        return [], None
+    if not _backfill_query_embeddings(conn):
+        return [], None
+    rows = conn.execute(
+        "SELECT i.intent, q.vec FROM interactions i JOIN query_embeddings q ON q.interaction_id = i.id "
+        "WHERE i.success = 1 AND i.response_type = 'text' AND i.intent IS NOT NULL "
+        "AND json_extract(i.parameters, '$.routed_by') IS NULL ORDER BY i.id DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    if not rows:
+        return [], None
+    rows = rows[::-1]
+    return [r["intent"] for r in rows], np.stack([np.frombuffer(r["vec"], dtype=np.float32) for r in rows])
+
 def get_recent_pro_formas(limit: int = 5) -> list:
     """Get recent pro forma generations for reference."""
-    memory = _load_memory()
-    
-    pro_formas = [
-        i for i in memory["interactions"]
-        if i.get("response_type") == "model" and i.get("metrics")
-    ]
-    
-    return pro_formas[-limit:]
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT * FROM interactions WHERE response_type = 'model' AND has_metrics = 1 ORDER BY id DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [_row_to_interaction(r) for r in reversed(rows)]
+
+def _row_to_interaction(row: sqlite3.Row) -> dict:
+    """Rebuild the interaction dict shape callers saw from the JSON store."""
+    interaction = {
+        "timestamp": row["timestamp"],
+        "query": row["query"],
+        "intent": row["intent"],
+        "response_type": row["response_type"],
+        "parameters": json.loads(row["parameters"] or "{}"),
+        "sources_used": json.loads(row["sources_used"] or "[]"),
+        "success": bool(row["success"]),
+    }
+    if row["has_metrics"]:
+        interaction["metrics"] = {k: row[k] for k in ("irr", "multiple", "exit_cap", "total_cost")}
+        interaction["deal_name"] = row["deal_name"]
+        interaction["market"] = row["market"]
+        interaction["program_type"] = row["program_type"]
+    return interaction
 
 def format_context_for_prompt() -> str:
     """Format user context as a string for inclusion in prompts."""
@@ -404,6 +819,11 @@ def _extract_val(data: dict, section: str, key: str):
 
 def clear_memory():
     """Clear all stored memory (for testing/reset)."""
-    _save_memory(_default_memory())
+    with _transaction() as conn:
+        for table in ("interactions", "corrections", "feedback", "counters", "aggregates",
+                      "learned_adjustments", "query_embeddings"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("DELETE FROM meta WHERE key != 'migrated_json'")
+    _query_indexes.pop(str(MEMORY_DB), None)
     if INSIGHTS_FILE.exists():
         INSIGHTS_FILE.unlink()
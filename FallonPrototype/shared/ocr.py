@@ -0,0 +1,160 @@
+"""
+OCR — Page-Parallel Text Recognition for Scanned PDFs
+
+Scanned PDFs are rasterized and OCR'd one page per task on a process pool.
+Each worker renders only its own page (pdf2image first_page == last_page)
+from a temporary copy of the file, so at most OCR_WORKERS page images exist
+at any time instead of the whole document.
+
+Recognized text is cached per (file hash, page number, DPI), so Streamlit
+reruns and re-uploads of the same scan never OCR a page twice, and raising
+the page limit only processes the new pages.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional
+
+OCR_DPI = 200
+OCR_MAX_PAGES = int(os.environ.get("OCR_MAX_PAGES", "50"))
+OCR_WORKERS = max(1, min(4, os.cpu_count() or 1))
+OCR_CACHE_SIZE = 2000   # pages
+
+# (file_hash, page, dpi) -> text, least recently used first
+_page_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WORKER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _ocr_page(path: str, page: int, dpi: int) -> str:
+    """Render one page and OCR it. Runs in a worker process."""
+    from pdf2image import convert_from_path
+    import pytesseract
+
+    images = convert_from_path(path, dpi=dpi, first_page=page, last_page=page)
+    try:
+        return "\n".join(pytesseract.image_to_string(img) for img in images)
+    finally:
+        for img in images:
+            img.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def file_hash(raw: bytes) -> str:
+    """Content hash used in the page cache key."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _page_cache:
+            _page_cache.move_to_end(key)
+            return _page_cache[key]
+    return None
+
+
+def _cache_put(key, text: str):
+    with _cache_lock:
+        _page_cache[key] = text
+        while len(_page_cache) > OCR_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+
+
+def clear_cache():
+    """Drop all cached page text."""
+    with _cache_lock:
+        _page_cache.clear()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PDF OCR
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _page_count(raw: bytes) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(io.BytesIO(raw)).pages)
+
+
+def ocr_pdf(
+    raw: bytes,
+    dpi: int = OCR_DPI,
+    max_pages: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> str:
+    """
+    OCR a scanned PDF, one page per worker process.
+
+    Args:
+        raw: PDF file bytes.
+        dpi: Rasterization resolution.
+        max_pages: OCR at most this many pages from the start (default OCR_MAX_PAGES).
+        progress: Called as progress(done, total) from the calling thread
+                  after each page, cached pages included.
+
+    Returns:
+        Page texts joined in page order ("" if nothing was recognized or
+        pdf2image / pytesseract are not installed). A note is appended
+        when the document has more pages than max_pages.
+    """
+    try:
+        import pdf2image  # noqa: F401
+        import pytesseract  # noqa: F401
+    except ImportError:
+        return ""
+
+    max_pages = OCR_MAX_PAGES if max_pages is None else max_pages
+    try:
+        page_count = _page_count(raw)
+    except Exception:
+        from pdf2image import pdfinfo_from_bytes
+        page_count = int(pdfinfo_from_bytes(raw).get("Pages", 0))
+    total = min(page_count, max_pages)
+    if total <= 0:
+        return ""
+
+    digest = file_hash(raw)
+    texts = {}
+    for page in range(1, total + 1):
+        cached = _cache_get((digest, page, dpi))
+        if cached is not None:
+            texts[page] = cached
+    done = len(texts)
+    if progress and done:
+        progress(done, total)
+
+    missing = [p for p in range(1, total + 1) if p not in texts]
+    if missing:
+        # Workers read the file from disk so the PDF isn't pickled per task
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(raw)
+        try:
+            with ProcessPoolExecutor(max_workers=min(OCR_WORKERS, len(missing))) as pool:
+                futures = {pool.submit(_ocr_page, tmp.name, page, dpi): page for page in missing}
+                for future in as_completed(futures):
+                    page = futures[future]
+                    try:
+                        texts[page] = future.result()
+                        _cache_put((digest, page, dpi), texts[page])
+                    except Exception as e:
+                        print(f"[OCR] Page {page} failed: {e}")
+                    done += 1
+                    if progress:
+                        progress(done, total)
+        finally:
+            os.unlink(tmp.name)
+
+    text = "\n".join(texts[p] for p in sorted(texts)).strip()
+    if text and page_count > total:
+        text += f"\n\n[OCR covered the first {total} of {page_count} pages]"
+    return text
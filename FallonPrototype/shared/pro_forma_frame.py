@@ -0,0 +1,284 @@
+"""
+ProFormaFrame — Array-Backed Pro Forma
+
+Compact representation of a pro forma: every numeric "value_field" in
+PRO_FORMA_SCHEMA gets a fixed column, values live in a float64 NumPy array,
+and units/labels/sources sit in side tables shared between copies. Any
+schema field that is a number, a numeric string, null, or a dict whose
+"value" is one of those gets a column, whatever its key order or extra
+keys; key order, extra keys and the original string are kept in the
+`shapes` side table.
+
+Anything that doesn't fit a numeric column (text, non-schema fields) is
+kept verbatim in `extra`, so ProFormaFrame.from_dict(pf).to_dict() == pf,
+key order included.
+
+Frames can be stacked: `values` may have shape (..., n_fields), one row per
+scenario. A scenario copy is a memcpy of the values array.
+"""
+
+import copy
+
+import numpy as np
+
+from FallonPrototype.shared.pro_forma_schema import PRO_FORMA_SCHEMA
+
+# Fixed column index — schema order
+FIELDS = tuple(
+    (section, key)
+    for section, fields in PRO_FORMA_SCHEMA.items()
+    for key, spec in fields.items()
+    if spec.get("type") == "value_field"
+)
+FIELD_INDEX = {f"{section}.{key}": i for i, (section, key) in enumerate(FIELDS)}
+
+# Per-column storage kind
+ABSENT = 0      # not in the pro forma (or kept in extra)
+FIELD = 1       # dict with a "value" key
+BARE = 2        # bare number
+INT = 4         # flag: value was an int
+STR = 8         # flag: value was a numeric string ("5.0")
+
+_FIELD_KEYS = ("value", "unit", "label", "source")
+
+
+def _is_number(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _is_numeric_str(v) -> bool:
+    if not isinstance(v, str):
+        return False
+    try:
+        return bool(np.isfinite(float(v)))
+    except ValueError:
+        return False
+
+
+def _columnar(v) -> bool:
+    """Whether a field value fits a float column."""
+    return v is None or _is_number(v) or _is_numeric_str(v)
+
+
+def _kind_flags(v) -> int:
+    return (INT if isinstance(v, int) else 0) | (STR if isinstance(v, str) else 0)
+
+
+class ProFormaFrame:
+    """
+    Array-backed pro forma.
+
+    Attributes:
+        values: float64 array of shape (..., len(FIELDS)); NaN = null/absent.
+        kind: int8 array (len(FIELDS),) of ABSENT/FIELD/BARE (| INT).
+        units, labels, sources: Per-column metadata lists (shared by copies).
+        shapes: Per-column field dict template when its keys differ from
+                value/unit/label/source (order or extra keys) or its value
+                is a string; the original string for bare numeric strings;
+                else None.
+        extra: Everything not stored in a column, in pro forma shape.
+        layout: Original key order — top-level keys and each section's keys.
+    """
+
+    __slots__ = ("values", "kind", "units", "labels", "sources", "shapes", "extra", "layout")
+
+    def __init__(self, values, kind, units, labels, sources, shapes, extra, layout):
+        self.values = values
+        self.kind = kind
+        self.units = units
+        self.labels = labels
+        self.sources = sources
+        self.shapes = shapes
+        self.extra = extra
+        self.layout = layout
+
+    # ─── Conversion ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_dict(cls, pro_forma: dict) -> "ProFormaFrame":
+        """Build a frame from the nested-dict pro forma."""
+        n = len(FIELDS)
+        values = np.full(n, np.nan)
+        kind = np.zeros(n, dtype=np.int8)
+        units, labels, sources, shapes = [None] * n, [None] * n, [None] * n, [None] * n
+        extra = {}
+        layout = []
+
+        for section, content in (pro_forma or {}).items():
+            if not isinstance(content, dict):
+                extra[section] = copy.deepcopy(content)
+                layout.append((section, None))
+                continue
+
+            layout.append((section, tuple(content)))
+            rest = {}
+            for key, field in content.items():
+                i = FIELD_INDEX.get(f"{section}.{key}")
+                if i is not None and _columnar(field):
+                    if field is not None:
+                        values[i] = float(field)
+                    kind[i] = BARE | _kind_flags(field)
+                    if isinstance(field, str):
+                        shapes[i] = field
+                elif i is not None and isinstance(field, dict) and "value" in field and _columnar(field["value"]):
+                    v = field["value"]
+                    if v is not None:
+                        values[i] = float(v)
+                    kind[i] = FIELD | _kind_flags(v)
+                    units[i], labels[i], sources[i] = field.get("unit"), field.get("label"), field.get("source")
+                    if tuple(field) != _FIELD_KEYS or isinstance(v, str):
+                        shapes[i] = copy.deepcopy(field)
+                else:
+                    rest[key] = copy.deepcopy(field)
+            extra[section] = rest
+
+        return cls(values, kind, units, labels, sources, shapes, extra, tuple(layout))
+
+    def to_dict(self) -> dict:
+        """Rebuild the nested-dict pro forma (single-row frames only)."""
+        if self.values.ndim != 1:
+            raise ValueError("to_dict() needs a single-row frame; use frame.row(i) first")
+
+        out = {}
+        for section, keys in self.layout:
+            if keys is None:
+                out[section] = copy.deepcopy(self.extra[section])
+                continue
+            rest = self.extra.get(section, {})
+            sec = {}
+            for key in keys:
+                i = FIELD_INDEX.get(f"{section}.{key}")
+                if key in rest or i is None or not self.kind[i]:
+                    sec[key] = copy.deepcopy(rest.get(key))
+                else:
+                    sec[key] = self._field(i)
+            out[section] = sec
+
+        # Columns set() on fields the source dict didn't have
+        for i, (section, key) in enumerate(FIELDS):
+            if self.kind[i]:
+                sec = out.setdefault(section, {})
+                if isinstance(sec, dict) and key not in sec:
+                    sec[key] = self._field(i)
+        return out
+
+    def _field(self, i: int):
+        v = self.values[i]
+        if np.isnan(v):
+            v = None
+        elif self.kind[i] & INT and float(v).is_integer():
+            v = int(v)
+        else:
+            v = float(v)
+        shape = self.shapes[i]
+        if self.kind[i] & STR:
+            # Unchanged numeric strings go back out as written
+            original = shape if self.kind[i] & BARE else shape["value"]
+            if v is not None and float(original) == v:
+                v = original
+        if self.kind[i] & BARE:
+            return v
+        meta = {"value": v, "unit": self.units[i], "label": self.labels[i], "source": self.sources[i]}
+        if shape is None:
+            return meta
+        return {k: meta[k] if k in meta else copy.deepcopy(shape[k]) for k in shape}
+
+    # ─── Access ─────────────────────────────────────────────────────────────
+
+    @property
+    def shape(self) -> tuple:
+        """Batch shape — () for a single pro forma."""
+        return self.values.shape[:-1]
+
+    def has(self, section: str, key: str) -> bool:
+        """True if the field is stored in a column."""
+        i = FIELD_INDEX.get(f"{section}.{key}")
+        return i is not None and bool(self.kind[i])
+
+    def get(self, section: str, key: str, default=None):
+        """
+        Numeric value of a field — same semantics as return_calculator._val().
+
+        Returns a float for single-row frames and an array (NaN → default)
+        for stacked frames. Non-column fields are read from `extra`.
+        """
+        i = FIELD_INDEX.get(f"{section}.{key}")
+        if i is not None and self.kind[i]:
+            v = self.values[..., i]
+            if v.ndim == 0:
+                return default if np.isnan(v) else float(v)
+            return np.where(np.isnan(v), np.nan if default is None else default, v)
+
+        field = self.raw(section, key)
+        if field is None:
+            return default
+        try:
+            return float(field)
+        except (TypeError, ValueError):
+            return default
+
+    def raw(self, section: str, key: str, default=None):
+        """Field value without float conversion (strings pass through)."""
+        i = FIELD_INDEX.get(f"{section}.{key}")
+        if i is not None and self.kind[i]:
+            return self.get(section, key, default)
+        sec = self.extra.get(section)
+        field = sec.get(key) if isinstance(sec, dict) else None
+        if isinstance(field, dict):
+            field = field.get("value")
+        return default if field is None else field
+
+    def set(self, section: str, key: str, value, label: str | None = None, source: str | None = None):
+        """
+        Set a column value in place (broadcast across stacked rows).
+
+        Metadata lists are copied on write, so copies stay independent.
+        """
+        i = FIELD_INDEX[f"{section}.{key}"]
+        self.values[..., i] = np.nan if value is None else value
+        if not self.kind[i] or label is not None or source is not None:
+            self.kind = self.kind.copy()
+            self.labels, self.sources = list(self.labels), list(self.sources)
+            if not self.kind[i]:
+                self.kind[i] = FIELD
+                self.extra = {**self.extra, section: {k: v for k, v in self.extra.get(section, {}).items() if k != key}}
+            if label is not None:
+                self.labels[i] = label
+            if source is not None:
+                self.sources[i] = source
+
+    # ─── Copies and stacking ────────────────────────────────────────────────
+
+    def copy(self) -> "ProFormaFrame":
+        """Scenario copy — new values array, shared (copy-on-write) metadata."""
+        return ProFormaFrame(self.values.copy(), self.kind, self.units, self.labels,
+                             self.sources, self.shapes, self.extra, self.layout)
+
+    def tile(self, *shape: int) -> "ProFormaFrame":
+        """Stack `shape` copies of this frame's values into one batch."""
+        values = np.broadcast_to(self.values, shape + self.values.shape).copy()
+        return ProFormaFrame(values, self.kind, self.units, self.labels,
+                             self.sources, self.shapes, self.extra, self.layout)
+
+    def row(self, index) -> "ProFormaFrame":
+        """Single scenario out of a stacked frame."""
+        return ProFormaFrame(self.values[index].copy(), self.kind, self.units, self.labels,
+                             self.sources, self.shapes, self.extra, self.layout)
+
+    def column(self, section: str, key: str) -> np.ndarray:
+        """
+        Writable view of one field across all stacked rows.
+
+        Raises:
+            ValueError: The field has no column (absent, or kept in `extra`),
+                        so writes to the view would never be read back.
+        """
+        i = FIELD_INDEX[f"{section}.{key}"]
+        if not self.kind[i]:
+            raise ValueError(f"{section}.{key} is not stored in a column; use set() first")
+        return self.values[..., i]
+
+
+def as_frame(pro_forma) -> ProFormaFrame:
+    """Return `pro_forma` as a ProFormaFrame, converting dicts."""
+    return pro_forma if isinstance(pro_forma, ProFormaFrame) else ProFormaFrame.from_dict(pro_forma)
@@ -0,0 +1,69 @@
+"""
+Pro Forma Output Schema (Phase 4.1)
+
+Section and field layout of a generated pro forma. Every "value_field" is a
+dict of {"value", "unit", "label", "source"}; "str" fields are plain strings.
+Field order here is the column order of ProFormaFrame.
+"""
+
+PRO_FORMA_SCHEMA = {
+    "project_summary": {
+        "deal_name": {"type": "str"},
+        "market": {"type": "str"},
+        "program_type": {"type": "str"},
+        "total_gfa_sf": {"type": "value_field"},
+        "unit_count": {"type": "value_field", "nullable": True},
+        "rentable_sf": {"type": "value_field", "nullable": True},
+        "construction_start": {"type": "value_field"},
+        "construction_duration_months": {"type": "value_field"},
+        "total_keys": {"type": "value_field", "nullable": True},
+        "notes": {"type": "str"},
+    },
+    "revenue_assumptions": {
+        "rent_psf_monthly": {"type": "value_field", "nullable": True},
+        "rent_psf_annual_nnn": {"type": "value_field", "nullable": True},
+        "adr": {"type": "value_field", "nullable": True},
+        "stabilized_occupancy_pct": {"type": "value_field"},
+        "lease_up_months": {"type": "value_field"},
+        "annual_rent_growth_pct": {"type": "value_field"},
+        "other_income_per_unit_monthly": {"type": "value_field", "nullable": True},
+    },
+    "cost_assumptions": {
+        "land_cost_total": {"type": "value_field"},
+        "hard_cost_psf": {"type": "value_field"},
+        "hard_cost_total": {"type": "value_field"},
+        "soft_cost_pct_of_hard": {"type": "value_field"},
+        "soft_cost_total": {"type": "value_field"},
+        "developer_fee_pct": {"type": "value_field"},
+        "developer_fee_total": {"type": "value_field"},
+        "contingency_pct": {"type": "value_field"},
+        "contingency_total": {"type": "value_field"},
+        "total_project_cost": {"type": "value_field"},
+    },
+    "financing_assumptions": {
+        "construction_loan_ltc_pct": {"type": "value_field"},
+        "construction_loan_amount": {"type": "value_field"},
+        "construction_loan_rate_pct": {"type": "value_field"},
+        "carry_cost_total": {"type": "value_field"},
+        "equity_required": {"type": "value_field"},
+        "lp_equity_pct": {"type": "value_field"},
+        "lp_equity_amount": {"type": "value_field"},
+        "gp_equity_pct": {"type": "value_field"},
+        "gp_equity_amount": {"type": "value_field"},
+    },
+    "return_metrics": {
+        "exit_cap_rate_pct": {"type": "value_field"},
+        "exit_year": {"type": "value_field"},
+        "stabilized_noi": {"type": "value_field"},
+        "gross_exit_value": {"type": "value_field"},
+        "net_exit_value": {"type": "value_field"},
+        "total_profit": {"type": "value_field"},
+        "profit_on_cost_pct": {"type": "value_field"},
+        "development_spread_bps": {"type": "value_field"},
+        "project_irr_levered_pct": {"type": "value_field"},
+        "equity_multiple_lp": {"type": "value_field"},
+        "lp_irr_pct": {"type": "value_field"},
+    },
+}
+
+VALID_LABELS = {"confirmed", "estimated", "calculated", "missing"}
@@ -3,8 +3,16 @@ Return Metrics Calculator (Phase 4.4)
 
 Pure Python calculator for cross-checking Claude's return estimates.
 Runs the same assumptions as a simplified DCF to validate the model.
+
+compute_returns_batch() is the NumPy-vectorized twin of compute_returns(),
+used by the goal-seek solver to evaluate many scenarios in one pass. It
+accepts a dict or a ProFormaFrame, including stacked scenario frames.
 """
 
+import numpy as np
+
+from FallonPrototype.shared.pro_forma_frame import FIELDS, ProFormaFrame, as_frame
+
 
 def _val(section: dict, key: str, default=None):
     """
@@ -240,39 +248,30 @@ def compute_sensitivity_table(pro_forma: dict, target_irr: float | None = None)
     Returns:
         Dict with row/col labels and IRR values for each scenario.
     """
-    returns = pro_forma.get("return_metrics", {})
-    costs = pro_forma.get("cost_assumptions", {})
-    
-    base_cap_rate = _val(returns, "exit_cap_rate_pct", 5.25)
-    base_hard_cost = _val(costs, "hard_cost_psf", 300)
+    frame = as_frame(pro_forma)
+    base_cap_rate = frame.get("return_metrics", "exit_cap_rate_pct", 5.25)
     
     # Define scenarios
     cap_rates = [base_cap_rate - 0.5, base_cap_rate, base_cap_rate + 0.5]
     cost_factors = [0.9, 1.0, 1.1]  # -10%, base, +10%
     
+    # One stacked frame holds all nine scenarios; one batch call scores them
+    scenarios = _create_scenarios(frame, cap_rates, cost_factors)
+    irr_grid = compute_returns_batch(scenarios)["calc_irr_approx_pct"]
+    
     values = []
     colors = []
     
-    for cap_rate in cap_rates:
+    for i in range(len(cap_rates)):
         row_values = []
         row_colors = []
         
-        for cost_factor in cost_factors:
-            # Create scenario pro forma
-            scenario = _create_scenario(pro_forma, cap_rate, cost_factor)
-            
-            # Compute returns for scenario
-            scenario_returns = compute_returns(scenario)
-            irr = scenario_returns.get("calc_irr_approx_pct")
-            
-            # Handle None, complex, or invalid IRR values
-            if irr is not None and isinstance(irr, (int, float)) and not isinstance(irr, complex):
-                row_values.append(round(float(irr), 1))
-            else:
-                row_values.append(None)
+        for j in range(len(cost_factors)):
+            irr = irr_grid[i, j]
+            row_values.append(round(float(irr), 1) if np.isfinite(irr) else None)
             
             # Determine color based on target
-            irr_for_color = row_values[-1]  # Use the cleaned value
+            irr_for_color = row_values[-1]
             if target_irr and irr_for_color is not None:
                 if irr_for_color >= target_irr:
                     row_colors.append("green")
@@ -297,44 +296,329 @@ def compute_sensitivity_table(pro_forma: dict, target_irr: float | None = None)
     }
 
 
-def _create_scenario(pro_forma: dict, cap_rate: float, cost_factor: float) -> dict:
-    """Create a scenario copy of the pro forma with modified assumptions."""
-    import copy
-    scenario = copy.deepcopy(pro_forma)
+def _create_scenarios(frame: ProFormaFrame, cap_rates: list, cost_factors: list) -> ProFormaFrame:
+    """
+    Stack cap rate × cost factor scenarios into one frame.
+    
+    Row i, column j has exit cap cap_rates[i] and construction costs scaled
+    by cost_factors[j], with equity re-derived against the fixed loan.
+    """
+    grid = frame.tile(len(cap_rates), len(cost_factors))
     
     # Modify cap rate
-    if "return_metrics" in scenario:
-        if "exit_cap_rate_pct" in scenario["return_metrics"]:
-            if isinstance(scenario["return_metrics"]["exit_cap_rate_pct"], dict):
-                scenario["return_metrics"]["exit_cap_rate_pct"]["value"] = cap_rate
-            else:
-                scenario["return_metrics"]["exit_cap_rate_pct"] = cap_rate
+    if frame.has("return_metrics", "exit_cap_rate_pct"):
+        grid.column("return_metrics", "exit_cap_rate_pct")[:] = np.array(cap_rates)[:, None]
     
     # Modify construction costs
-    costs = scenario.get("cost_assumptions", {})
-    
-    for key in ["hard_cost_psf", "hard_cost_total", "soft_cost_total", 
+    factors = np.array(cost_factors)[None, :]
+    for key in ["hard_cost_psf", "hard_cost_total", "soft_cost_total",
                 "contingency_total", "total_project_cost"]:
-        if key in costs:
-            if isinstance(costs[key], dict) and costs[key].get("value"):
-                costs[key]["value"] *= cost_factor
-            elif isinstance(costs[key], (int, float)):
-                costs[key] *= cost_factor
+        if frame.get("cost_assumptions", key):
+            grid.column("cost_assumptions", key)[:] *= factors
     
     # Recalculate equity
-    financing = scenario.get("financing_assumptions", {})
-    total_cost = _val(costs, "total_project_cost")
-    loan_amount = _val(financing, "construction_loan_amount")
+    total_cost = frame.get("cost_assumptions", "total_project_cost")
+    loan_amount = frame.get("financing_assumptions", "construction_loan_amount")
     
     if total_cost and loan_amount:
-        new_equity = total_cost - loan_amount
-        if "equity_required" in financing:
-            if isinstance(financing["equity_required"], dict):
-                financing["equity_required"]["value"] = new_equity
+        new_equity = grid.column("cost_assumptions", "total_project_cost") - loan_amount
+        lp_pct = frame.get("financing_assumptions", "lp_equity_pct", 90) / 100
+        if frame.has("financing_assumptions", "equity_required"):
+            grid.column("financing_assumptions", "equity_required")[:] = new_equity
+        if frame.has("financing_assumptions", "lp_equity_amount"):
+            grid.column("financing_assumptions", "lp_equity_amount")[:] = new_equity * lp_pct
+    
+    return grid
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# VECTORIZED CALCULATOR
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Cost components whose totals feed total_project_cost directly
+_COST_TOTAL_FIELDS = ("hard_cost_total", "soft_cost_total", "contingency_total", "developer_fee_total")
+
+
+def _estimate_noi_batch(get, program_type: str) -> np.ndarray:
+    """
+    Array version of _estimate_noi(). `get(section, key, default)` returns
+    a scalar or array; the result is NaN wherever _estimate_noi() returns None.
+    """
+    rev, summ = "revenue_assumptions", "project_summary"
+    
+    if program_type in ("multifamily", "condo"):
+        rent_psf = get(rev, "rent_psf_monthly", np.nan)
+        occupancy = get(rev, "stabilized_occupancy_pct", 93) / 100
+        unit_count = get(summ, "unit_count", np.nan)
+        other_income = get(rev, "other_income_per_unit_monthly", 125) * unit_count * 12
+        egi = (rent_psf * unit_count * 900 * 12 + other_income) * occupancy
+        noi = egi * 0.65
+        return np.where((rent_psf != 0) & (unit_count != 0), noi, np.nan)
+    
+    if program_type == "office":
+        rent_psf = get(rev, "rent_psf_annual_nnn", np.nan)
+        rentable_sf = get(summ, "rentable_sf", np.nan)
+        occupancy = get(rev, "stabilized_occupancy_pct", 88) / 100
+        noi = rent_psf * rentable_sf * occupancy
+        return np.where((rent_psf != 0) & (rentable_sf != 0), noi, np.nan)
+    
+    if program_type == "hotel":
+        adr = get(rev, "adr", np.nan)
+        occupancy = get(rev, "stabilized_occupancy_pct", 70) / 100
+        keys = get(summ, "total_keys", np.nan)
+        noi = adr * occupancy * keys * 365 * 0.35
+        return np.where((adr != 0) & (keys != 0), noi, np.nan)
+    
+    return np.asarray(np.nan)
+
+
+def compute_returns_batch(pro_forma: dict, overrides: dict | None = None) -> dict:
+    """
+    Vectorized compute_returns() over arrays of input overrides.
+    
+    With no overrides the results match compute_returns() exactly. Overrides
+    flow through the same relationships _create_scenario() applies:
+    cost inputs rebuild total_project_cost, which moves the loan (via LTC),
+    equity and LP equity; the unit count scales GFA and so construction
+    cost along with NOI. Revenue inputs scale a model-supplied stabilized
+    NOI by the ratio of estimated NOIs so they stay live drivers.
+    
+    Args:
+        pro_forma: The base pro forma — a dict or ProFormaFrame. A stacked
+                   frame is scored row by row (each row is its own base).
+        overrides: Map of "section.field" -> array-like of values. Arrays
+                   broadcast against each other and the frame's batch shape;
+                   NaN entries fall back to the base value, so one batch can
+                   vary different fields in different rows.
+    
+    Returns:
+        Dict with the same keys as compute_returns(), each a float64 array
+        of the broadcast shape. NaN marks metrics compute_returns() would
+        report as None.
+    """
+    frame = as_frame(pro_forma)
+    overrides = {k: np.asarray(v, dtype=np.float64) for k, v in (overrides or {}).items()}
+    shape = np.broadcast_shapes(frame.shape, *(a.shape for a in overrides.values()))
+    
+    program_type = frame.raw("project_summary", "program_type", "multifamily")
+    
+    def base(section, key, default=np.nan):
+        return frame.get(section, key, default)
+    
+    def get(section, key, default=np.nan):
+        b = base(section, key, default)
+        ov = overrides.get(f"{section}.{key}")
+        if ov is None:
+            return b
+        return np.where(np.isnan(ov), b, ov)
+    
+    rev, costs, fin, ret = "revenue_assumptions", "cost_assumptions", "financing_assumptions", "return_metrics"
+    
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # NOI — model value scaled by the estimated-NOI ratio, else the estimate
+        est_base = _estimate_noi_batch(base, program_type)
+        est_new = _estimate_noi_batch(get, program_type)
+        noi_given = get(ret, "stabilized_noi")
+        ratio = np.where(np.isfinite(est_base) & (est_base != 0), est_new / est_base, 1.0)
+        if f"{ret}.stabilized_noi" in overrides:
+            noi = np.where(np.isnan(noi_given), est_new, noi_given)
+        else:
+            noi = np.where(np.isnan(noi_given), est_new, noi_given * ratio)
         
-        lp_pct = _val(financing, "lp_equity_pct", 90) / 100
-        if "lp_equity_amount" in financing:
-            if isinstance(financing["lp_equity_amount"], dict):
-                financing["lp_equity_amount"]["value"] = new_equity * lp_pct
+        # Total development cost — base value plus the change in each driver.
+        # GFA (and with it construction cost) scales with the unit count.
+        units_base = np.asarray(base("project_summary", "unit_count"), dtype=np.float64)
+        units = np.asarray(get("project_summary", "unit_count"), dtype=np.float64)
+        units, units_base = np.broadcast_arrays(units, units_base)
+        units_ratio = np.divide(units, units_base, out=np.ones_like(units),
+                                where=np.isfinite(units_base) & (units_base != 0))
+        gfa_base = base("project_summary", "total_gfa_sf", 0)
+        
+        def tdc(fn, gfa):
+            land = fn(costs, "land_cost_total", 0)
+            hard = fn(costs, "hard_cost_psf", 0)
+            soft = fn(costs, "soft_cost_pct_of_hard", 0) / 100
+            cont = fn(costs, "contingency_pct", 0) / 100
+            fee = fn(costs, "developer_fee_pct", 0) / 100
+            return (land + gfa * hard * (1 + soft) * (1 + cont)) * (1 + fee)
+        
+        total_cost_base = base(costs, "total_project_cost")
+        total_cost = get(costs, "total_project_cost") + (tdc(get, gfa_base * units_ratio) - tdc(base, gfa_base))
+        for key in _COST_TOTAL_FIELDS:
+            total_cost = total_cost + (get(costs, key, 0) - base(costs, key, 0))
+        
+        # Capital stack — loan follows LTC, equity absorbs the rest
+        ltc_base = base(fin, "construction_loan_ltc_pct")
+        loan_base = base(fin, "construction_loan_amount")
+        loan = get(fin, "construction_loan_amount")
+        loan = np.where(np.isnan(ltc_base), loan,
+                        loan + (total_cost * get(fin, "construction_loan_ltc_pct") - total_cost_base * ltc_base) / 100)
+        equity_base = base(fin, "equity_required")
+        equity = get(fin, "equity_required") + np.nan_to_num(total_cost - total_cost_base) - np.nan_to_num(loan - loan_base)
+        lp_pct_base = base(fin, "lp_equity_pct", 90)
+        lp_pct = get(fin, "lp_equity_pct", 90)
+        lp_equity = get(fin, "lp_equity_amount") + np.nan_to_num(equity * lp_pct - equity_base * lp_pct_base) / 100
+        
+        # Exit
+        cap_rate = get(ret, "exit_cap_rate_pct", 5.25) / 100
+        gross_exit = np.where((noi != 0) & (cap_rate > 0), noi / cap_rate, np.nan)
+        net_exit = gross_exit - gross_exit * 0.025
+        total_profit = np.where(total_cost != 0, net_exit - total_cost, np.nan)
+        profit_on_cost = np.where(total_profit != 0, total_profit / total_cost * 100, np.nan)
+        
+        exit_year = get(ret, "exit_year", 5)
+        construction_months = get("project_summary", "construction_duration_months", 18)
+        lease_up_months = get(rev, "lease_up_months", 18)
+        hold_years = np.where((exit_year != 0) & ~np.isnan(exit_year), exit_year,
+                              (construction_months + lease_up_months) / 12 + 2)
+        
+        # LP returns (90/10 split, 20% promote)
+        has_multiple = (lp_equity > 0) & (total_profit != 0) & np.isfinite(total_profit) & (equity != 0) & np.isfinite(equity)
+        lp_profit_share = total_profit * lp_pct / 100 * 0.8
+        equity_multiple = np.where(has_multiple, (lp_equity + lp_profit_share) / lp_equity, np.nan)
+        irr = np.where(
+            (equity_multiple > 0) & (hold_years > 0),
+            (np.maximum(equity_multiple, 0) ** (1 / hold_years) - 1) * 100,
+            np.where(equity_multiple < 0, -100.0, np.nan),
+        )
+    
+    def out(a):
+        return np.broadcast_to(np.asarray(a, dtype=np.float64), shape).copy()
+    
+    return {
+        "calc_noi": out(noi),
+        "calc_gross_exit_value": out(gross_exit),
+        "calc_net_exit_value": out(net_exit),
+        "calc_total_profit": out(total_profit),
+        "calc_profit_on_cost_pct": out(profit_on_cost),
+        "calc_equity_multiple_approx": out(equity_multiple),
+        "calc_irr_approx_pct": out(irr),
+        "calc_hold_years": out(hold_years),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DRIVER SENSITIVITY (TORNADO / SPIDER)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+DRIVER_SECTIONS = ("revenue_assumptions", "cost_assumptions", "financing_assumptions", "return_metrics")
+
+# Independent inputs the calculator reads. Totals (hard/soft/contingency/fee,
+# total cost, loan, equity) are derived from these inside compute_returns_batch()
+# and are never flexed on their own — that would double-count.
+DRIVER_INPUTS = (
+    ("revenue_assumptions", "rent_psf_monthly"),
+    ("revenue_assumptions", "rent_psf_annual_nnn"),
+    ("revenue_assumptions", "adr"),
+    ("revenue_assumptions", "stabilized_occupancy_pct"),
+    ("revenue_assumptions", "other_income_per_unit_monthly"),
+    ("revenue_assumptions", "lease_up_months"),
+    ("cost_assumptions", "land_cost_total"),
+    ("cost_assumptions", "hard_cost_psf"),
+    ("cost_assumptions", "soft_cost_pct_of_hard"),
+    ("cost_assumptions", "contingency_pct"),
+    ("cost_assumptions", "developer_fee_pct"),
+    ("financing_assumptions", "construction_loan_ltc_pct"),
+    ("financing_assumptions", "lp_equity_pct"),
+    ("return_metrics", "exit_cap_rate_pct"),
+    ("return_metrics", "exit_year"),
+)
+
+
+def _driver_fields(frame: ProFormaFrame, sections: tuple) -> list[tuple[str, str, float]]:
+    """List (section, field, base_value) for every non-zero independent input."""
+    fields = []
+    for section, key in DRIVER_INPUTS:
+        value = frame.get(section, key) if section in sections else None
+        if value:
+            fields.append((section, key, value))
+    # Without GFA, $/SF can't rebuild the cost stack — flex the hard cost total instead
+    if not frame.get("project_summary", "total_gfa_sf") and "cost_assumptions" in sections:
+        fields = [f for f in fields if f[1] != "hard_cost_psf"]
+        if frame.get("cost_assumptions", "hard_cost_total"):
+            fields.append(("cost_assumptions", "hard_cost_total", frame.get("cost_assumptions", "hard_cost_total")))
+    return fields
+
+
+def compute_driver_sensitivity(
+    pro_forma: dict,
+    flex_pct: float = 10.0,
+    steps: int = 5,
+    sections: tuple = DRIVER_SECTIONS,
+) -> dict:
+    """
+    Flex every independent input by ±flex_pct and rank drivers by return impact.
+    
+    All drivers and flex steps are scored in a single compute_returns_batch()
+    call: row i of the batch varies driver i, every other input stays at base.
     
-    return scenario
+    Args:
+        pro_forma: The generated pro forma (dict or ProFormaFrame).
+        flex_pct: Maximum flex in percent (10 → -10% .. +10%).
+        steps: Points on each spider curve (odd keeps the base point).
+        sections: Pro forma sections whose DRIVER_INPUTS are flexed.
+    
+    Returns:
+        Dict with:
+          "flex_pct", "steps" (flex % at each curve point),
+          "base_irr", "base_profit_on_cost",
+          "drivers": list sorted by IRR swing (tornado order), each with
+              key, label, base_value, irr_down, irr_up, irr_swing,
+              poc_down, poc_up, poc_swing, irr_curve, poc_curve
+          "ranked_by_poc": driver keys sorted by profit-on-cost swing
+    """
+    frame = as_frame(pro_forma)
+    fields = _driver_fields(frame, sections)
+    flex = np.linspace(-flex_pct, flex_pct, steps)
+    
+    base = compute_returns_batch(frame)
+    base_irr = float(base["calc_irr_approx_pct"])
+    base_poc = float(base["calc_profit_on_cost_pct"])
+    
+    def clean(x):
+        return round(float(x), 4) if np.isfinite(x) else None
+    
+    if not fields:
+        return {"flex_pct": flex_pct, "steps": flex.tolist(), "base_irr": clean(base_irr),
+                "base_profit_on_cost": clean(base_poc), "drivers": [], "ranked_by_poc": []}
+    
+    n = len(fields)
+    overrides = {}
+    for i, (section, key, value) in enumerate(fields):
+        arr = np.full((n, steps), np.nan)
+        arr[i] = value * (1 + flex / 100)
+        overrides[f"{section}.{key}"] = arr
+    
+    calc = compute_returns_batch(frame, overrides)
+    irr = calc["calc_irr_approx_pct"]
+    poc = calc["calc_profit_on_cost_pct"]
+    
+    drivers = []
+    for i, (section, key, value) in enumerate(fields):
+        irr_swing = abs(np.nan_to_num(irr[i, -1] - irr[i, 0]))
+        poc_swing = abs(np.nan_to_num(poc[i, -1] - poc[i, 0]))
+        drivers.append({
+            "key": f"{section}.{key}",
+            "label": key.replace("_", " ").replace(" pct", " %").replace(" psf", " /sf").title(),
+            "base_value": value,
+            "irr_down": clean(irr[i, 0]),
+            "irr_up": clean(irr[i, -1]),
+            "irr_swing": round(float(irr_swing), 4),
+            "poc_down": clean(poc[i, 0]),
+            "poc_up": clean(poc[i, -1]),
+            "poc_swing": round(float(poc_swing), 4),
+            "irr_curve": [clean(v) for v in irr[i]],
+            "poc_curve": [clean(v) for v in poc[i]],
+        })
+    
+    drivers.sort(key=lambda d: d["irr_swing"], reverse=True)
+    ranked_by_poc = [d["key"] for d in sorted(drivers, key=lambda d: d["poc_swing"], reverse=True)]
+    
+    return {
+        "flex_pct": flex_pct,
+        "steps": [round(float(f), 4) for f in flex],
+        "base_irr": clean(base_irr),
+        "base_profit_on_cost": clean(base_poc),
+        "drivers": drivers,
+        "ranked_by_poc": ranked_by_poc,
+    }
@@ -0,0 +1,245 @@
+"""
+Run Store — Columnar History of Generated Pro Formas
+
+Every generated or adjusted model is flattened into one Arrow row — each
+PRO_FORMA_SCHEMA value field, the compute_returns() results and the
+extracted ProjectParameters — and appended to a Parquet dataset under
+data/runs/, hive-partitioned by market / program / date:
+
+    data/runs/market=charlotte/program=multifamily/date=2026-10-18/<run>.parquet
+
+Months of runs can then be scanned with pyarrow.dataset or DuckDB
+(`SELECT ... FROM 'data/runs/**/*.parquet'`) with partition pruning.
+
+Pro forma values come straight from ProFormaFrame's float64 storage: runs
+are laid out column-major once and each Arrow column wraps its slice of
+that block without another copy (NaN → null via a validity bitmap).
+"""
+
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from FallonPrototype.shared.pro_forma_frame import FIELDS, as_frame
+
+RUNS_DIR = Path(__file__).parent.parent / "data" / "runs"
+
+# compute_returns() output, in order
+CALC_FIELDS = (
+    "calc_noi",
+    "calc_gross_exit_value",
+    "calc_net_exit_value",
+    "calc_total_profit",
+    "calc_profit_on_cost_pct",
+    "calc_equity_multiple_approx",
+    "calc_irr_approx_pct",
+    "calc_hold_years",
+)
+
+# Mirrors agents.financial_agent.ProjectParameters (kept in sync by tests)
+PARAM_FIELDS = (
+    ("market", pa.string()),
+    ("program_type", pa.string()),
+    ("unit_count", pa.int64()),
+    ("rentable_sf", pa.int64()),
+    ("total_gfa_sf", pa.int64()),
+    ("land_cost", pa.float64()),
+    ("acreage", pa.float64()),
+    ("target_lp_irr_pct", pa.float64()),
+    ("target_equity_multiple", pa.float64()),
+    ("construction_start", pa.string()),
+    ("construction_duration_months", pa.int64()),
+    ("mixed_use_components", pa.list_(pa.string())),
+    ("total_keys", pa.int64()),
+    ("submarket", pa.string()),
+    ("notes", pa.string()),
+)
+
+PARTITION_SCHEMA = pa.schema([
+    ("market", pa.string()),
+    ("program", pa.string()),
+    ("date", pa.string()),
+])
+
+RUN_SCHEMA = pa.schema(
+    [
+        ("run_id", pa.string()),
+        ("generated_at", pa.timestamp("us", tz="UTC")),
+        ("deal_name", pa.string()),
+        ("warning_count", pa.int32()),
+    ]
+    + [(f"{section}.{key}", pa.float64()) for section, key in FIELDS]
+    + [(name, pa.float64()) for name in CALC_FIELDS]
+    + [(f"params.{name}", typ) for name, typ in PARAM_FIELDS]
+    + list(PARTITION_SCHEMA)
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FLATTEN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _float_column(values: np.ndarray) -> pa.Array:
+    """Wrap a contiguous float64 slice as an Arrow array — data buffer is shared, NaN → null."""
+    missing = np.isnan(values)
+    if not missing.any():
+        return pa.Array.from_buffers(pa.float64(), len(values), [None, pa.py_buffer(values)])
+    validity = np.packbits(~missing, bitorder="little")
+    return pa.Array.from_buffers(pa.float64(), len(values), [pa.py_buffer(validity), pa.py_buffer(values)],
+                                 null_count=int(missing.sum()))
+
+
+def _coerce(value, typ):
+    if value is None:
+        return None
+    try:
+        if pa.types.is_integer(typ):
+            return int(float(value))
+        if pa.types.is_floating(typ):
+            return float(value)
+        if pa.types.is_list(typ):
+            return [str(v) for v in value] if isinstance(value, (list, tuple)) else [str(value)]
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def _partition_value(value, default="unknown") -> str:
+    text = str(value).strip().lower() if value else ""
+    return text.replace("/", "-") or default
+
+
+def runs_to_table(runs: list[dict], generated_at: datetime | None = None) -> pa.Table:
+    """
+    Flatten model runs into an Arrow table with RUN_SCHEMA.
+
+    Args:
+        runs: Export dicts as stored in session state — "pro_forma" (dict or
+              single-row ProFormaFrame), and optionally "calc_results",
+              "params" and "warnings".
+        generated_at: Timestamp for every row (default: now, UTC).
+
+    Returns:
+        pa.Table, one row per run.
+    """
+    n = len(runs)
+    generated_at = generated_at or datetime.now(timezone.utc)
+    frames = [as_frame(r.get("pro_forma") or {}) for r in runs]
+    if any(f.values.ndim != 1 for f in frames):
+        raise ValueError("runs_to_table() needs single-row frames; use frame.row(i) first")
+
+    # Column-major blocks: row i of each block is one contiguous Arrow column
+    values = np.empty((len(FIELDS), n))
+    calcs = np.full((len(CALC_FIELDS), n), np.nan)
+    for j, (run, frame) in enumerate(zip(runs, frames)):
+        values[:, j] = frame.values
+        calc = run.get("calc_results") or {}
+        for i, name in enumerate(CALC_FIELDS):
+            v = calc.get(name)
+            if v is not None:
+                calcs[i, j] = v
+
+    markets, programs, names = [], [], []
+    for frame in frames:
+        markets.append(_partition_value(frame.raw("project_summary", "market")))
+        programs.append(_partition_value(frame.raw("project_summary", "program_type")))
+        name = frame.raw("project_summary", "deal_name")
+        names.append(str(name) if name is not None else None)
+
+    params = [r.get("params") or {} for r in runs]
+    columns = (
+        [
+            pa.array([uuid.uuid4().hex for _ in range(n)], pa.string()),
+            pa.array([generated_at] * n, pa.timestamp("us", tz="UTC")),
+            pa.array(names, pa.string()),
+            pa.array([len(r.get("warnings") or []) for r in runs], pa.int32()),
+        ]
+        + [_float_column(values[i]) for i in range(len(FIELDS))]
+        + [_float_column(calcs[i]) for i in range(len(CALC_FIELDS))]
+        + [pa.array([_coerce(p.get(name), typ) for p in params], typ) for name, typ in PARAM_FIELDS]
+        + [
+            pa.array(markets, pa.string()),
+            pa.array(programs, pa.string()),
+            pa.array([generated_at.astimezone(timezone.utc).strftime("%Y-%m-%d")] * n, pa.string()),
+        ]
+    )
+    return pa.Table.from_arrays(columns, schema=RUN_SCHEMA)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DATASET
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _partitioning():
+    return ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+
+def append_runs(runs: list[dict], base_dir: Path | str = RUNS_DIR, generated_at: datetime | None = None) -> int:
+    """
+    Append runs to the partitioned Parquet dataset.
+
+    Each call writes new files next to the existing ones, so concurrent
+    sessions never rewrite each other's data.
+
+    Returns:
+        Number of rows written.
+    """
+    if not runs:
+        return 0
+    table = runs_to_table(runs, generated_at)
+    ds.write_dataset(
+        table,
+        str(base_dir),
+        format="parquet",
+        partitioning=_partitioning(),
+        basename_template=f"run-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return table.num_rows
+
+
+def open_runs(base_dir: Path | str = RUNS_DIR) -> ds.Dataset:
+    """
+    Open the run history as a pyarrow dataset.
+
+    Example:
+        runs = open_runs()
+        runs.to_table(
+            columns=["deal_name", "calc_irr_approx_pct"],
+            filter=(ds.field("market") == "charlotte") & (ds.field("date") >= "2026-10-01"),
+        )
+    """
+    return ds.dataset(str(base_dir), format="parquet", schema=RUN_SCHEMA, partitioning=_partitioning())
+
+
+def compact_runs(base_dir: Path | str = RUNS_DIR) -> int:
+    """
+    Merge each partition's per-run files into one Parquet file.
+
+    Interactive use writes one small file per run; compacting keeps scans
+    over months of history fast.
+
+    Returns:
+        Number of partitions compacted.
+    """
+    base_dir = Path(base_dir)
+    if not base_dir.exists():
+        return 0
+    file_schema = pa.schema([f for f in RUN_SCHEMA if f.name not in PARTITION_SCHEMA.names])
+    compacted = 0
+    for leaf in sorted({p.parent for p in base_dir.glob("**/*.parquet")}):
+        files = sorted(leaf.glob("*.parquet"))
+        if len(files) < 2:
+            continue
+        table = pa.concat_tables(pq.read_table(f, schema=file_schema) for f in files)
+        target = leaf / f"compact-{uuid.uuid4().hex}.parquet"
+        pq.write_table(table, target)
+        for f in files:
+            f.unlink()
+        compacted += 1
+    return compacted
@@ -0,0 +1,201 @@
+"""
+Text Stream — Page-Level Extraction and Lazy Chunking
+
+Documents are read as a generator of Page(number, offset, text) records
+instead of one concatenated string, and iter_chunks() turns that stream
+into chunks while it is still being produced. Ingestion can embed the
+first chunks while later PDF pages are still being parsed, and peak memory
+is bounded by the chunking window rather than by the document size.
+
+Offsets are character positions in the document as it would read when
+joined with join_pages(), so chunk offsets stay valid across both paths.
+"""
+
+import io
+import os
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+PAGE_SEPARATOR = "\n"
+TEXT_BLOCK_CHARS = 64_000        # plain-text files are streamed in blocks of about this size
+WINDOW_CHARS = 12_000            # text buffered before the splitter runs
+
+
+class Page(NamedTuple):
+    number: int      # 1-based
+    offset: int      # character offset of the page in the joined document
+    text: str
+
+
+class Chunk(NamedTuple):
+    index: int
+    offset: int      # character offset of the chunk in the joined document
+    page: int        # page the chunk starts on
+    text: str
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PAGE EXTRACTION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _with_offsets(texts: Iterable[str]) -> Iterator[Page]:
+    offset = 0
+    for number, text in enumerate(texts, 1):
+        yield Page(number, offset, text)
+        offset += len(text) + len(PAGE_SEPARATOR)
+
+
+def _pdf_texts(source) -> Iterator[str]:
+    import pypdf
+
+    reader = pypdf.PdfReader(source)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def _text_blocks(stream, block_chars: int = TEXT_BLOCK_CHARS) -> Iterator[str]:
+    """Read a text stream in blocks that end on a line break where possible."""
+    pending, cut_last = "", False
+    while True:
+        block = stream.read(block_chars)
+        if not block:
+            break
+        block = pending + block
+        cut = block.rfind("\n")
+        cut_last = cut != -1
+        if cut == -1:
+            pending = ""
+            yield block
+        else:
+            # The separator restored by join_pages() replaces this newline
+            pending = block[cut + 1:]
+            yield block[:cut]
+    if pending or cut_last:
+        yield pending
+
+
+def iter_pdf_pages(source) -> Iterator[Page]:
+    """Yield the pages of a PDF (path, bytes or binary file object) one at a time."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return _with_offsets(_pdf_texts(source))
+
+
+def iter_text_pages(source) -> Iterator[Page]:
+    """Yield a text file (path, str or text file object) in line-aligned blocks."""
+    if isinstance(source, str) and not os.path.exists(source):
+        return _with_offsets(_text_blocks(io.StringIO(source)))
+    if isinstance(source, (str, os.PathLike)):
+        return _iter_text_file(source)
+    return _with_offsets(_text_blocks(source))
+
+
+def _iter_text_file(path) -> Iterator[Page]:
+    with open(path, "r", encoding="utf-8") as f:
+        yield from _with_offsets(_text_blocks(f))
+
+
+def iter_file_pages(filepath: str) -> Iterator[Page]:
+    """Dispatch on extension (.pdf / .txt). Yields nothing for unsupported files."""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == ".pdf":
+        return iter_pdf_pages(filepath)
+    if ext == ".txt":
+        return iter_text_pages(filepath)
+    return iter(())
+
+
+def join_pages(pages: Iterable[Page]) -> str:
+    """Materialize a page stream as one string (single join, no repeated concatenation)."""
+    return PAGE_SEPARATOR.join(p.text for p in pages)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LAZY CHUNKING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _default_split(text: str) -> list[str]:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    global _default_splitter
+    if _default_splitter is None:
+        _default_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1500,
+            chunk_overlap=200,
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+    return _default_splitter.split_text(text)
+
+
+_default_splitter = None
+
+
+def iter_chunks(
+    pages: Iterable[Page],
+    split: Optional[Callable[[str], list[str]]] = None,
+    window_chars: int = WINDOW_CHARS,
+) -> Iterator[Chunk]:
+    """
+    Chunk a page stream lazily.
+
+    Text is buffered until it exceeds window_chars, split, and every chunk
+    but the last is yielded; the last one is carried into the next window so
+    chunk boundaries never depend on where a page or window happened to end.
+    At most about window_chars + one page of text is held at a time.
+
+    Args:
+        pages: Page stream from iter_*_pages().
+        split: Function mapping text to chunk strings that appear verbatim in
+               it, in order (default: 1500-char recursive splitter, 200 overlap).
+        window_chars: Buffer size that triggers a split.
+
+    Yields:
+        Chunk(index, offset, page, text) in document order.
+    """
+    split = split or _default_split
+    buffer, buffer_offset = "", 0
+    page_starts = []   # (offset, page number) for pages overlapping the buffer
+    index = 0
+
+    def locate(offset):
+        page = page_starts[0][1]
+        for start, number in page_starts:
+            if start > offset:
+                break
+            page = number
+        return page
+
+    def emit(final):
+        nonlocal buffer, buffer_offset, index
+        pieces = split(buffer)
+        positions, search = [], 0
+        for piece in pieces:
+            pos = buffer.find(piece, search)
+            pos = search if pos == -1 else pos
+            positions.append(pos)
+            search = pos + 1
+        count = len(pieces) if final else len(pieces) - 1
+        for piece, pos in zip(pieces[:count], positions):
+            offset = buffer_offset + pos
+            yield Chunk(index, offset, locate(offset), piece)
+            index += 1
+        if not final and count > 0:
+            # Carry the held-back last chunk into the next window
+            keep = positions[-1]
+            buffer_offset += keep
+            buffer = buffer[keep:]
+            while len(page_starts) > 1 and page_starts[1][0] <= buffer_offset:
+                page_starts.pop(0)
+
+    for page in pages:
+        if not buffer:
+            buffer_offset = page.offset
+            page_starts[:] = [(page.offset, page.number)]
+        else:
+            buffer += PAGE_SEPARATOR
+            page_starts.append((page.offset, page.number))
+        buffer += page.text
+        if len(buffer) > window_chars:
+            yield from emit(final=False)
+
+    if buffer.strip():
+        yield from emit(final=True)
@@ -0,0 +1,259 @@
+"""
+Tracing — Nested Timing Spans for Every Pipeline Stage
+
+A minimal span API shared by the agents, the vector store, ingestion and
+the Excel export:
+
+    with span("vector_store.query", collection=name):
+        ...
+
+    @traced("financial.extract")
+    def extract_parameters(...):
+        ...
+
+Spans nest through a context variable, so a request's extraction,
+retrieval, embedding, generation and validation steps form one trace.
+Finished spans go to an in-memory ring buffer (read by the Streamlit
+sidebar waterfall) and, when a root span ends, its whole trace is
+appended to logs/traces.jsonl (rotated to traces.jsonl.1 past
+TRACE_FILE_MAX_BYTES; FALLON_TRACE_FILE="" turns the file off). Records use OpenTelemetry field names and
+id formats; when the opentelemetry package is installed every span is
+also mirrored to the configured OTel tracer provider.
+
+Work submitted to thread pools starts its own trace unless it is run
+through contextvars.copy_context().
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+_PROTO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TRACE_BUFFER_SIZE = 5000          # finished spans kept in memory
+TRACE_FILE = os.environ.get("FALLON_TRACE_FILE", os.path.join(_PROTO_DIR, "logs", "traces.jsonl"))
+TRACE_FILE_MAX_BYTES = int(os.environ.get("FALLON_TRACE_MAX_MB", "20")) * 1024 * 1024
+TRACE_ENABLED = os.environ.get("FALLON_TRACING", "1") != "0"
+
+_current = contextvars.ContextVar("fallon_span", default=None)
+_buffer = deque(maxlen=TRACE_BUFFER_SIZE)
+_open_traces = {}                 # trace_id -> finished spans of a still-running trace
+_OPEN_TRACE_LIMIT = 1000
+_lock = threading.Lock()
+
+try:
+    from opentelemetry import trace as _otel_trace
+    _otel_tracer = _otel_trace.get_tracer("fallon")
+except Exception:
+    _otel_trace = None
+    _otel_tracer = None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SPANS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class Span:
+    """One timed operation. Attributes can be added while it runs via set()."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "status", "error", "_perf")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = "OK"
+        self.error = None
+        self._perf = time.perf_counter_ns()
+
+    def set(self, **attributes):
+        """Attach attributes (counts, sizes, flags) to the running span."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        """OpenTelemetry-style record (ids in hex, times in Unix nanoseconds)."""
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+
+def _clean(attributes: dict) -> dict:
+    """Keep attribute values JSON / OTel friendly."""
+    out = {}
+    for key, value in attributes.items():
+        if value is None or isinstance(value, (bool, int, float, str)):
+            out[key] = value
+        else:
+            out[key] = str(value)[:200]
+    return out
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block as a span nested under the current one.
+
+    Args:
+        name: Dotted stage name, e.g. "vector_store.query".
+        **attributes: Extra fields recorded on the span (collection, n_results…).
+
+    Yields:
+        The Span; call .set(key=value) to add attributes from inside the block.
+    """
+    if not TRACE_ENABLED:
+        yield _NoopSpan()
+        return
+
+    parent = _current.get()
+    current = Span(name, parent, _clean(attributes))
+    token = _current.set(current)
+    otel = _otel_tracer.start_as_current_span(name, attributes=current.attributes) if _otel_tracer else None
+    otel_span = otel.__enter__() if otel else None
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "ERROR"
+        current.error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        current.end_ns = current.start_ns + (time.perf_counter_ns() - current._perf)
+        _current.reset(token)
+        if otel_span is not None:
+            try:
+                otel_span.set_attributes(_clean(current.attributes))
+                if current.error:
+                    otel_span.set_status(_otel_trace.Status(_otel_trace.StatusCode.ERROR, current.error))
+            finally:
+                otel.__exit__(None, None, None)
+        _finish(current)
+
+
+def traced(name: Optional[str] = None, **attributes):
+    """Decorator form of span(); the name defaults to module.function."""
+    def decorate(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_span():
+    """The running span (or a no-op stand-in outside any span)."""
+    return _current.get() or _NoopSpan()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SINKS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _finish(finished: Span):
+    record = finished.to_dict()
+    with _lock:
+        _buffer.append(record)
+        if finished.parent_id is not None:
+            _open_traces.setdefault(finished.trace_id, []).append(record)
+            while len(_open_traces) > _OPEN_TRACE_LIMIT:
+                # Children that outlived their root (detached threads)
+                _open_traces.pop(next(iter(_open_traces)))
+            return
+        trace = _open_traces.pop(finished.trace_id, [])
+        trace.append(record)
+    _write_jsonl(trace)
+
+
+def _write_jsonl(records: list[dict]):
+    if not TRACE_FILE:
+        return
+    try:
+        os.makedirs(os.path.dirname(TRACE_FILE), exist_ok=True)
+        with _lock:
+            if os.path.exists(TRACE_FILE) and os.path.getsize(TRACE_FILE) >= TRACE_FILE_MAX_BYTES:
+                # Keep one previous file so disk use stays at twice the cap
+                os.replace(TRACE_FILE, TRACE_FILE + ".1")
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+    except Exception:
+        pass  # tracing must never break a request
+
+
+def recent_traces(limit: int = 5) -> list[dict]:
+    """
+    The last `limit` finished traces, newest first.
+
+    Returns:
+        [{"trace_id", "name", "start_time_unix_nano", "duration_ms",
+          "spans": [span dicts with "depth" and "offset_ms", in start order]}]
+    """
+    with _lock:
+        records = list(_buffer)
+    by_trace = {}
+    for record in records:
+        by_trace.setdefault(record["trace_id"], []).append(record)
+
+    roots = [r for r in records if r["parent_span_id"] is None][-limit:][::-1]
+    traces = []
+    for root in roots:
+        spans = sorted(by_trace.get(root["trace_id"], []), key=lambda r: r["start_time_unix_nano"])
+        children = {}
+        for s in spans:
+            children.setdefault(s["parent_span_id"], []).append(s)
+        ordered = []
+
+        def walk(parent_id, depth):
+            for s in children.get(parent_id, []):
+                offset = (s["start_time_unix_nano"] - root["start_time_unix_nano"]) / 1e6
+                ordered.append({**s, "depth": depth, "offset_ms": round(offset, 3)})
+                walk(s["span_id"], depth + 1)
+
+        walk(None, 0)
+        traces.append({
+            "trace_id": root["trace_id"],
+            "name": root["name"],
+            "start_time_unix_nano": root["start_time_unix_nano"],
+            "duration_ms": root["duration_ms"],
+            "spans": ordered,
+        })
+    return traces
+
+
+def clear():
+    """Drop all buffered spans (the JSONL file is left alone)."""
+    with _lock:
+        _buffer.clear()
+        _open_traces.clear()
@@ -5,6 +5,7 @@ no separate sentence-transformers or torch installation required.
 
 Three collections:
   fallon_contracts    — chunked contract PDFs (loan, JV, construction, architect, lease)
+  fallon_contract_clauses — small child chunks of fallon_contracts, each linked to its parent
   fallon_deal_data    — historical deal memos and pro forma summaries
   fallon_market_defaults — structured market assumption records by market + program type
 """
@@ -14,6 +15,8 @@ import json
 import chromadb
 from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
 
+from FallonPrototype.shared.tracing import span, traced
+
 # ── Paths ──────────────────────────────────────────────────────────────────────
 _BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 _STORE_PATH = os.path.join(_BASE_DIR, "vector_store")
@@ -21,6 +24,7 @@ _MARKET_DEFAULTS_PATH = os.path.join(_BASE_DIR, "data", "market_defaults", "mark
 
 # Collection names — referenced by every agent, never hard-coded elsewhere
 CONTRACTS_COLLECTION = "fallon_contracts"
+CONTRACT_CLAUSES_COLLECTION = "fallon_contract_clauses"
 DEAL_DATA_COLLECTION = "fallon_deal_data"
 MARKET_DEFAULTS_COLLECTION = "fallon_market_defaults"
 MARKET_RESEARCH_COLLECTION = "fallon_market_research"
@@ -54,6 +58,23 @@ def get_collection(name: str) -> chromadb.Collection:
     )
 
 
+def embed_texts(texts: list[str]) -> list:
+    """
+    Embed texts with the shared MiniLM function, outside any collection.
+
+    Vectors live in the same space as every collection here, so callers that
+    keep their own index (e.g. memory's similar-query recall) stay comparable.
+
+    Args:
+        texts: Strings to embed.
+
+    Returns:
+        One 384-dimension vector per text.
+    """
+    with span("vector_store.embed", texts=len(texts)):
+        return list(_embedding_fn(texts))
+
+
 def add_documents(
     collection_name: str,
     texts: list[str],
@@ -103,7 +124,8 @@ def add_documents(
     skipped = len(texts) - len(new_texts)
 
     if new_texts:
-        collection.upsert(documents=new_texts, metadatas=new_metas, ids=new_ids)
+        with span("vector_store.add", collection=collection_name, documents=len(new_texts)):
+            collection.upsert(documents=new_texts, metadatas=new_metas, ids=new_ids)
 
     total = _get_count(collection_name)
     print(
@@ -135,6 +157,7 @@ def query_collection(
     Returns:
         List of dicts, sorted by relevance (most relevant first):
           {
+            "id":         str   — the chunk ID,
             "text":       str   — the chunk text,
             "metadata":   dict  — source filename, doc_type, chunk_index, etc.,
             "distance":   float — cosine distance (lower = more similar),
@@ -150,25 +173,30 @@ def query_collection(
     # Cap n_results at the actual collection size to avoid ChromaDB errors
     actual_n = min(n_results, collection.count())
 
-    query_kwargs = {
-        "query_texts": [query_text],
-        "n_results": actual_n,
-        "include": ["documents", "metadatas", "distances"],
-    }
-    if where:
-        query_kwargs["where"] = where
+    with span("vector_store.query", collection=collection_name, n_results=actual_n, filtered=bool(where)):
+        # Embed separately so embedding and index search show up as their own spans
+        query_kwargs = {
+            "query_embeddings": embed_texts([query_text]),
+            "n_results": actual_n,
+            "include": ["documents", "metadatas", "distances"],
+        }
+        if where:
+            query_kwargs["where"] = where
 
-    results = collection.query(**query_kwargs)
+        with span("vector_store.search", collection=collection_name):
+            results = collection.query(**query_kwargs)
 
     # Unpack ChromaDB's nested list structure (one query → one result set)
+    ids = results["ids"][0]
     docs = results["documents"][0]
     metas = results["metadatas"][0]
     distances = results["distances"][0]
 
     output = []
-    for doc, meta, dist in zip(docs, metas, distances):
+    for doc_id, doc, meta, dist in zip(ids, docs, metas, distances):
         output.append(
             {
+                "id": doc_id,
                 "text": doc,
                 "metadata": meta,
                 "distance": round(dist, 4),
@@ -179,16 +207,159 @@ def query_collection(
     return output
 
 
+def get_documents(collection_name: str, ids: list[str]) -> list[dict]:
+    """
+    Fetch stored chunks by ID in a single call (no embedding, no search).
+
+    Args:
+        collection_name: Which collection to read.
+        ids:             Chunk IDs; missing IDs are skipped.
+
+    Returns:
+        List of {"id", "text", "metadata"} dicts in the order of `ids`.
+    """
+    if not ids:
+        return []
+    try:
+        results = get_collection(collection_name).get(ids=ids, include=["documents", "metadatas"])
+    except Exception:
+        return []
+    found = {
+        doc_id: {"id": doc_id, "text": doc, "metadata": meta}
+        for doc_id, doc, meta in zip(results["ids"], results["documents"], results["metadatas"])
+    }
+    return [found[i] for i in ids if i in found]
+
+
+def delete_documents(collection_name: str, ids: list[str]) -> int:
+    """Delete chunks by ID. Returns the number of IDs passed."""
+    if not ids:
+        return 0
+    get_collection(collection_name).delete(ids=ids)
+    return len(ids)
+
+
+def parent_id(series: str, index: int) -> str:
+    """ID of a parent chunk: the series prefix plus a zero-padded chunk index."""
+    return f"{series}{index:03d}"
+
+
+def _merge_passage(parents: list[dict]) -> dict:
+    """Join contiguous parent chunks into one passage, trimming any overlap by char_offset."""
+    texts, end = [], None
+    for doc in parents:
+        text = doc["text"]
+        start = doc["metadata"].get("char_offset")
+        if end is not None and start is not None and start < end:
+            text = text[end - start:]
+        if text.strip():
+            texts.append(text)
+        if start is not None:
+            end = max(end or 0, start + len(doc["text"]))
+    first, last = parents[0]["metadata"], parents[-1]["metadata"]
+    meta = dict(first)
+    meta["chunk_indices"] = ",".join(str(d["metadata"].get("chunk_index")) for d in parents)
+    if len(parents) > 1 and first.get("section_path") and last.get("section_path") != first.get("section_path"):
+        meta["section_path"] = f"{first['section_path']} … {last['section_path']}"
+    return {"id": "+".join(d["id"] for d in parents), "text": "\n\n".join(texts), "metadata": meta}
+
+
+@traced("vector_store.query_parent_child")
+def query_parent_child(
+    child_collection: str,
+    parent_collection: str,
+    query_text: str,
+    n_results: int = 4,
+    neighbors: int = 1,
+    where: dict | None = None,
+) -> list[dict]:
+    """
+    Match on small child chunks, return their larger parent passages.
+
+    Children carry "parent_series" / "parent_index" (parent ID =
+    parent_id(series, index)) and "child_index" / "child_count". The best
+    n_results parents are kept; when the matching child sits at the start or
+    end of its parent, up to `neighbors` adjacent parents on that side are
+    added too (only within the same "article", if parents record one). All parents are read with one collection.get, and parents
+    that are contiguous in a document are merged into a single passage, so
+    the context has no duplicated or overlapping text.
+
+    Returns:
+        Passages in query_collection() format, most relevant first, with the
+        merged parents' indices in metadata["chunk_indices"].
+    """
+    children = query_collection(child_collection, query_text, n_results=n_results * 4, where=where)
+
+    # Best child per parent
+    best = {}
+    for child in children:
+        meta = child["metadata"]
+        if "parent_series" not in meta:
+            continue
+        key = (meta["parent_series"], meta["parent_index"])
+        if key not in best or child["distance"] < best[key]["distance"]:
+            best[key] = child
+    ranked = sorted(best.items(), key=lambda kv: kv[1]["distance"])[:n_results]
+    if not ranked:
+        return []
+
+    wanted = {key: child["distance"] for key, child in ranked}
+    neighbor_of = {}
+    for (series, index), child in ranked:
+        meta = child["metadata"]
+        lo = index - neighbors if meta.get("child_index", 0) == 0 else index
+        hi = index + neighbors if meta.get("child_index", 0) == meta.get("child_count", 1) - 1 else index
+        for j in range(max(lo, 0), hi + 1):
+            if (series, j) not in wanted:
+                neighbor_of.setdefault((series, j), (series, index))
+
+    keys = {parent_id(s, i): (s, i) for s, i in sorted({**wanted, **neighbor_of})}
+    fetched = get_documents(parent_collection, list(keys))
+
+    # Neighbors only extend a match within the same article (when parents record one)
+    article = {keys[d["id"]]: d["metadata"].get("article") for d in fetched}
+    docs = [
+        d for d in fetched
+        if keys[d["id"]] in wanted or article.get(keys[d["id"]]) == article.get(neighbor_of[keys[d["id"]]])
+    ]
+
+    # Merge runs of consecutive parents within each document
+    passages, run, prev = [], [], None
+    for doc in docs:
+        series, index = keys[doc["id"]]
+        if run and (series, index) != (prev[0], prev[1] + 1):
+            passages.append(run)
+            run = []
+        run.append(doc)
+        prev = (series, index)
+    if run:
+        passages.append(run)
+
+    output = []
+    for run in passages:
+        distances = [wanted[keys[d["id"]]] for d in run if keys[d["id"]] in wanted]
+        if not distances:
+            continue
+        passage = _merge_passage(run)
+        passage["distance"] = min(distances)
+        passage["relevance"] = _classify_relevance(passage["distance"])
+        output.append(passage)
+    output.sort(key=lambda p: p["distance"])
+    return output
+
+
 def get_collection_counts() -> dict:
     """
     Return document counts for all collections.
     Used by the Streamlit sidebar to show how many documents are indexed.
 
     Returns:
-        {"fallon_contracts": int, "fallon_deal_data": int, "fallon_market_defaults": int, "fallon_market_research": int}
+        {"fallon_contracts": int, "fallon_contract_clauses": int, "fallon_deal_data": int,
+         "fallon_market_defaults": int, "fallon_market_research": int}
     """
     return {
         CONTRACTS_COLLECTION: _get_count(CONTRACTS_COLLECTION),
+        CONTRACT_CLAUSES_COLLECTION: _get_count(CONTRACT_CLAUSES_COLLECTION),
         DEAL_DATA_COLLECTION: _get_count(DEAL_DATA_COLLECTION),
         MARKET_DEFAULTS_COLLECTION: _get_count(MARKET_DEFAULTS_COLLECTION),
         MARKET_RESEARCH_COLLECTION: _get_count(MARKET_RESEARCH_COLLECTION),
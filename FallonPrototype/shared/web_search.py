@@ -0,0 +1,203 @@
+"""
+Web Search — Cached, Time-Boxed Market Search for the Chat
+
+The chat enriches market questions with live web results. Searching
+inline cost seconds per turn and repeated the same queries across turns
+and sessions. This module makes search a background service:
+
+    future = search_async("Charlotte multifamily cap rates", market="Charlotte")
+    ...                                   # build the rest of the prompt meanwhile
+    results = collect(future, timeout=1.5)  # "" if the budget runs out
+
+Results are cached for SEARCH_TTL_S, keyed by the normalized query (lower
+case, punctuation dropped, word order ignored) plus the market, and shared
+by every session in the process. Concurrent identical searches share one
+backend call. A search that misses the budget keeps running and fills the
+cache for the next turn.
+
+The backend is pluggable: DuckDuckGoBackend by default, StubBackend for
+offline tests (or FALLON_SEARCH_BACKEND=stub / off).
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from FallonPrototype.shared.tracing import span
+
+SEARCH_TTL_S = float(os.environ.get("FALLON_SEARCH_TTL_S", "21600"))      # 6 hours
+SEARCH_TIMEOUT_S = float(os.environ.get("FALLON_SEARCH_TIMEOUT_S", "2.5"))  # max wait per chat turn
+SEARCH_CACHE_SIZE = 256
+SEARCH_MAX_CHARS = 3000
+SEARCH_WORKERS = 4
+
+_WORD = re.compile(r"[a-z0-9$%.]+")
+
+_cache = OrderedDict()      # key -> (expires_at, text), least recently used first
+_inflight = {}              # key -> Future of a running search
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="web-search")
+_stats = {"hits": 0, "misses": 0, "timeouts": 0, "errors": 0}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BACKENDS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class DuckDuckGoBackend:
+    """Live search through the duckduckgo-search package."""
+
+    name = "duckduckgo"
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        from duckduckgo_search import DDGS
+        return DDGS().text(query, max_results=max_results) or []
+
+
+class StubBackend:
+    """
+    Offline backend returning canned results.
+
+    Args:
+        results: {substring: [{"title", "body", "href"}]}; the first key found
+                 in the lower-cased query wins, "" matches anything.
+        delay_s: Simulated network latency per search.
+    """
+
+    name = "stub"
+
+    def __init__(self, results: dict = None, delay_s: float = 0.0):
+        self.results = results or {}
+        self.delay_s = delay_s
+        self.calls = []
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        self.calls.append(query)
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        for key, hits in self.results.items():
+            if key.lower() in query.lower():
+                return hits[:max_results]
+        return []
+
+
+class _DisabledBackend:
+    name = "off"
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        return []
+
+
+_BACKENDS = {"duckduckgo": DuckDuckGoBackend, "stub": StubBackend, "off": _DisabledBackend}
+_backend = _BACKENDS.get(os.environ.get("FALLON_SEARCH_BACKEND", "duckduckgo"), DuckDuckGoBackend)()
+
+
+def set_backend(backend) -> None:
+    """Swap the search backend (any object with search(query, max_results) -> list[dict]) and clear the cache."""
+    global _backend
+    _backend = backend
+    clear_cache()
+
+
+def get_backend():
+    return _backend
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SEARCH
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def normalize_query(query: str) -> str:
+    """Cache key form of a query: lower case, no punctuation, unique words in sorted order."""
+    return " ".join(sorted(set(_WORD.findall(query.lower()))))
+
+
+def format_results(results: list[dict]) -> str:
+    """Search hits as the prompt block the chat model expects."""
+    parts = []
+    for r in results:
+        parts.append(f"Title: {r.get('title', '')}")
+        parts.append(f"  {r.get('body', '')}")
+        parts.append(f"  URL: {r.get('href', '')}")
+        parts.append("---")
+    return "\n".join(parts)[:SEARCH_MAX_CHARS]
+
+
+def _run_search(key: tuple, query: str, max_results: int) -> str:
+    try:
+        with span("web_search.backend", backend=_backend.name, query=query[:80]):
+            text = format_results(_backend.search(query, max_results))
+    except Exception:
+        with _lock:
+            _stats["errors"] += 1
+        return ""  # errors are not cached; the next turn tries again
+    else:
+        with _lock:
+            _cache[key] = (time.time() + SEARCH_TTL_S, text)
+            _cache.move_to_end(key)
+            while len(_cache) > SEARCH_CACHE_SIZE:
+                _cache.popitem(last=False)
+        return text
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def search_async(query: str, market: str = "", max_results: int = 3) -> Future:
+    """
+    Start (or join) a search and return a Future of the formatted results.
+
+    Args:
+        query: What to search for; the market is appended when given.
+        market: Market name, part of the cache key.
+        max_results: Hits requested from the backend.
+    """
+    key = (normalize_query(query), (market or "").strip().lower(), max_results)
+    with _lock:
+        cached = _cache.get(key)
+        if cached and cached[0] > time.time():
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            done = Future()
+            done.set_result(cached[1])
+            return done
+        running = _inflight.get(key)
+        if running is not None:
+            _stats["hits"] += 1
+            return running
+        _stats["misses"] += 1
+        full_query = f"{query} {market}".strip() if market else query
+        future = _executor.submit(_run_search, key, full_query, max_results)
+        _inflight[key] = future
+        return future
+
+
+def collect(future: Future, timeout: float = SEARCH_TIMEOUT_S) -> str:
+    """Results of search_async(), or "" if they are not ready within `timeout` seconds."""
+    try:
+        return future.result(timeout=max(0.0, timeout))
+    except FutureTimeout:
+        with _lock:
+            _stats["timeouts"] += 1
+        return ""
+
+
+def web_search(query: str, market: str = "", max_results: int = 3, timeout: float = SEARCH_TIMEOUT_S) -> str:
+    """Blocking search bounded by `timeout`; see search_async()."""
+    return collect(search_async(query, market, max_results), timeout)
+
+
+def get_search_stats() -> dict:
+    """Cache hits (including joined in-flight searches), misses, timeouts, errors and cache size."""
+    with _lock:
+        return {**_stats, "cached": len(_cache), "backend": _backend.name}
+
+
+def clear_cache() -> None:
+    with _lock:
+        _cache.clear()
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,325 @@
+"""
+Benchmark: end-to-end agent latency against a local LLM stand-in.
+
+Starts tests/llm_stub.py (an OpenAI-compatible server replaying recorded
+responses with a fixed latency and token rate), points both apps at it via
+NVIDIA_BASE_URL, and drives fixed scenario sets through
+
+    financial.run        financial_agent.run()
+    contract.answer      contract_agent.answer_contract_question()
+    rag.ingest           RAGdemo contract_reviewer.ingest_contract()
+    rag.review           RAGdemo contract_reviewer.generate_review()
+
+at each concurrency level. Every round runs each scenario of a set once,
+spread over the worker pool, with the answer / review caches and the
+RAGdemo index cleared beforehand, so rounds measure the uncached path.
+Reports p50/p95/mean per stage (plus the stub's own per-call p50/p95)
+and throughput, and writes everything to JSON so runs can be
+diffed between commits:
+
+    python FallonPrototype/tests/bench_agents.py
+    python FallonPrototype/tests/bench_agents.py --compare logs/bench_agents_abc1234.json
+
+Retrieval uses the existing vector store (run_all_ingestion) and the
+MiniLM embedding model, as the other tests do.
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+_PROTO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_REPO_DIR = os.path.dirname(_PROTO_DIR)
+sys.path.insert(0, _REPO_DIR)
+sys.path.insert(0, os.path.join(_REPO_DIR, "RAGdemo"))
+
+from FallonPrototype.tests.llm_stub import LLMStub
+
+CONTRACTS_DIR = os.path.join(_PROTO_DIR, "data", "contracts")
+DEFAULT_OUT_DIR = os.path.join(_PROTO_DIR, "logs")
+
+FINANCIAL_SCENARIOS = [
+    ("200 units in Charlotte on 3 acres",
+     {"market": "charlotte", "program_type": "multifamily", "unit_count": 200, "acreage": 3.0}),
+    ("80k sf office building in Boston Seaport on 1.5 acres targeting 15% IRR",
+     {"market": "boston", "program_type": "office", "rentable_sf": 80000, "acreage": 1.5,
+      "target_lp_irr_pct": 15.0, "submarket": "seaport"}),
+    ("250-key select-service hotel in Nashville, 2 acre site",
+     {"market": "nashville", "program_type": "hotel", "total_keys": 250, "acreage": 2.0}),
+    ("Boston Seaport condo development, 180 units on 1.2 acres",
+     {"market": "boston", "program_type": "condo", "unit_count": 180, "acreage": 1.2,
+      "submarket": "seaport"}),
+]
+
+CONTRACT_QUESTIONS = [
+    "How does the JV waterfall distribute cash after the preferred return?",
+    "What is the GP catch-up in the operating agreement?",
+    "What are the construction loan completion guaranty requirements?",
+    "What is the security deposit under the commercial lease?",
+    "What happens if the buyer terminates during the due diligence period?",
+]
+
+CONTRACT_ANSWER = """The JV operating agreement distributes cash first to return capital, then an 8% cumulative preferred return to the LP, followed by a GP catch-up and a promote split above each IRR hurdle (jv_operating_agreement_002.txt, Art. 4 > 4.2 Preferred Return).
+
+Consult legal counsel before relying on these terms."""
+
+REVIEW_ANSWER = """## Summary
+A commercial real estate agreement between the parties.
+
+## Key Terms
+- Term, payment and default provisions as stated.
+
+## Risks & Red Flags
+- Broad indemnification obligations.
+
+## Recommendations
+- Negotiate caps on liability."""
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SCENARIOS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def load_contracts() -> list[tuple[str, str]]:
+    """(name, text) for each sample contract plus all of them combined (map-reduce path)."""
+    contracts = []
+    for filename in sorted(os.listdir(CONTRACTS_DIR)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(CONTRACTS_DIR, filename), "r", encoding="utf-8") as f:
+                contracts.append((filename, f.read()))
+    contracts.append(("combined", "\n\n".join(text for _, text in contracts)))
+    return contracts
+
+
+def build_recordings() -> list[dict]:
+    """Recorded LLM responses for every prompt the scenarios send."""
+    from FallonPrototype.agents.financial_agent import EXTRACTION_SYSTEM_PROMPT, GENERATION_SYSTEM_PROMPT
+    from FallonPrototype.agents.contract_agent import CONTRACT_SYSTEM_PROMPT
+    from FallonPrototype.tests.test_pro_forma_generator import SAMPLE_PRO_FORMA
+    from shared.contract_reviewer import REVIEW_SYSTEM_PROMPT, SECTION_SYSTEM_PROMPT, MERGE_SYSTEM_PROMPT
+
+    recordings = []
+    for query, fields in FINANCIAL_SCENARIOS:
+        recordings.append({"system": EXTRACTION_SYSTEM_PROMPT[:200], "user": query, "response": json.dumps(fields)})
+    recordings += [
+        {"system": GENERATION_SYSTEM_PROMPT[:200], "response": json.dumps(SAMPLE_PRO_FORMA, indent=2)},
+        {"system": CONTRACT_SYSTEM_PROMPT[:200], "response": CONTRACT_ANSWER},
+        # Merge prompt extends the review prompt, so it must match first
+        {"system": MERGE_SYSTEM_PROMPT[len(REVIEW_SYSTEM_PROMPT):][:200], "response": REVIEW_ANSWER},
+        {"system": SECTION_SYSTEM_PROMPT[:200], "response": REVIEW_ANSWER},
+        {"system": REVIEW_SYSTEM_PROMPT[:200], "response": REVIEW_ANSWER},
+    ]
+    return recordings
+
+
+def build_stages() -> dict:
+    """stage name -> (scenarios, run(scenario) -> None, reset() before each round)."""
+    from FallonPrototype.agents import financial_agent
+    from FallonPrototype.agents.contract_agent import answer_contract_question
+    from FallonPrototype.shared import answer_cache
+    from shared import contract_reviewer
+    from shared.vector_store import reset_collection
+
+    def run_financial(scenario):
+        response = financial_agent.run(scenario[0])
+        if response.export_data is None:
+            raise RuntimeError(response.answer[:200])
+
+    def run_contract(question):
+        response = answer_contract_question(question)
+        if response.answer.startswith("Unable to generate response"):
+            raise RuntimeError(response.answer[:200])
+
+    def run_review(contract):
+        review = contract_reviewer.generate_review(contract[1])
+        if review.startswith("ERROR:"):
+            raise RuntimeError(review[:200])
+
+    def clear_reviews():
+        with contract_reviewer._cache_lock:
+            contract_reviewer._section_cache.clear()
+
+    contracts = load_contracts()
+    return {
+        "financial.run": (FINANCIAL_SCENARIOS, run_financial, lambda: None),
+        "contract.answer": (CONTRACT_QUESTIONS, run_contract, answer_cache.invalidate),
+        "rag.ingest": (contracts, lambda c: contract_reviewer.ingest_contract(c[1], c[0]), reset_collection),
+        "rag.review": (contracts, run_review, clear_reviews),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MEASUREMENT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0–100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(seconds: list[float], wall: float, errors: int) -> dict:
+    ms = [s * 1000 for s in seconds]
+    return {
+        "n": len(ms),
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 50), 1),
+        "p95_ms": round(percentile(ms, 95), 1),
+        "mean_ms": round(sum(ms) / len(ms), 1) if ms else 0.0,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(ms) / wall, 3) if wall else 0.0,
+    }
+
+
+def bench_stage(scenarios, run, reset, concurrency: int, rounds: int) -> tuple[list[float], float, int]:
+    """Run every scenario once per round on `concurrency` workers; returns (latencies, wall, errors)."""
+    latencies, errors, wall = [], 0, 0.0
+
+    def timed(scenario):
+        start = time.perf_counter()
+        try:
+            run(scenario)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(rounds):
+            reset()
+            start = time.perf_counter()
+            results = list(pool.map(timed, scenarios))
+            wall += time.perf_counter() - start
+            for seconds, error in results:
+                if error is None:
+                    latencies.append(seconds)
+                else:
+                    errors += 1
+                    print(f"    error: {str(error).splitlines()[0] if str(error) else repr(error)}")
+    return latencies, wall, errors
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_REPO_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict):
+    """Print p50/p95 changes per stage and concurrency against a previous run."""
+    print(f"\n  vs {baseline.get('commit', '?')}:")
+    for stage, levels in current["stages"].items():
+        for level, stats in levels.items():
+            old = baseline.get("stages", {}).get(stage, {}).get(level)
+            if not old:
+                continue
+            deltas = []
+            for key in ("p50_ms", "p95_ms"):
+                change = (stats[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                deltas.append(f"{key[:3]} {old[key]:.0f}->{stats[key]:.0f}ms ({change:+.0f}%)")
+            print(f"    {stage:<16} c={level:<3} " + "  ".join(deltas))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MAIN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end agent latency benchmark")
+    parser.add_argument("--stages", default="financial.run,contract.answer,rag.ingest,rag.review")
+    parser.add_argument("--concurrency", default="1,4", help="comma-separated worker counts")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over each scenario set")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds before the first token")
+    parser.add_argument("--tokens-per-s", type=float, default=200.0, help="stub generation rate")
+    parser.add_argument("--port", type=int, default=0, help="stub port (default: any free port)")
+    parser.add_argument("--recordings", help="JSON list of {system, user, response} to replay instead of the built-ins")
+    parser.add_argument("--out", help="output JSON path (default logs/bench_agents_<commit>.json)")
+    parser.add_argument("--compare", help="previous output JSON to diff against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        # Read before writing, in case --out overwrites the same file
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    stub = LLMStub(latency_s=args.latency, tokens_per_s=args.tokens_per_s, port=args.port).start()
+    # The LLM clients read these at import time
+    os.environ["NVIDIA_BASE_URL"] = stub.url
+    os.environ.setdefault("NVIDIA_API_KEY", "stub")
+
+    if args.recordings:
+        with open(args.recordings, "r", encoding="utf-8") as f:
+            stub.recordings = json.load(f)
+    else:
+        stub.recordings = build_recordings()
+
+    stages = build_stages()
+    levels = [int(c) for c in args.concurrency.split(",")]
+    selected = [s.strip() for s in args.stages.split(",") if s.strip()]
+
+    print("=" * 60)
+    print("AGENT LATENCY BENCHMARK")
+    print("=" * 60)
+    print(f"  stub {stub.url}: {args.latency * 1000:.0f}ms first token, {args.tokens_per_s:.0f} tok/s")
+
+    report = {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "latency_s": args.latency,
+            "tokens_per_s": args.tokens_per_s,
+            "rounds": args.rounds,
+            "concurrency": levels,
+        },
+        "stages": {},
+    }
+    try:
+        for name in selected:
+            if name not in stages:
+                print(f"  unknown stage {name!r} — choose from {', '.join(stages)}")
+                continue
+            scenarios, run, reset = stages[name]
+            for level in levels:
+                calls_before = len(stub.requests)
+                latencies, wall, errors = bench_stage(scenarios, run, reset, level, args.rounds)
+                stats = summarize(latencies, wall, errors)
+                llm = summarize([r[0] for r in stub.requests[calls_before:]], wall, 0)
+                stats["llm_calls"] = llm["n"]
+                stats["llm_p50_ms"], stats["llm_p95_ms"] = llm["p50_ms"], llm["p95_ms"]
+                report["stages"].setdefault(name, {})[str(level)] = stats
+                print(f"  {name:<16} c={level:<3} p50 {stats['p50_ms']:8.0f}ms  p95 {stats['p95_ms']:8.0f}ms  "
+                      f"{stats['throughput_per_s']:6.2f}/s  {stats['llm_calls']:>3} LLM calls"
+                      + (f"  {errors} errors" if errors else ""))
+    finally:
+        stub.stop()
+
+    from FallonPrototype.shared.claude_client import get_usage_by_site
+    report["tokens_by_site"] = {
+        site: {k: u[k] for k in ("calls", "input_tokens", "output_tokens", "avg_input_tokens", "tokens_per_s")}
+        for site, u in get_usage_by_site().items()
+    }
+    for site, u in report["tokens_by_site"].items():
+        print(f"  tokens {site:<16} {u['calls']:>4} calls  {u['avg_input_tokens']:>6} avg in  {u['output_tokens']:>7} out")
+
+    out = args.out or os.path.join(DEFAULT_OUT_DIR, f"bench_agents_{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n  Results written to {out}")
+
+    if baseline:
+        compare(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
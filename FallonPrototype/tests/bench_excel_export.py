@@ -0,0 +1,87 @@
+"""
+Benchmark: Excel export time and peak memory.
+
+Exports 1 and 100 deals (each with precomputed sensitivity and driver
+tables, as show_model passes them) and a 10- and 100-deal portfolio
+workbook, and reports wall time and tracemalloc peak. Run directly:
+
+    python FallonPrototype/tests/bench_excel_export.py
+"""
+
+import sys
+import os
+import copy
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared.excel_export import export_pro_forma, export_pro_forma_cached, export_portfolio
+from FallonPrototype.shared.return_calculator import compute_sensitivity_table, compute_driver_sensitivity
+from FallonPrototype.tests.test_pro_forma_generator import SAMPLE_PRO_FORMA
+
+
+def make_deals(n: int) -> list[dict]:
+    deals = []
+    for i in range(n):
+        pf = copy.deepcopy(SAMPLE_PRO_FORMA)
+        pf["cost_assumptions"]["hard_cost_psf"]["value"] = 250 + i
+        deals.append({
+            "pro_forma": pf,
+            "sensitivity": compute_sensitivity_table(pf, target_irr=14.0),
+            "drivers": compute_driver_sensitivity(pf),
+        })
+    return deals
+
+
+def bench(export_fn, deals: list[dict]) -> tuple[float, float]:
+    """
+    Returns (seconds, peak MB) for exporting every deal once.
+    
+    Timed and traced in separate passes — tracemalloc slows allocation-heavy
+    code enough to distort the timing.
+    """
+    start = time.perf_counter()
+    for d in deals:
+        export_fn(d, "Bench")
+    elapsed = time.perf_counter() - start
+    
+    tracemalloc.start()
+    for d in deals:
+        export_fn(d, "Bench")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    print("=" * 60)
+    print("EXCEL EXPORT BENCHMARK")
+    print("=" * 60)
+    
+    for n in (1, 100):
+        deals = make_deals(n)
+        elapsed, peak = bench(export_pro_forma, deals)
+        print(f"  {n:>3} deal(s): {elapsed * 1000:8.0f}ms total  {elapsed * 1000 / n:6.1f}ms/deal  peak {peak:5.1f}MB")
+    
+    # Portfolio: one workbook for all deals
+    for n in (10, 100):
+        deals = make_deals(n)
+        elapsed, peak = bench(lambda ds, _: export_portfolio(ds), [deals])
+        print(f"  portfolio {n:>3}: {elapsed * 1000:6.0f}ms total  peak {peak:5.1f}MB")
+        elapsed, peak = bench(lambda ds, _: export_portfolio(ds, cached_values=False), [deals])
+        print(f"    no cached values: {elapsed * 1000:6.0f}ms total  peak {peak:5.1f}MB")
+    
+    # Cached path: first call builds, reruns hit the cache
+    deal = make_deals(1)[0]
+    start = time.perf_counter()
+    export_pro_forma_cached(deal, "Bench")
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    export_pro_forma_cached(deal, "Bench")
+    warm = time.perf_counter() - start
+    print(f"  cached:       {cold * 1000:8.1f}ms cold  {warm * 1000:6.3f}ms warm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmark: retrieval quality (recall@k, MRR) and latency per search mode.
+
+Builds every collection from the repo's corpora (data/contracts and
+Financial Model/data — deal data, contract provisions, market research) in
+a throwaway in-memory store with the regular ingestion code, then runs a
+labeled query set through three modes:
+
+    vector     vector_store.query_collection()      (what the agents use today)
+    hybrid     hybrid_search.hybrid_query()         (BM25 + vector, RRF)
+    reranked   hybrid_search.reranked_query()       (hybrid, then reranked)
+
+A result counts as relevant when its source file is one of the query's
+expected files. recall@k is the share of expected files found in the top k;
+k covers the cut-offs the agents use (retrieve_deal_comps keeps 4, the
+contract agent 8). Results go to JSON so chunking / n_results changes can be
+diffed between commits:
+
+    python FallonPrototype/tests/bench_retrieval.py
+    python FallonPrototype/tests/bench_retrieval.py --compare logs/bench_retrieval_abc1234.json
+
+Pass --existing to evaluate the persistent store instead of rebuilding.
+"""
+
+import sys
+import os
+import io
+import json
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared import vector_store, hybrid_search
+from FallonPrototype.shared.vector_store import (
+    query_collection,
+    CONTRACTS_COLLECTION,
+    DEAL_DATA_COLLECTION,
+    MARKET_RESEARCH_COLLECTION,
+)
+from FallonPrototype.tests.bench_agents import percentile, _commit
+
+DEFAULT_OUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
+K_VALUES = (1, 4, 8)
+
+MODES = {
+    "vector": query_collection,
+    "hybrid": hybrid_search.hybrid_query,
+    "reranked": hybrid_search.reranked_query,
+}
+
+# (collection, query, expected source files)
+LABELED_QUERIES = [
+    # Deal data
+    (DEAL_DATA_COLLECTION, "Charlotte multifamily",
+     {"charlotte_south_end_multifamily.txt", "charlotte_multifamily_overview.txt"}),
+    (DEAL_DATA_COLLECTION, "South End apartment rents and unit mix",
+     {"charlotte_south_end_multifamily.txt"}),
+    (DEAL_DATA_COLLECTION, "Boston Seaport office development costs",
+     {"boston_seaport_office_2025.txt", "boston_office_overview.txt"}),
+    (DEAL_DATA_COLLECTION, "Nashville Gulch hotel mixed-use RevPAR",
+     {"nashville_gulch_hotel_mixed_use.txt", "nashville_mixed_use_overview.txt"}),
+    (DEAL_DATA_COLLECTION, "Fan Pier residential condo pricing",
+     {"fanpier_residential_overview.txt"}),
+    (DEAL_DATA_COLLECTION, "JV waterfall promote tiers and IRR hurdles",
+     {"jv_waterfall_structure.txt", "promote_carried_interest_structures.txt"}),
+    (DEAL_DATA_COLLECTION, "mezzanine debt and preferred equity terms",
+     {"mezzanine_preferred_equity.txt"}),
+    (DEAL_DATA_COLLECTION, "construction contract GMP and retainage",
+     {"construction_contracts.txt"}),
+    # Market research
+    (MARKET_RESEARCH_COLLECTION, "Charlotte submarket rents and vacancy",
+     {"charlotte_submarket_intelligence_2025.txt", "charlotte_comprehensive_market_analysis_2025.txt"}),
+    (MARKET_RESEARCH_COLLECTION, "hotel RevPAR and occupancy outlook",
+     {"hotel_outlook_2026.txt"}),
+    (MARKET_RESEARCH_COLLECTION, "construction cost escalation and labor shortages",
+     {"jll_construction_outlook_2026.txt", "national_capital_markets_construction_trends_2025.txt"}),
+    (MARKET_RESEARCH_COLLECTION, "cap rates by property type",
+     {"cbre_cap_rate_h2_2025.txt", "market_data_reference_2025.txt"}),
+    (MARKET_RESEARCH_COLLECTION, "Nashville multifamily absorption and new supply",
+     {"nashville_comprehensive_market_analysis_2025.txt", "nashville_submarket_intelligence_2025.txt"}),
+    (MARKET_RESEARCH_COLLECTION, "Boston life science lab demand",
+     {"boston_comprehensive_market_analysis_2025.txt", "boston_submarket_intelligence_2025.txt"}),
+    # Contracts
+    (CONTRACTS_COLLECTION, "preferred return to the investor member",
+     {"jv_operating_agreement_002.txt"}),
+    (CONTRACTS_COLLECTION, "construction loan interest rate and completion guaranty",
+     {"construction_loan_agreement_001.txt"}),
+    (CONTRACTS_COLLECTION, "tenant security deposit",
+     {"commercial_lease_003.txt"}),
+    (CONTRACTS_COLLECTION, "buyer termination during the due diligence period",
+     {"land_purchase_agreement_005.txt"}),
+    (CONTRACTS_COLLECTION, "mezzanine lender intercreditor agreement",
+     {"mezzanine_loan_004.txt"}),
+]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CORPUS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def build_collections() -> float:
+    """Ingest the repo corpora into a fresh in-memory store; returns seconds taken."""
+    import chromadb
+    from FallonPrototype.shared.ingest_deal_data import ingest_deal_data
+    from FallonPrototype.shared.ingest_market_research import ingest_market_research
+    from FallonPrototype.shared.ingest_contracts import ingest_contracts
+    from FallonPrototype.shared.run_all_ingestion import ingest_contract_provisions
+
+    vector_store._client = chromadb.EphemeralClient()
+    for name in vector_store.get_collection_counts():
+        try:
+            vector_store._client.delete_collection(name)
+        except Exception:
+            pass
+    hybrid_search._indexes.clear()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingest_deal_data()
+        ingest_contract_provisions()
+        ingest_market_research()
+        ingest_contracts(extract_metadata=False)
+    return time.perf_counter() - start
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# METRICS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def score_query(results: list[dict], expected: set) -> dict:
+    """recall@k for each K_VALUES and the reciprocal rank of the first relevant hit."""
+    sources = [r.get("metadata", {}).get("source") for r in results]
+    scores = {f"recall@{k}": len(expected & set(sources[:k])) / len(expected) for k in K_VALUES}
+    first = next((rank for rank, s in enumerate(sources, 1) if s in expected), None)
+    scores["rr"] = 1.0 / first if first else 0.0
+    return scores
+
+
+def evaluate_mode(search, repeats: int) -> tuple[dict, list[dict]]:
+    """Run every labeled query through one search function; returns (summary, per-query rows)."""
+    n = max(K_VALUES)
+    rows = []
+    for collection, query, expected in LABELED_QUERIES:
+        search(collection, query, n_results=n)           # warm-up (BM25 index, caches)
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = search(collection, query, n_results=n)
+            times.append((time.perf_counter() - start) * 1000)
+        rows.append({
+            "collection": collection,
+            "query": query,
+            **{key: round(value, 3) for key, value in score_query(results, expected).items()},
+            "p50_ms": round(percentile(times, 50), 2),
+            "top_sources": [r.get("metadata", {}).get("source") for r in results[:4]],
+        })
+
+    latencies = [r["p50_ms"] for r in rows]
+    summary = {f"recall@{k}": round(sum(r[f"recall@{k}"] for r in rows) / len(rows), 3) for k in K_VALUES}
+    summary["mrr"] = round(sum(r["rr"] for r in rows) / len(rows), 3)
+    summary["p50_ms"] = round(percentile(latencies, 50), 2)
+    summary["p95_ms"] = round(percentile(latencies, 95), 2)
+    return summary, rows
+
+
+def compare(current: dict, baseline: dict):
+    """Print metric changes per mode against a previous run."""
+    print(f"\n  vs {baseline.get('commit', '?')}:")
+    for mode, summary in current["modes"].items():
+        old = baseline.get("modes", {}).get(mode)
+        if not old:
+            continue
+        changes = [f"{key} {old[key]:g}->{summary[key]:g}" for key in summary if key in old and old[key] != summary[key]]
+        print(f"    {mode:<9} " + ("  ".join(changes) if changes else "unchanged"))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MAIN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval recall / latency benchmark")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per query")
+    parser.add_argument("--existing", action="store_true", help="use the persistent store instead of rebuilding")
+    parser.add_argument("--out", help="output JSON path (default logs/bench_retrieval_<commit>.json)")
+    parser.add_argument("--compare", help="previous output JSON to diff against")
+    parser.add_argument("--verbose", action="store_true", help="print per-query results")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print("=" * 60)
+    print("RETRIEVAL BENCHMARK")
+    print("=" * 60)
+
+    build_s = None
+    if not args.existing:
+        build_s = build_collections()
+        print(f"  Built collections in {build_s:.1f}s: {vector_store.get_collection_counts()}")
+
+    report = {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {"k": list(K_VALUES), "repeats": args.repeats, "queries": len(LABELED_QUERIES),
+                   "rebuilt": not args.existing, "build_s": round(build_s, 2) if build_s else None},
+        "modes": {},
+        "queries": {},
+    }
+
+    header = "  ".join(f"R@{k}" for k in K_VALUES)
+    print(f"\n  {'mode':<9} {header}   MRR    p50ms   p95ms")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        if mode not in MODES:
+            print(f"  unknown mode {mode!r} — choose from {', '.join(MODES)}")
+            continue
+        summary, rows = evaluate_mode(MODES[mode], args.repeats)
+        report["modes"][mode] = summary
+        report["queries"][mode] = rows
+        recalls = "  ".join(f"{summary[f'recall@{k}']:.2f}" for k in K_VALUES)
+        print(f"  {mode:<9} {recalls}  {summary['mrr']:.3f}  {summary['p50_ms']:6.1f}  {summary['p95_ms']:6.1f}")
+        if args.verbose:
+            for row in rows:
+                print(f"      rr={row['rr']:.2f} R@4={row['recall@4']:.2f} {row['p50_ms']:6.1f}ms  {row['query']}")
+
+    out = args.out or os.path.join(DEFAULT_OUT_DIR, f"bench_retrieval_{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n  Results written to {out}")
+
+    if baseline:
+        compare(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Pytest setup shared by the test modules.
+"""
+
+import os
+
+# Test runs shouldn't grow logs/traces.jsonl; tests that check the sink point it at a temp file
+os.environ.setdefault("FALLON_TRACE_FILE", "")
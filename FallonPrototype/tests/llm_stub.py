@@ -0,0 +1,178 @@
+"""
+Local OpenAI-compatible LLM stand-in for benchmarks.
+
+Serves POST /v1/chat/completions and replays recorded responses instead of
+calling the NIM API. Each recording matches on substrings of the system and
+user messages; the first match wins. Every reply is delayed by a fixed
+time-to-first-token plus completion_tokens / tokens_per_s, so agent latency
+can be measured against a known, repeatable LLM profile.
+
+Point either app at it with NVIDIA_BASE_URL (read when the LLM client is
+imported). Run standalone:
+
+    python FallonPrototype/tests/llm_stub.py --port 8011 --recordings rec.json
+
+rec.json is a list of {"system": str, "user": str, "response": str}; the
+match keys are optional.
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = "Stub response."
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class LLMStub:
+    """
+    OpenAI-compatible chat completions server replaying recorded responses.
+
+    Args:
+        recordings: [{"system": substring, "user": substring, "response": text}]
+        latency_s: Fixed delay before the first token (network + prefill).
+        tokens_per_s: Generation rate used to delay by the completion length.
+                      0 disables the generation delay.
+        port: Port to bind on 127.0.0.1 (0 picks a free port).
+    """
+
+    def __init__(self, recordings: list[dict] = None, latency_s: float = 0.2,
+                 tokens_per_s: float = 200.0, port: int = 0):
+        self.recordings = list(recordings or [])
+        self.latency_s = latency_s
+        self.tokens_per_s = tokens_per_s
+        self.requests = []         # (seconds, prompt_tokens, completion_tokens) per call
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def match(self, system: str, user: str) -> str:
+        """Recorded response for a system / user message pair."""
+        for rec in self.recordings:
+            if rec.get("system", "") in system and rec.get("user", "") in user:
+                return rec["response"]
+        return DEFAULT_RESPONSE
+
+    def complete(self, body: dict) -> dict:
+        """Build (and pace) the chat.completions response for a request body."""
+        start = time.perf_counter()
+        messages = body.get("messages", [])
+        system = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        user = "\n".join(m.get("content", "") for m in messages if m.get("role") != "system")
+        text = self.match(system, user)
+
+        prompt_tokens = estimate_tokens(system + user)
+        completion_tokens = estimate_tokens(text)
+        delay = self.latency_s
+        if self.tokens_per_s > 0:
+            delay += completion_tokens / self.tokens_per_s
+        time.sleep(delay)
+
+        with self._lock:
+            self.requests.append((time.perf_counter() - start, prompt_tokens, completion_tokens))
+        return {
+            "id": f"stub-{len(self.requests)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                else:
+                    self._send(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send(400, {"error": {"message": "invalid JSON"}})
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+                if body.get("stream"):
+                    self._send(400, {"error": {"message": "streaming is not supported by the stub"}})
+                    return
+                self._send(200, stub.complete(body))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "LLMStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible LLM stub")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--recordings", help="JSON list of {system, user, response}")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--tokens-per-s", type=float, default=200.0)
+    args = parser.parse_args()
+
+    recordings = []
+    if args.recordings:
+        with open(args.recordings, "r", encoding="utf-8") as f:
+            recordings = json.load(f)
+    stub = LLMStub(recordings, args.latency, args.tokens_per_s, args.port)
+    print(f"LLM stub listening on {stub.url} ({len(recordings)} recordings) — Ctrl+C to stop")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
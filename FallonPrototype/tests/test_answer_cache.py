@@ -0,0 +1,150 @@
+"""
+Tests for the semantic answer cache.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+from FallonPrototype.shared import answer_cache
+
+# Toy embedding: questions about the same topic map to nearby vectors
+_TOPICS = {"catch": 0, "waterfall": 1, "reserve": 2, "promote": 3}
+
+
+def _embed(texts):
+    out = []
+    for text in texts:
+        v = np.full(8, 0.05, dtype=np.float32)
+        for word, axis in _TOPICS.items():
+            if word in text.lower():
+                v[axis] += 1.0
+        out.append(v)
+    return out
+
+
+def _setup():
+    answer_cache._embed_fn = _embed
+    answer_cache.invalidate()
+
+
+def _teardown():
+    answer_cache._embed_fn = None
+    answer_cache.invalidate()
+
+
+def test_semantic_lookup():
+    """Test paraphrase hits, chunk-ID validation and corpus versioning."""
+    print("\n" + "=" * 60)
+    print("TEST: Semantic lookup")
+    print("=" * 60)
+
+    _setup()
+    try:
+        corpus = ("v1",)
+        ids = ["contract_jv_004", "contract_jv_005"]
+        answer_cache.store("Explain the GP catch-up", ids, "cached answer", corpus)
+
+        # Paraphrase over the same chunks hits
+        assert answer_cache.lookup("how does catch-up work for the GP", ids[::-1], corpus) == "cached answer"
+        # Different topic misses
+        assert answer_cache.lookup("what is the interest reserve", ids, corpus) is None
+        # Same question but retrieval changed -> miss
+        assert answer_cache.lookup("Explain the GP catch-up", ["contract_jv_004"], corpus) is None
+        # Corpus changed -> miss, and old entries are evicted
+        assert answer_cache.lookup("Explain the GP catch-up", ids, ("v2",)) is None
+        assert answer_cache.cache_stats()["size"] == 0
+        print(f"  {answer_cache.cache_stats()}")
+
+        # Without an embedding model, exact (normalized) text still matches
+        answer_cache._embed_fn = lambda texts: (_ for _ in ()).throw(RuntimeError("offline"))
+        answer_cache.store("Explain the GP catch-up", ids, "exact", corpus)
+        assert answer_cache.lookup("explain the GP catch-up?", ids, corpus) == "exact"
+        assert answer_cache.lookup("how does catch-up work for the GP", ids, corpus) is None
+        print("  Offline fallback matches normalized text")
+    finally:
+        _teardown()
+
+    print("\nPASS: Semantic lookup")
+    return True
+
+
+def test_eviction():
+    """Test age and size eviction, and cached_call() skipping errors."""
+    print("\n" + "=" * 60)
+    print("TEST: Eviction")
+    print("=" * 60)
+
+    _setup()
+    try:
+        corpus = ("v1",)
+        answer_cache.store("waterfall tiers", ["a"], "old", corpus)
+        answer_cache._entries[-1]["created"] -= answer_cache.TTL_SECONDS + 1
+        assert answer_cache.lookup("waterfall tiers", ["a"], corpus) is None
+
+        for i in range(answer_cache.CACHE_SIZE + 5):
+            answer_cache.store(f"promote question {i}", [str(i)], i, corpus)
+        assert answer_cache.cache_stats()["size"] == answer_cache.CACHE_SIZE
+        print(f"  Size capped at {answer_cache.CACHE_SIZE}, expired entries dropped")
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "ERROR: timeout" if len(calls) == 1 else "fine"
+
+        ok = lambda v: not v.startswith("ERROR:")
+        assert answer_cache.cached_call("reserve?", ["r"], compute, ok) == ("ERROR: timeout", False)
+        assert answer_cache.cached_call("reserve?", ["r"], compute, ok) == ("fine", False)
+        assert answer_cache.cached_call("reserve?", ["r"], compute, ok) == ("fine", True)
+        assert len(calls) == 2
+        print("  Errors are not cached")
+    finally:
+        _teardown()
+
+    print("\nPASS: Eviction")
+    return True
+
+
+def run_all_tests():
+    """Run all answer cache tests."""
+    print("\n" + "=" * 60)
+    print("ANSWER CACHE TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("semantic_lookup", test_semantic_lookup),
+        ("eviction", test_eviction),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,179 @@
+"""
+Tests for the rolling conversation memory used by the chat prompt.
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared import claude_client
+from FallonPrototype.shared.chat_history import (
+    message_text,
+    format_history,
+    pending_summary_range,
+    summarize,
+    compact_json,
+    RECENT_MESSAGES,
+    SUMMARY_BATCH,
+    SUMMARY_CHARS,
+    MESSAGE_CHARS,
+    PENDING_MESSAGE_CHARS,
+)
+
+
+def _conversation(n: int) -> list[dict]:
+    messages = []
+    for i in range(n):
+        if i % 2 == 0:
+            # Every fifth user turn pastes a long document
+            text = f"Question {i} about the Charlotte deal" + (" lease text" * 2000 if i % 10 == 0 else "")
+            messages.append({"role": "user", "content": text})
+        else:
+            messages.append({"role": "assistant", "resp": {"t": "txt", "txt": f"Answer {i}"}})
+    return messages
+
+
+def test_bounded_history():
+    """Test that the history block stays the same size however long the session gets."""
+    print("\n" + "=" * 60)
+    print("TEST: Bounded history")
+    print("=" * 60)
+
+    assert message_text({"role": "assistant", "resp": {"t": "txt", "txt": "Hi"}}) == "Hi"
+    assert message_text({"role": "assistant", "resp": {"t": "model", "txt": "Here"}}) == "Here [pro forma generated]"
+    assert compact_json({"market": "Charlotte", "units": 300}) == '{"market":"Charlotte","units":300}'
+
+    # Simulate a session where every due batch is summarized
+    summary = {"text": "", "upto": 0}
+    sizes = []
+    folded = 0
+    for n in range(1, 201):
+        messages = _conversation(n)
+        due = pending_summary_range(messages, summary)
+        if due:
+            start, end = due
+            assert start == summary["upto"] and end - start >= SUMMARY_BATCH
+            folded += end - start
+            summary = {"text": ("facts " * 1000)[:SUMMARY_CHARS], "upto": end}
+        sizes.append(len(format_history(messages, summary)))
+
+    bound = SUMMARY_CHARS + RECENT_MESSAGES * (MESSAGE_CHARS + 100) + SUMMARY_BATCH * (PENDING_MESSAGE_CHARS + 100)
+    print(f"  history chars: turn 10 {sizes[9]:,}, turn 100 {sizes[99]:,}, turn 200 {sizes[199]:,} (bound {bound:,})")
+    assert max(sizes) <= bound
+    assert folded == summary["upto"] and summary["upto"] >= 200 - RECENT_MESSAGES - SUMMARY_BATCH
+    history = format_history(_conversation(200), summary)
+    assert history.startswith("Summary of earlier conversation:")
+    assert "Answer 199" in history and "Question 100" not in history
+    assert "more characters]" in format_history(_conversation(11), {"text": "", "upto": 0})
+
+    print("\nPASS: Bounded history")
+    return True
+
+
+def test_no_message_dropped():
+    """Test that every message is in the summary or the verbatim part, even while the summarizer lags."""
+    print("\n" + "=" * 60)
+    print("TEST: No message dropped")
+    print("=" * 60)
+
+    summary = {"text": "", "upto": 0}
+    running = None          # summary job in flight: finishes on the next turn
+    for n in range(1, 121):
+        messages = _conversation(n)
+        if running and n % 3 == 0:   # the background job takes a few turns
+            summary, running = running, None
+        due = pending_summary_range(messages, summary)
+        if due and running is None:
+            running = {"text": "facts", "upto": due[1]}
+
+        history = format_history(messages, summary)
+        for i, m in enumerate(messages):
+            if i >= summary["upto"]:
+                assert message_text(m)[:20] in history, f"message {i} of {n} is in neither part"
+
+        # The chat job's snapshot: only unsummarized messages, "upto" rebased onto them
+        snapshot = format_history(messages[summary["upto"]:], {"text": summary["text"], "upto": 0})
+        assert snapshot == history
+
+    print(f"  120 turns, summary covers {summary['upto']} messages")
+
+    print("\nPASS: No message dropped")
+    return True
+
+
+def test_incremental_summary():
+    """Test that summarize() sends the previous summary plus only the new messages."""
+    print("\n" + "=" * 60)
+    print("TEST: Incremental summary")
+    print("=" * 60)
+
+    sent = []
+
+    def create(**kwargs):
+        sent.append(kwargs["messages"][1]["content"])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="  User wants 300 units in South End.  "))],
+            usage=None,
+        )
+
+    saved = claude_client._client
+    claude_client._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    try:
+        messages = _conversation(8)
+        updated = summarize("Charlotte multifamily deal.", messages[2:8])
+    finally:
+        claude_client._client = saved
+
+    assert updated == "User wants 300 units in South End."
+    assert "CURRENT SUMMARY:\nCharlotte multifamily deal." in sent[0]
+    assert "Question 2" in sent[0] and "Answer 7" in sent[0]
+    assert "Question 0" not in sent[0]
+    assert claude_client.get_usage_by_site()["history_summary"]["calls"] >= 1
+    claude_client.reset_session_usage()
+
+    print("\nPASS: Incremental summary")
+    return True
+
+
+def run_all_tests():
+    """Run all chat history tests."""
+    print("\n" + "=" * 60)
+    print("CHAT HISTORY TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("bounded_history", test_bounded_history),
+        ("no_message_dropped", test_no_message_dropped),
+        ("incremental_summary", test_incremental_summary),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,208 @@
+"""
+Tests for the structure-aware contract chunker.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared.contract_chunker import chunk_contract, iter_contract_chunks, CHUNK_MAX_CHARS
+from FallonPrototype.shared.text_stream import iter_text_pages, join_pages
+from FallonPrototype.agents.contract_agent import format_context
+
+_CONTRACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "contracts")
+
+SAMPLE = """OPERATING AGREEMENT
+
+ARTICLE I - DEFINITIONS
+
+1.1 Defined Terms. The following terms have the meanings below:
+"Capital Contribution" means the amount contributed by a Member.
+"Preferred Return" means a 9% cumulative return.
+
+ARTICLE IV - DISTRIBUTIONS
+
+4.1 Waterfall. Cash is distributed in tiers.
+4.2 Preferred Return. Investor receives 9% per annum. """ + "Accrual continues until paid. " * 120 + """
+
+4.3 Catch-Up. GP receives 100% until 20%.
+
+EXHIBIT A - LEGAL DESCRIPTION
+Parcel 1 at 500 Seaport Blvd.
+"""
+
+
+def _check_offsets(text, chunks):
+    for c in chunks:
+        assert text[c.offset:c.offset + len(c.text)] == c.text, f"chunk {c.index} offset mismatch"
+        assert len(c.text) <= CHUNK_MAX_CHARS
+
+
+def test_sample_contract_structure():
+    """Test that sample contracts split on article boundaries with section paths."""
+    print("\n" + "=" * 60)
+    print("TEST: Sample contract structure")
+    print("=" * 60)
+
+    path = os.path.join(_CONTRACTS_DIR, "jv_operating_agreement_002.txt")
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    chunks = chunk_contract(text)
+    _check_offsets(text, chunks)
+
+    assert chunks[0].kind == "preamble" and chunks[-1].kind == "signatures"
+    waterfall = [c for c in chunks if "4.1" in c.sections]
+    assert len(waterfall) == 1 and waterfall[0].section_path.startswith("Art. 4")
+    # No clause appears in two chunks
+    numbers = [n for c in chunks for n in c.sections]
+    assert len(numbers) == len(set(numbers))
+    for c in chunks:
+        print(f"  {len(c.text):5d}  {c.section_path}")
+
+    # Streaming in small blocks gives the same chunks
+    with open(path, encoding="utf-8") as f:
+        pages = list(iter_text_pages(f))
+    streamed = list(iter_contract_chunks(pages))
+    assert [c.text for c in streamed] == [c.text for c in chunks]
+    assert join_pages(pages) == text
+
+    print("\nPASS: Chunks follow the contract outline")
+    return True
+
+
+def test_definitions_exhibits_long_clauses():
+    """Test defined terms, exhibits, and splitting of a single oversized clause."""
+    print("\n" + "=" * 60)
+    print("TEST: Definitions, exhibits, long clauses")
+    print("=" * 60)
+
+    chunks = chunk_contract(SAMPLE)
+    _check_offsets(SAMPLE, chunks)
+    by_kind = {}
+    for c in chunks:
+        by_kind.setdefault(c.kind, []).append(c)
+
+    definitions = by_kind["definition"]
+    assert len(definitions) == 1 and definitions[0].section_path == "Art. I > 1.1 Defined Terms"
+    assert "Preferred Return\" means" in definitions[0].text
+
+    long_parts = [c for c in chunks if c.sections == ("4.2",)]
+    assert len(long_parts) > 1
+    assert all(c.section_path == "Art. IV > 4.2 Preferred Return" for c in long_parts)
+    assert all(c.text.endswith(".") for c in long_parts)   # split at sentence ends
+    assert not any("4.3" in c.sections and "4.2" in c.sections for c in chunks)
+
+    exhibit = by_kind["exhibit"][0]
+    assert exhibit.article == "Exhibit A" and exhibit.section_path == "Exhibit A LEGAL DESCRIPTION"
+    print(f"  {len(chunks)} chunks: " + ", ".join(f"{k}={len(v)}" for k, v in by_kind.items()))
+
+    print("\nPASS: Clause detection")
+    return True
+
+
+def test_numbered_lines_inside_sections():
+    """Test that list items and wrapped numbers inside a section don't open new sections."""
+    print("\n" + "=" * 60)
+    print("TEST: Numbered lines inside sections")
+    print("=" * 60)
+
+    text = """ARTICLE IV - DISTRIBUTIONS
+
+4.2 Preferred Return. Investor receives a preferred return at a rate of
+8.0 percent per annum, compounded annually, payable as follows:
+1. Quarterly distributions of Available Cash Flow;
+2. quarterly true-ups against the accrued balance;
+3.5 Management Fee. Stray number from another article.
+4.3 Catch-Up. GP receives 100% until 20%.
+
+ARTICLE 5 - FEES
+
+5.1 Asset Management Fee. One-half percent.
+Section 2. Term of Fees. Fees run for the life of the Company.
+"""
+    chunks = chunk_contract(text)
+    _check_offsets(text, chunks)
+    sections = tuple(n for c in chunks for n in c.sections)
+    print(f"  Sections: {sections}")
+    assert sections == ("4.2", "4.3", "5.1", "2"), sections
+    clause = next(c for c in chunks if "4.2" in c.sections)
+    assert "quarterly true-ups" in clause.text and "Stray number" in clause.text
+
+    # Without articles, bare numbers are the outline when they run in sequence
+    text = "1. Definitions. Terms below.\n1. Each term as defined.\n2. Term. Ten years.\n3. Rent. As scheduled.\n"
+    sections = tuple(n for c in chunk_contract(text, max_chars=20) for n in c.sections)
+    print(f"  Bare sections: {sections}")
+    assert sections == ("1", "2", "3"), sections
+
+    print("\nPASS: Only outline-shaped numbers open sections")
+    return True
+
+
+def test_format_context_cites_sections():
+    """Test that the contract agent's context cites section paths and adjacent clauses."""
+    print("\n" + "=" * 60)
+    print("TEST: format_context() section citations")
+    print("=" * 60)
+
+    chunk = {
+        "text": "4.2 Preferred Return. Investor receives 9% per annum.",
+        "metadata": {"source": "jv.txt", "doc_type": "contract", "chunk_index": 5,
+                     "section_path": "Art. 4 > 4.2 Preferred Return"},
+        "relevance": "high",
+        "adjacent": {
+            "before": [{"text": "4.1 Waterfall.", "metadata": {"section_path": "Art. 4 > 4.1 Waterfall"}}],
+            "after": [],
+        },
+    }
+    context = format_context([chunk, {"text": "Cap rates", "metadata": {"source": "m.md"}}])
+    assert "Section: Art. 4 > 4.2 Preferred Return" in context
+    assert context.index("[Art. 4 > 4.1 Waterfall]") < context.index("[Art. 4 > 4.2 Preferred Return]")
+    assert context.count("Section:") == 1
+    print(context)
+
+    print("\nPASS: Context cites sections")
+    return True
+
+
+def run_all_tests():
+    """Run all contract chunker tests."""
+    print("\n" + "=" * 60)
+    print("CONTRACT CHUNKER TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("sample_contract_structure", test_sample_contract_structure),
+        ("definitions_exhibits_long_clauses", test_definitions_exhibits_long_clauses),
+        ("numbered_lines_inside_sections", test_numbered_lines_inside_sections),
+        ("format_context_cites_sections", test_format_context_cites_sections),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,125 @@
+"""
+Tests for tornado/spider driver sensitivity and the Excel Drivers sheet.
+"""
+
+import sys
+import os
+import io
+import copy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from openpyxl import load_workbook
+
+from FallonPrototype.shared.return_calculator import compute_returns, compute_driver_sensitivity
+from FallonPrototype.shared.excel_export import export_pro_forma
+from FallonPrototype.tests.test_pro_forma_generator import SAMPLE_PRO_FORMA
+
+
+def test_drivers_match_scalar():
+    """Test that each tornado endpoint matches a scalar compute_returns() run."""
+    print("\n" + "=" * 60)
+    print("TEST: compute_driver_sensitivity() matches scalar calculator")
+    print("=" * 60)
+
+    drv = compute_driver_sensitivity(SAMPLE_PRO_FORMA, flex_pct=10, steps=5)
+    assert drv["steps"] == [-10.0, -5.0, 0.0, 5.0, 10.0]
+    assert drv["drivers"], "Expected numeric drivers"
+
+    keys = [d["key"] for d in drv["drivers"]]
+    assert "return_metrics.exit_cap_rate_pct" in keys
+    assert all(k.split(".")[0] in ("revenue_assumptions", "cost_assumptions",
+                                   "financing_assumptions", "return_metrics") for k in keys)
+
+    # Only independent inputs are flexed; totals are re-derived from them
+    derived = {"cost_assumptions.hard_cost_total", "cost_assumptions.soft_cost_total",
+               "cost_assumptions.contingency_total", "cost_assumptions.developer_fee_total",
+               "cost_assumptions.total_project_cost", "financing_assumptions.construction_loan_amount",
+               "financing_assumptions.equity_required", "financing_assumptions.lp_equity_amount",
+               "financing_assumptions.gp_equity_amount"}
+    assert not derived & set(keys), f"Derived totals flexed: {derived & set(keys)}"
+    hard = next(d for d in drv["drivers"] if d["key"] == "cost_assumptions.hard_cost_psf")
+    assert hard["irr_swing"] > 0, "Hard cost $/SF should move returns through the cost stack"
+
+    # Fields the scalar calculator reads directly (it doesn't re-derive totals)
+    direct = {"return_metrics.exit_cap_rate_pct", "revenue_assumptions.rent_psf_monthly",
+              "revenue_assumptions.stabilized_occupancy_pct"}
+    no_noi = copy.deepcopy(SAMPLE_PRO_FORMA)
+    del no_noi["return_metrics"]["stabilized_noi"]
+    drv = compute_driver_sensitivity(no_noi, flex_pct=10, steps=5)
+
+    for d in [d for d in drv["drivers"] if d["key"] in direct]:
+        section, field = d["key"].split(".")
+        pf = copy.deepcopy(no_noi)
+        pf[section][field]["value"] = d["base_value"] * 1.10
+        scalar = compute_returns(pf)["calc_irr_approx_pct"]
+        assert abs(d["irr_up"] - scalar) < 1e-3, f"{d['key']}: {d['irr_up']} vs {scalar}"
+        assert abs(d["irr_curve"][2] - drv["base_irr"]) < 1e-3, "Middle step should be base"
+        print(f"  - {d['label']}: {d['irr_down']:.2f}% .. {d['irr_up']:.2f}%")
+
+    swings = [d["irr_swing"] for d in drv["drivers"]]
+    assert swings == sorted(swings, reverse=True), "Drivers should be in tornado order"
+    assert len(drv["ranked_by_poc"]) == len(drv["drivers"])
+
+    print("\nPASS: Driver sensitivity matches scalar calculator")
+    return True
+
+
+def test_drivers_sheet():
+    """Test that the exported workbook has a populated Drivers sheet with charts."""
+    print("\n" + "=" * 60)
+    print("TEST: Excel Drivers sheet")
+    print("=" * 60)
+
+    wb = load_workbook(io.BytesIO(export_pro_forma({"pro_forma": SAMPLE_PRO_FORMA})))
+    assert "Drivers" in wb.sheetnames
+    ws = wb["Drivers"]
+
+    labels = [ws.cell(r, 1).value for r in range(1, ws.max_row + 1)]
+    assert "Exit Cap Rate %" in labels
+    assert len(ws._charts) == 2, "Expected tornado and spider charts"
+    print(f"  Drivers sheet: {ws.max_row} rows, {len(ws._charts)} charts")
+
+    print("\nPASS: Drivers sheet exported")
+    return True
+
+
+def run_all_tests():
+    """Run all driver sensitivity tests."""
+    print("\n" + "=" * 60)
+    print("DRIVER SENSITIVITY TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("drivers_match_scalar", test_drivers_match_scalar),
+        ("drivers_sheet", test_drivers_sheet),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
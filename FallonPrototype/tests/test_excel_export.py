@@ -4,12 +4,19 @@ Tests for Phase 5 — Excel Export.
 
 import sys
 import os
+import io
+import copy
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from openpyxl import load_workbook
+
 from FallonPrototype.shared.excel_export import (
     export_pro_forma,
+    export_pro_forma_cached,
+    export_portfolio,
     get_suggested_filename,
+    STYLES,
 )
 from FallonPrototype.shared.return_calculator import compute_sensitivity_table
 
@@ -210,6 +217,82 @@ def test_sensitivity_table_in_returns():
     return True
 
 
+def test_named_styles_and_cache():
+    """Test that cells use shared named styles and cached exports are reused."""
+    print("\n" + "=" * 60)
+    print("TEST: Named styles + export_pro_forma_cached()")
+    print("=" * 60)
+    
+    first = export_pro_forma_cached(SAMPLE_EXPORT_DATA, "Test Pro Forma")
+    wb = load_workbook(io.BytesIO(first))
+    
+    assert set(STYLES) <= set(wb.named_styles)
+    assert wb["Inputs"]["A1"].style == "pf_title"
+    print(f"  {len(STYLES)} named styles registered")
+    
+    # Same content -> same bytes object; changed content -> fresh export
+    assert export_pro_forma_cached(copy.deepcopy(SAMPLE_EXPORT_DATA), "Test Pro Forma") is first
+    changed = copy.deepcopy(SAMPLE_EXPORT_DATA)
+    changed["pro_forma"]["project_summary"]["unit_count"]["value"] = 210
+    assert export_pro_forma_cached(changed, "Test Pro Forma") is not first
+    print("  Cache hit on identical pro forma, miss on change")
+    
+    print("\nPASS: Named styles and export cache work")
+    return True
+
+
+def test_portfolio_export():
+    """Test the multi-deal portfolio workbook."""
+    print("\n" + "=" * 60)
+    print("TEST: export_portfolio()")
+    print("=" * 60)
+    
+    deals = []
+    for units in (180, 200, 220):
+        d = copy.deepcopy(SAMPLE_EXPORT_DATA)
+        d["pro_forma"]["project_summary"]["deal_name"] = f"Charlotte {units}"
+        d["pro_forma"]["project_summary"]["unit_count"]["value"] = units
+        deals.append(d)
+    
+    wb = load_workbook(io.BytesIO(export_portfolio(deals)))
+    
+    assert wb.sheetnames[:2] == ["Portfolio", "Sensitivity"]
+    assert "Deal 3 Inputs" in wb.sheetnames and "Deal 3 Calcs" in wb.sheetnames
+    print(f"  {len(wb.sheetnames)} sheets")
+    
+    ws = wb["Portfolio"]
+    assert ws["A4"].value == "Rank"
+    ranks = [ws.cell(r, 1).value for r in range(5, 8)]
+    assert all(r.startswith("=RANK(J") for r in ranks)
+    assert sorted(ws.cell(r, 11).value for r in range(5, 8)) == ["Deal 1", "Deal 2", "Deal 3"]
+    assert ws["F5"].value.startswith("='Deal ") and "Calcs'!B" in ws["F5"].value
+    print("  Portfolio rows link to deal sheets with RANK()")
+    
+    sens = wb["Sensitivity"]
+    assert [sens.cell(r, 2).value for r in range(5, 8)] == ["Charlotte 180", "Charlotte 200", "Charlotte 220"]
+    print("  Shared sensitivity has one row per deal")
+    
+    # Rows are ordered by the same LP IRR the sheet shows and ranks
+    deals = []
+    for i, (units, rent, cap) in enumerate([(180, 1.95, 5.5), (240, 1.70, 4.75), (200, 2.10, 6.0), (160, 1.85, 5.0),
+                                            (260, 2.00, 5.75), (220, 1.60, 5.25), (190, 2.20, 4.5), (210, 1.75, 6.25)]):
+        d = copy.deepcopy(SAMPLE_EXPORT_DATA)
+        pf = d["pro_forma"]
+        pf["project_summary"]["unit_count"]["value"] = units
+        pf["revenue_assumptions"]["rent_psf_monthly"]["value"] = rent
+        pf["return_metrics"]["exit_cap_rate_pct"]["value"] = cap
+        deals.append(d)
+    ws = load_workbook(io.BytesIO(export_portfolio(deals)), data_only=True)["Portfolio"]
+    ranks = [ws.cell(r, 1).value for r in range(5, 13)]
+    irrs = [ws.cell(r, 10).value for r in range(5, 13)]
+    print(f"  Ranks {ranks}, LP IRR {[round(v * 100, 1) for v in irrs]}")
+    assert ranks == sorted(ranks) and ranks[0] == 1
+    assert irrs == sorted(irrs, reverse=True)
+    
+    print("\nPASS: Portfolio export works")
+    return True
+
+
 def test_get_suggested_filename():
     """Test filename suggestion."""
     print("\n" + "=" * 60)
@@ -265,6 +348,8 @@ def run_all_tests():
         ("has_all_sheets", test_export_has_all_sheets),
         ("summary_content", test_summary_sheet_content),
         ("sensitivity_table", test_sensitivity_table_in_returns),
+        ("named_styles_and_cache", test_named_styles_and_cache),
+        ("portfolio_export", test_portfolio_export),
         ("suggested_filename", test_get_suggested_filename),
         ("save_sample", test_save_sample_export),
     ]
@@ -0,0 +1,168 @@
+"""
+Tests for the formula evaluator and cached values in exported workbooks.
+"""
+
+import sys
+import os
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from openpyxl import load_workbook
+
+from FallonPrototype.shared.formula_eval import evaluate_cells, FormulaError
+from FallonPrototype.shared.excel_export import export_pro_forma, export_portfolio
+from FallonPrototype.tests.test_pro_forma_generator import SAMPLE_PRO_FORMA
+
+
+def _eval_one(formula, cells=None):
+    cells = dict(cells or {})
+    cells[("S", 1, 100)] = formula
+    return evaluate_cells(cells)[("S", 1, 100)]
+
+
+def test_formula_semantics():
+    """Test operators, functions and error values against Excel semantics."""
+    print("\n" + "=" * 60)
+    print("TEST: Formula semantics")
+    print("=" * 60)
+
+    data = {("S", 1, 1): 10.0, ("S", 1, 2): 0.0, ("S", 1, 3): 30.0, ("Other Sheet", 2, 5): 4.0}
+    cases = [
+        ("=1+2*3", 7.0),
+        ("=-2^2", 4.0),
+        ("=(1+2)*3/4", 2.25),
+        ("=2^3^2", 64.0),
+        ("=A1*'Other Sheet'!B5", 40.0),
+        ("=$A$1+A3", 40.0),
+        ("=IF(A1>5,\"big\",\"small\")", "big"),
+        ("=IF(A2>0,A1/A2,-1)", -1.0),
+        ("=ROUND(2.5,0)+ROUND(-2.5,0)", 0.0),
+        ("=ROUND(1234.567,1)", 1234.6),
+        ("=SUM(A1:A3)", 40.0),
+        ("=SUMPRODUCT(A1:A3,A1:A3)/SUM(A1:A3)", 25.0),
+        ("=RANK(A3,A1:A3)", 1.0),
+        ("=RANK(A2,A1:A3)", 3.0),
+        ("=\"a\"&\"b\"", "ab"),
+        ("=B99+1", 1.0),
+    ]
+    for formula, expected in cases:
+        result = _eval_one(formula, data)
+        assert result == expected, f"{formula}: {result!r} != {expected!r}"
+        print(f"  {formula:40s} = {result!r}")
+
+    for formula, error in [("=A1/A2", "#DIV/0!"), ("=(A1/A2)+1", "#DIV/0!"), ("=NOPE(1)", "#NAME?"), ("=(-8)^0.5", "#NUM!")]:
+        result = _eval_one(formula, data)
+        assert isinstance(result, FormulaError) and result == error, f"{formula}: {result!r}"
+        print(f"  {formula:40s} = {result}")
+
+    print("\nPASS: Formula semantics match Excel")
+    return True
+
+
+def test_topological_order_and_cycles():
+    """Test that dependencies resolve regardless of order and cycles are skipped."""
+    print("\n" + "=" * 60)
+    print("TEST: Topological evaluation")
+    print("=" * 60)
+
+    # Chain written back-to-front, plus a cycle and a cell that depends on it
+    cells = {("S", 1, r): f"=A{r + 1}+1" for r in range(1, 200)}
+    cells[("S", 1, 200)] = 5.0
+    cells[("S", 2, 1)] = "=B2"
+    cells[("S", 2, 2)] = "=B1"
+    cells[("S", 2, 3)] = "=B1+1"
+    cells[("S", 3, 1)] = "=C1"
+
+    results = evaluate_cells(cells)
+    assert results[("S", 1, 1)] == 5.0 + 199
+    assert ("S", 2, 1) not in results and ("S", 2, 2) not in results and ("S", 2, 3) not in results
+    assert ("S", 3, 1) not in results
+    print(f"  199-cell chain resolved: A1 = {results[('S', 1, 1)]:g}")
+    print("  Cycles and their dependents left uncached")
+
+    print("\nPASS: Single topological pass")
+    return True
+
+
+def test_export_has_cached_values():
+    """Test that exported workbooks carry computed values readable without Excel."""
+    print("\n" + "=" * 60)
+    print("TEST: Cached values in exported workbooks")
+    print("=" * 60)
+
+    excel_bytes = export_pro_forma({"pro_forma": SAMPLE_PRO_FORMA}, "Test")
+    formulas = load_workbook(io.BytesIO(excel_bytes))
+    values = load_workbook(io.BytesIO(excel_bytes), data_only=True)
+
+    # Formulas are kept
+    assert str(formulas["Calculations"]["B21"].value).startswith("=")
+
+    calc = {row[0]: row[1] for row in values["Calculations"].iter_rows(values_only=True) if row[0]}
+    ps = SAMPLE_PRO_FORMA["project_summary"]
+    ca = SAMPLE_PRO_FORMA["cost_assumptions"]
+
+    hard = ps["total_gfa_sf"]["value"] * ca["hard_cost_psf"]["value"]
+    assert abs(calc["Hard Costs"] - hard) < 1e-6
+    assert abs(calc["Profit on Cost"] - calc["Total Profit"] / calc["Total Development Cost"]) < 1e-12
+    assert abs(calc["Total Development Cost"] - (calc["Subtotal"] + calc["Developer Fee"])) < 1e-6
+    print(f"  TDC ${calc['Total Development Cost']:,.0f}, PoC {calc['Profit on Cost']:.1%}")
+
+    scen = values["Unit Scenarios"]
+    units = [c.value for c in scen[5][1:6]]
+    assert units == [ps["unit_count"]["value"] + d for d in (-20, -10, 0, 10, 20)]
+    assert values["Summary"]["B3"].value == "charlotte"
+    print(f"  Unit scenarios: {units}")
+
+    # Portfolio cross-sheet formulas
+    wb = load_workbook(io.BytesIO(export_portfolio([{"pro_forma": SAMPLE_PRO_FORMA}] * 2)), data_only=True)
+    port = wb["Portfolio"]
+    assert port["B5"].value == ps["deal_name"]
+    assert port["A5"].value == 1 and port["A6"].value == 1  # identical deals tie
+    assert abs(port["F8"].value - 2 * calc["Total Development Cost"]) < 1e-3
+    print(f"  Portfolio total TDC ${port['F8'].value:,.0f}")
+
+    print("\nPASS: Exported workbooks carry cached values")
+    return True
+
+
+def run_all_tests():
+    """Run all formula evaluator tests."""
+    print("\n" + "=" * 60)
+    print("FORMULA EVALUATOR TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("formula_semantics", test_formula_semantics),
+        ("topological_order_and_cycles", test_topological_order_and_cycles),
+        ("export_has_cached_values", test_export_has_cached_values),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -150,7 +150,7 @@ def test_phase5_excel():
     excel_bytes = export_pro_forma(export_data, "Test")
     wb = load_workbook(io.BytesIO(excel_bytes))
     
-    assert len(wb.sheetnames) == 6
+    assert len(wb.sheetnames) == 7
     print(f"  Sheets: {wb.sheetnames}")
     print(f"  File size: {len(excel_bytes):,} bytes")
     
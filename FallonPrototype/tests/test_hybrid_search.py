@@ -0,0 +1,136 @@
+"""
+Tests for BM25, hybrid (RRF) and reranked retrieval.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import chromadb
+
+from FallonPrototype.shared import vector_store, hybrid_search
+from FallonPrototype.tests.test_parent_child import _WordHashEmbedding, _index_sample
+
+
+def _use_test_store():
+    saved = vector_store._client, vector_store._embedding_fn, hybrid_search._cross_encoder_unavailable
+    vector_store._client = chromadb.EphemeralClient()
+    vector_store._embedding_fn = _WordHashEmbedding()
+    hybrid_search._cross_encoder_unavailable = True   # deterministic sentence-level reranker
+    hybrid_search._indexes.clear()
+    for name in ("test_parents", "test_children"):
+        try:
+            vector_store._client.delete_collection(name)
+        except Exception:
+            pass
+    return saved
+
+
+def _restore(saved):
+    vector_store._client, vector_store._embedding_fn, hybrid_search._cross_encoder_unavailable = saved
+    hybrid_search._indexes.clear()
+
+
+def test_lexical_query():
+    """Test tokenization, BM25 ranking, metadata filters and index refresh."""
+    print("\n" + "=" * 60)
+    print("TEST: lexical_query()")
+    print("=" * 60)
+
+    assert hybrid_search.tokenize("Section 4.2 of the LLC") == ["section", "4.2", "llc"]
+
+    saved = _use_test_store()
+    try:
+        _index_sample("jv")
+        results = hybrid_search.lexical_query("test_parents", "catch-up", n_results=3)
+        assert results and "Catch-Up" in results[0]["text"]
+        assert [r["bm25"] for r in results] == sorted((r["bm25"] for r in results), reverse=True)
+        print(f"  'catch-up' -> {results[0]['metadata']['section_path']} (bm25 {results[0]['bm25']})")
+
+        assert hybrid_search.lexical_query("test_parents", "zebra giraffe") == []
+
+        # New documents rebuild the index; filters restrict it
+        _index_sample("lease")
+        filtered = hybrid_search.lexical_query("test_parents", "catch-up", n_results=10,
+                                               where={"source": "lease.txt"})
+        assert filtered and all(r["metadata"]["source"] == "lease.txt" for r in filtered)
+        print(f"  Filtered to lease.txt: {len(filtered)} results")
+    finally:
+        _restore(saved)
+
+    print("\nPASS: BM25 search")
+    return True
+
+
+def test_hybrid_and_reranked():
+    """Test RRF fusion output and reranking."""
+    print("\n" + "=" * 60)
+    print("TEST: hybrid_query() / reranked_query()")
+    print("=" * 60)
+
+    saved = _use_test_store()
+    try:
+        _index_sample("jv")
+        query = "GP catch-up until 20% of distributions"
+        results = hybrid_search.hybrid_query("test_parents", query, n_results=4)
+        assert len(results) == 4
+        assert len({r["id"] for r in results}) == 4
+        assert [r["rrf"] for r in results] == sorted((r["rrf"] for r in results), reverse=True)
+        for r in results:
+            assert r["relevance"] in ("high", "medium", "low") and 0.0 <= r["distance"] <= 2.0
+            print(f"  rrf {r['rrf']:.4f}  dist {r['distance']:.3f}  {r['metadata']['section_path']}")
+
+        reranked = hybrid_search.reranked_query("test_parents", query, n_results=3)
+        assert len(reranked) == 3
+        assert [r["rerank"] for r in reranked] == sorted((r["rerank"] for r in reranked), reverse=True)
+        assert "Catch-Up" in reranked[0]["text"]
+        print(f"  Reranked top: {reranked[0]['metadata']['section_path']} ({reranked[0]['rerank']:.3f})")
+
+        assert hybrid_search.rerank(query, []) == []
+    finally:
+        _restore(saved)
+
+    print("\nPASS: Hybrid and reranked search")
+    return True
+
+
+def run_all_tests():
+    """Run all hybrid search tests."""
+    print("\n" + "=" * 60)
+    print("HYBRID SEARCH TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("lexical_query", test_lexical_query),
+        ("hybrid_and_reranked", test_hybrid_and_reranked),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,251 @@
+"""
+Tests for local chat intent routing (keyword rules + nearest centroid).
+"""
+
+import sys
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared import memory, intent_router
+from FallonPrototype.shared.intent_router import classify, classify_rules, CentroidModel, get_routing_stats
+from FallonPrototype.tests.test_memory import _use_tmp_store, _trigram_embed
+
+READY = {"market": "Charlotte", "program_type": "multifamily", "parcel_acres": 3.2, "unit_count": 240}
+
+TRAINING = {
+    "answer_question": [
+        "what does the partnership say about removing the general partner",
+        "what does the partnership say about the general partner removal",
+        "what does the partnership say about a general partner default",
+        "what does the partnership say about the general partner fees",
+        "what does the partnership say about general partner transfers",
+    ],
+    "chat": [
+        "thanks that is really helpful",
+        "thanks that is very helpful",
+        "thanks that was helpful",
+        "thanks this is helpful",
+        "thanks, really helpful stuff",
+    ],
+    "gather_info": [
+        "the site is near the river in south end",
+        "the site is close to the river in south end",
+        "the site sits by the river in south end",
+        "the site is along the river in south end",
+        "the site is on the river in south end",
+    ],
+}
+
+
+def _train(routed: bool = False):
+    memory._embed_fn = _trigram_embed
+    intent_router.reset()
+    for intent, queries in TRAINING.items():
+        for q in queries:
+            params = {"routed_by": "centroid"} if routed else None
+            memory.record_interaction(q, intent, "text", parameters=params)
+
+
+def test_keyword_rules():
+    """Test the high-precision rules and the actionability guards."""
+    print("\n" + "=" * 60)
+    print("TEST: Keyword rules")
+    print("=" * 60)
+
+    assert classify_rules("set rent to $3.10", has_model=True) == "adjust_model"
+    assert classify_rules("cap rate 5.5", has_model=True) == "adjust_model"
+    assert classify_rules("set rent to $3.10", has_model=False) is None
+    assert classify_rules("what rent do comparable deals get?", has_model=True) is None, "Questions aren't adjustments"
+    assert classify_rules("What does the JV agreement say about removal of the GP?", False) == "answer_question"
+    assert classify_rules("The JV agreement is attached", False) is None, "Contract terms alone aren't a question"
+    assert classify_rules("go ahead and build the pro forma", False) == "generate_model"
+    assert classify_rules("what is a good exit cap in Nashville", False) is None
+
+    memory._embed_fn = lambda texts: (_ for _ in ()).throw(AssertionError("rules must not embed"))
+    try:
+        decision = classify("set rent to $3.10", has_model=True)
+        assert (decision.intent, decision.source, decision.confidence) == ("adjust_model", "rules", 1.0)
+        assert classify("go ahead and build the pro forma", project_data=READY).intent == "generate_model"
+        # Generation needs complete project data and no new numbers to extract
+        assert classify("go ahead and build the pro forma", project_data={"market": "Charlotte"}) is None
+        assert classify("build the pro forma with 300 units", project_data=READY) is None
+    finally:
+        memory._embed_fn = None
+
+    print("\nPASS: Rules route clear-cut turns without an embedding")
+    return True
+
+
+def test_centroid_model():
+    """Test centroids trained from the memory store route paraphrases of past turns."""
+    print("\n" + "=" * 60)
+    print("TEST: Nearest-centroid model")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _use_tmp_store(tmp)
+        try:
+            _train()
+            model = intent_router.get_model()
+            print(f"  Centroids: {model.intents} from {model.examples} examples")
+            assert set(model.intents) == set(TRAINING)
+
+            decision = classify("what does the partnership say about general partner removal rights")
+            print(f"  Decision: {decision}")
+            assert decision is not None and decision.intent == "answer_question" and decision.source == "centroid"
+            assert decision.confidence >= intent_router.CENTROID_THRESHOLD
+
+            # Confident but not routable: chat still goes to the conversation model
+            assert model.predict(memory.embed_query("thanks that is so helpful"))[0] == "chat"
+            assert classify("thanks that is so helpful") is None
+            assert classify("zzzz qqqq") is None, "Unrelated text clears no threshold"
+
+            start = time.perf_counter()
+            for _ in range(100):
+                classify("what does the partnership say about general partner removal rights")
+            print(f"  Classify: {(time.perf_counter() - start) * 10:.2f}ms avg")
+
+            stats = get_routing_stats()
+            print(f"  Stats: {stats}")
+            assert stats["centroid"] == 101 and stats["llm"] == 2
+        finally:
+            restore()
+            intent_router.reset()
+
+    print("\nPASS: Centroids route paraphrases of labelled turns")
+    return True
+
+
+def test_training_data():
+    """Test that routed turns and thin intents don't become centroids."""
+    print("\n" + "=" * 60)
+    print("TEST: Training data")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _use_tmp_store(tmp)
+        try:
+            _train(routed=True)
+            intents, matrix = memory.get_intent_examples()
+            assert intents == [] and matrix is None, "Routed turns must not train the router"
+            assert classify("what does the partnership say about general partner removal rights") is None
+
+            memory.record_interaction("set cap rate to 5", "adjust_model", "text")
+            memory.record_interaction("charlotte 240 units", "generate", "model")
+            intents, matrix = memory.get_intent_examples()
+            assert intents == ["adjust_model"] and matrix.shape[0] == 1, "Only chat turns are examples"
+
+            model = CentroidModel(["generate"] * 5 + ["MODEL"] * 2 + ["chat"] * 3, _trigram_embed(["x"] * 10))
+            assert model.intents == ["generate_model"], "Legacy labels are aliased; thin intents dropped"
+            assert model.predict(_trigram_embed(["x"])[0]) is None, "One centroid can't clear a margin"
+        finally:
+            restore()
+            intent_router.reset()
+
+    print("\nPASS: Only labelled chat turns train the router")
+    return True
+
+
+def test_trains_on_conversation_model_labels():
+    """Test that turns the conversation model labels are recorded on every branch and train the router."""
+    print("\n" + "=" * 60)
+    print("TEST: Training on conversation model labels")
+    print("=" * 60)
+
+    from FallonPrototype import app
+
+    turns = {
+        # Contract answers and generation return early from process_message
+        "answer_question": TRAINING["answer_question"],
+        "generate_model": [
+            "ok that all sounds right, show me what it looks like",
+            "ok that sounds right, show me what it looks like",
+            "ok that all looks right, show me what it looks like",
+            "ok all of that sounds right, show me what it looks like",
+            "ok that all sounds right, show me how it looks",
+        ],
+        "chat": TRAINING["chat"],
+    }
+    labels = {q: intent for intent, queries in turns.items() for q in queries}
+    saved = app.get_ai_response, app.generate_model_from_data, app.answer_contract_question
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _use_tmp_store(tmp)
+        memory._embed_fn = _trigram_embed
+        intent_router.reset()
+        app.get_ai_response = lambda message, state: {
+            "intent": labels[message], "response": "Sure.", "ready_to_generate": True,
+        }
+        app.generate_model_from_data = lambda state, report: {"t": "model", "txt": "Built."}
+        app.answer_contract_question = lambda message: SimpleNamespace(
+            answer="Removal requires Cause.", confidence="high", sources=[],
+        )
+        try:
+            kinds = set()
+            for message in labels:
+                state = SimpleNamespace(model=None, project_data={}, messages=[], summary={"text": "", "upto": 0})
+                kinds.add(app.process_message(message, state)["t"])
+            assert kinds == {"answer", "model", "txt"}, kinds
+
+            intents, matrix = memory.get_intent_examples()
+            assert sorted(intents) == sorted(labels.values()) and matrix.shape[0] == len(labels)
+
+            intent_router.reset()
+            model = intent_router.get_model()
+            print(f"  Centroids: {model.intents} from {model.examples} examples")
+            assert set(model.intents) == set(turns)
+            assert model.predict(memory.embed_query("ok that all sounds right, show me what it'll look like"))[0] == "generate_model"
+        finally:
+            app.get_ai_response, app.generate_model_from_data, app.answer_contract_question = saved
+            restore()
+            intent_router.reset()
+
+    print("\nPASS: Every labelled turn trains the router")
+    return True
+
+
+def run_all_tests():
+    """Run all intent router tests."""
+    print("\n" + "=" * 60)
+    print("INTENT ROUTER TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("keyword_rules", test_keyword_rules),
+        ("centroid_model", test_centroid_model),
+        ("training_data", test_training_data),
+        ("trains_on_conversation_model_labels", test_trains_on_conversation_model_labels),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
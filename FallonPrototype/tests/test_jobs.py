@@ -0,0 +1,158 @@
+"""
+Tests for the background job queue: dedupe by input hash, progress, errors.
+"""
+
+import sys
+import os
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared import jobs
+from FallonPrototype.shared.jobs import JobQueue, job_key
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while not job.done and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.done, f"job {job.kind} did not finish"
+
+
+def test_dedupe_and_progress():
+    """Test that identical inputs share one job and progress is visible while it runs."""
+    print("\n" + "=" * 60)
+    print("TEST: Dedupe and progress")
+    print("=" * 60)
+
+    queue = JobQueue(workers=2)
+    release = threading.Event()
+    calls = []
+
+    def work(job, text, data):
+        calls.append(text)
+        job.report(1, 2, "halfway", partial=text.upper())
+        release.wait(5)
+        return len(text) + len(data)
+
+    try:
+        first = queue.submit("parse", work, "abc", b"\x00\x01")
+        second = queue.submit("parse", work, "abc", b"\x00\x01")
+        other = queue.submit("parse", work, "abc", b"\x00\x02")
+        assert first is second
+        assert other is not first
+
+        while first.progress is None:
+            time.sleep(0.01)
+        assert first.status == "running" and not first.done
+        assert first.progress == (1, 2) and first.message == "halfway" and first.partial == "ABC"
+
+        release.set()
+        _wait(first)
+        _wait(other)
+        assert first.status == "done" and first.result == 5
+        assert sorted(calls) == ["abc", "abc"]          # two distinct inputs, two runs
+        assert queue.submit("parse", work, "abc", b"\x00\x01") is first
+        assert first.elapsed > 0
+
+        # Stale-prone work only joins a running job; a finished one runs again
+        rerun = queue.submit("parse", work, "abc", b"\x00\x01", reuse_finished=False)
+        assert rerun is not first and rerun.id == first.id
+        _wait(rerun)
+        assert len(calls) == 3
+        print(f"  job {first.id}: {first.status}, result {first.result}, {first.elapsed * 1000:.1f}ms")
+    finally:
+        release.set()
+        queue.shutdown()
+
+    # Explicit keys and key stability
+    assert job_key("chat", {"a": 1, "b": [1, 2]}) == job_key("chat", {"b": [1, 2], "a": 1})
+    assert job_key("chat", "x") != job_key("parse", "x")
+
+    print("\nPASS: Dedupe and progress")
+    return True
+
+
+def test_errors_and_pruning():
+    """Test that failed jobs record the error and are replaced on resubmission; old jobs are pruned."""
+    print("\n" + "=" * 60)
+    print("TEST: Errors and pruning")
+    print("=" * 60)
+
+    queue = JobQueue(workers=1)
+    attempts = []
+
+    def flaky(job):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return "ok"
+
+    saved = jobs.MAX_FINISHED_JOBS
+    jobs.MAX_FINISHED_JOBS = 3
+    try:
+        failed = queue.submit("chat", flaky, key="q")
+        _wait(failed)
+        assert failed.status == "error" and "ValueError: boom" in failed.error
+        retried = queue.submit("chat", flaky, key="q")
+        assert retried is not failed
+        _wait(retried)
+        assert retried.result == "ok"
+
+        for i in range(6):
+            _wait(queue.submit("n", lambda job, i: i, i))
+        queue.submit("n", lambda job, i: i, 99)
+        kept = queue.jobs("n")
+        assert len(queue.jobs()) <= 4 and kept[-1].kind == "n"
+        print(f"  {len(queue.jobs())} jobs kept after pruning")
+
+        queue.forget(retried.id)
+        assert queue.get(retried.id) is None
+    finally:
+        jobs.MAX_FINISHED_JOBS = saved
+        queue.shutdown()
+
+    print("\nPASS: Errors and pruning")
+    return True
+
+
+def run_all_tests():
+    """Run all job queue tests."""
+    print("\n" + "=" * 60)
+    print("JOB QUEUE TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("dedupe_and_progress", test_dedupe_and_progress),
+        ("errors_and_pruning", test_errors_and_pruning),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
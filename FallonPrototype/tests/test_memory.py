@@ -0,0 +1,275 @@
+"""
+Tests for the SQLite-backed memory store.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared import memory
+from FallonPrototype.tests.test_pro_forma_generator import SAMPLE_PRO_FORMA
+
+
+_STORE_GLOBALS = ("MEMORY_DIR", "MEMORY_DB", "MEMORY_FILE", "INSIGHTS_FILE", "_embed_fn", "_embed_unavailable")
+
+
+def _use_tmp_store(tmp: str, legacy: dict | None = None):
+    """
+    Point the memory module at a scratch directory.
+
+    Returns:
+        restore() — puts the previous paths and embedder back and closes this
+        thread's connection to the scratch database. Call it in a finally block.
+    """
+    saved = {name: getattr(memory, name) for name in _STORE_GLOBALS}
+
+    def restore():
+        path = str(memory.MEMORY_DB)
+        conn = getattr(memory._local, "conns", {}).pop(path, None)
+        if conn is not None:
+            conn.close()
+        with memory._index_lock:
+            memory._query_indexes.pop(path, None)
+        for name, value in saved.items():
+            setattr(memory, name, value)
+
+    memory.MEMORY_DIR = Path(tmp)
+    memory.MEMORY_DB = Path(tmp) / "user_memory.db"
+    memory.MEMORY_FILE = Path(tmp) / "user_memory.json"
+    memory.INSIGHTS_FILE = Path(tmp) / "learned_insights.json"
+    if legacy is not None:
+        memory.MEMORY_FILE.write_text(json.dumps(legacy))
+    return restore
+
+
+def _trigram_embed(texts):
+    """Deterministic stand-in for MiniLM: hashed character trigrams."""
+    out = np.zeros((len(texts), 256), dtype=np.float32)
+    for row, text in enumerate(texts):
+        t = f"  {text.lower()}  "
+        for i in range(len(t) - 2):
+            out[row, zlib.crc32(t[i:i + 3].encode()) % 256] += 1
+    return out
+
+
+def test_json_migration():
+    """Test that a legacy user_memory.json is imported on first use."""
+    print("\n" + "=" * 60)
+    print("TEST: JSON -> SQLite migration")
+    print("=" * 60)
+
+    legacy = {
+        "interactions": [
+            {"timestamp": "2026-01-01T00:00:00", "query": "charlotte multifamily 200 units", "intent": "generate",
+             "response_type": "model", "parameters": {}, "sources_used": [], "success": True,
+             "metrics": {"irr": 16.0, "multiple": 1.9, "exit_cap": 5.25, "total_cost": 70e6},
+             "deal_name": "Charlotte MF", "market": "charlotte", "program_type": "multifamily"},
+            {"timestamp": "2026-01-02T00:00:00", "query": "what is a cap rate", "intent": "chat",
+             "response_type": "text", "parameters": {}, "sources_used": [], "success": True},
+        ],
+        "preferences": {"markets": {"charlotte": 4, "Boston": 1}, "program_types": {"multifamily": 3},
+                        "typical_deal_size": 71e6, "target_irr_range": [12.8, 19.2], "preferred_exit_cap": None},
+        "corrections": [{"timestamp": "2026-01-03T00:00:00", "parameter": "exit_cap_rate_pct", "original": 5.25,
+                         "adjusted": 5.5, "delta": 0.25, "context": {}}],
+        "successful_queries": [],
+        "learned_defaults": {"general_general_exit_cap_rate_pct": {"deltas": [0.25, 0.5], "avg_adjustment": 0.375}},
+        "feedback_scores": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _use_tmp_store(tmp, legacy)
+        try:
+            ctx = memory.get_user_context()
+            print(f"  Context: {ctx}")
+            assert ctx["interaction_count"] == 2
+            assert ctx["preferred_markets"][0] == ("charlotte", 4), "Legacy preference counts should carry over"
+            assert ctx["typical_deal_size"] == 70e6
+            assert ctx["target_irr_range"] == [12.8, 19.2], "Legacy IRR range used until 3 IRRs are seen"
+            assert memory.get_learned_adjustment("exit_cap_rate_pct") == 0.375
+            assert memory.get_recent_pro_formas()[0]["deal_name"] == "Charlotte MF"
+            assert memory.get_similar_past_queries("charlotte deal")[0]["query"] == "charlotte multifamily 200 units"
+
+            # Migration runs once — a second connection doesn't duplicate rows
+            memory._local.conns.clear()
+            assert memory.get_user_context()["interaction_count"] == 2
+        finally:
+            restore()
+
+    print("\nPASS: Legacy JSON migrated")
+    return True
+
+
+def test_incremental_aggregates():
+    """Test that preferences and learned adjustments update per write."""
+    print("\n" + "=" * 60)
+    print("TEST: Incremental aggregates")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _use_tmp_store(tmp)
+        try:
+            for _ in range(3):
+                memory.record_interaction("charlotte deal", "generate", "model", pro_forma=SAMPLE_PRO_FORMA)
+            ctx = memory.get_user_context()
+            assert ctx["preferred_markets"] == [("charlotte", 3)]
+            assert ctx["typical_deal_size"] == SAMPLE_PRO_FORMA["cost_assumptions"]["total_project_cost"]["value"]
+
+            # Learned adjustment is the mean of the last LEARNED_DELTA_WINDOW deltas
+            for i in range(memory.LEARNED_DELTA_WINDOW + 5):
+                memory.record_adjustment("rent_psf_monthly", 2.0, 2.0 + i / 100, {"market": "charlotte"})
+            expected = sum(range(5, memory.LEARNED_DELTA_WINDOW + 5)) / 100 / memory.LEARNED_DELTA_WINDOW
+            learned = memory.get_learned_adjustment("rent_psf_monthly", market="charlotte")
+            assert abs(learned - expected) < 1e-9, f"{learned} != {expected}"
+            assert memory.get_learned_adjustment("rent_psf_monthly", market="boston") is None
+            print(f"  Learned rent adjustment: {learned:+.4f}")
+
+            # Retention caps the log without touching the aggregates
+            memory.INTERACTION_LIMIT = 5
+            try:
+                for _ in range(10):
+                    memory.record_interaction("chat", "chat", "text")
+            finally:
+                memory.INTERACTION_LIMIT = 500
+            assert memory.get_user_context()["interaction_count"] == 5
+            insights = memory.analyze_and_learn()
+            assert insights["total_interactions"] == 13
+            assert json.loads(memory.INSIGHTS_FILE.read_text())["total_interactions"] == 13
+            print(f"  Insights: {insights['patterns']['intent_distribution']}")
+        finally:
+            restore()
+
+    print("\nPASS: Aggregates maintained incrementally")
+    return True
+
+
+def test_concurrent_writers():
+    """Test that concurrent sessions don't lose writes."""
+    print("\n" + "=" * 60)
+    print("TEST: Concurrent writers")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _use_tmp_store(tmp)
+        try:
+            threads, per_thread = 8, 25
+
+            def worker(n):
+                for i in range(per_thread):
+                    memory.record_interaction(f"session {n} query {i}", "chat", "text")
+                    memory.record_adjustment("exit_cap_rate_pct", 5.0, 5.25)
+
+            start = time.perf_counter()
+            pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+            for t in pool:
+                t.start()
+            for t in pool:
+                t.join()
+            elapsed = time.perf_counter() - start
+
+            writes = threads * per_thread
+            assert memory.get_user_context()["interaction_count"] == writes
+            assert memory.get_learned_adjustment("exit_cap_rate_pct") == 0.25
+            print(f"  {writes * 2} writes from {threads} threads in {elapsed * 1000:.0f}ms")
+        finally:
+            restore()
+
+    print("\nPASS: No lost writes under concurrency")
+    return True
+
+
+def test_similar_query_recall():
+    """Test embedding recall: matrix top-k, threshold, incremental refresh, backfill."""
+    print("\n" + "=" * 60)
+    print("TEST: Embedding-based similar-query recall")
+    print("=" * 60)
+
+    legacy = {"interactions": [{"timestamp": "2026-01-01T00:00:00", "query": "nashville office tower returns",
+                                "intent": "generate", "response_type": "model", "success": True}]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        restore = _use_tmp_store(tmp, legacy)
+        memory._embed_fn = _trigram_embed
+        try:
+            for q in ["charlotte multifamily 200 units", "what is the exit cap in boston",
+                      "boston lab building 150k sf", "explain the jv waterfall"]:
+                memory.record_interaction(q, "chat", "text")
+            memory.record_interaction("failed query about charlotte multifamily", "chat", "text", success=False)
+
+            hits = memory.get_similar_past_queries("charlotte multifamily 250 units", limit=2)
+            print(f"  Hits: {[(h['query'], round(h['similarity'], 2)) for h in hits]}")
+            assert hits[0]["query"] == "charlotte multifamily 200 units"
+            assert all(h["query"] != "failed query about charlotte multifamily" for h in hits)
+            assert all(h["similarity"] >= memory.SIMILARITY_THRESHOLD for h in hits)
+
+            # Legacy JSON query was backfilled into the index
+            assert memory.get_similar_past_queries("nashville office tower")[0]["query"] == "nashville office tower returns"
+
+            # New writes are picked up incrementally
+            memory.record_interaction("denver hotel 180 keys", "chat", "text")
+            assert memory.get_similar_past_queries("denver hotel keys")[0]["query"] == "denver hotel 180 keys"
+            index = memory._query_indexes[str(memory.MEMORY_DB)]
+            assert index.size - index.start == 6
+
+            assert memory.get_similar_past_queries("zzzz qqqq") == [], "Unrelated query should clear no threshold"
+
+            start = time.perf_counter()
+            for _ in range(100):
+                memory.get_similar_past_queries("boston exit cap")
+            print(f"  Lookup: {(time.perf_counter() - start) * 10:.2f}ms avg")
+        finally:
+            restore()
+
+    print("\nPASS: Similar-query recall uses the embedding index")
+    return True
+
+
+def run_all_tests():
+    """Run all memory store tests."""
+    print("\n" + "=" * 60)
+    print("MEMORY STORE TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("json_migration", test_json_migration),
+        ("incremental_aggregates", test_incremental_aggregates),
+        ("concurrent_writers", test_concurrent_writers),
+        ("similar_query_recall", test_similar_query_recall),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,108 @@
+"""
+Tests for page-parallel PDF OCR.
+"""
+
+import sys
+import os
+import io
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pypdf import PdfWriter
+
+from FallonPrototype.shared import ocr
+
+
+def _blank_pdf(pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(612, 792)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def _fake_ocr_page(path, page, dpi):
+    if page == 3:
+        raise RuntimeError("unreadable page")
+    return f"page {page} at {dpi} dpi"
+
+
+def test_ocr_pdf_parallel_and_cached():
+    """Test page order, page limits, progress callbacks and the per-page cache."""
+    print("\n" + "=" * 60)
+    print("TEST: ocr_pdf()")
+    print("=" * 60)
+
+    if multiprocessing.get_start_method() != "fork":
+        print("  Skipped: worker stub needs fork start method")
+        return True
+
+    original = ocr._ocr_page
+    ocr._ocr_page = _fake_ocr_page
+    ocr.clear_cache()
+    try:
+        raw = _blank_pdf(8)
+        progress = []
+        text = ocr.ocr_pdf(raw, dpi=150, max_pages=6, progress=lambda done, total: progress.append((done, total)))
+        lines = text.splitlines()
+        assert lines[:2] == ["page 1 at 150 dpi", "page 2 at 150 dpi"]
+        assert "page 3" not in text and "page 6 at 150 dpi" in text
+        assert "first 6 of 8 pages" in lines[-1]
+        assert progress[-1] == (6, 6) and len(progress) == 6
+        print(f"  {len(progress)} progress callbacks, failed page skipped")
+
+        # Cached pages skip the pool; only the failed page is retried
+        assert len(ocr._page_cache) == 5
+        ocr._ocr_page = original  # would fail without pdf2image/poppler
+        progress.clear()
+        ocr.ocr_pdf(raw, dpi=150, max_pages=5, progress=lambda done, total: progress.append((done, total)))
+        assert progress[0] == (4, 5) and progress[-1] == (5, 5)
+        print("  Rerun served from the per-page cache")
+    finally:
+        ocr._ocr_page = original
+        ocr.clear_cache()
+
+    print("\nPASS: Page-parallel OCR")
+    return True
+
+
+def run_all_tests():
+    """Run all OCR tests."""
+    print("\n" + "=" * 60)
+    print("OCR TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("ocr_pdf_parallel_and_cached", test_ocr_pdf_parallel_and_cached),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,165 @@
+"""
+Tests for parent-child retrieval over contract chunks.
+"""
+
+import sys
+import os
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import chromadb
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+from FallonPrototype.shared import vector_store
+from FallonPrototype.shared.contract_chunker import chunk_contract, child_chunks, CHILD_MAX_CHARS
+from FallonPrototype.tests.test_contract_chunker import SAMPLE
+
+
+class _WordHashEmbedding(EmbeddingFunction):
+    """Deterministic bag-of-words embedding, so tests need no model download."""
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        out = []
+        for text in input:
+            v = np.zeros(384, dtype=np.float32)
+            for word in text.lower().replace(".", " ").replace(",", " ").split():
+                v[zlib.crc32(word.encode()) % 384] += 1
+            out.append(v / (np.linalg.norm(v) or 1.0))
+        return out
+
+    @staticmethod
+    def name():
+        return "word-hash-test"
+
+
+def _index_sample(stem="jv"):
+    """Index SAMPLE the way ingest_contracts does, into throwaway collections."""
+    chunks = chunk_contract(SAMPLE)
+    parents = ([c.text for c in chunks],
+               [{"source": f"{stem}.txt", "doc_type": "contract", "chunk_index": c.index,
+                 "char_offset": c.offset, "section_path": c.section_path, "article": c.article} for c in chunks],
+               [f"contract_{stem}_{c.index:03d}" for c in chunks])
+    texts, metas, ids = [], [], []
+    for c in chunks:
+        children = child_chunks(c)
+        for j, (offset, text) in enumerate(children):
+            texts.append(text)
+            metas.append({"source": f"{stem}.txt", "doc_type": "contract_clause",
+                          "parent_series": f"contract_{stem}_", "parent_index": c.index,
+                          "child_index": j, "child_count": len(children), "char_offset": offset})
+            ids.append(f"clause_{stem}_{c.index:03d}_{j:02d}")
+    vector_store.add_documents("test_parents", *parents)
+    vector_store.add_documents("test_children", texts, metas, ids)
+    return chunks
+
+
+def test_child_chunks():
+    """Test that children tile their parent without overlap."""
+    print("\n" + "=" * 60)
+    print("TEST: child_chunks()")
+    print("=" * 60)
+
+    for chunk in chunk_contract(SAMPLE):
+        children = child_chunks(chunk)
+        assert all(len(text) <= CHILD_MAX_CHARS or len(children) == 1 for _, text in children)
+        end = chunk.offset
+        for offset, text in children:
+            assert SAMPLE[offset:offset + len(text)] == text
+            assert offset >= end
+            end = offset + len(text)
+        print(f"  {chunk.section_path:40s} {len(chunk.text):5d} chars -> {len(children)} children")
+
+    print("\nPASS: Children tile parents")
+    return True
+
+
+def test_query_parent_child():
+    """Test child matching, batched parent fetch, neighbor merge and dedup."""
+    print("\n" + "=" * 60)
+    print("TEST: query_parent_child()")
+    print("=" * 60)
+
+    saved = vector_store._client, vector_store._embedding_fn
+    vector_store._client = chromadb.EphemeralClient()
+    vector_store._embedding_fn = _WordHashEmbedding()
+    calls = []
+    original_get = vector_store.get_documents
+
+    def counting_get(name, ids):
+        calls.append(list(ids))
+        return original_get(name, ids)
+
+    vector_store.get_documents = counting_get
+    try:
+        chunks = _index_sample()
+        results = vector_store.query_parent_child(
+            "test_children", "test_parents", "Catch-Up GP receives 100% until 20%", n_results=3,
+        )
+        assert len(calls) == 1, "parents must be fetched in one batch"
+        assert results and "4.3 Catch-Up" in results[0]["text"]
+
+        # Passages never repeat text
+        texts = [p["text"] for p in results]
+        for i, a in enumerate(texts):
+            for b in texts[i + 1:]:
+                assert a[:200] not in b
+        indices = [int(i) for p in results for i in p["metadata"]["chunk_indices"].split(",")]
+        assert len(indices) == len(set(indices))
+
+        # Neighbors stay within the matched article
+        for p in results:
+            articles = {chunks[int(i)].article for i in p["metadata"]["chunk_indices"].split(",")}
+            assert len(articles) == 1
+            print(f"  {p['distance']:.3f}  {p['metadata']['section_path']}  chunks {p['metadata']['chunk_indices']}")
+    finally:
+        vector_store.get_documents = original_get
+        vector_store._client, vector_store._embedding_fn = saved
+
+    print("\nPASS: Parent-child retrieval")
+    return True
+
+
+def run_all_tests():
+    """Run all parent-child retrieval tests."""
+    print("\n" + "=" * 60)
+    print("PARENT-CHILD RETRIEVAL TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("child_chunks", test_child_chunks),
+        ("query_parent_child", test_query_parent_child),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,217 @@
+"""
+Tests for ProFormaFrame — the array-backed pro forma representation.
+"""
+
+import sys
+import os
+import copy
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+from FallonPrototype.shared.pro_forma_frame import ProFormaFrame, FIELDS
+from FallonPrototype.shared.return_calculator import compute_returns, compute_returns_batch, compute_sensitivity_table
+from FallonPrototype.tests.test_pro_forma_generator import SAMPLE_PRO_FORMA
+
+
+def test_round_trip_lossless():
+    """Test that dict -> frame -> dict reproduces the pro forma exactly."""
+    print("\n" + "=" * 60)
+    print("TEST: ProFormaFrame round trip")
+    print("=" * 60)
+
+    odd = copy.deepcopy(SAMPLE_PRO_FORMA)
+    odd["cost_assumptions"]["hard_cost_psf"] = 275                       # bare int
+    odd["cost_assumptions"]["land_cost_per_acre"] = {"value": 1.5e6}      # non-schema field
+    odd["return_metrics"]["exit_cap_rate_pct"]["note"] = "broker quote"   # extra key
+    odd["revenue_assumptions"]["lease_up_months"]["value"] = None         # null
+    odd["warnings"] = ["check rents"]                                     # non-dict section
+
+    for name, pf in [("sample", SAMPLE_PRO_FORMA), ("edge cases", odd)]:
+        frame = ProFormaFrame.from_dict(pf)
+        back = frame.to_dict()
+        assert back == pf, f"{name}: round trip changed the pro forma"
+        assert json.dumps(back) == json.dumps(pf), f"{name}: key order or int/float changed"
+        print(f"  - {name}: lossless ({frame.values.nbytes} bytes of values)")
+
+    frame = ProFormaFrame.from_dict(odd)
+    assert frame.get("cost_assumptions", "hard_cost_psf") == 275.0
+    assert frame.get("cost_assumptions", "land_cost_per_acre") == 1.5e6
+    assert frame.get("revenue_assumptions", "lease_up_months", 18) == 18
+    assert frame.raw("project_summary", "deal_name") == SAMPLE_PRO_FORMA["project_summary"]["deal_name"]
+
+    print("\nPASS: Round trip is lossless")
+    return True
+
+
+def test_copy_is_independent():
+    """Test that scenario copies share metadata but not values."""
+    print("\n" + "=" * 60)
+    print("TEST: ProFormaFrame copies")
+    print("=" * 60)
+
+    base = ProFormaFrame.from_dict(SAMPLE_PRO_FORMA)
+    scenario = base.copy()
+    scenario.set("cost_assumptions", "hard_cost_psf", 300.0)
+    scenario.set("return_metrics", "exit_cap_rate_pct", 5.5, label="confirmed", source="user-provided")
+
+    assert base.get("cost_assumptions", "hard_cost_psf") == 275.0
+    assert base.to_dict() == SAMPLE_PRO_FORMA, "Base frame must not change"
+
+    out = scenario.to_dict()
+    assert out["cost_assumptions"]["hard_cost_psf"]["value"] == 300
+    assert out["return_metrics"]["exit_cap_rate_pct"]["label"] == "confirmed"
+    assert scenario.units is base.units, "Unchanged side tables should be shared"
+    print(f"  {len(FIELDS)} columns, copy = {scenario.values.nbytes} bytes")
+
+    print("\nPASS: Copies are independent")
+    return True
+
+
+def test_stacked_frame_matches_scalar():
+    """Test that a stacked frame scores each row like compute_returns()."""
+    print("\n" + "=" * 60)
+    print("TEST: Stacked frame vs compute_returns()")
+    print("=" * 60)
+
+    base = ProFormaFrame.from_dict(SAMPLE_PRO_FORMA)
+    stack = base.tile(4)
+    stack.column("return_metrics", "exit_cap_rate_pct")[:] = [4.5, 5.0, 5.5, 6.0]
+    stack.column("financing_assumptions", "equity_required")[1] *= 1.2
+    stack.column("return_metrics", "stabilized_noi")[3] = np.nan
+
+    batch = compute_returns_batch(stack)
+    for i in range(4):
+        scalar = compute_returns(stack.row(i).to_dict())
+        for key, value in scalar.items():
+            if value is None:
+                assert np.isnan(batch[key][i]), f"row {i} {key}: expected NaN"
+            else:
+                assert abs(batch[key][i] - value) < 1e-9 * max(1, abs(value)), f"row {i} {key} mismatch"
+        print(f"  - row {i}: IRR {scalar['calc_irr_approx_pct']:.2f}%")
+
+    print("\nPASS: Stacked frame matches scalar calculator")
+    return True
+
+
+def test_reordered_fields_stay_columnar():
+    """Test that field dicts with reordered or extra keys still get columns."""
+    print("\n" + "=" * 60)
+    print("TEST: Reordered / extra-key fields")
+    print("=" * 60)
+
+    odd = copy.deepcopy(SAMPLE_PRO_FORMA)
+    for section in odd.values():
+        if not isinstance(section, dict):
+            continue
+        for key, field in list(section.items()):
+            if isinstance(field, dict) and "value" in field:
+                section[key] = {"note": "from broker", **dict(reversed(list(field.items())))}
+
+    frame = ProFormaFrame.from_dict(odd)
+    assert frame.has("cost_assumptions", "hard_cost_total") and frame.has("return_metrics", "exit_cap_rate_pct")
+    assert json.dumps(frame.to_dict()) == json.dumps(odd), "Key order and extra keys must round-trip"
+
+    scenario = frame.copy()
+    scenario.set("return_metrics", "exit_cap_rate_pct", 5.5, label="confirmed")
+    field = scenario.to_dict()["return_metrics"]["exit_cap_rate_pct"]
+    assert list(field) == list(odd["return_metrics"]["exit_cap_rate_pct"])
+    assert field["value"] == 5.5 and field["label"] == "confirmed" and field["note"] == "from broker"
+
+    expected = compute_sensitivity_table(SAMPLE_PRO_FORMA)
+    table = compute_sensitivity_table(odd)
+    print(f"  IRR grid: {table['values']}")
+    assert table["values"] == expected["values"], "Sensitivity grid must not depend on key order"
+
+    # Writes to a field without a column raise instead of vanishing
+    text = copy.deepcopy(SAMPLE_PRO_FORMA)
+    text["cost_assumptions"]["hard_cost_total"] = {"value": "49.5M", "unit": "$"}
+    try:
+        ProFormaFrame.from_dict(text).column("cost_assumptions", "hard_cost_total")
+        assert False, "column() on a non-column field should raise"
+    except ValueError:
+        pass
+
+    print("\nPASS: Reordered fields stay columnar")
+    return True
+
+
+def test_numeric_strings_stay_columnar():
+    """Test that numeric-string and null fields get columns, so scenarios flex them."""
+    print("\n" + "=" * 60)
+    print("TEST: Numeric-string fields")
+    print("=" * 60)
+
+    text = copy.deepcopy(SAMPLE_PRO_FORMA)
+    text["return_metrics"]["exit_cap_rate_pct"]["value"] = "5.0"
+    text["cost_assumptions"]["total_project_cost"]["value"] = str(SAMPLE_PRO_FORMA["cost_assumptions"]["total_project_cost"]["value"])
+    text["cost_assumptions"]["hard_cost_psf"] = str(SAMPLE_PRO_FORMA["cost_assumptions"]["hard_cost_psf"]["value"])
+    text["financing_assumptions"]["lp_equity_amount"] = None
+    numeric = copy.deepcopy(SAMPLE_PRO_FORMA)
+    numeric["return_metrics"]["exit_cap_rate_pct"]["value"] = 5.0
+    numeric["cost_assumptions"]["hard_cost_psf"] = SAMPLE_PRO_FORMA["cost_assumptions"]["hard_cost_psf"]["value"]
+    numeric["financing_assumptions"]["lp_equity_amount"] = None
+
+    frame = ProFormaFrame.from_dict(text)
+    for section, key in [("return_metrics", "exit_cap_rate_pct"), ("cost_assumptions", "total_project_cost"),
+                         ("cost_assumptions", "hard_cost_psf"), ("financing_assumptions", "lp_equity_amount")]:
+        assert frame.has(section, key), f"{section}.{key} should have a column"
+    assert json.dumps(frame.to_dict()) == json.dumps(text), "Unchanged strings must round-trip as written"
+
+    scenario = frame.copy()
+    scenario.set("return_metrics", "exit_cap_rate_pct", 5.5)
+    assert scenario.to_dict()["return_metrics"]["exit_cap_rate_pct"]["value"] == 5.5
+
+    table = compute_sensitivity_table(text)
+    print(f"  IRR grid: {table['values']}")
+    assert table["values"] == compute_sensitivity_table(numeric)["values"]
+    assert len({tuple(row) for row in table["values"]}) == len(table["values"]), "Each cap rate row must differ"
+
+    print("\nPASS: Numeric strings stay columnar")
+    return True
+
+
+def run_all_tests():
+    """Run all ProFormaFrame tests."""
+    print("\n" + "=" * 60)
+    print("PRO FORMA FRAME TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("round_trip_lossless", test_round_trip_lossless),
+        ("copy_is_independent", test_copy_is_independent),
+        ("stacked_frame_matches_scalar", test_stacked_frame_matches_scalar),
+        ("reordered_fields_stay_columnar", test_reordered_fields_stay_columnar),
+        ("numeric_strings_stay_columnar", test_numeric_strings_stay_columnar),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
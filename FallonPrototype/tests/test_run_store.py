@@ -0,0 +1,138 @@
+"""
+Tests for the Parquet run store.
+"""
+
+import sys
+import os
+import copy
+import dataclasses
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+import pyarrow.dataset as ds
+
+from FallonPrototype.shared.run_store import (
+    PARAM_FIELDS, RUN_SCHEMA, runs_to_table, append_runs, open_runs, compact_runs, _float_column,
+)
+from FallonPrototype.shared.return_calculator import compute_returns
+from FallonPrototype.agents.financial_agent import ProjectParameters, params_to_dict
+from FallonPrototype.tests.test_pro_forma_generator import SAMPLE_PRO_FORMA
+
+
+def _run(market="charlotte", program="multifamily", units=200):
+    pf = copy.deepcopy(SAMPLE_PRO_FORMA)
+    pf["project_summary"]["market"] = market
+    pf["project_summary"]["program_type"] = program
+    pf["project_summary"]["unit_count"]["value"] = units
+    params = ProjectParameters(market=market, program_type=program, unit_count=units,
+                               mixed_use_components=["retail"])
+    return {"pro_forma": pf, "calc_results": compute_returns(pf), "params": params_to_dict(params), "warnings": []}
+
+
+def test_flatten_runs():
+    """Test that runs flatten into RUN_SCHEMA with nulls and zero-copy columns."""
+    print("\n" + "=" * 60)
+    print("TEST: runs_to_table()")
+    print("=" * 60)
+
+    # Param columns track the ProjectParameters dataclass
+    assert [name for name, _ in PARAM_FIELDS] == [f.name for f in dataclasses.fields(ProjectParameters)]
+
+    table = runs_to_table([_run(units=200), _run(units=240)])
+    assert table.schema == RUN_SCHEMA
+    assert table.num_rows == 2
+    assert table.column("project_summary.unit_count").to_pylist() == [200.0, 240.0]
+    assert table.column("revenue_assumptions.adr").null_count == 2
+    assert table.column("params.unit_count").to_pylist() == [200, 240]
+    assert table.column("params.mixed_use_components")[0].as_py() == ["retail"]
+    assert abs(table.column("calc_irr_approx_pct")[0].as_py() - _run()["calc_results"]["calc_irr_approx_pct"]) < 1e-12
+    print(f"  {table.num_columns} columns, {table.num_rows} rows")
+
+    # Float columns share the NumPy buffer
+    values = np.array([1.0, np.nan, 3.0])
+    col = _float_column(values)
+    assert col.buffers()[1].address == values.ctypes.data
+    assert col.to_pylist() == [1.0, None, 3.0]
+    print("  Float columns wrap NumPy memory (NaN -> null)")
+
+    print("\nPASS: Runs flatten to Arrow")
+    return True
+
+
+def test_partitioned_dataset():
+    """Test appending, partition-pruned scans and compaction."""
+    print("\n" + "=" * 60)
+    print("TEST: append_runs() / open_runs() / compact_runs()")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        day1 = datetime(2026, 9, 30, 12, tzinfo=timezone.utc)
+        day2 = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+        assert append_runs([_run("charlotte"), _run("boston", "office")], tmp, generated_at=day1) == 2
+        append_runs([_run("charlotte")], tmp, generated_at=day2)
+        append_runs([_run("charlotte", units=300)], tmp, generated_at=day2)
+
+        leaf = Path(tmp) / "market=charlotte" / "program=multifamily" / "date=2026-10-01"
+        assert len(list(leaf.glob("*.parquet"))) == 2
+
+        runs = open_runs(tmp)
+        charlotte = runs.to_table(
+            columns=["project_summary.unit_count", "date"],
+            filter=(ds.field("market") == "charlotte") & (ds.field("date") >= "2026-10-01"),
+        )
+        assert sorted(charlotte.column("project_summary.unit_count").to_pylist()) == [200.0, 300.0]
+        assert runs.count_rows() == 4
+        print(f"  4 runs in {len(list(Path(tmp).glob('**/*.parquet')))} files; filtered scan -> {charlotte.num_rows} rows")
+
+        assert compact_runs(tmp) == 1
+        assert len(list(leaf.glob("*.parquet"))) == 1
+        assert open_runs(tmp).count_rows() == 4
+        print("  Compaction merged per-run files without losing rows")
+
+    print("\nPASS: Partitioned dataset round-trips")
+    return True
+
+
+def run_all_tests():
+    """Run all run store tests."""
+    print("\n" + "=" * 60)
+    print("RUN STORE TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("flatten_runs", test_flatten_runs),
+        ("partitioned_dataset", test_partitioned_dataset),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,127 @@
+"""
+Tests for page-level text streaming and lazy chunking.
+"""
+
+import sys
+import os
+import io
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared.text_stream import (
+    Page, iter_text_pages, iter_chunks, join_pages, PAGE_SEPARATOR,
+)
+
+
+def _pages(count=300, seed=1):
+    rng = random.Random(seed)
+    words = ["the", "Borrower", "shall", "pay", "Section", "4.2", "Lender", "notice", "within", "days"]
+    texts = [
+        "\n\n".join(" ".join(rng.choice(words) for _ in range(rng.randint(20, 200)))
+                     for _ in range(rng.randint(1, 12)))
+        for _ in range(count)
+    ]
+    pages, offset = [], 0
+    for number, text in enumerate(texts, 1):
+        pages.append(Page(number, offset, text))
+        offset += len(text) + len(PAGE_SEPARATOR)
+    return pages
+
+
+def test_page_stream_offsets():
+    """Test that page offsets index into the joined document."""
+    print("\n" + "=" * 60)
+    print("TEST: Page stream offsets")
+    print("=" * 60)
+
+    pages = _pages()
+    doc = join_pages(pages)
+    assert all(doc[p.offset:p.offset + len(p.text)] == p.text for p in pages)
+
+    # Plain text is streamed in line-aligned blocks that join back losslessly
+    blocks = list(iter_text_pages(io.StringIO(doc)))
+    assert len(blocks) > 1
+    assert join_pages(blocks) == doc
+    assert all(doc[b.offset:b.offset + len(b.text)] == b.text for b in blocks)
+    print(f"  {len(doc):,} chars -> {len(blocks)} text blocks, offsets exact")
+
+    print("\nPASS: Page offsets")
+    return True
+
+
+def test_lazy_chunking():
+    """Test that lazily produced chunks cover the document with exact offsets and pages."""
+    print("\n" + "=" * 60)
+    print("TEST: iter_chunks()")
+    print("=" * 60)
+
+    pages = _pages()
+    doc = join_pages(pages)
+
+    # Chunks are produced before the page stream is exhausted
+    consumed = []
+
+    def tracked():
+        for p in pages:
+            consumed.append(p.number)
+            yield p
+
+    stream = iter_chunks(tracked())
+    next(stream)
+    assert len(consumed) < len(pages) // 10
+    print(f"  First chunk after reading {len(consumed)} of {len(pages)} pages")
+
+    chunks = list(iter_chunks(iter(pages)))
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    covered = bytearray(len(doc))
+    for c in chunks:
+        assert doc[c.offset:c.offset + len(c.text)] == c.text
+        assert c.page == max(p.number for p in pages if p.offset <= c.offset)
+        covered[c.offset:c.offset + len(c.text)] = b"\x01" * len(c.text)
+    assert all(covered[i] or doc[i].isspace() for i in range(len(doc)))
+    print(f"  {len(chunks)} chunks, offsets and pages exact, no text dropped")
+
+    print("\nPASS: Lazy chunking")
+    return True
+
+
+def run_all_tests():
+    """Run all text stream tests."""
+    print("\n" + "=" * 60)
+    print("TEXT STREAM TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("page_stream_offsets", test_page_stream_offsets),
+        ("lazy_chunking", test_lazy_chunking),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,138 @@
+"""
+Tests for per-call-site token accounting in claude_client.
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared import claude_client
+from FallonPrototype.shared.claude_client import (
+    call_claude,
+    get_usage_by_site,
+    get_session_usage,
+    reset_session_usage,
+)
+
+
+class _FakeCompletions:
+    """Stands in for the OpenAI client; usage=None exercises the estimate path."""
+
+    def __init__(self, text, usage):
+        self.text = text
+        self.usage = usage
+
+    def create(self, **kwargs):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.text))],
+            usage=self.usage,
+        )
+
+
+def _with_fake_client(text, usage):
+    saved = claude_client._client
+    claude_client._client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions(text, usage)))
+    return saved
+
+
+def test_usage_by_site():
+    """Test that calls are attributed to their site with histograms."""
+    print("\n" + "=" * 60)
+    print("TEST: Usage by site")
+    print("=" * 60)
+
+    reset_session_usage()
+    saved = _with_fake_client("ok", SimpleNamespace(prompt_tokens=1200, completion_tokens=300))
+    try:
+        call_claude("sys", "q1", site="generation")
+        call_claude("sys", "q2", site="generation")
+        call_claude("sys", "q3", site="chat", prompt_parts={"history": 400, "documents": 2000})
+    finally:
+        claude_client._client = saved
+
+    usage = get_usage_by_site()
+    print(f"  sites: {list(usage)}")
+    assert set(usage) == {"generation", "chat"}
+    gen = usage["generation"]
+    assert gen["calls"] == 2
+    assert gen["input_tokens"] == 2400 and gen["output_tokens"] == 600
+    assert gen["avg_input_tokens"] == 1200 and gen["max_input_tokens"] == 1200
+    assert gen["prompt_hist"]["≤2,000"] == 2
+    assert sum(gen["prompt_hist"].values()) == 2
+    assert sum(gen["tokens_per_s_hist"].values()) == 2
+    assert list(usage) == ["generation", "chat"]          # largest input first
+    assert usage["chat"]["avg_prompt_part_chars"] == {"history": 400, "documents": 2000}
+    assert get_session_usage()["input_tokens"] == 3600
+
+    reset_session_usage()
+    assert get_usage_by_site() == {}
+
+    print("\nPASS: Usage by site")
+    return True
+
+
+def test_estimated_usage():
+    """Test the 4-characters-per-token fallback when the API reports no usage."""
+    print("\n" + "=" * 60)
+    print("TEST: Estimated usage")
+    print("=" * 60)
+
+    reset_session_usage()
+    saved = _with_fake_client("x" * 400, None)
+    try:
+        call_claude("s" * 4000, "u" * 4000, site="extraction")
+    finally:
+        claude_client._client = saved
+
+    stats = get_usage_by_site()["extraction"]
+    print(f"  estimated: {stats['input_tokens']} in / {stats['output_tokens']} out")
+    assert stats["input_tokens"] == 2000
+    assert stats["output_tokens"] == 100
+    assert stats["prompt_hist"][">32,000"] == 0
+    reset_session_usage()
+
+    print("\nPASS: Estimated usage")
+    return True
+
+
+def run_all_tests():
+    """Run all token usage tests."""
+    print("\n" + "=" * 60)
+    print("TOKEN USAGE TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("usage_by_site", test_usage_by_site),
+        ("estimated_usage", test_estimated_usage),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
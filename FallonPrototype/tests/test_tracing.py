@@ -0,0 +1,148 @@
+"""
+Tests for tracing spans, the ring buffer and the JSONL sink.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared import tracing
+from FallonPrototype.shared.tracing import span, traced, current_span, recent_traces
+
+
+@traced("test.leaf")
+def _leaf(n):
+    current_span().set(n=n)
+    return n * 2
+
+
+def test_nested_spans():
+    """Test nesting, the decorator and waterfall ordering."""
+    print("\n" + "=" * 60)
+    print("TEST: Nested spans")
+    print("=" * 60)
+
+    saved = tracing.TRACE_FILE
+    tracing.TRACE_FILE = ""
+    tracing.clear()
+    try:
+        with span("test.root", query="q") as root:
+            with span("test.child"):
+                assert _leaf(2) == 4
+            _leaf(3)
+        # A span in another thread starts its own trace
+        t = threading.Thread(target=_leaf, args=(5,))
+        t.start()
+        t.join()
+
+        traces = recent_traces(5)
+        assert [t["name"] for t in traces] == ["test.leaf", "test.root"]
+        trace = traces[1]
+        assert trace["trace_id"] == root.trace_id
+        names = [(s["name"], s["depth"]) for s in trace["spans"]]
+        assert names == [("test.root", 0), ("test.child", 1), ("test.leaf", 2), ("test.leaf", 1)]
+        assert trace["spans"][2]["attributes"] == {"n": 2}
+        assert all(s["offset_ms"] >= 0 for s in trace["spans"])
+        assert trace["spans"][0]["duration_ms"] >= trace["spans"][1]["duration_ms"]
+        for s in trace["spans"]:
+            print(f"  {'  ' * s['depth']}{s['name']:<12} +{s['offset_ms']:.3f}ms {s['duration_ms']:.3f}ms")
+    finally:
+        tracing.TRACE_FILE = saved
+        tracing.clear()
+
+    print("\nPASS: Nested spans")
+    return True
+
+
+def test_errors_and_jsonl():
+    """Test error status and that finished traces are written as one batch."""
+    print("\n" + "=" * 60)
+    print("TEST: Errors and JSONL sink")
+    print("=" * 60)
+
+    saved = tracing.TRACE_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        tracing.TRACE_FILE = os.path.join(tmp, "traces.jsonl")
+        tracing.clear()
+        try:
+            try:
+                with span("test.root"):
+                    with span("test.fails"):
+                        raise ValueError("boom")
+            except ValueError:
+                pass
+            with open(tracing.TRACE_FILE, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            assert [r["name"] for r in records] == ["test.fails", "test.root"]
+            assert all(r["status"] == "ERROR" for r in records)
+            assert records[0]["error"] == "ValueError: boom"
+            assert records[0]["parent_span_id"] == records[1]["span_id"]
+            assert len(records[1]["trace_id"]) == 32 and len(records[1]["span_id"]) == 16
+            print(f"  {len(records)} spans written, error recorded")
+
+            # Past the size cap the file rotates to .1 and starts over
+            saved_max = tracing.TRACE_FILE_MAX_BYTES
+            tracing.TRACE_FILE_MAX_BYTES = 1
+            try:
+                with span("test.rotated"):
+                    pass
+            finally:
+                tracing.TRACE_FILE_MAX_BYTES = saved_max
+            with open(tracing.TRACE_FILE + ".1", "r", encoding="utf-8") as f:
+                assert len(f.readlines()) == 2
+            with open(tracing.TRACE_FILE, "r", encoding="utf-8") as f:
+                assert [json.loads(line)["name"] for line in f] == ["test.rotated"]
+
+            # Span outside any trace is a no-op for set()
+            current_span().set(ignored=True)
+        finally:
+            tracing.TRACE_FILE = saved
+            tracing.clear()
+
+    print("\nPASS: Errors and JSONL sink")
+    return True
+
+
+def run_all_tests():
+    """Run all tracing tests."""
+    print("\n" + "=" * 60)
+    print("TRACING TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("nested_spans", test_nested_spans),
+        ("errors_and_jsonl", test_errors_and_jsonl),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
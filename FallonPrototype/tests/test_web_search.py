@@ -0,0 +1,149 @@
+"""
+Tests for the cached, time-boxed web search service (offline stub backend).
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from FallonPrototype.shared import web_search
+from FallonPrototype.shared.web_search import (
+    StubBackend,
+    set_backend,
+    get_backend,
+    search_async,
+    collect,
+    normalize_query,
+    get_search_stats,
+)
+
+HITS = {
+    "cap rate": [{"title": "Cap rates H2", "body": "Multifamily cap rates held at 5.1%.", "href": "https://example.com/cap"}],
+    "": [{"title": "Generic", "body": "Market update.", "href": "https://example.com"}],
+}
+
+
+def test_cache_by_normalized_query_and_market():
+    """Test that reworded queries hit the cache and markets are cached separately."""
+    print("\n" + "=" * 60)
+    print("TEST: Cache key")
+    print("=" * 60)
+
+    saved = get_backend()
+    stub = StubBackend(HITS)
+    set_backend(stub)
+    try:
+        assert normalize_query("Cap rate, Charlotte!") == normalize_query("charlotte  CAP rate")
+
+        first = collect(search_async("Charlotte cap rate trends", market="Charlotte"))
+        assert "5.1%" in first and "URL: https://example.com/cap" in first
+        again = collect(search_async("cap rate trends charlotte?", market="charlotte "))
+        assert again == first
+        assert len(stub.calls) == 1
+        assert stub.calls[0].endswith("Charlotte")        # market appended to the query
+
+        collect(search_async("Charlotte cap rate trends", market="Nashville"))
+        assert len(stub.calls) == 2
+
+        stats = get_search_stats()
+        print(f"  stats: {stats}")
+        assert stats["hits"] == 1 and stats["misses"] == 2 and stats["backend"] == "stub"
+
+        # Expired entries are searched again
+        saved_ttl = web_search.SEARCH_TTL_S
+        web_search.SEARCH_TTL_S = 0
+        try:
+            collect(search_async("office vacancy", market="Boston"))
+            collect(search_async("office vacancy", market="Boston"))
+        finally:
+            web_search.SEARCH_TTL_S = saved_ttl
+        assert len(stub.calls) == 4
+    finally:
+        set_backend(saved)
+
+    print("\nPASS: Cache key")
+    return True
+
+
+def test_timeout_and_coalescing():
+    """Test that a slow search is abandoned at the budget, shared by callers, and cached when it lands."""
+    print("\n" + "=" * 60)
+    print("TEST: Timeout and coalescing")
+    print("=" * 60)
+
+    saved = get_backend()
+    stub = StubBackend(HITS, delay_s=0.5)
+    set_backend(stub)
+    try:
+        start = time.perf_counter()
+        future = search_async("cap rate outlook", market="Boston")
+        joined = search_async("outlook cap rate", market="Boston")
+        assert joined is future
+        assert collect(future, timeout=0.05) == ""
+        waited = time.perf_counter() - start
+        print(f"  returned after {waited * 1000:.0f}ms with a 50ms budget")
+        assert waited < 0.3
+
+        future.result(timeout=2)                            # the search finishes in the background
+        assert "5.1%" in collect(search_async("cap rate outlook", market="Boston"), timeout=0)
+        assert len(stub.calls) == 1
+        assert get_search_stats()["timeouts"] == 1
+
+        # Backend errors return "" and are not cached
+        class Failing:
+            name = "failing"
+
+            def search(self, query, max_results):
+                raise ConnectionError("offline")
+
+        set_backend(Failing())
+        assert collect(search_async("cap rate outlook")) == ""
+        assert get_search_stats()["errors"] == 1 and get_search_stats()["cached"] == 0
+    finally:
+        set_backend(saved)
+
+    print("\nPASS: Timeout and coalescing")
+    return True
+
+
+def run_all_tests():
+    """Run all web search tests."""
+    print("\n" + "=" * 60)
+    print("WEB SEARCH TESTS")
+    print("=" * 60)
+
+    tests = [
+        ("cache_by_normalized_query_and_market", test_cache_by_normalized_query_and_market),
+        ("timeout_and_coalescing", test_timeout_and_coalescing),
+    ]
+
+    results = []
+    for name, test_fn in tests:
+        try:
+            passed = test_fn()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"\nERROR in {name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append((name, False))
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+
+    for name, passed in results:
+        status = "PASS" if passed else "FAIL"
+        print(f"  {name}: {status}")
+
+    all_passed = all(p for _, p in results)
+    print(f"\nOverall: {'ALL TESTS PASSED' if all_passed else 'SOME TESTS FAILED'}")
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -3,10 +3,14 @@ AI Contract Reviewer — Demo Day Tool
 Upload any contract PDF and get an instant plain-English breakdown.
 """
 
+import io
+
 import streamlit as st
 from shared.document_parser import parse_uploaded_file
 from shared.contract_reviewer import ingest_contract, generate_review, ask_question
-from shared.vector_store import get_count
+from shared.vector_store import get_count, document_id
+from shared.llm_client import get_usage_by_site
+from shared.jobs import JobQueue
 
 # -- Page Config ---------------------------------------------------------------
 
@@ -379,6 +383,68 @@ if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 if "chunk_count" not in st.session_state:
     st.session_state.chunk_count = 0
+if "doc_id" not in st.session_state:
+    st.session_state.doc_id = None
+if "documents" not in st.session_state:
+    # doc_id -> {"filename", "text", "review", "chat_history", "chunk_count"}
+    st.session_state.documents = {}
+if "review_job" not in st.session_state:
+    st.session_state.review_job = None      # {"id", "upload"} of the landing-page review
+if "review_error" not in st.session_state:
+    st.session_state.review_error = None
+
+
+def open_document(doc_id):
+    """Make a previously reviewed contract the active one (re-indexes it only if it was evicted)."""
+    doc = st.session_state.documents[doc_id]
+    doc["chunk_count"] = ingest_contract(doc["text"], doc["filename"])
+    st.session_state.doc_id = doc_id
+    st.session_state.contract_text = doc["text"]
+    st.session_state.filename = doc["filename"]
+    st.session_state.review_result = doc["review"]
+    st.session_state.chat_history = doc["chat_history"]
+    st.session_state.chunk_count = doc["chunk_count"]
+
+
+# -- Background Review ---------------------------------------------------------
+
+@st.cache_resource
+def get_job_queue():
+    """One queue per server process, so reviews keep running across reruns."""
+    return JobQueue()
+
+
+def review_job(job, data, filename):
+    """Parse, index and review an upload. Runs on the job queue."""
+    upload = io.BytesIO(data)
+    upload.name = filename
+    job.report(message="Parsing document...")
+    text = parse_uploaded_file(upload, progress=lambda d, t: job.report(d, t, f"OCR: page {d} of {t}"))
+    if text.startswith("[") and text.endswith("]"):
+        return {"error": text}
+
+    job.report(message="Indexing contract for Q&A...")
+    chunks = ingest_contract(text, filename)
+
+    job.report(message="Generating AI review...")
+    review = generate_review(text, progress=lambda d, t: job.report(d, t, f"Reviewed {d} of {t} sections"))
+    if review.startswith("ERROR:"):
+        return {"error": review}
+    return {"doc_id": document_id(text), "filename": filename, "text": text,
+            "review": review, "chunk_count": chunks}
+
+
+@st.fragment(run_every=1.0)
+def show_review_progress(job_id):
+    """Poll a running review; reruns the app once it finishes."""
+    job = get_job_queue().get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    if job.progress:
+        done, total = job.progress
+        st.progress(done / total, text=job.message)
+    else:
+        st.caption(f"{job.message or 'Queued...'} {job.elapsed:.0f}s")
 
 # -- Landing Page (no contract uploaded) ---------------------------------------
 
@@ -414,23 +480,45 @@ if st.session_state.contract_text is None:
         )
 
         if uploaded_file is not None:
-            with st.spinner("Parsing document..."):
-                text = parse_uploaded_file(uploaded_file)
-
-            if text.startswith("[") and text.endswith("]"):
-                st.error(text)
+            queue = get_job_queue()
+            pending = st.session_state.review_job
+            # Only a new upload (or Retry) starts a review; reruns just poll it
+            if pending is None or pending["upload"] != uploaded_file.file_id:
+                job = queue.submit("review", review_job, uploaded_file.getvalue(), uploaded_file.name)
+                st.session_state.review_job = pending = {"id": job.id, "upload": uploaded_file.file_id}
+                st.session_state.review_error = None
+            job = queue.get(pending["id"])
+
+            if st.session_state.review_error:
+                st.error(st.session_state.review_error)
+                if st.button("Retry review"):
+                    st.session_state.review_job = None
+                    st.rerun()
+            elif job is None:
+                # Dropped from the registry; start it again
+                st.session_state.review_job = None
+                st.rerun()
+            elif not job.done:
+                show_review_progress(job.id)
+            elif job.status == "error" or "error" in job.result:
+                # Don't cache the failure: a retry or re-upload reviews the file again
+                queue.forget(job.id)
+                st.session_state.review_error = (f"Review failed: {job.error}" if job.status == "error"
+                                                 else job.result["error"])
+                st.rerun()
             else:
-                st.session_state.contract_text = text
-                st.session_state.filename = uploaded_file.name
-
-                with st.spinner("Indexing contract for Q&A..."):
-                    chunks = ingest_contract(text, uploaded_file.name)
-                    st.session_state.chunk_count = chunks
-
-                with st.spinner("Generating AI review..."):
-                    review = generate_review(text)
-                    st.session_state.review_result = review
-
+                result = job.result
+                # Already reviewed this session — keep its chat history
+                if result["doc_id"] not in st.session_state.documents:
+                    st.session_state.documents[result["doc_id"]] = {
+                        "filename": result["filename"],
+                        "text": result["text"],
+                        "review": result["review"],
+                        "chat_history": [],
+                        "chunk_count": result["chunk_count"],
+                    }
+
+                open_document(result["doc_id"])
                 st.rerun()
 
     st.markdown("""
@@ -452,13 +540,39 @@ else:
         st.markdown(f"**File:** {st.session_state.filename}")
         st.markdown(f"**Characters:** {len(st.session_state.contract_text):,}")
         st.markdown(f"**Chunks indexed:** {st.session_state.chunk_count}")
+        if len(st.session_state.documents) > 1:
+            doc_ids = list(st.session_state.documents)
+            selected = st.selectbox(
+                "Switch contract",
+                doc_ids,
+                index=doc_ids.index(st.session_state.doc_id),
+                format_func=lambda d: st.session_state.documents[d]["filename"],
+            )
+            if selected != st.session_state.doc_id:
+                open_document(selected)
+                st.rerun()
+        usage = get_usage_by_site()
+        if usage:
+            with st.expander("Token usage"):
+                st.dataframe(
+                    [{"site": site, "calls": u["calls"], "in": u["input_tokens"], "max in": u["max_input_tokens"],
+                      "out": u["output_tokens"], "tok/s": u["tokens_per_s"]} for site, u in usage.items()],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+                st.caption("Calls by prompt size (input tokens)")
+                st.bar_chart({site: u["prompt_hist"] for site, u in usage.items()})
+                st.caption("Calls by output tokens/s")
+                st.bar_chart({site: u["tokens_per_s_hist"] for site, u in usage.items()})
         st.markdown("---")
         if st.button("New Contract", use_container_width=True):
+            # Reviewed contracts stay indexed and can be switched back to
             st.session_state.contract_text = None
             st.session_state.review_result = None
             st.session_state.filename = None
             st.session_state.chat_history = []
             st.session_state.chunk_count = 0
+            st.session_state.doc_id = None
             st.rerun()
 
     # Top stats strip
@@ -619,7 +733,7 @@ else:
         st.markdown(f'<div class="chat-bubble chat-user">{prompt}</div>', unsafe_allow_html=True)
 
         with st.spinner("Searching contract..."):
-            answer = ask_question(prompt)
+            answer = ask_question(prompt, st.session_state.doc_id)
 
         st.markdown(f'<div class="chat-bubble chat-assistant">{answer}</div>', unsafe_allow_html=True)
         st.session_state.chat_history.append({"role": "assistant", "content": answer})
@@ -3,10 +3,16 @@ Contract Reviewer RAG pipeline.
 Handles: ingest (chunk + embed) → review (structured summary) → Q&A (RAG chat).
 """
 
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from .llm_client import call_llm
-from .vector_store import reset_collection, add_documents, query
+from .vector_store import document_id, has_document, add_document, get_count, query
 
 # ── Chunking ──────────────────────────────────────────────────────────────────
 
@@ -19,20 +25,16 @@ _splitter = RecursiveCharacterTextSplitter(
 
 def ingest_contract(text: str, filename: str = "contract") -> int:
     """Chunk the contract text and embed into the session vector store.
-    Resets any previously stored contract first.
-    Returns the number of chunks created."""
-    reset_collection()
-    chunks = _splitter.split_text(text)
-
-    texts = []
-    metadatas = []
-    ids = []
-    for i, chunk in enumerate(chunks):
-        texts.append(chunk)
-        metadatas.append({"source": filename, "chunk_index": i})
-        ids.append(f"{filename}_{i:04d}")
+    Contracts are keyed by content hash (see document_id), so other
+    contracts stay indexed and re-ingesting the same text is a no-op.
+    Returns the number of chunks indexed for this contract."""
+    doc_id = document_id(text)
+    if has_document(doc_id):
+        return get_count(doc_id)
 
-    return add_documents(texts, metadatas, ids)
+    chunks = _splitter.split_text(text)
+    metadatas = [{"source": filename, "chunk_index": i} for i in range(len(chunks))]
+    return add_document(doc_id, chunks, metadatas, source=filename)
 
 
 # ── Review Summary ────────────────────────────────────────────────────────────
@@ -72,22 +74,188 @@ List all financial terms: total amount, payment schedule, late fees, penalties,
 CRITICAL: Base your analysis ONLY on the contract text provided. Do not make up terms that aren't in the document. If a section has no relevant information, say so clearly."""
 
 
-def generate_review(contract_text: str) -> str:
-    """Generate a structured review of the full contract text."""
-    # Truncate very long contracts to fit in context
-    max_chars = 30000
-    if len(contract_text) > max_chars:
-        text_to_review = contract_text[:max_chars] + f"\n\n[...truncated at {max_chars} characters. {len(contract_text) - max_chars} characters omitted.]"
-    else:
-        text_to_review = contract_text
+REVIEW_MAX_CHARS = 30000          # contracts up to this size are reviewed in one call
+SECTION_MAX_CHARS = 12000         # map step: target size of each section batch
+MERGE_MAX_CHARS = 40000           # reduce step: partial reviews merged per call
+REVIEW_MAX_WORKERS = 6            # concurrent section calls
+
+SECTION_SYSTEM_PROMPT = """You are an expert contract reviewer. You will see ONE SECTION of a longer contract. Extract what this section contributes to a full review, using these exact headings:
+
+## Plain-English Summary
+1-2 sentences on what this section does.
+
+## Key Terms
+Parties, dates, contract type or values stated in this section.
+
+## Risk Flags
+Concerning clauses in this section (auto-renewal, penalties, indemnification, non-compete, unilateral amendment, jury waiver, unlimited liability, assignment restrictions) and why each is a risk.
+
+## Important Deadlines
+Dates, notice periods, renewal windows and payment schedules in this section.
+
+## Money Terms
+Amounts, payment schedules, fees, penalties, interest, deposits, escrow in this section.
+
+Quote section or clause numbers where visible. Write "None in this section." under any heading with nothing to report. Base everything ONLY on the text provided."""
+
+MERGE_SYSTEM_PROMPT = REVIEW_SYSTEM_PROMPT + """
+
+You are given section-by-section partial reviews of ONE contract, in document order, instead of the contract itself. Merge them into a single review with the sections above: combine duplicates, keep every distinct risk flag, deadline and money term (noting the section it came from), and resolve the summary and key terms for the contract as a whole."""
+
+# Heading lines: ARTICLE IV, Section 5.2, 12. INDEMNIFICATION, EXHIBIT B, SCHEDULE 1, ALL-CAPS TITLES
+_HEADING = re.compile(
+    r"^[ \t]*(?:"
+    r"(?:ARTICLE|Article|SECTION|Section|EXHIBIT|Exhibit|SCHEDULE|Schedule|APPENDIX|Appendix|ANNEX|Annex)\s+[\w.\-]+"
+    r"|\d+(?:\.\d+)*\.?\s+[A-Z][A-Z &,/\-]{2,}"
+    r"|[A-Z][A-Z &,/\-]{4,}"
+    r")[^\n]*$",
+    re.MULTILINE,
+)
+
+_section_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=SECTION_MAX_CHARS,
+    chunk_overlap=0,
+    separators=["\n\n", "\n", ". ", " ", ""],
+)
+
+# sha256(prompt + text) -> partial review, shared by all sessions
+_section_cache = OrderedDict()
+_SECTION_CACHE_SIZE = 1024
+_cache_lock = threading.Lock()
+
+
+def split_sections(text: str, max_chars: int = SECTION_MAX_CHARS) -> list[tuple[str, str]]:
+    """Split a contract at its headings and pack neighbours into batches of at most max_chars.
+    Oversized sections are split further at paragraph boundaries.
+    Returns [(title, text)] in document order."""
+    starts = [m.start() for m in _HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(text))
+
+    sections = []
+    for begin, end in zip(starts, starts[1:]):
+        body = text[begin:end]
+        if not body.strip():
+            continue
+        title = body.strip().split("\n", 1)[0][:80]
+        if len(body) <= max_chars:
+            sections.append((title, body))
+        else:
+            parts = _section_splitter.split_text(body)
+            sections.extend((f"{title} (part {i}/{len(parts)})", part) for i, part in enumerate(parts, 1))
+
+    batches = []
+    for title, body in sections:
+        if batches and len(batches[-1][1]) + len(body) <= max_chars:
+            first, joined = batches[-1]
+            batches[-1] = (first if " … " in first else f"{first} … {title}", joined + body)
+        else:
+            batches.append((title, body))
+    return batches
+
+
+def _cached_call(system_prompt: str, user_message: str, max_tokens: int, site: str) -> str:
+    """call_llm() memoized by content hash. Errors are not cached."""
+    key = hashlib.sha256(f"{system_prompt}\x00{user_message}\x00{max_tokens}".encode("utf-8", errors="replace")).hexdigest()
+    with _cache_lock:
+        if key in _section_cache:
+            _section_cache.move_to_end(key)
+            return _section_cache[key]
+
+    result = call_llm(system_prompt, user_message, max_tokens=max_tokens, site=site)
+
+    if not result.startswith("ERROR:"):
+        with _cache_lock:
+            _section_cache[key] = result
+            while len(_section_cache) > _SECTION_CACHE_SIZE:
+                _section_cache.popitem(last=False)
+    return result
+
+
+def _review_section(title: str, body: str) -> str:
+    user_message = f"""Review this section of a longer contract:
+
+---SECTION: {title}---
+{body}
+---END SECTION---"""
+    return _cached_call(SECTION_SYSTEM_PROMPT, user_message, max_tokens=1500, site="review_section")
+
+
+def _merge_reviews(partials: list[tuple[str, str]]) -> str:
+    parts = [f"### Partial review — {title}\n{review}" for title, review in partials]
+    user_message = "Merge these partial reviews of one contract into a single structured review:\n\n" + "\n\n---\n\n".join(parts)
+    return _cached_call(MERGE_SYSTEM_PROMPT, user_message, max_tokens=4096, site="review_merge")
+
+
+def _map_reduce_review(contract_text: str, progress=None) -> str:
+    sections = split_sections(contract_text)
+    total = len(sections)
+    done = 0
+    partials = [None] * total
+
+    # Map: every section concurrently, at most REVIEW_MAX_WORKERS in flight
+    with ThreadPoolExecutor(max_workers=REVIEW_MAX_WORKERS) as pool:
+        futures = {pool.submit(_review_section, title, body): i for i, (title, body) in enumerate(sections)}
+        for future in as_completed(futures):
+            partials[futures[future]] = future.result()
+            done += 1
+            if progress:
+                progress(done, total)
+
+    ok = [(title, review) for (title, _), review in zip(sections, partials) if not review.startswith("ERROR:")]
+    if not ok:
+        return partials[0]
+    failed = [title for (title, _), review in zip(sections, partials) if review.startswith("ERROR:")]
+
+    # Reduce: merge in batches until the partials fit one call. Partials of a
+    # batch whose merge fails are kept as they are rather than dropped.
+    unmerged = []
+    while sum(len(r) for _, r in ok) > MERGE_MAX_CHARS and len(ok) > 1:
+        groups, size = [[]], 0
+        for item in ok:
+            if groups[-1] and size + len(item[1]) > MERGE_MAX_CHARS:
+                groups.append([])
+                size = 0
+            groups[-1].append(item)
+            size += len(item[1])
+        if len(groups) == 1:
+            break
+        with ThreadPoolExecutor(max_workers=REVIEW_MAX_WORKERS) as pool:
+            merged = list(pool.map(_merge_reviews, groups))
+        ok = []
+        for group, review in zip(groups, merged):
+            if review.startswith("ERROR:"):
+                unmerged.extend(group)
+            else:
+                ok.append((f"{group[0][0]} … {group[-1][0]}", review))
+
+    review = _merge_reviews(ok) if ok else ""
+    if review.startswith("ERROR:"):
+        return review
+    if unmerged:
+        review += "\n\n## Sections Not Merged\n\n" + "\n\n".join(f"### {title}\n{r}" for title, r in unmerged)
+        review += f"\n\n*Note: {len(unmerged)} partial reviews could not be merged and are listed as written.*"
+    if failed:
+        review += f"\n\n*Note: {len(failed)} of {total} sections could not be reviewed: {', '.join(failed)}.*"
+    return review.strip()
+
+
+def generate_review(contract_text: str, progress=None) -> str:
+    """Generate a structured review of the full contract text.
+    Contracts longer than REVIEW_MAX_CHARS are reviewed section by section in
+    parallel and the partial reviews merged (map-reduce), so nothing is truncated.
+    progress(done, total) is called as sections finish."""
+    if len(contract_text) > REVIEW_MAX_CHARS:
+        return _map_reduce_review(contract_text, progress)
 
     user_message = f"""Please review the following contract and provide a structured analysis:
 
 ---CONTRACT TEXT---
-{text_to_review}
+{contract_text}
 ---END CONTRACT---"""
 
-    return call_llm(REVIEW_SYSTEM_PROMPT, user_message, max_tokens=4096)
+    return call_llm(REVIEW_SYSTEM_PROMPT, user_message, max_tokens=4096, site="review")
 
 
 # ── Q&A Chat ──────────────────────────────────────────────────────────────────
@@ -102,9 +270,10 @@ Rules:
 5. If a question can't be fully answered from the excerpts, explain what's missing and suggest what to look for."""
 
 
-def ask_question(question: str) -> str:
-    """RAG-powered Q&A: retrieve relevant chunks and answer the question."""
-    chunks = query(question, n_results=6)
+def ask_question(question: str, doc_id: str | None = None) -> str:
+    """RAG-powered Q&A: retrieve relevant chunks and answer the question.
+    Pass doc_id to search a single contract; otherwise all indexed contracts are searched."""
+    chunks = query(question, n_results=6, doc_ids=[doc_id] if doc_id else None)
 
     if not chunks:
         return "No contract has been uploaded yet. Please upload a contract first."
@@ -124,4 +293,4 @@ RELEVANT CONTRACT EXCERPTS:
 
 Please answer the question based on these excerpts from the uploaded contract."""
 
-    return call_llm(QA_SYSTEM_PROMPT, user_message, max_tokens=2048)
+    return call_llm(QA_SYSTEM_PROMPT, user_message, max_tokens=2048, site="qa")
@@ -5,42 +5,44 @@ Handles PDF, DOCX, images (OCR), and plain text files.
 
 import io
 
+from .ocr import ocr_pdf
 
-def parse_uploaded_file(uploaded_file) -> str:
-    """Parse an uploaded file and return its text content."""
+
+def iter_pdf_pages(source):
+    """Yield (page_number, char_offset, text) for each PDF page, one page at a time.
+    Offsets are positions in the pages joined with newlines."""
+    from pypdf import PdfReader
+    offset = 0
+    for number, page in enumerate(PdfReader(source).pages, 1):
+        text = page.extract_text() or ""
+        yield number, offset, text
+        offset += len(text) + 1
+
+
+def parse_uploaded_file(uploaded_file, progress=None, max_pages=None) -> str:
+    """Parse an uploaded file and return its text content.
+    Scanned PDFs are OCR'd page-parallel; progress(done, total) reports pages."""
     name = uploaded_file.name.lower()
-    raw = uploaded_file.getvalue()
 
     # --- PDF ---
     if name.endswith(".pdf"):
         try:
-            from pypdf import PdfReader
-            reader = PdfReader(io.BytesIO(raw))
-            pages = [page.extract_text() or "" for page in reader.pages]
-            text = "\n".join(pages).strip()
+            uploaded_file.seek(0)
+            text = "\n".join(page_text for _, _, page_text in iter_pdf_pages(uploaded_file)).strip()
             if text:
                 return text
         except Exception:
             pass
 
-        # pypdf returned nothing — try OCR
-        try:
-            from PIL import Image
-            import pytesseract
-            try:
-                from pdf2image import convert_from_bytes
-                images = convert_from_bytes(raw, first_page=1, last_page=20)
-                ocr_parts = [pytesseract.image_to_string(img) for img in images]
-                text = "\n".join(ocr_parts).strip()
-                if text:
-                    return text
-            except ImportError:
-                pass
-        except ImportError:
-            pass
+        # pypdf returned nothing — OCR the rendered pages in parallel
+        text = ocr_pdf(uploaded_file.getvalue(), max_pages=max_pages, progress=progress)
+        if text:
+            return text
 
         return "[PDF text extraction returned empty. This may be a scanned document — try exporting pages as images and uploading those.]"
 
+    raw = uploaded_file.getvalue()
+
     # --- DOCX ---
     if name.endswith(".docx"):
         try:
@@ -0,0 +1,93 @@
+"""
+Background jobs for slow review work.
+
+Parsing, indexing and reviewing a contract runs on a thread pool so the
+Streamlit script stays responsive. The queue lives in st.cache_resource,
+so a job keeps running across reruns; sessions only hold the job id.
+Jobs are keyed by a hash of their kind and inputs — submitting the same
+upload again returns the existing job instead of starting another review.
+
+Job functions get the Job first and call job.report() with progress; they
+have no Streamlit context and must not touch st.session_state.
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = 2
+MAX_FINISHED_JOBS = 50
+
+
+class Job:
+    def __init__(self, job_id: str, kind: str):
+        self.id = job_id
+        self.kind = kind
+        self.status = "queued"      # queued → running → done | error
+        self.result = None
+        self.error = None
+        self.progress = None        # (done, total)
+        self.message = ""
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error")
+
+    @property
+    def elapsed(self) -> float:
+        return ((self.finished or time.time()) - self.started) if self.started else 0.0
+
+    def report(self, done=None, total=None, message=None):
+        """Publish progress; a call without done/total clears the progress bar (new phase)."""
+        self.progress = (done, total) if done is not None and total else None
+        if message is not None:
+            self.message = message
+
+
+class JobQueue:
+    """Thread-pool executor with a job registry deduplicated by input hash."""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="review-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn, data: bytes, *args) -> Job:
+        """Run fn(job, data, *args) unless a job for the same kind and data exists (failed jobs are replaced)."""
+        job_id = hashlib.sha256(kind.encode() + b"\x00" + data).hexdigest()[:24]
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing.status != "error":
+                return existing
+            job = self._jobs[job_id] = Job(job_id, kind)
+            finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished)
+            for old in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self._jobs[old.id]
+        self._executor.submit(self._run, job, fn, data, args)
+        return job
+
+    def _run(self, job, fn, data, args):
+        job.status = "running"
+        job.started = time.time()
+        try:
+            job.result = fn(job, data, *args)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def forget(self, job_id: str):
+        """Remove a finished job so the same upload runs again."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.done:
+                del self._jobs[job_id]
@@ -4,6 +4,9 @@ Uses NVIDIA NIM API with Kimi K2 model (OpenAI-compatible endpoint).
 """
 
 import os
+import threading
+import time
+from bisect import bisect_left
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -17,7 +20,7 @@ for _up in [
         load_dotenv(dotenv_path=_up)
         break
 
-NVIDIA_BASE_URL = "https://integrate.api.nvidia.com/v1"
+NVIDIA_BASE_URL = os.environ.get("NVIDIA_BASE_URL", "https://integrate.api.nvidia.com/v1")
 MODEL = "moonshotai/kimi-k2-instruct"
 
 _client = OpenAI(
@@ -25,10 +28,19 @@ _client = OpenAI(
     api_key=os.environ.get("NVIDIA_API_KEY"),
 )
 
+# Token usage per call site ("review", "review_section", "review_merge", "qa").
+# Histogram buckets are upper bounds; the last bucket is open-ended.
+PROMPT_TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+TOKENS_PER_S_BUCKETS = (5, 10, 20, 40, 80, 160)
+_usage = {}
+_usage_lock = threading.Lock()
 
-def call_llm(system_prompt: str, user_message: str, max_tokens: int = 4096) -> str:
-    """Send a message to the LLM and return the response text."""
+
+def call_llm(system_prompt: str, user_message: str, max_tokens: int = 4096, site: str = "other") -> str:
+    """Send a message to the LLM and return the response text.
+    Token usage is counted under `site`; see get_usage_by_site()."""
     try:
+        start = time.perf_counter()
         response = _client.chat.completions.create(
             model=MODEL,
             max_tokens=max_tokens,
@@ -37,7 +49,15 @@ def call_llm(system_prompt: str, user_message: str, max_tokens: int = 4096) -> s
                 {"role": "user", "content": user_message},
             ],
         )
-        return response.choices[0].message.content
+        text = response.choices[0].message.content
+        if response.usage:
+            input_tokens = response.usage.prompt_tokens or 0
+            output_tokens = response.usage.completion_tokens or 0
+        else:
+            input_tokens = (len(system_prompt) + len(user_message)) // 4
+            output_tokens = len(text or "") // 4
+        _record_usage(site, input_tokens, output_tokens, time.perf_counter() - start)
+        return text
 
     except Exception as e:
         error_str = str(e)
@@ -47,3 +67,46 @@ def call_llm(system_prompt: str, user_message: str, max_tokens: int = 4096) -> s
             return "ERROR: Rate limit reached. Wait a moment and try again."
         else:
             return f"ERROR: Unexpected error calling NVIDIA NIM API — {error_str}"
+
+
+def _bucket_labels(edges: tuple) -> list[str]:
+    return [f"≤{e:,}" for e in edges] + [f">{edges[-1]:,}"]
+
+
+def _record_usage(site: str, input_tokens: int, output_tokens: int, seconds: float):
+    tokens_per_s = output_tokens / seconds if seconds > 0 else 0.0
+    with _usage_lock:
+        stats = _usage.get(site)
+        if stats is None:
+            stats = _usage[site] = {"calls": 0, "input_tokens": 0, "output_tokens": 0,
+                                    "max_input_tokens": 0, "seconds": 0.0,
+                                    "prompt_hist": [0] * (len(PROMPT_TOKEN_BUCKETS) + 1),
+                                    "tokens_per_s_hist": [0] * (len(TOKENS_PER_S_BUCKETS) + 1)}
+        stats["calls"] += 1
+        stats["input_tokens"] += input_tokens
+        stats["output_tokens"] += output_tokens
+        stats["max_input_tokens"] = max(stats["max_input_tokens"], input_tokens)
+        stats["seconds"] += seconds
+        stats["prompt_hist"][bisect_left(PROMPT_TOKEN_BUCKETS, input_tokens)] += 1
+        stats["tokens_per_s_hist"][bisect_left(TOKENS_PER_S_BUCKETS, tokens_per_s)] += 1
+
+
+def get_usage_by_site() -> dict:
+    """{site: {calls, input_tokens, output_tokens, avg_input_tokens, max_input_tokens, tokens_per_s,
+    prompt_hist, tokens_per_s_hist}}; the histograms map bucket labels ("≤2,000") to call counts."""
+    prompt_labels = _bucket_labels(PROMPT_TOKEN_BUCKETS)
+    rate_labels = _bucket_labels(TOKENS_PER_S_BUCKETS)
+    with _usage_lock:
+        return {
+            site: {
+                "calls": u["calls"],
+                "input_tokens": u["input_tokens"],
+                "output_tokens": u["output_tokens"],
+                "avg_input_tokens": u["input_tokens"] // u["calls"],
+                "max_input_tokens": u["max_input_tokens"],
+                "tokens_per_s": round(u["output_tokens"] / u["seconds"], 1) if u["seconds"] else 0.0,
+                "prompt_hist": dict(zip(prompt_labels, u["prompt_hist"])),
+                "tokens_per_s_hist": dict(zip(rate_labels, u["tokens_per_s_hist"])),
+            }
+            for site, u in _usage.items()
+        }
@@ -2,17 +2,37 @@
 In-memory vector store for Contract Reviewer.
 Uses ChromaDB with built-in ONNX all-MiniLM-L6-v2 embeddings.
 Documents exist only for the session — nothing persists to disk.
+
+Many contracts share one collection. Each chunk carries a `doc_id` (content
+hash of the contract text), so re-indexing a known document is a no-op and
+queries can be scoped to one or more documents. When the estimated index
+size exceeds MEMORY_BUDGET_BYTES, the least recently used documents are
+evicted whole.
 """
 
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
 import chromadb
 from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
 
 COLLECTION_NAME = "user_contracts"
 
+# Index memory budget (text + embeddings), evicted LRU by whole document
+MEMORY_BUDGET_BYTES = int(os.environ.get("RAG_MEMORY_BUDGET_MB", "256")) * 1024 * 1024
+EMBEDDING_DIM = 384                 # all-MiniLM-L6-v2
+_PER_CHUNK_OVERHEAD = 512           # HNSW links, ids, metadata
+
 # In-memory client — all data is lost when the process ends
 _client = chromadb.Client()
 _embedding_fn = DefaultEmbeddingFunction()
 
+# doc_id -> {"source", "chunks", "bytes"}, least recently used first
+_documents = OrderedDict()
+_lock = threading.RLock()
+
 
 def get_collection() -> chromadb.Collection:
     """Return the contracts collection, creating it if needed."""
@@ -24,12 +44,84 @@ def get_collection() -> chromadb.Collection:
 
 
 def reset_collection():
-    """Delete and recreate the collection (used when uploading a new contract)."""
-    try:
-        _client.delete_collection(COLLECTION_NAME)
-    except Exception:
-        pass
-    return get_collection()
+    """Delete and recreate the collection, dropping every indexed document."""
+    with _lock:
+        try:
+            _client.delete_collection(COLLECTION_NAME)
+        except Exception:
+            pass
+        _documents.clear()
+        return get_collection()
+
+
+def document_id(text: str) -> str:
+    """Content hash used as a document's id — identical text, identical id."""
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:16]
+
+
+def _estimate_bytes(texts: list[str]) -> int:
+    return sum(len(t.encode("utf-8", errors="replace")) for t in texts) + len(texts) * (EMBEDDING_DIM * 4 + _PER_CHUNK_OVERHEAD)
+
+
+def has_document(doc_id: str) -> bool:
+    """True if the document is indexed; marks it as recently used."""
+    with _lock:
+        if doc_id in _documents:
+            _documents.move_to_end(doc_id)
+            return True
+        return False
+
+
+def list_documents() -> list[dict]:
+    """Indexed documents, most recently used first."""
+    with _lock:
+        return [{"doc_id": d, **info} for d, info in reversed(_documents.items())]
+
+
+def delete_document(doc_id: str) -> int:
+    """Remove all chunks of a document. Returns number of chunks removed."""
+    with _lock:
+        info = _documents.pop(doc_id, None)
+        if info is None:
+            return 0
+        get_collection().delete(where={"doc_id": doc_id})
+        return info["chunks"]
+
+
+def _evict(budget: int, keep: str | None = None) -> list[str]:
+    """Drop least recently used documents until the index fits the budget."""
+    evicted = []
+    total = sum(info["bytes"] for info in _documents.values())
+    for doc_id in list(_documents):
+        if total <= budget:
+            break
+        if doc_id == keep:
+            continue
+        total -= _documents[doc_id]["bytes"]
+        delete_document(doc_id)
+        evicted.append(doc_id)
+    return evicted
+
+
+def add_document(doc_id: str, texts: list[str], metadatas: list[dict], source: str = "contract") -> int:
+    """
+    Embed and store one document's chunks under `doc_id`.
+
+    No-op if the document is already indexed. Evicts least recently used
+    documents if the index would exceed MEMORY_BUDGET_BYTES.
+
+    Returns number of chunks indexed for the document.
+    """
+    with _lock:
+        if has_document(doc_id):
+            return _documents[doc_id]["chunks"]
+        if texts:
+            ids = [f"{doc_id}_{i:04d}" for i in range(len(texts))]
+            metadatas = [{**m, "doc_id": doc_id} for m in metadatas]
+            get_collection().upsert(documents=texts, metadatas=metadatas, ids=ids)
+        _documents[doc_id] = {"source": source, "chunks": len(texts), "bytes": _estimate_bytes(texts)}
+        _evict(MEMORY_BUDGET_BYTES, keep=doc_id)
+        return len(texts)
 
 
 def add_documents(texts: list[str], metadatas: list[dict], ids: list[str]) -> int:
@@ -41,18 +133,40 @@ def add_documents(texts: list[str], metadatas: list[dict], ids: list[str]) -> in
     return len(texts)
 
 
-def query(query_text: str, n_results: int = 5) -> list[dict]:
-    """Semantic search over stored contract chunks."""
-    collection = get_collection()
-    if collection.count() == 0:
-        return []
-
-    actual_n = min(n_results, collection.count())
-    results = collection.query(
-        query_texts=[query_text],
-        n_results=actual_n,
-        include=["documents", "metadatas", "distances"],
-    )
+def query(query_text: str, n_results: int = 5, doc_ids: list[str] | None = None, where: dict | None = None) -> list[dict]:
+    """
+    Semantic search over stored contract chunks.
+
+    Args:
+        query_text: The question or search text.
+        n_results: Maximum chunks to return.
+        doc_ids: Restrict to these documents (default: all indexed).
+        where: Extra Chroma metadata filter, e.g. {"source": "lease.pdf"}.
+    """
+    with _lock:
+        collection = get_collection()
+        if doc_ids is not None:
+            doc_ids = [d for d in doc_ids if has_document(d)]
+            if not doc_ids:
+                return []
+            available = sum(_documents[d]["chunks"] for d in doc_ids)
+        else:
+            available = collection.count()
+        if available == 0:
+            return []
+
+        filters = []
+        if doc_ids is not None:
+            filters.append({"doc_id": doc_ids[0]} if len(doc_ids) == 1 else {"doc_id": {"$in": doc_ids}})
+        if where:
+            filters.append(where)
+
+        results = collection.query(
+            query_texts=[query_text],
+            n_results=min(n_results, available),
+            where=(filters[0] if len(filters) == 1 else {"$and": filters}) if filters else None,
+            include=["documents", "metadatas", "distances"],
+        )
 
     docs = results["documents"][0]
     metas = results["metadatas"][0]
@@ -68,9 +182,13 @@ def query(query_text: str, n_results: int = 5) -> list[dict]:
     return output
 
 
-def get_count() -> int:
-    """Return number of chunks in the collection."""
+def get_count(doc_id: str | None = None) -> int:
+    """Return number of chunks in the collection (or in one document)."""
     try:
+        if doc_id is not None:
+            with _lock:
+                info = _documents.get(doc_id)
+                return info["chunks"] if info else 0
         return get_collection().count()
     except Exception:
         return 0